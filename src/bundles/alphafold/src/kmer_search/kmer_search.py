@@ -9,10 +9,11 @@ def sequence_search(sequences, database_path, min_kmer_matches = 15, nthreads =
     '''
     results = []
     kmer_index = KmerSequenceIndex(database_path)
-    for sequence in sequences:
-        seq_num, num_kmer_matches = kmer_index.search(sequence, nthreads = nthreads)
+    matches = kmer_index.search_batch(sequences, nthreads = nthreads)
+    for seq_num, num_kmer_matches in matches:
         if num_kmer_matches < min_kmer_matches:
             results.append(None)
+            continue
         title, db_sequence = kmer_index.title_and_sequence(seq_num)
         uid, uname = uniprot_id_and_name(title)
         results.append((uid, uname, db_sequence, num_kmer_matches))
@@ -31,42 +32,66 @@ class KmerSequenceIndex:
         self.k = k
         self.counts = None	# Array containing number of sequences for each k-mer
         self.sizes = None	# Array containing number of bytes for each FASTA file entry.
+        self.kmer_seq_indices = None	# Array or memory map of sequence indices for each k-mer
 
     def search(self, sequence, nthreads = 1):
         '''
         Return the database sequence number which has the most k-mers matching
         the specified sequence.  Also return the number of matching k-mers.
         '''
+        return self.search_batch([sequence], nthreads = nthreads)[0]
+
+    def search_batch(self, sequences, nthreads = 1):
+        '''
+        Search for several sequences returning a list of (database sequence number,
+        number of matching k-mers) for each one.  The sequence indices for a k-mer
+        that occurs in more than one of the sequences are only read once, and the
+        matches for different sequences are counted in parallel threads.
+        '''
         if self.counts is None:
             self.load_index()
 
-        # List the k-mers in the given sequence.
-        kmers = sequence_kmers(sequence, self.k)
+        # List the k-mers in each sequence and the combined set of k-mers.
+        seq_kmers = [sequence_kmers(sequence, self.k) for sequence in sequences]
+        from numpy import concatenate, unique, searchsorted, empty, uint32
+        all_kmers = unique(concatenate(seq_kmers)) if seq_kmers else empty((0,), uint32)
 
         # Find the database sequences that have these k-mers.
-        seqi_list = self.kmer_sequences(kmers, nthreads=nthreads)
+        seqi_list = self.kmer_sequences(all_kmers, nthreads=nthreads)
 
         # Find the database sequence with the most matching k-mers.
-        # This is slow because it is doing random memory writes in a counts
-        # array that is too large to fit in CPU cache.
-        from numpy import zeros, int32
-        counts = zeros((self.num_sequences,), int32)
-        for seqi in seqi_list:
-            counts[seqi] += 1
-        database_sequence_number = counts.argmax()
-        num_kmer_matches = counts[database_sequence_number]
+        num_sequences = self.num_sequences
+        def best_sequence(kmers):
+            hits = [seqi_list[i] for i in searchsorted(all_kmers, kmers)]
+            return best_match(concatenate(hits) if hits else empty((0,), uint32), num_sequences)
+
+        if nthreads > 1 and len(seq_kmers) > 1:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers = nthreads) as e:
+                results = list(e.map(best_sequence, seq_kmers))
+        else:
+            results = [best_sequence(kmers) for kmers in seq_kmers]
 
-        return database_sequence_number, num_kmer_matches
+        return results
 
     def kmer_sequences(self, kmer_list, nthreads = 1):
         '''
         For each k-mer return an array of indices of sequences that contain that k-mer.
         '''
-        if self.indices_in_memory:
-            seqi_list = []
-            for kmer in kmer_list:
-                o,c = self.kmer_sequence_offsets[kmer], self.counts[kmer]
-                seqi_list.append(self.kmer_seq_indices[o:o+c])
+        if self.kmer_seq_indices is not None:
+            indices = self.kmer_seq_indices
+            offsets, counts = self.kmer_sequence_offsets[kmer_list], self.counts[kmer_list]
+            seqi_list = [indices[o:o+c] for o,c in zip(offsets, counts)]
+            if not self.indices_in_memory and nthreads > 1 and len(seqi_list) > 1:
+                # Page in the memory mapped index using multiple threads.
+                from math import ceil
+                n = int(ceil(len(seqi_list) / nthreads))
+                batches = [seqi_list[i:i+n] for i in range(0, len(seqi_list), n)]
+                def copy_arrays(arrays):
+                    return [a.copy() for a in arrays]
+                from concurrent.futures import ThreadPoolExecutor
+                with ThreadPoolExecutor(max_workers = nthreads) as e:
+                    seqi_list = sum(e.map(copy_arrays, batches), [])
             return seqi_list
 
         uint_size = 4
@@ -75,8 +100,8 @@ class KmerSequenceIndex:
             bdata = []
             for kmer in kmer_list:
                 o,c = self.kmer_sequence_offsets[kmer], self.counts[kmer]
-                f.seek(uint_size * offset)
-                bdata.append(f.read(uint_size * count))
+                f.seek(uint_size * int(o))
+                bdata.append(f.read(uint_size * int(c)))
         else:
             # Do a multi-threaded read from the kmer sequence file.
             seqi_path = self.file_paths()[3]
@@ -101,7 +126,12 @@ class KmerSequenceIndex:
     def file_paths(self):
         return index_file_paths(self._sequences_path)
 
-    def load_index(self, index_in_memory = False):
+    def load_index(self, index_in_memory = False, memory_map = True):
+        '''
+        Read the k-mer counts and FASTA entry sizes.  The sequence indices for each
+        k-mer are read into memory, memory mapped so only the parts used by searches
+        are read, or if neither then read from the file for each search.
+        '''
         self.indices_in_memory = index_in_memory
         size_path, sizes_path, counts_path, seqs_path = self.file_paths()
         from numpy import fromfile, uint32, uint16
@@ -109,6 +139,10 @@ class KmerSequenceIndex:
         self.sizes = fromfile(sizes_path, dtype=uint16)
         if index_in_memory:
             self.kmer_seq_indices = fromfile(seqs_path, dtype=uint32)
+        elif memory_map:
+            # Use an ndarray view since slicing a memmap object is slow.
+            from numpy import memmap, ndarray
+            self.kmer_seq_indices = memmap(seqs_path, dtype=uint32, mode='r').view(ndarray)
         with open(size_path, 'r') as fs:
             import json
             s = json.load(fs)
@@ -173,7 +207,7 @@ def sequence_kmers(sequence, k, unique = True, kmer_range = None):
 
     # Compute indices with array operations for speed.
     from numpy import zeros, uint32
-    kmers = zeros((len(sequence)-k+1,), uint32)
+    kmers = zeros((max(0, len(sequence)-k+1),), uint32)
     m = len(kmers)
     naa = len(amino_acid_characters)
     for i in range(k):
@@ -193,6 +227,44 @@ def sequence_kmers(sequence, k, unique = True, kmer_range = None):
 
     return kmers
 
+def best_match(seq_indices, num_sequences, partition_bits = 18):
+    '''
+    Return the sequence index that occurs most often in an array of sequence indices
+    and how many times it occurs.  For ties the lowest sequence index is returned.
+    Counting in an array with an entry for every database sequence does random memory
+    writes in an array too large to fit in CPU cache, so if there are many more database
+    sequences than indices, the indices are grouped into partitions of 2**partition_bits
+    sequences that are counted separately with a small counts array.
+    '''
+    if len(seq_indices) == 0:
+        return 0, 0
+
+    from numpy import bincount
+    psize = 1 << partition_bits
+    if num_sequences <= psize or num_sequences <= 4*len(seq_indices):
+        counts = bincount(seq_indices)
+        seq_num = counts.argmax()
+        return seq_num, counts[seq_num]
+
+    # Group indices by partition.  A stable sort of 16-bit keys is a radix sort.
+    from numpy import uint16, searchsorted, arange
+    partition = (seq_indices >> partition_bits).astype(uint16)
+    order = partition.argsort(kind = 'stable')
+    seq_indices, partition = seq_indices[order], partition[order]
+    nparts = int(partition[-1]) + 1
+    bounds = searchsorted(partition, arange(nparts+1))
+
+    best_seq, best_count = 0, 0
+    for p in range(nparts):
+        start, end = bounds[p], bounds[p+1]
+        if end - start <= best_count:
+            continue
+        counts = bincount(seq_indices[start:end] - p*psize)
+        i = counts.argmax()
+        if counts[i] > best_count:
+            best_seq, best_count = p*psize + i, counts[i]
+    return best_seq, best_count
+
 ski_func = None
 ski_indices = None
 ski_ind_p = None
@@ -448,14 +520,74 @@ def test_search(seqs_path):
         print (s, matches)
     '''
 
+def write_random_sequences(seqs_path, num_sequences, min_length = 50, max_length = 500, seed = 0):
+    '''Write a FASTA file of random single line sequences for benchmarking.'''
+    from numpy import random, frombuffer, uint8
+    rng = random.default_rng(seed)
+    aa = frombuffer(amino_acid_characters.encode('ascii'), uint8)
+    with open(seqs_path, 'w') as f:
+        for i in range(num_sequences):
+            length = rng.integers(min_length, max_length+1)
+            seq = aa[rng.integers(0, len(aa), length)].tobytes().decode('ascii')
+            f.write(f'>AFDB:AF-S{i}-F1 Random sequence UA=S{i} UI=S{i}_RANDOM\n{seq}\n')
+
+def count_matches_loop(kmer_index, sequence):
+    '''Original search counting matches with an array for every database sequence.'''
+    kmers = sequence_kmers(sequence, kmer_index.k)
+    from numpy import zeros, int32
+    counts = zeros((kmer_index.num_sequences,), int32)
+    for seqi in kmer_index.kmer_sequences(kmers):
+        counts[seqi] += 1
+    seq_num = counts.argmax()
+    return seq_num, counts[seq_num]
+
+def benchmark(directory, num_sequences = 1000000, num_queries = 100, nthreads = 8):
+    '''
+    Time searches of mutated sequences taken from a synthetic database of random
+    sequences using the original counting loop, one search at a time, and batched.
+    '''
+    from os.path import join, exists
+    seqs_path = join(directory, f'random{num_sequences}.fasta')
+    from time import time
+    if not exists(index_file_paths(seqs_path)[3]):
+        t0 = time()
+        write_random_sequences(seqs_path, num_sequences)
+        create_index_files(seqs_path, max_memory = None)
+        print(f'made database and index of {num_sequences} sequences in {time()-t0:.1f} seconds')
+
+    kmer_index = KmerSequenceIndex(seqs_path)
+    kmer_index.load_index()
+    from random import seed, randrange
+    seed(0)
+    query_nums = [randrange(num_sequences) for i in range(num_queries)]
+    queries = [mutate(kmer_index.title_and_sequence(i)[1], 0.3) for i in query_nums]
+
+    # Read the index once so all methods are timed with it in the file cache.
+    kmer_index.search_batch(queries)
+
+    timings = (('counting loop', lambda: [count_matches_loop(kmer_index, q) for q in queries]),
+               ('one at a time', lambda: [kmer_index.search(q) for q in queries]),
+               ('batch', lambda: kmer_index.search_batch(queries)),
+               (f'batch {nthreads} threads', lambda: kmer_index.search_batch(queries, nthreads = nthreads)))
+    for name, search in timings:
+        t0 = time()
+        matches = search()
+        t = time() - t0
+        found = sum(1 for (s, c), qi in zip(matches, query_nums) if s == qi)
+        print(f'{name}: {num_queries} queries in {t:.3f} seconds, {num_queries/t:.1f} queries per second,'
+              f' {found} found original sequence')
+
 if __name__ == '__main__':
     from sys import argv
-    if len(argv) < 3 or argv[1] not in ['makeindex', 'test']:
-        print('Syntax: python3 kmer_search.py test|makeindex sequences.fasta')
+    if len(argv) < 3 or argv[1] not in ['makeindex', 'test', 'benchmark']:
+        print('Syntax: python3 kmer_search.py test|makeindex sequences.fasta\n'
+              '        python3 kmer_search.py benchmark directory [num_sequences]')
     else:
         sequences_path = argv[2]
         if argv[1] == 'test':
             test_search(sequences_path)        
+        elif argv[1] == 'benchmark':
+            benchmark(argv[2], int(argv[3]) if len(argv) >= 4 else 1000000)
         elif argv[1] == 'makeindex':
             try:
                 c_create_index_files(sequences_path, max_memory = 16 * 1024 * 1024 * 1024)
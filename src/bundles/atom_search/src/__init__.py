@@ -23,6 +23,7 @@
 # === UCSF ChimeraX Copyright ===
 
 from .ast import AtomSearchTree
+from .spatial_index import spatial_index, SpatialIndex
 
 from chimerax.core.toolshed import BundleAPI
 
@@ -0,0 +1,267 @@
+# vim: set expandtab ts=4 sw=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Session-level spatial index of atoms using a cell list for each structure.
+#
+# Each structure's atoms are binned in cubic cells in structure coordinates so
+# moving a model does not invalidate the index.  When atom coordinates change,
+# only the atoms that moved are taken out of the cell list and kept in a short
+# list that is searched directly.  The cell list is rebuilt when too many atoms
+# have moved or atoms are added or deleted.  Clients can ask which atoms moved
+# since an earlier generation of the index to recompute only what changed.
+#
+
+def spatial_index(session):
+    '''Return the session's atom spatial index, creating it if needed.'''
+    si = getattr(session, '_atom_spatial_index', None)
+    if si is None:
+        session._atom_spatial_index = si = SpatialIndex(session)
+    return si
+
+# -----------------------------------------------------------------------------
+#
+class SpatialIndex:
+
+    def __init__(self, session, cell_size = 5.0):
+        self.session = session
+        self.cell_size = cell_size
+        self._indices = {}	# Structure -> StructureCellIndex
+        from chimerax.core.models import REMOVE_MODELS
+        self._remove_handler = session.triggers.add_handler(REMOVE_MODELS, self._models_removed)
+
+    def structure_index(self, structure):
+        '''Return the up-to-date cell index for a structure.'''
+        si = self._indices.get(structure)
+        if si is None:
+            self._indices[structure] = si = StructureCellIndex(structure, self.cell_size)
+        else:
+            si.refresh()
+        return si
+
+    def close_atom_pairs(self, atoms1, atoms2, cutoff, scene_coords = True):
+        '''
+        Find pairs of atoms, one from each collection, within the cutoff distance.
+        The cutoff can be a single value or an array with one value per atom of atoms1.
+        Returns two index arrays into atoms1 and atoms2.  If scene_coords is false
+        then atoms1 and atoms2 must belong to the same structure or structures with
+        the same coordinate system.
+        '''
+        from numpy import concatenate, array, int32, full
+        if len(atoms1) == 0 or len(atoms2) == 0:
+            e = array((), int32)
+            return e, e
+        xyz1 = atoms1.scene_coords if scene_coords else atoms1.coords
+        i1list, i2list = [], []
+        for s, s_atoms2 in atoms2.by_structure:
+            si = self.structure_index(s)
+            sindex = si.atom_indices(s_atoms2)		# Index of atoms2 atoms in structure
+            if scene_coords:
+                xyz = s.scene_position.inverse().transform_points(xyz1)
+            else:
+                xyz = xyz1
+            p, a = si.close_points(xyz, cutoff)
+            # Keep only structure atoms that are in atoms2.
+            to_atoms2 = full((s.num_atoms,), -1, int32)
+            to_atoms2[sindex] = atoms2.indices(s_atoms2)
+            a2 = to_atoms2[a]
+            keep = (a2 >= 0)
+            i1list.append(p[keep])
+            i2list.append(a2[keep])
+        return concatenate(i1list), concatenate(i2list)
+
+    def moved_atoms(self, structure, generation):
+        '''
+        Return structure atom indices of atoms that moved since the given index
+        generation, or None if that is no longer known.
+        '''
+        return self.structure_index(structure).moved_since(generation)
+
+    def _models_removed(self, trigger_name, models):
+        for m in models:
+            if m in self._indices:
+                del self._indices[m]
+
+    def delete(self):
+        self.session.triggers.remove_handler(self._remove_handler)
+        self._indices.clear()
+
+# -----------------------------------------------------------------------------
+#
+class StructureCellIndex:
+
+    # Rebuild the cell list when more than this fraction of atoms have moved.
+    max_moved_fraction = 0.05
+    # Remember moved atoms for this many generations.
+    max_move_log = 32
+
+    def __init__(self, structure, cell_size):
+        self.structure = structure
+        self.cell_size = cell_size
+        self.generation = 0
+        self._move_log = []	# (generation, moved atom indices)
+        self._rebuild()
+
+    def _rebuild(self):
+        s = self.structure
+        self._atoms = atoms = s.atoms
+        self._pointers = atoms.pointers.copy()
+        self._coordset_id = s.active_coordset_id
+        self._coords = xyz = atoms.coords
+        self.generation += 1
+        self._rebuilt_generation = self.generation
+        self._move_log = []
+        from numpy import array, int32, floor
+        self._loose = array((), int32)		# Atoms taken out of the cell list
+        self._origin = xyz.min(axis = 0) if len(xyz) > 0 else array((0.0,0.0,0.0))
+        cells = floor((xyz - self._origin) / self.cell_size).astype(int32)
+        self._grid_size = gs = (cells.max(axis = 0) + 1) if len(cells) > 0 else array((1,1,1), int32)
+        keys = self._cell_keys(cells)
+        order = keys.argsort(kind = 'stable').astype(int32)
+        from numpy import unique
+        skeys = keys[order]
+        ukeys, starts, counts = unique(skeys, return_index = True, return_counts = True)
+        self._order = order		# Atom indices sorted by cell
+        self._cell_keys_sorted = ukeys
+        self._cell_starts = starts
+        self._cell_counts = counts
+        self._in_cells = None		# Mask of atoms still in their original cell, None if all
+
+    def _cell_keys(self, cells):
+        from numpy import int64
+        nx, ny, nz = self._grid_size
+        c = cells.astype(int64)
+        return (c[:,2]*ny + c[:,1])*nx + c[:,0]
+
+    def refresh(self):
+        '''Update the index for atom motions.'''
+        s = self.structure
+        atoms = s.atoms
+        if len(atoms) != len(self._pointers) or (atoms.pointers != self._pointers).any():
+            self._rebuild()		# Atoms added or deleted
+            return
+        xyz = atoms.coords
+        if s.active_coordset_id == self._coordset_id:
+            moved = (xyz != self._coords).any(axis = 1).nonzero()[0]
+        else:
+            from numpy import arange
+            moved = arange(len(xyz))
+            self._coordset_id = s.active_coordset_id
+        if len(moved) == 0:
+            return
+        self._atoms = atoms
+        self._coords = xyz
+        from numpy import union1d, ones
+        loose = union1d(self._loose, moved).astype(moved.dtype)
+        if len(loose) > self.max_moved_fraction * len(xyz):
+            self._rebuild()
+            return
+        self._loose = loose
+        if self._in_cells is None:
+            self._in_cells = ones((len(xyz),), bool)
+        self._in_cells[moved] = False
+        self.generation += 1
+        log = self._move_log
+        log.append((self.generation, moved))
+        if len(log) > self.max_move_log:
+            del log[0]
+
+    def moved_since(self, generation):
+        '''Indices of atoms moved since generation, or None if unknown.'''
+        if generation == self.generation:
+            from numpy import array, int32
+            return array((), int32)
+        if generation < self._rebuilt_generation:
+            return None
+        log = self._move_log
+        if not log or log[0][0] > generation + 1:
+            return None
+        from numpy import unique, concatenate
+        return unique(concatenate([m for g, m in log if g > generation]))
+
+    def atom_indices(self, atoms):
+        '''Indices of atoms in the structure atom list.'''
+        return self._atoms.indices(atoms)
+
+    def close_points(self, xyz, cutoff):
+        '''
+        Find structure atoms within cutoff distance of points given in structure
+        coordinates.  Cutoff is a value or an array of one value per point.
+        Returns a point index array and an atom index array.
+        '''
+        from numpy import ndarray, array, int32, concatenate, floor, arange, repeat, searchsorted
+        cut = cutoff if isinstance(cutoff, ndarray) else None
+        max_cut = cutoff.max() if cut is not None else cutoff
+        r = int(floor(max_cut / self.cell_size)) + 1
+        cells = floor((xyz - self._origin) / self.cell_size).astype(int32)
+        gs = self._grid_size
+        plist, alist = [], []
+        ukeys, starts, counts, order = (self._cell_keys_sorted, self._cell_starts,
+                                        self._cell_counts, self._order)
+        in_cells = self._in_cells
+        for dz in range(-r, r+1):
+            for dy in range(-r, r+1):
+                for dx in range(-r, r+1):
+                    nc = cells + (dx, dy, dz)
+                    inside = ((nc >= 0) & (nc < gs)).all(axis = 1)
+                    pi = inside.nonzero()[0]
+                    if len(pi) == 0:
+                        continue
+                    keys = self._cell_keys(nc[pi])
+                    k = searchsorted(ukeys, keys)
+                    k[k >= len(ukeys)] = 0
+                    found = (ukeys[k] == keys)
+                    pi, k = pi[found], k[found]
+                    if len(pi) == 0:
+                        continue
+                    n = counts[k]
+                    p = repeat(pi, n)
+                    # Offsets of each atom within its cell run.
+                    first = repeat(starts[k] - (n.cumsum() - n), n)
+                    a = order[first + arange(len(p))]
+                    plist.append(p)
+                    alist.append(a)
+        if plist:
+            p, a = concatenate(plist), concatenate(alist)
+            if in_cells is not None:
+                keep = in_cells[a]
+                p, a = p[keep], a[keep]
+        else:
+            p = a = array((), int32)
+        loose = self._loose
+        if len(loose) > 0:
+            # Pair moved atoms with all points near any of them.
+            from chimerax.geometry import find_close_points
+            near, lnear = find_close_points(xyz, self._coords[loose], max_cut)
+            if len(near) > 0:
+                la = loose[lnear]
+                lp = repeat(near, len(la))
+                la = la[arange(len(lp)) % len(la)]
+                p, a = concatenate((p, lp)), concatenate((a, la))
+        # Keep only pairs within cutoff distance.
+        d = xyz[p] - self._coords[a]
+        d2 = (d*d).sum(axis = 1)
+        c = cut[p] if cut is not None else cutoff
+        keep = (d2 <= c*c)
+        return p[keep].astype(int32), a[keep].astype(int32)
@@ -4399,6 +4399,19 @@ extern "C" EXPORT void structure_add_coordset(void *mol, int id, void *xyz, size
     }
 }
 
+extern "C" EXPORT void structure_delete_coordset(void *mol, int id)
+{
+    Structure *m = static_cast<Structure *>(mol);
+    try {
+        CoordSet *cs = m->find_coord_set(id);
+        if (cs == nullptr)
+            throw std::invalid_argument("No coordinate set with given id");
+        m->delete_coord_set(cs);
+    } catch (...) {
+        molc_error();
+    }
+}
+
 extern "C" EXPORT void structure_remove_coordsets(void *mol)
 {
     Structure *m = static_cast<Structure *>(mol);
@@ -1058,7 +1058,7 @@ geometry_arrays(PyObject *, PyObject *args, PyObject *keywds)
 static void ribbon_extrusions(const float *coords, const float *tangents, const float *normals,
 			      int num_coords, const int *ranges, int num_ranges, int num_res,
 			      const RibbonXSections &xs_front, const RibbonXSections &xs_back,
-			      Geometry &geometry)
+			      Geometry &geometry, const int *caps = NULL)
 {
   int nsp = num_coords / num_res;  	// Path points per residue
   int nlp = nsp/2, nrp = (nsp + 1)/2;	// Left and right half points per residue
@@ -1070,11 +1070,14 @@ static void ribbon_extrusions(const float *coords, const float *tangents, const
   // have a left half and the last residue have a right half.
   // If an interior range is shown only half segments are shown at the ends
   // since other code (e.g. tube cylinders) will render the other halfs.
+  // If caps is given it has a front and back flag for each range so that
+  // part of a displayed range can be recomputed with the same end caps.
   for (int r = 0 ; r < num_ranges ; ++r)
     {
       int r0 = ranges[2*r], r1 = ranges[2*r+1];
 
-      bool capped = true;
+      bool capped = (caps ? caps[2*r] : true);
+      bool last_cap = (caps ? caps[2*r+1] : true);
         
       for (int i = r0 ; i <= r1 ; ++i)
 	{
@@ -1088,7 +1091,7 @@ static void ribbon_extrusions(const float *coords, const float *tangents, const
 	  geometry.add_mesh(mleft);
 	  
 	  // Right half
-	  bool next_cap = (i == r1 ? true : (xs_back[i] != xs_front[i + 1]));
+	  bool next_cap = (i == r1 ? last_cap : (xs_back[i] != xs_front[i + 1]));
 	  s = i * nsp + nlp;
 	  e = (i < num_res-1 ? s + nrp + 1 : s + nrp);
 	  num_pts = e-s;
@@ -1131,13 +1134,13 @@ extern "C" PyObject *
 ribbon_extrusions(PyObject *, PyObject *args, PyObject *keywds)
 {
   FArray centers, tangents, normals;
-  IArray ranges;
+  IArray ranges, caps;
   int num_res;
   RibbonXSections xs_front, xs_back;
   Geometry *g;
   const char *kwlist[] = {"centers", "tangents", "normals", "ranges", "num_res",
-			  "xs_front", "xs_back", "geometry", NULL};
-  if (!PyArg_ParseTupleAndKeywords(args, keywds, const_cast<char *>("O&O&O&O&iO&O&O&"),
+			  "xs_front", "xs_back", "geometry", "caps", NULL};
+  if (!PyArg_ParseTupleAndKeywords(args, keywds, const_cast<char *>("O&O&O&O&iO&O&O&|O&"),
 				   (char **)kwlist,
 				   parse_float_n3_array, &centers,
 				   parse_float_n3_array, &tangents,
@@ -1146,11 +1149,12 @@ ribbon_extrusions(PyObject *, PyObject *args, PyObject *keywds)
 				   &num_res,
 				   parse_rxsection_array, &xs_front,
 				   parse_rxsection_array, &xs_back,
-				   parse_geometry_pointer, &g))
+				   parse_geometry_pointer, &g,
+				   parse_int_n2_array, &caps))
     return NULL;
 
   if (!centers.is_contiguous() || !tangents.is_contiguous() || !normals.is_contiguous() ||
-      !ranges.is_contiguous())
+      !ranges.is_contiguous() || (caps.dimension() == 2 && !caps.is_contiguous()))
     {
       PyErr_SetString(PyExc_TypeError,
 		      "ribbon_extrusions(): Centers, tangents, normals and ranges arrays must be contiguous");
@@ -1164,9 +1168,18 @@ ribbon_extrusions(PyObject *, PyObject *args, PyObject *keywds)
 		   normals.size_string().c_str());
       return NULL;
     }
+  bool have_caps = (caps.dimension() == 2);
+  if (have_caps && caps.size(0) != ranges.size(0))
+    {
+      PyErr_Format(PyExc_TypeError,
+		   "ribbon_extrusions(): Caps (%s) and ranges (%s) must have same size",
+		   caps.size_string().c_str(), ranges.size_string().c_str());
+      return NULL;
+    }
 
   ribbon_extrusions(centers.values(), tangents.values(), normals.values(), centers.size(0),
-		    ranges.values(), ranges.size(0), num_res, xs_front, xs_back, *g);
+		    ranges.values(), ranges.size(0), num_res, xs_front, xs_back, *g,
+		    (have_caps ? caps.values() : NULL));
   
   return python_none();
 }
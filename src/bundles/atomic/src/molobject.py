@@ -1723,6 +1723,12 @@ class StructureData:
                        args = (ctypes.c_void_p, ctypes.c_bool, ctypes.c_void_p, ctypes.c_size_t, ctypes.c_size_t))
         f(self._c_pointer, replace, pointer(xyzs), *xyzs.shape[:2])
 
+    def delete_coordset(self, cs_id):
+        '''Delete the coordinate set with the given id.  The active coordinate set
+        cannot be deleted.'''
+        f = c_function('structure_delete_coordset', args = (ctypes.c_void_p, ctypes.c_int))
+        f(self._c_pointer, cs_id)
+
     def remove_coordsets(self):
         '''Remove all coordinate sets.'''
         f = c_function('structure_remove_coordsets', args = (ctypes.c_void_p,))
@@ -24,8 +24,8 @@
 
 timing = False
 #timing = True
+from time import time
 if timing:
-    from time import time
     coeftime = normaltime = 0
 
 EPSILON = 1e-6
@@ -33,18 +33,25 @@ EPSILON = 1e-6
 from .molobject import StructureData
 TETHER_CYLINDER = StructureData.TETHER_CYLINDER
 
-from numpy import array, zeros, ones, empty, float32, float64, uint8
+from numpy import array, zeros, ones, empty, float32, float64, int32, uint8
 from numpy import dot, concatenate, any, linspace, newaxis, inner, cross, mean
 from numpy.linalg import norm
 
 from . import _ribbons
 
 def _make_ribbon_graphics(structure, ribbons_drawing):
-    '''Update ribbons drawing.'''
+    '''
+    Update ribbons drawing.  Geometry is cached for each polymer chain.
+    Chains with no changes reuse their triangles, and chains where only
+    coordinates changed recompute just the residues whose ribbon path
+    moved, patching the new vertices into the existing arrays.
+    '''
 
-    ribbons_drawing.clear()
+    t_start = time()
 
     if structure.ribbon_display_count == 0:
+        ribbons_drawing.clear()
+        ribbons_drawing._set_rebuild_stats(time() - t_start)
         return
 
     if timing:
@@ -66,12 +73,22 @@ def _make_ribbon_graphics(structure, ribbons_drawing):
         nres = structure.num_ribbon_residues
         segment_divisions = lod.ribbon_divisions(nres)
 
+    # Settings that change ribbon geometry for every chain.
+    arc_helix = (structure.ribbon_mode_helix == structure.RIBBON_MODE_ARC)
+    # Tube helix cross sections are made for each helix, so are not among the
+    # per-residue cross sections compared for reuse.  Include their settings.
+    xs_mgr = structure.ribbon_xs_mgr
+    tube_xs = (xs_mgr.tube_radius, tuple(sorted(xs_mgr.params[xs_mgr.STYLE_ROUND].items()))) \
+        if arc_helix else None
+    params = (segment_divisions, structure.ribbon_mode_helix, structure.ribbon_mode_strand,
+              structure.spline_normals, structure.ribbon_tether_scale, structure.bond_radius,
+              tube_xs)
+
     # Accumulate ribbon information for all polymer chains.
-    geometry = TriangleAccumulator()
-    polyres = []
-    roffset = 0
-    tethered_atoms = []
-    backbone_atoms = []
+    chain_cache = ribbons_drawing._chain_ribbons
+    chains = []
+    patched = []	# Chains whose vertices were updated in place
+    nreused = nrebuilt = 0
 
     for rlist, ptype in polymers:
         # Always call get_polymer_spline to make sure hide bits are
@@ -104,10 +121,10 @@ def _make_ribbon_graphics(structure, ribbons_drawing):
         # Assign a residue class to each residue and compute the
         # ranges of secondary structures
         is_helix = residues.is_helix
+        is_strand = residues.is_strand
         ssids = residues.secondary_structure_ids
-        arc_helix = (structure.ribbon_mode_helix == structure.RIBBON_MODE_ARC)
         res_class, helix_ranges, sheet_ranges, display_ranges = \
-            _ribbon_ranges(is_helix, residues.is_strand, ssids, displays,
+            _ribbon_ranges(is_helix, is_strand, ssids, displays,
                            residues.polymer_types, arc_helix)
 
         if timing:
@@ -121,8 +138,31 @@ def _make_ribbon_graphics(structure, ribbons_drawing):
 
         if timing:
             xstime += time()-t0
+
+        orients = structure.ribbon_orients(residues)
+        # Smoothing uses ribbon_adjusts and tethers depend on ribbon_hide_backbones.
+        style = (params, (displays, is_helix, is_strand, ssids, orients,
+                          residues.ribbon_adjusts, residues.ribbon_hide_backbones),
+                 xs_front, xs_back)
+        chain = chain_cache.get(residues[0])
+        if chain is not None and chain.same_style(residues, style):
+            if chain.same_coords(coords, guides):
+                # Nothing changed for this chain.
+                chains.append(chain)
+                nreused += 1
+                continue
+            if chain.path is None:
+                chain = None	# Tube helices are always recomputed.
+        else:
+            chain = None
+
+        # Keep coordinates before smoothing for detecting changes.
+        new_coords = coords.copy()
+        new_guides = None if guides is None else guides.copy()
+
+        if timing:
             t0 = time()
-            
+
         # Perform any smoothing (e.g., strand smoothing
         # to remove lasagna sheets, pipes and planks
         # display as cylinders and planes, etc.)
@@ -134,8 +174,8 @@ def _make_ribbon_graphics(structure, ribbons_drawing):
             t0 = time()
 
         # Create tube helices.
+        geometry = TriangleAccumulator()
         if arc_helix:
-            ribbon_adjusts = residues.ribbon_adjusts
             for start, end in helix_ranges:
                 if displays[start:end].any():
                     centers = _arc_helix_geometry(coords, xs_mgr, displays, start, end, geometry)
@@ -151,7 +191,6 @@ def _make_ribbon_graphics(structure, ribbons_drawing):
         # Create spline path
         if timing:
             t1 = time()
-        orients = structure.ribbon_orients(residues)
         flip_normals = _ribbon_flip_normals(structure, is_helix)
         ribbon = Ribbon(coords, guides, orients, flip_normals, smooth_twist, segment_divisions,
                         structure.spline_normals)
@@ -169,8 +208,15 @@ def _make_ribbon_graphics(structure, ribbons_drawing):
             pathtime += time() - t0
             t0 = time()
             
-        # Compute ribbon triangles
-        _ribbon_geometry(path, display_ranges, len(residues), xs_front, xs_back, geometry)
+        # Compute ribbon triangles, only for residues with a changed path if possible.
+        if chain is not None and chain.patch_path(path, new_coords, new_guides):
+            patched.append(chain)
+        else:
+            _ribbon_geometry(path, display_ranges, len(residues), xs_front, xs_back, geometry)
+            chain = _ChainRibbon(residues, style, new_coords, new_guides,
+                                 None if arc_helix else path, display_ranges, geometry)
+            chain.spline_params = (helix_ranges, sheet_ranges, flip_normals, smooth_twist)
+            nrebuilt += 1
 
         if timing:
             geotime += time() - t0
@@ -179,44 +225,54 @@ def _make_ribbon_graphics(structure, ribbons_drawing):
         # Get list of tethered atoms and attachment position to ribbon.
         if structure.ribbon_tether_scale > 0:
             min_tether_offset = structure.bond_radius
-            t_atoms, b_atoms = _ribbon_tethers(ribbon, residues, min_tether_offset)
-            if t_atoms:
-                tethered_atoms.append(t_atoms)
-            if b_atoms:
-                backbone_atoms.append(b_atoms)
+            chain.tethered_atoms, chain.backbone_atoms = \
+                _ribbon_tethers(ribbon, residues, min_tether_offset)
                 
         if timing:
             tethertime += time()-t0
         
-        polyres.append(residues)
+        chains.append(chain)
 
-        roffset += len(residues)
-        geometry.set_range_offset(roffset)
+    ribbons_drawing._chain_ribbons = {c.residues[0]:c for c in chains}
 
     if timing:
         t0 = time()
         
     # Set ribbon drawing geometry, colors, residue triangle ranges, and tethers
-    if not geometry.empty():
-        # Set drawing geometry
-        va, na, ta = geometry.vertex_normal_triangle_arrays()
-        ribbons_drawing.set_geometry(va, na, ta)
-        # ribbons_drawing.display_style = rp.Mesh
-
-        # Remember triangle ranges for each residue.
-        from . import concatenate, Residues
-        residues = concatenate(polyres, Residues)
-        ribbons_drawing.set_triangle_ranges(residues, geometry.triangle_ranges)
-
-        # Set colors
-        ribbons_drawing.update_ribbon_colors()
-
-        # Make tethers
+    if nrebuilt == 0 and chains == ribbons_drawing._chains:
+        # Only coordinates changed so update vertices and normals in place.
+        if patched:
+            ribbons_drawing._geometry_patched()
+    else:
+        ribbons_drawing.clear()
+        va, na, ta, tranges = _combine_chain_geometry(chains)
+        if ta is not None:
+            # Set drawing geometry
+            ribbons_drawing.set_geometry(va, na, ta)
+            # ribbons_drawing.display_style = rp.Mesh
+
+            # Remember triangle ranges for each residue.
+            from . import concatenate, Residues
+            residues = concatenate([c.residues for c in chains], Residues)
+            ribbons_drawing.set_triangle_ranges(residues, tranges)
+
+            # Set colors
+            ribbons_drawing.update_ribbon_colors()
+        ribbons_drawing._chains = chains
+
+    # Make tethers
+    ribbons_drawing.remove_tethers()
+    if ribbons_drawing.triangles is not None:
+        tethered_atoms = [c.tethered_atoms for c in chains if c.tethered_atoms]
+        backbone_atoms = [c.backbone_atoms for c in chains if c.backbone_atoms]
         ribbons_drawing.set_tethers(tethered_atoms, backbone_atoms,
                                     structure.ribbon_tether_shape,
                                     structure.ribbon_tether_scale,
                                     structure.ribbon_tether_sides)
 
+    ribbons_drawing._set_rebuild_stats(time() - t_start, nreused, len(patched), nrebuilt,
+                                       sum(c.patched_residue_count for c in patched))
+
     if timing:
         drtime = time() - t0
         t0 = time()
@@ -229,6 +285,168 @@ def _make_ribbon_graphics(structure, ribbons_drawing):
                  pathtime, spltime, coeftime, normaltime, interptime,
                  geotime, drtime, tethertime))
 
+class _ChainRibbon:
+    '''
+    Ribbon geometry for one polymer chain.  Kept between ribbon updates
+    so unchanged chains are not recomputed, and when only coordinates change
+    just the residues whose ribbon path moved get new vertices.
+    '''
+    def __init__(self, residues, style, coords, guides, path, display_ranges, geometry):
+        self.residues = residues
+        self._residue_pointers = residues.pointers
+        self._style = style
+        self._coords = coords		# Spline atom coordinates before smoothing
+        self._guides = guides
+        self.path = path		# Centers, tangents, normals.  None for tube helices.
+        self._display_ranges = display_ranges
+        if geometry.empty():
+            self.vertices = self.normals = self.triangles = None
+            self.triangle_ranges = empty((0,5), int32)
+        else:
+            self.vertices, self.normals, self.triangles = geometry.vertex_normal_triangle_arrays()
+            self.triangle_ranges = geometry.triangle_ranges
+        self.tethered_atoms = self.backbone_atoms = None
+        self.patched_residue_count = 0
+        self.spline_params = None	# Helix and sheet ranges, normal flips, twist smoothing
+
+    @property
+    def orients(self):
+        return self._style[1][4]
+
+    def same_style(self, residues, style):
+        '''Is the chain geometry the same except for possibly coordinates?'''
+        params, arrays, xs_front, xs_back = style
+        sparams, sarrays, sxs_front, sxs_back = self._style
+        from numpy import array_equal
+        return (params == sparams
+                and array_equal(residues.pointers, self._residue_pointers)
+                and all(array_equal(a, sa) for a, sa in zip(arrays, sarrays))
+                and all(xs is sxs for xs, sxs in zip(xs_front, sxs_front))
+                and all(xs is sxs for xs, sxs in zip(xs_back, sxs_back)))
+
+    def same_coords(self, coords, guides):
+        from numpy import array_equal
+        if not array_equal(coords, self._coords):
+            return False
+        if guides is None or self._guides is None:
+            return guides is None and self._guides is None
+        return array_equal(guides, self._guides)
+
+    def patch_path(self, path, coords, guides):
+        '''
+        Recompute vertices and normals for residues where the ribbon path changed.
+        Return False if the number of vertices changed and the whole chain must
+        be recomputed.
+        '''
+        old_path = self.path
+        for p, op in zip(path, old_path):
+            if p.shape != op.shape:
+                return False
+        num_res = len(self.residues)
+        changed = _changed_path_residues(old_path, path, num_res)
+        ranges, caps = self._changed_ranges(changed)
+        count = 0
+        if ranges:
+            geometry = TriangleAccumulator()
+            _, xs_front, xs_back = self._style[1:]
+            xsf = [xs._xs_pointer for xs in xs_front]
+            xsb = [xs._xs_pointer for xs in xs_back]
+            centers, tangents, normals = path
+            _ribbons.ribbon_extrusions(centers, tangents, normals, array(ranges, int32),
+                                       num_res, xsf, xsb, geometry._geom_cpp,
+                                       caps = array(caps, int32))
+            if not geometry.empty():
+                va, na, ta = geometry.vertex_normal_triangle_arrays()
+                tr = geometry.triangle_ranges
+                otr = self.triangle_ranges
+                from numpy import searchsorted
+                rows = searchsorted(otr[:,0], tr[:,0])
+                if (rows >= len(otr)).any():
+                    return False
+                otr = otr[rows]
+                if ((otr[:,0] != tr[:,0]).any()
+                    or ((otr[:,4] - otr[:,3]) != (tr[:,4] - tr[:,3])).any()
+                    or ((otr[:,2] - otr[:,1]) != (tr[:,2] - tr[:,1])).any()):
+                    return False
+                for (ri,ts,te,vs,ve), (ori,ots,ote,ovs,ove) in zip(tr, otr):
+                    self.vertices[ovs:ove] = va[vs:ve]
+                    self.normals[ovs:ove] = na[vs:ve]
+                count = len(tr)
+        self.path = path
+        self._coords = coords
+        self._guides = guides
+        self.patched_residue_count = count
+        return True
+
+    def _changed_ranges(self, changed):
+        '''
+        Split displayed residue ranges into runs of changed residues.
+        Return the runs and whether each run has front and back end caps.
+        '''
+        _, xs_front, xs_back = self._style[1:]
+        ranges = []
+        caps = []
+        for r0, r1 in self._display_ranges:
+            i = r0
+            while i <= r1:
+                if not changed[i]:
+                    i += 1
+                    continue
+                j = i
+                while j < r1 and changed[j+1]:
+                    j += 1
+                ranges.append((i, j))
+                caps.append((i == r0 or xs_back[i-1] is not xs_front[i],
+                             j == r1 or xs_back[j] is not xs_front[j+1]))
+                i = j + 1
+        return ranges, caps
+
+def _changed_path_residues(path0, path1, num_res):
+    '''
+    Return mask of residues where any of the ribbon path points
+    used to make its geometry differ.
+    '''
+    changed_points = zeros((len(path0[0]),), bool)
+    for a0, a1 in zip(path0, path1):
+        changed_points |= (a0 != a1).any(axis=1)
+    nsp = len(changed_points) // num_res
+    changed = changed_points[:num_res*nsp].reshape((num_res,nsp)).any(axis=1)
+    # Back half of a residue extends to the first path point of the next residue.
+    changed[:-1] |= changed_points[nsp::nsp][:num_res-1]
+    return changed
+
+def _combine_chain_geometry(chains):
+    '''
+    Concatenate chain vertices, normals, triangles and residue triangle ranges.
+    The chain vertex and normal arrays are replaced by views into the combined
+    arrays so later changes to chains update the drawing geometry.
+    '''
+    geom = [c for c in chains if c.triangles is not None]
+    if len(geom) == 0:
+        return None, None, None, None
+    va = concatenate([c.vertices for c in geom])
+    na = concatenate([c.normals for c in geom])
+    tlist = []
+    rlist = []
+    roffset = voffset = toffset = 0
+    for c in chains:
+        if c.triangles is not None:
+            nv, nt = len(c.vertices), len(c.triangles)
+            tlist.append(c.triangles + voffset)
+            tr = c.triangle_ranges.copy()
+            tr[:,0] += roffset
+            tr[:,1:3] += toffset
+            tr[:,3:5] += voffset
+            rlist.append(tr)
+            c.vertices = va[voffset:voffset+nv]
+            c.normals = na[voffset:voffset+nv]
+            voffset += nv
+            toffset += nt
+        roffset += len(c.residues)
+    ta = concatenate(tlist)
+    tranges = concatenate(rlist)
+    return va, na, ta, tranges
+
 
 def _get_polymer_spline(residues):
     '''Return a tuple of spline center and guide coordinates for a
@@ -574,6 +792,18 @@ class TriangleAccumulator1:
     def triangle_ranges(self):
         return self._triangle_ranges
 
+# -----------------------------------------------------------------------------
+#
+from collections import namedtuple
+class RibbonRebuildStats(namedtuple('RibbonRebuildStats',
+                                    ('seconds', 'chains_reused', 'chains_patched',
+                                     'chains_rebuilt', 'residues_patched'))):
+    '''Time and amount of work for the last ribbon geometry update of a structure.'''
+    def __str__(self):
+        return ('%.4g seconds, %d chains reused, %d patched (%d residues), %d rebuilt'
+                % (self.seconds, self.chains_reused, self.chains_patched,
+                   self.residues_patched, self.chains_rebuilt))
+
 # -----------------------------------------------------------------------------
 #
 from chimerax.graphics import Drawing
@@ -586,6 +816,9 @@ class RibbonsDrawing(Drawing):
         self._triangle_ranges_sorted = None	# Sorted ranges for first_intercept() calc
         self._residues = None			# Residues used with _triangle_ranges
         self._residues_count = 0		# For detecting deleted residues
+        self._chain_ribbons = {}		# Map first residue to _ChainRibbon
+        self._chains = []			# _ChainRibbon for current geometry
+        self.rebuild_stats = None		# RibbonRebuildStats for last update
         
     def clear(self):
         self.set_geometry(None, None, None)
@@ -593,14 +826,64 @@ class RibbonsDrawing(Drawing):
         self._tethers_drawing = None
         self._triangle_ranges = None
         self._residues = None
+        self._chains = []
 
     def compute_ribbons(self, structure):
-        if timing:
-            t0 = time()
         _make_ribbon_graphics(structure, self)
         if timing:
-            t1 = time()
-            print ('compute_ribbons(): %.4g' % (t1-t0))
+            print ('compute_ribbons(): %s' % str(self.rebuild_stats))
+
+    def update_coordinates(self, structure):
+        '''
+        Recompute ribbons for new atom coordinates reusing the residue classes,
+        cross sections and display ranges of the current ribbons.  This is
+        only valid if secondary structure, display and ribbon style have not
+        changed.  Return False if the ribbons need to be fully recomputed.
+        '''
+        t0 = time()
+        chains = self._chains
+        segment_divisions = structure._level_of_detail.ribbon_fixed_divisions
+        tethers = (structure.ribbon_tether_scale > 0)
+        patched = []
+        for chain in chains:
+            if chain.path is None:
+                return False		# Tube helices
+            divisions = chain._style[0][0]
+            if segment_divisions is not None and segment_divisions != divisions:
+                return False
+            any_display, atoms, coords, guides = _get_polymer_spline(chain.residues)
+            if atoms is None or len(atoms) != len(chain.residues):
+                return False
+            if chain.same_coords(coords, guides):
+                continue
+            new_coords = coords.copy()
+            new_guides = None if guides is None else guides.copy()
+            helix_ranges, sheet_ranges, flip_normals, smooth_twist = chain.spline_params
+            _smooth_ribbon(chain.residues, coords, guides, helix_ranges, sheet_ranges,
+                           structure.ribbon_mode_helix, structure.ribbon_mode_strand)
+            ribbon = Ribbon(coords, guides, chain.orients, flip_normals, smooth_twist,
+                            divisions, structure.spline_normals)
+            if not chain.patch_path(ribbon.path(), new_coords, new_guides):
+                return False
+            if tethers:
+                _set_tether_positions(chain.residues, ribbon.segment_coefficients)
+            patched.append(chain)
+        if patched:
+            self._geometry_patched()
+        self._set_rebuild_stats(time() - t0, len(chains) - len(patched), len(patched), 0,
+                                sum(c.patched_residue_count for c in patched))
+        return True
+
+    def _set_rebuild_stats(self, seconds, chains_reused = 0, chains_patched = 0,
+                           chains_rebuilt = 0, residues_patched = 0):
+        self.rebuild_stats = RibbonRebuildStats(seconds, chains_reused, chains_patched,
+                                                chains_rebuilt, residues_patched)
+
+    def _geometry_patched(self):
+        # Vertices and normals were modified in place.  Setting the
+        # attributes marks the graphics buffers to be updated.
+        self._vertices = self._vertices
+        self._normals = self._normals
 
     def set_triangle_ranges(self, residues, triangle_ranges):
         self._residues = residues
@@ -652,6 +935,12 @@ class RibbonsDrawing(Drawing):
             tmask = None
         self.highlighted_triangles_mask = tmask
         
+    def remove_tethers(self):
+        td = self._tethers_drawing
+        if td:
+            self.remove_drawing(td)
+            self._tethers_drawing = None
+
     def set_tethers(self, tethered_atoms, backbone_atoms,
                     tether_shape, tether_scale, tether_sides):
         if len(tethered_atoms) == 0:
@@ -65,6 +65,7 @@ class Structure(Model, StructureData):
             '_use_spline_normals': False,
             'ribbon_xs_mgr': XSectionManager(),
             'filename': None,
+            'coordset_source': None,	# Reads trajectory frames on demand
         }
 
         StructureData.__init__(self, c_pointer)
@@ -81,6 +82,8 @@ class Structure(Model, StructureData):
         self._chain_trace_pbgroup = None
         self._ribbons_drawing = None
         self._ring_drawing = None
+        self._fixed_topology_playback = False
+        self._playback_graphics = None	# _PlaybackGraphics, reused state during coordset playback
 
         self._ses_handlers = []
         t = self.session.triggers
@@ -236,6 +239,8 @@ class Structure(Model, StructureData):
         for attr_name, default_val in self._session_attrs.items():
             setattr(self, attr_name, data.get(attr_name, default_val))
         self.ribbon_xs_mgr.set_structure(self)
+        if self.coordset_source is not None:
+            self.coordset_source.set_structure(self)
 
         # Create Python pseudobond group models so they are added as children.
         list(self.pbg_map.values())
@@ -348,11 +353,44 @@ class Structure(Model, StructureData):
         # TODO: Handle instead with a C++ notification that atoms added or deleted
         pass
 
+    def _get_fixed_topology_playback(self):
+        return self._fixed_topology_playback
+    def _set_fixed_topology_playback(self, fixed):
+        if fixed == self._fixed_topology_playback:
+            return
+        self._fixed_topology_playback = fixed
+        self._playback_graphics = None
+        if not fixed:
+            # Catch up on any radius or style changes made during playback.
+            self._graphics_changed |= (self._SHAPE_CHANGE | self._RIBBON_CHANGE | self._RING_CHANGE)
+    fixed_topology_playback = property(_get_fixed_topology_playback, _set_fixed_topology_playback)
+    '''
+    When true, graphics updates that only involve a change of coordinates,
+    such as a new active coordset, reuse atom radii, bond pairing, ring fills
+    and ribbon residue classes instead of recomputing them.  Used for fast
+    trajectory playback.  Changes to atom radii or ribbon styles made while
+    this is set are only shown when it is turned off.
+    '''
+
+    _COORDINATE_CHANGE = (StructureData._SHAPE_CHANGE | StructureData._RIBBON_CHANGE
+                          | StructureData._RING_CHANGE)
+
     def update_graphics_if_needed(self, *_):
         gc = self._graphics_changed
         if gc == 0:
             return
 
+        if self._fixed_topology_playback:
+            if gc & ~self._COORDINATE_CHANGE == 0:
+                pg = self._playback_graphics
+                if pg is None:
+                    self._playback_graphics = pg = _PlaybackGraphics(self)
+                if pg.update_coordinates():
+                    self._graphics_changed = 0
+                    self.redraw_needed(shape_changed = True)
+                    return
+            self._playback_graphics = None
+
         if gc & self._RIBBON_CHANGE:
             self._create_ribbon_graphics()
             # Displaying ribbon can set backbone atom hide bits producing shape change.
@@ -546,34 +584,42 @@ class Structure(Model, StructureData):
         from .shapedrawing import AtomicShapeDrawing
         self._ring_drawing = p = self.new_drawing('rings', subclass=AtomicShapeDrawing)
 
+        ring_fills = self._ring_fills()
+        if ring_fills:
+            self._fill_rings(ring_fills)
+            self._graphics_changed |= self._SHAPE_CHANGE
+
+    def _ring_fills(self):
+        '''Return list of (atoms, offset, color) for rings to fill.'''
         # TODO:
         #   find all residue rings
         #   limit to 3, 4, 5 and 6 member rings
         #   check if all atoms are shown (displayed and not hidden)
         #   if thin, will only use one two-sided fill
         #   if thick, use stick radius to separate fills
-        ring_count = 0
         all_rings = self.rings(all_size_threshold=6)
         # Ring info will change spontaneously when we ask for radii, so remember what we need now
         ring_atoms = [ring.ordered_atoms for ring in all_rings]
-        rings = []
+        fills = []
         for atoms in ring_atoms:
             residue = atoms[0].residue
             if not residue.ring_display or not all(atoms.visibles):
                 continue
-            ring_count += 1
             if residue.thin_rings:
                 offset = 0
             else:
                 offset = min(self._atom_display_radii(atoms))
+            fills.append((atoms, offset, residue.ring_color))
+        return fills
+
+    def _fill_rings(self, ring_fills):
+        rings = []
+        for atoms, offset, color in ring_fills:
             if len(atoms) < 6:
-                rings.append(self.fill_small_ring(atoms, offset, residue.ring_color))
+                rings.append(self.fill_small_ring(atoms, offset, color))
             else:
-                rings.append(self.fill_6ring(atoms, offset, residue.ring_color))
-
-        if ring_count:
-            self._ring_drawing.add_shapes(rings)
-            self._graphics_changed |= self._SHAPE_CHANGE
+                rings.append(self.fill_6ring(atoms, offset, color))
+        self._ring_drawing.add_shapes(rings)
 
     def _res_numbering(self, rn):
         rn_lookup = { 'author': Residue.RN_AUTHOR, 'canonical': Residue.RN_CANONICAL,
@@ -665,6 +711,7 @@ class Structure(Model, StructureData):
             self.add_drawing(rd)
 
         ribbons_drawing.compute_ribbons(self)
+        self._graphics_updater.last_ribbon_time += ribbons_drawing.rebuild_stats.seconds
         
         self._graphics_changed |= self._SHAPE_CHANGE
 
@@ -923,66 +970,59 @@ class Structure(Model, StructureData):
     def _atomspec_filter_chain(self, atoms, num_atoms, parts, attrs):
         # print("Structure._atomspec_filter_chain", num_atoms, parts, attrs)
         import numpy
-        chain_ids = atoms.residues.chain_ids
         if not parts:
             selected = numpy.ones(num_atoms, dtype=numpy.bool_)
         else:
+            chain_ids = atoms.chain_ids
             selected = numpy.zeros(num_atoms, dtype=numpy.bool_)
             for part in parts:
-                choose = part.string_matcher(self.lower_case_chains)
-                s = numpy.vectorize(choose)(chain_ids)
-                selected = numpy.logical_or(selected, s)
+                selected |= part.string_mask(chain_ids, self.lower_case_chains)
         if attrs:
             chains = self.chains
             chain_selected = numpy.ones(len(chains), dtype=numpy.bool_)
             chain_selected = self._atomspec_attr_filter(chains, chain_selected, attrs)
-            chain_map = dict(zip(chains, chain_selected))
-            for i, a in enumerate(atoms):
-                if not selected[i]:
-                    continue
-                try:
-                    if not chain_map[a.residue.chain]:
-                        selected[i] = False
-                except KeyError:
-                    # XXX: Atom is not in a chain, "must not be selected?"
-                    selected[i] = False
+            # Atoms not in a chain are not selected.
+            from .molarray import concatenate, Residues
+            sel_res = [c.existing_residues for c, sel in zip(chains, chain_selected) if sel]
+            selected &= numpy.isin(atoms.residues.pointers, concatenate(sel_res, Residues).pointers)
         # print("AtomicStructure._atomspec_filter_chain", selected)
         return selected
 
     def _atomspec_attr_filter(self, objects, selected, attrs):
         import numpy
+        selected = numpy.array(selected, dtype=numpy.bool_)
         for attr in attrs:
             choose = attr.attr_matcher()
-            selected = [(selected[i] and choose(obj)) for i, obj in enumerate(objects)]
-        return numpy.array(selected)
-
+            # Only test objects still selected
+            for i in numpy.nonzero(selected)[0]:
+                if not choose(objects[i]):
+                    selected[i] = False
+        return selected
 
     def _atomspec_filter_residue(self, atoms, num_atoms, parts, attrs):
         # print("Structure._atomspec_filter_residue", num_atoms, parts, attrs)
         import numpy
-        if not parts:
+        if not parts and not attrs:
             # No residue specifier, choose everything
-            selected = numpy.ones(num_atoms, dtype=numpy.bool_)
+            return numpy.ones(num_atoms, dtype=numpy.bool_)
+        # Test each residue once instead of once per atom.
+        residues, rindex = _unique_residues_index(atoms)
+        if not parts:
+            rsel = numpy.ones(len(residues), dtype=numpy.bool_)
         else:
-            res_names = numpy.array(atoms.residues.names)
-            res_numbers = atoms.residues.numbers
-            res_ics = atoms.residues.insertion_codes
-            selected = numpy.zeros(num_atoms, dtype=numpy.bool_)
+            res_names = residues.names
+            res_numbers = residues.numbers
+            res_ics = residues.insertion_codes
+            rsel = numpy.zeros(len(residues), dtype=numpy.bool_)
             for part in parts:
-                choose_id = part.res_id_matcher()
-                if choose_id:
-                    s = numpy.vectorize(choose_id)(res_numbers, res_ics)
-                    if s.any():
-                        selected = numpy.logical_or(selected, s)
-                    else:
-                        choose_id = None
-                        # Try using input as name instead of number
-                if not choose_id:
-                    choose_type = part.string_matcher(False)
-                    s = numpy.vectorize(choose_type)(res_names)
-                    selected = numpy.logical_or(selected, s)
+                s = part.res_id_mask(res_numbers, res_ics)
+                if s is None or not s.any():
+                    # Try using input as name instead of number
+                    s = part.string_mask(res_names, False)
+                rsel |= s
         if attrs:
-            selected = self._atomspec_attr_filter(atoms.residues, selected, attrs)
+            rsel = self._atomspec_attr_filter(residues, rsel, attrs)
+        selected = rsel[rindex]
         # print("AtomicStructure._atomspec_filter_residue", selected)
         return selected
 
@@ -993,12 +1033,10 @@ class Structure(Model, StructureData):
             # No name specifier, use everything
             selected = numpy.ones(num_atoms, dtype=numpy.bool_)
         else:
-            names = numpy.array(atoms.names)
+            names = atoms.names
             selected = numpy.zeros(num_atoms, dtype=numpy.bool_)
             for part in parts:
-                choose = part.string_matcher(False)
-                s = numpy.vectorize(choose)(names)
-                selected = numpy.logical_or(selected, s)
+                selected |= part.string_mask(names, False)
         if attrs:
             selected = self._atomspec_attr_filter(atoms, selected, attrs)
         # print("AtomicStructure._atomspec_filter_atom", selected)
@@ -1234,6 +1272,86 @@ class BondsDrawing(Drawing):
 
 
 
+class _PlaybackGraphics:
+    '''
+    Graphics state that does not depend on coordinates, such as atom radii,
+    bond pairing and ring fills, kept while playing coordinate sets so that
+    each frame only recomputes coordinate dependent arrays.
+    '''
+    def __init__(self, structure):
+        self._structure = structure
+        ad = structure._atoms_drawing
+        self._atoms = atoms = None if ad is None else ad.visible_atoms
+        self._xyzr = None
+        if atoms is not None:
+            from numpy import empty, float32
+            self._xyzr = xyzr = empty((len(atoms), 4), float32)
+            xyzr[:, 3] = structure._atom_display_radii(atoms)
+        self._ribbon_count = structure.ribbon_display_count
+        self._ring_fills = None if structure._ring_drawing is None else structure._ring_fills()
+
+    def update_coordinates(self):
+        '''
+        Update graphics for new atom coordinates.  Return False if some
+        graphics need a full update.
+        '''
+        s = self._structure
+        ad = s._atoms_drawing
+        if ad is None or ad.visible_atoms is not self._atoms:
+            return False
+        if s.ribbon_display_count != self._ribbon_count:
+            return False
+
+        rd = s._ribbons_drawing
+        if rd is not None and rd._chains:
+            if not rd.update_coordinates(s):
+                return False
+            s._graphics_updater.last_ribbon_time += rd.rebuild_stats.seconds
+        elif self._ribbon_count > 0:
+            return False
+
+        if self._ring_fills and not self._update_rings():
+            return False
+
+        # All atom coordinates are copied in one call.
+        xyzr = self._xyzr
+        xyzr[:, :3] = self._atoms.coords
+        from chimerax.geometry import Places
+        ad.positions = Places(shift_and_scale=xyzr)
+
+        bd = s._bonds_drawing
+        if bd is not None:
+            bd.positions = bd.visible_bonds.halfbond_cylinder_placements(bd.positions.opengl_matrices())
+
+        # Same steps as Structure._update_graphics() for a shape change.  The
+        # chain trace pseudobonds only change when displayed atoms change,
+        # which needs a full update, and are placed with the other groups.
+        if s._auto_chain_trace:
+            s._update_chain_trace_graphics(s._SHAPE_CHANGE)
+        for pbg in s.pbg_map.values():
+            pbg._update_graphics(s._SHAPE_CHANGE)
+        s._update_ribbon_tethers()
+        return True
+
+    def _update_rings(self):
+        rd = self._structure._ring_drawing
+        if rd is None or rd.vertices is None:
+            return False
+        s = self._structure
+        shapes = [(s.fill_small_ring(atoms, offset, color) if len(atoms) < 6
+                   else s.fill_6ring(atoms, offset, color))
+                  for atoms, offset, color in self._ring_fills]
+        from numpy import concatenate, float32
+        va = concatenate([shape.vertices for shape in shapes]).astype(float32, copy = False)
+        if va.shape != rd.vertices.shape:
+            return False
+        na = concatenate([shape.normals for shape in shapes]).astype(float32, copy = False)
+        vc = rd.vertex_colors
+        rd.set_geometry(va, na, rd.triangles)
+        rd.vertex_colors = vc
+        return True
+
+
 class AtomicStructure(Structure):
     """
     Molecular model including support for chains, hetero-residues,
@@ -1787,6 +1905,13 @@ def assembly_html_table(mol):
     html = '\n'.join(lines)
     return html
 
+def _unique_residues_index(atoms):
+    '''Return the unique residues of atoms and for each atom the index of its residue.'''
+    from numpy import unique
+    rptrs, rindex = unique(atoms.residues.pointers, return_inverse = True)
+    from .molarray import Residues
+    return Residues(rptrs), rindex
+
 def chain_res_range(chain):
     existing = chain.existing_residues
     if len(existing) == 1:
@@ -1865,6 +1990,7 @@ class StructureGraphicsChangeManager:
         self._structures_array = None		# StructureDatas object
         self.num_atoms_shown = 0
         self.level_of_detail = LevelOfDetail()
+        self.last_ribbon_time = 0		# Seconds computing ribbons for last graphics update
         from chimerax.core.models import MODEL_DISPLAY_CHANGED
         self._display_handler = t.add_handler(MODEL_DISPLAY_CHANGED, self._model_display_changed)
         self._model_display_change = False
@@ -1891,6 +2017,7 @@ class StructureGraphicsChangeManager:
             self._model_display_change = True
 
     def _update_graphics_if_needed(self, *_):
+        self.last_ribbon_time = 0
         s = self._array()
         gc = s._graphics_changeds	# Includes pseudobond group changes.
         if self._model_display_change or gc.any():
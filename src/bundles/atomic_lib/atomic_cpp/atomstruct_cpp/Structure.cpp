@@ -1260,6 +1260,18 @@ Structure::delete_atoms(const std::vector<Atom*>& atoms)
     _delete_atoms(del_atoms_set);
 }
 
+void
+Structure::delete_coord_set(CoordSet* cs)
+{
+    auto csi = std::find(_coord_sets.begin(), _coord_sets.end(), cs);
+    if (csi == _coord_sets.end())
+        throw std::invalid_argument("Coordinate set not in structure");
+    if (cs == _active_coord_set)
+        throw std::invalid_argument("Cannot delete the active coordinate set");
+    _coord_sets.erase(csi);
+    delete cs;
+}
+
 void
 Structure::delete_bond(Bond *b)
 {
@@ -267,6 +267,7 @@ public:
     void  delete_atoms(const std::set<Atom*>& atoms) { _delete_atoms(atoms); }
     void  delete_atoms(const std::vector<Atom*>& atoms);
     void  delete_bond(Bond* b);
+    void  delete_coord_set(CoordSet* cs);
     void  delete_residue(Residue* r);
     bool  display() const { return _display; }
     void  extend_input_seq_info(ChainID& chain_id, ResName& res_name) {
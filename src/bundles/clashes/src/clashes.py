@@ -75,14 +75,14 @@ def find_clashes(session, test_atoms,
 
        Returns a dictionary keyed on atoms, with values that are
        dictionaries keyed on clashing atom with value being the clash value.
+
+       Results are cached per session, so repeating a call with the same atoms
+       and parameters after some atoms have moved only re-tests the moved atoms.
     """
 
     from chimerax.atomic import Structure
     use_scene_coords = inter_model and len(
         [m for m in session.models if isinstance(m, Structure)]) > 1
-    # use the fast _closepoints module to cut down candidate atoms if we
-    # can (since _closepoints doesn't know about "non-bonded" it isn't as
-    # useful as it might otherwise be)
     if restrict == "any":
         if inter_model:
             from chimerax.atomic import all_atoms
@@ -97,21 +97,7 @@ def find_clashes(session, test_atoms,
         else:
             from chimerax.atomic import structure_atoms
             universe_atoms = structure_atoms(test_atoms.unique_structures)
-        other_atoms = universe_atoms.subtract(test_atoms)
-        if distance_only:
-            cutoff = distance_only
-        else:
-            cutoff = 2.0 * assumed_max_vdw - clash_threshold
-        if use_scene_coords:
-            test_coords = test_atoms.scene_coords
-            other_coords = other_atoms.scene_coords
-        else:
-            test_coords = test_atoms.coords
-            other_coords = other_atoms.coords
-        from chimerax.geometry import find_close_points
-        t_close, o_close = find_close_points(test_coords, other_coords, cutoff)
-        test_atoms = test_atoms[t_close]
-        search_atoms = other_atoms[o_close]
+        search_atoms = universe_atoms.subtract(test_atoms)
     elif not isinstance(restrict, str):
         search_atoms = restrict
     else:
@@ -120,6 +106,72 @@ def find_clashes(session, test_atoms,
         test_atoms = test_atoms.filter(test_atoms.structures.visibles == True)
         search_atoms = search_atoms.filter(search_atoms.structures.visibles == True)
 
+    params = dict(assumed_max_vdw=assumed_max_vdw, bond_separation=bond_separation,
+        clash_threshold=clash_threshold, distance_only=distance_only, hbond_allowance=hbond_allowance,
+        inter_model=inter_model, inter_submodel=inter_submodel, intra_model=intra_model,
+        intra_res=intra_res, intra_mol=intra_mol, res_separation=res_separation,
+        use_scene_coords=use_scene_coords)
+    cache_key = tuple(sorted(params.items()))
+    from chimerax.atom_search import spatial_index
+    index = spatial_index(session)
+    cache = _clash_cache(session)
+    signature = _atoms_signature(test_atoms, search_atoms, hbond_allowance and not distance_only)
+    cached = cache.get(cache_key)
+    if cached is not None and cached.signature == signature and not cached.deleted_structures():
+        moved = cached.moved_atoms(index)
+        clashes = cached.clashes
+        if len(moved) > 0:
+            # Drop the clashes of moved atoms and re-test only those atoms.
+            for a in moved:
+                for nb in clashes.pop(a, {}):
+                    nb_clashes = clashes[nb]
+                    del nb_clashes[a]
+                    if not nb_clashes:
+                        del clashes[nb]
+            _add_clashes(index, test_atoms & moved, search_atoms, clashes, params)
+            _add_clashes(index, test_atoms, search_atoms & moved, clashes, params)
+    else:
+        clashes = {}
+        _add_clashes(index, test_atoms, search_atoms, clashes, params)
+        cached = _CachedClashes(signature, clashes)
+        cache.store(cache_key, cached)
+    cached.record_state(index, test_atoms, search_atoms)
+    return {a: dict(a_clashes) for a, a_clashes in clashes.items()}
+
+def _add_clashes(index, test_atoms, search_atoms, clashes, params):
+    """Add clashes between test_atoms and search_atoms to the 'clashes' dictionary"""
+    if len(test_atoms) == 0 or len(search_atoms) == 0:
+        return
+    assumed_max_vdw, bond_separation, clash_threshold, distance_only, hbond_allowance, \
+        inter_model, inter_submodel, intra_model, intra_res, intra_mol, res_separation, \
+        use_scene_coords = [params[k] for k in ("assumed_max_vdw", "bond_separation",
+        "clash_threshold", "distance_only", "hbond_allowance", "inter_model", "inter_submodel",
+        "intra_model", "intra_res", "intra_mol", "res_separation", "use_scene_coords")]
+    if distance_only:
+        cutoff = distance_only
+    else:
+        cutoff = test_atoms.radii + assumed_max_vdw - clash_threshold
+    i1, i2 = index.close_atom_pairs(test_atoms, search_atoms, cutoff, scene_coords=use_scene_coords)
+    # Cheap vectorized rejections before the per-pair tests
+    keep = test_atoms.pointers[i1] != search_atoms.pointers[i2]
+    if not intra_res:
+        keep &= test_atoms.residues.pointers[i1] != search_atoms.residues.pointers[i2]
+    if not inter_model or not intra_model:
+        same_model = test_atoms.structures.pointers[i1] == search_atoms.structures.pointers[i2]
+        if not inter_model:
+            keep &= same_model
+        if not intra_model:
+            keep &= ~same_model
+    i1, i2 = i1[keep], i2[keep]
+    if len(i1) == 0:
+        return
+    if use_scene_coords:
+        d = test_atoms.scene_coords[i1] - search_atoms.scene_coords[i2]
+    else:
+        d = test_atoms.coords[i1] - search_atoms.coords[i2]
+    from numpy import sqrt
+    distances = sqrt((d*d).sum(axis=1))
+
     if res_separation is not None:
         chain_pos = {}
         for s in test_atoms.unique_structures:
@@ -127,84 +179,211 @@ def find_clashes(session, test_atoms,
                 for i, r in enumerate(c.residues):
                     if r:
                         chain_pos[r] = i
-    from chimerax.atom_search import AtomSearchTree
-    tree = AtomSearchTree(search_atoms, scene_coords=inter_model)
-    clashes = {}
-    from chimerax.geometry import distance
     intra_mol_map = {}
-    for a in test_atoms:
+    exclusions_map = {}
+    for ti, si, dist in zip(i1, i2, distances):
+        a = test_atoms[ti]
+        nb = search_atoms[si]
+        try:
+            exclusions = exclusions_map[a]
+        except KeyError:
+            need_expansion = [a]
+            exclusions = set(need_expansion)
+            for i in range(bond_separation):
+                next_need = []
+                for expand in need_expansion:
+                    for n in expand.neighbors:
+                        if n in exclusions:
+                            continue
+                        exclusions.add(n)
+                        next_need.append(n)
+                need_expansion = next_need
+            exclusions_map[a] = exclusions
+            if not intra_mol and a not in intra_mol_map:
+                connected = set([a])
+                to_do = list(a.neighbors)
+                while to_do:
+                    conn = to_do.pop()
+                    connected.add(conn)
+                    for nb2 in conn.neighbors:
+                        if nb2 not in connected:
+                            to_do.append(nb2)
+                for ca in connected:
+                    intra_mol_map[ca] = connected
+        if nb in exclusions:
+            continue
+        if not intra_mol and nb in intra_mol_map[a]:
+            continue
+        if a in clashes and nb in clashes[a]:
+            continue
+        if res_separation is not None:
+            if a.residue.chain is not None and a.residue.chain == nb.residue.chain:
+                if abs(chain_pos[a.residue] - chain_pos[nb.residue]) < res_separation:
+                    continue
+        if not inter_submodel \
+        and a.structure.id and nb.structure.id \
+        and a.structure.id[0] == nb.structure.id[0] \
+        and a.structure.id[:-1] == nb.structure.id[:-1] \
+        and a.structure.id[1:] != nb.structure.id[1:]:
+            continue
         if distance_only:
-            cutoff = distance_only
+            clash = distance_only - dist
         else:
-            cutoff = a.radius + assumed_max_vdw - clash_threshold
-        crd = a.scene_coord if use_scene_coords else a.coord
-        nearby = tree.search(crd, cutoff)
-        if not nearby:
-            continue
-        need_expansion = [a]
-        exclusions = set(need_expansion)
-        for i in range(bond_separation):
-            next_need = []
-            for expand in need_expansion:
-                for n in expand.neighbors:
-                    if n in exclusions:
-                        continue
-                    exclusions.add(n)
-                    next_need.append(n)
-            need_expansion = next_need
-        if not intra_mol and a not in intra_mol_map:
-            connected = set([a])
-            to_do = list(a.neighbors)
-            while to_do:
-                conn = to_do.pop()
-                connected.add(conn)
-                for nb in conn.neighbors:
-                    if nb not in connected:
-                        to_do.append(nb)
-            for ca in connected:
-                intra_mol_map[ca] = connected
-        for nb in nearby:
-            if nb in exclusions:
-                continue
-            if not intra_res and a.residue == nb.residue:
-                continue
-            if not intra_mol and nb in intra_mol_map[a]:
-                continue
-            if not inter_model and a.structure != nb.structure:
-                continue
-            if not intra_model and a.structure == nb.structure:
-                continue
-            if a in clashes and nb in clashes[a]:
-                continue
-            if res_separation is not None:
-                if a.residue.chain is not None and a.residue.chain == nb.residue.chain:
-                    if abs(chain_pos[a.residue] - chain_pos[nb.residue]) < res_separation:
-                        continue
-            if not inter_submodel \
-            and a.structure.id and nb.structure.id \
-            and a.structure.id[0] == nb.structure.id[0] \
-            and a.structure.id[:-1] == nb.structure.id[:-1] \
-            and a.structure.id[1:] != nb.structure.id[1:]:
+            clash = a.radius + nb.radius - dist
+        if hbond_allowance and not distance_only:
+            if (_donor(a) and _acceptor(nb)) or (_donor(nb) and _acceptor(a)):
+                clash -= hbond_allowance
+        if distance_only:
+            if clash < 0.0:
                 continue
-            if use_scene_coords:
-                a_crd, nb_crd = a.scene_coord, nb.scene_coord
-            else:
-                a_crd, nb_crd = a.coord, nb.coord
-            if distance_only:
-                clash = distance_only - distance(a_crd, nb_crd)
-            else:
-                clash = a.radius + nb.radius - distance(a_crd, nb_crd)
-            if hbond_allowance and not distance_only:
-                if (_donor(a) and _acceptor(nb)) or (_donor(nb) and _acceptor(a)):
-                    clash -= hbond_allowance
-            if distance_only:
-                if clash < 0.0:
-                    continue
-            elif clash < clash_threshold:
+        elif clash < clash_threshold:
+            continue
+        clashes.setdefault(a, {})[nb] = clash
+        clashes.setdefault(nb, {})[a] = clash
+
+class _ClashCache:
+    """Clash results for recently used parameters.
+
+    Results refer to Atom and Structure objects, so they are dropped when
+    models are added, removed or renumbered, and when atoms, bonds, residues
+    or chains are created or deleted or residues are renumbered.  That way
+    closed models are not kept alive and a freed atom pointer reused by a new
+    atom never matches old results.  Changes not yet reported by the atomic
+    "changes" trigger are checked when an entry is used.
+    """
+
+    max_entries = 4
+
+    def __init__(self, session):
+        self._session = session
+        self._entries = {}      # key -> (change state, _CachedClashes), least recent first
+        from chimerax.core.models import ADD_MODELS, REMOVE_MODELS, MODEL_ID_CHANGED
+        t = session.triggers
+        self._handlers = [(t, t.add_handler(name, self._models_changed))
+                          for name in (ADD_MODELS, REMOVE_MODELS, MODEL_ID_CHANGED)]
+        from chimerax.atomic import get_triggers
+        at = get_triggers()
+        self._handlers.append((at, at.add_handler('changes', self._atomic_changes)))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        change_state, cached = entry
+        if change_state != _topology_change_state(self._session):
+            return None
+        self._entries[key] = entry     # Most recently used
+        return cached
+
+    def store(self, key, cached):
+        entries = self._entries
+        entries.pop(key, None)
+        entries[key] = (_topology_change_state(self._session), cached)
+        while len(entries) > self.max_entries:
+            del entries[next(iter(entries))]
+
+    def clear(self):
+        self._entries.clear()
+
+    def _models_changed(self, trigger_name, models):
+        self._entries.clear()
+
+    def _atomic_changes(self, trigger_name, changes):
+        if not self._entries:
+            return
+        reasons = (changes.atom_reasons(), changes.residue_reasons(),
+                   changes.chain_reasons(), changes.structure_reasons())
+        relevant = (any(_TOPOLOGY_CHANGE_REASONS.intersection(r) for r in reasons)
+                    or changes.num_deleted_atoms() or changes.num_deleted_bonds()
+                    or changes.num_deleted_residues() or changes.num_deleted_chains()
+                    or len(changes.created_atoms(False)) or len(changes.created_bonds(False))
+                    or len(changes.created_residues(False)) or len(changes.created_chains(False)))
+        if relevant:
+            self._entries.clear()
+        else:
+            # Reported changes have been cleared from the change tracker.
+            for key, (change_state, cached) in tuple(self._entries.items()):
+                self._entries[key] = ((), cached)
+
+# Residue changes that alter res_separation and intra_mol tests.
+_TOPOLOGY_CHANGE_REASONS = frozenset(['number changed', 'insertion_code changed',
+                                      'chain_id changed', 'residues changed'])
+_TOPOLOGY_CHANGE_CLASSES = ('Atom', 'Bond', 'Residue', 'Chain', 'Structure')
+
+def _topology_change_state(session):
+    # Summary of atomic changes not yet reported by the "changes" trigger.
+    ct = getattr(session, 'change_tracker', None)
+    if ct is None or not ct.changed:
+        return ()
+    global_changes, structure_changes = ct.changes
+    state = []
+    for class_name in _TOPOLOGY_CHANGE_CLASSES:
+        c = global_changes.get(class_name)
+        if c is None:
+            continue
+        reasons = _TOPOLOGY_CHANGE_REASONS.intersection(c.reasons)
+        state.append((len(c.created), c.total_deleted,
+                      len(c.modified) if reasons else 0, tuple(sorted(reasons))))
+    return tuple(state)
+
+def _clash_cache(session):
+    cache = getattr(session, '_clash_results_cache', None)
+    if cache is None:
+        session._clash_results_cache = cache = _ClashCache(session)
+    return cache
+
+def _atoms_signature(test_atoms, search_atoms, use_idatm):
+    """Hash of the atom properties (other than coordinates) that clash results depend on"""
+    from hashlib import sha1
+    h = sha1()
+    for atoms in (test_atoms, search_atoms):
+        h.update(atoms.pointers.tobytes())
+        h.update(atoms.radii.tobytes())
+        h.update(atoms.num_bonds.tobytes())
+        if use_idatm:
+            h.update('\0'.join(atoms.idatm_types).encode())
+        # Residue numbers, chains and model ids used by res_separation,
+        # intra_mol and inter_submodel tests.
+        residues = atoms.residues
+        h.update(residues.numbers.tobytes())
+        h.update('\0'.join(residues.insertion_codes).encode())
+        h.update('\0'.join(residues.chain_ids).encode())
+        h.update(repr([s.id for s in atoms.unique_structures]).encode())
+        h.update(b'|')
+    return h.digest()
+
+class _CachedClashes:
+    """Clash results along with the atom positions they were computed for"""
+    def __init__(self, signature, clashes):
+        self.signature = signature
+        self.clashes = clashes
+        self.generations = {}
+        self.positions = {}
+
+    def record_state(self, index, test_atoms, search_atoms):
+        structures = set(test_atoms.unique_structures) | set(search_atoms.unique_structures)
+        self.generations = {s: index.structure_index(s).generation for s in structures}
+        self.positions = {s: s.scene_position for s in structures}
+
+    def deleted_structures(self):
+        return [s for s in self.generations if s.deleted]
+
+    def moved_atoms(self, index):
+        """Atoms that moved since the results were computed"""
+        from chimerax.atomic import Atoms, concatenate
+        moved = []
+        for s, generation in self.generations.items():
+            if s.deleted:
                 continue
-            clashes.setdefault(a, {})[nb] = clash
-            clashes.setdefault(nb, {})[a] = clash
-    return clashes
+            indices = index.moved_atoms(s, generation)
+            if indices is None or s.scene_position != self.positions[s]:
+                moved.append(s.atoms)
+            elif len(indices) > 0:
+                moved.append(s.atoms[indices])
+        return concatenate(moved, Atoms) if moved else Atoms()
 
 from chimerax.atomic import Element
 hyd = Element.get_element(1)
@@ -114,6 +114,8 @@ class Opts:
         self.safe_mode = False
         self.toolshed = None
         self.disable_qt = False
+        self.startup_times = False
+        self.import_times = False
 
 
 def _parse_python_args(argv, usage):
@@ -273,6 +275,10 @@ def _parse_chimerax_args(argv, arguments, usage):
             opts.toolshed = optarg
         elif opt == "--disable-qt":
             opts.disable_qt = True
+        elif opt == "--startuptimes":
+            opts.startup_times = True
+        elif opt == "--importtimes":
+            opts.import_times = True
         else:
             print("Unknown option: ", opt)
             opts.help = True
@@ -321,6 +327,8 @@ def parse_arguments(argv):
         "--qtscalefactor <factor>",
         "--toolshed preview|<url>",
         "--disable-qt",
+        "--startuptimes",
+        "--importtimes",
     ]
     if sys.platform.startswith("win"):
         arguments += ["--console", "--noconsole"]
@@ -379,8 +387,55 @@ def parse_arguments(argv):
     return opts, args
 
 
+class _StartupTimer:
+    """Record time of each phase of initialization for --startuptimes."""
+
+    def __init__(self):
+        from time import perf_counter
+        self._start = self._last = perf_counter()
+        self.phases = []
+
+    def phase(self, name):
+        """Record time since the end of the previous phase."""
+        from time import perf_counter
+        t = perf_counter()
+        self.phases.append((name, t - self._last))
+        self._last = t
+
+    def report(self, file):
+        for name, seconds in self.phases:
+            print("startup phase %-24s %8.1f ms" % (name, 1000 * seconds), file=file)
+        print("startup phase %-24s %8.1f ms" % ("total", 1000 * (self._last - self._start)), file=file, flush=True)
+
+
+class _TimingReports:
+    """Print the --startuptimes and --importtimes reports once, either when
+    initialization finishes or at exit if init() returns or exits early
+    (e.g. a script calling sys.exit())."""
+
+    def __init__(self, timer, import_audit):
+        self.timer = timer
+        self.import_audit = import_audit
+        self._reported = False
+        import atexit
+        atexit.register(self.report)
+
+    def report(self):
+        if self._reported:
+            return
+        self._reported = True
+        import sys
+        if self.timer is not None:
+            self.timer.report(sys.stderr)
+        if self.import_audit is not None:
+            self.import_audit.stop()
+            from chimerax.core.toolshed import get_toolshed
+            self.import_audit.report(sys.stderr, get_toolshed())
+
+
 def init(argv, event_loop=True):
     import sys
+    timer = _StartupTimer()
     # MacOS 10.12+ generates drop event for command-line argument before main()
     # is even called; compensate
     bad_drop_events = False
@@ -409,6 +464,14 @@ def init(argv, event_loop=True):
         # MacOS doesn't generate these drop events for args after '--' flags
         bad_drop_events = False
     opts, args = parse_arguments(argv)
+    timer.phase("arguments")
+    import_audit = None
+    if opts.import_times:
+        from chimerax.core.import_audit import ImportAudit
+        import_audit = ImportAudit()
+        import_audit.start()
+    if opts.startup_times or opts.import_times:
+        timing_reports = _TimingReports(timer if opts.startup_times else None, import_audit)
     if not opts.devel:
         import warnings
         warnings.filterwarnings("ignore", category=DeprecationWarning)
@@ -562,6 +625,7 @@ def init(argv, event_loop=True):
         chimerax.app_bin_dir = os.path.join(rootdir, "bin")
     chimerax.app_data_dir = os.path.join(rootdir, "share")
     chimerax.app_lib_dir = os.path.join(rootdir, "lib")
+    timer.phase("environment")
 
     from chimerax.core import session
     try:
@@ -589,6 +653,8 @@ def init(argv, event_loop=True):
     from chimerax.core import attributes
     attributes.RegAttrManager(sess)
 
+    timer.phase("session")
+
     if opts.uninstall:
         return uninstall(sess)
 
@@ -627,6 +693,8 @@ def init(argv, event_loop=True):
         except Exception:
             pass
 
+    timer.phase("user interface")
+
     # common core initialization
     if not opts.silent:
         if sess.ui.is_gui and opts.debug:
@@ -653,6 +721,7 @@ def init(argv, event_loop=True):
             for line in f:
                 restart_action(line, inst_dir, restart_action_msgs)
         os.remove(tmp_file)
+    timer.phase("restart actions")
 
     if opts.toolshed is None:
         # Default to whatever the restart actions needed
@@ -665,6 +734,7 @@ def init(argv, event_loop=True):
                   check_available=opts.get_available_bundles,
                   remote_url=toolshed_url, session=sess)
     sess.toolshed = toolshed.get_toolshed()
+    timer.phase("toolshed")
     if opts.module != 'pip' and opts.run_path is None:
         # keep bugs in ChimeraX from preventing pip from working
         if not opts.silent:
@@ -675,6 +745,7 @@ def init(argv, event_loop=True):
         sess.tools = tools.Tools(sess, first=True)
         from chimerax.core import undo
         sess.undo = undo.Undo(sess, first=True)
+        timer.phase("bundle initialization")
 
     if opts.version >= 0:
         sess.silent = False
@@ -720,6 +791,7 @@ def init(argv, event_loop=True):
             if sess.ui.is_gui and opts.debug:
                 print("Starting main interface", flush=True)
         sess.ui.build()
+        timer.phase("main window")
 
     if opts.start_tools:
         if not opts.silent:
@@ -735,6 +807,7 @@ def init(argv, event_loop=True):
                 continue
             start_tools.append(tools[0][1])
         sess.tools.start_tools(start_tools)
+        timer.phase("start tools")
 
     if opts.commands:
         if not opts.silent:
@@ -757,6 +830,7 @@ def init(argv, event_loop=True):
                         traceback.print_exc(file=sys.__stderr__)
                     else:
                         sess.ui.thread_safe(sess.logger.report_exception, exc_info=sys.exc_info())
+        timer.phase("commands")
 
     if opts.scripts:
         if not opts.silent:
@@ -780,11 +854,15 @@ def init(argv, event_loop=True):
                     sess.ui.thread_safe(sess.logger.report_exception, exc_info=sys.exc_info())
             except SystemExit as e:
                 return e.code
+        timer.phase("scripts")
 
     if not opts.silent:
         if sess.ui.is_gui and opts.debug:
             print("Finished initialization", flush=True)
 
+    if opts.startup_times or opts.import_times:
+        timing_reports.report()
+
     if not opts.silent:
         from chimerax.core.logger import log_version
         log_version(sess.logger)  # report version in log
@@ -36,3 +36,4 @@ from .atomspec import AtomSpecArg, all_objects
 from .atomspec import register_selector, deregister_selector
 from .atomspec import list_selectors, get_selector, get_selector_description
 from .atomspec import is_selector_user_defined, is_selector_atomic
+from .atomspec import clear_atomspec_cache, set_atomspec_profiling, report_atomspec_profile
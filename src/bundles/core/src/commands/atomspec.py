@@ -801,6 +801,37 @@ class _Part:
                             return ic <= end_ic
         return matcher
 
+    def string_mask(self, values, case_sensitive=False):
+        # Boolean mask of values matching string_matcher(), testing each
+        # distinct value only once.
+        import numpy
+        if len(values) == 0:
+            return numpy.zeros(0, dtype=numpy.bool_)
+        uvalues, index = numpy.unique(values, return_inverse=True)
+        matcher = self.string_matcher(case_sensitive)
+        umask = numpy.array([matcher(v) for v in uvalues], dtype=numpy.bool_)
+        return umask[index]
+
+    def res_id_mask(self, numbers, insertion_codes):
+        # Boolean mask of (residue number, insertion code) pairs matching
+        # res_id_matcher(), or None if this part is not a residue id.
+        # Residues without insertion codes are tested once per distinct number.
+        matcher = self.res_id_matcher()
+        if matcher is None:
+            return None
+        import numpy
+        numbers = numpy.asarray(numbers)
+        has_ic = numpy.array([bool(ic) for ic in insertion_codes], dtype=numpy.bool_)
+        mask = numpy.zeros(len(numbers), dtype=numpy.bool_)
+        plain = ~has_ic
+        if plain.any():
+            useq, index = numpy.unique(numbers[plain], return_inverse=True)
+            umask = numpy.array([matcher(seq, "") for seq in useq], dtype=numpy.bool_)
+            mask[plain] = umask[index]
+        for i in numpy.nonzero(has_ic)[0]:
+            mask[i] = matcher(numbers[i], insertion_codes[i])
+        return mask
+
     def _parse_as_res_id(self, n, at_start):
         if at_start:
             if n.lower() == "start":
@@ -1080,13 +1111,22 @@ class AtomSpec:
         Objects instance
             Instance containing data (atoms, bonds, etc) that match
             this atom specifier.
+
+        When evaluated for all models, results of specifiers that only
+        name models, chains, residues and atoms are cached (see
+        :py:func:`clear_atomspec_cache`).
         """
         # print("evaluate:", str(self))
+        if models is not None:
+            return self._evaluate(session, models, order_implicit_atoms=order_implicit_atoms,
+                                  add_implied=add_implied)
+        models = session.models.list(**kw)
+        models.sort(key=lambda m: m.id)
+        return atomspec_cache(session).evaluate(self, models, order_implicit_atoms, add_implied, kw)
+
+    def _evaluate(self, session, models, *, order_implicit_atoms=False, add_implied=None):
         if add_implied is None:
             add_implied = self._add_implied
-        if models is None:
-            models = session.models.list(**kw)
-            models.sort(key=lambda m: m.id)
         if self._operator is None:
             results = self._left_spec.evaluate(
                 session, models, top=False, ordered=order_implicit_atoms, add_implied=add_implied)
@@ -1130,6 +1170,194 @@ class AtomSpec:
         return results
 
 
+#
+# Cache of evaluated atom specifiers
+#
+
+# Change reasons of atomic data which can alter what a specifier matches.
+_SPEC_CHANGE_REASONS = frozenset(['name changed', 'number changed', 'insertion_code changed',
+                                  'chain_id changed', 'residues changed', 'sequence changed'])
+# Atomic classes whose creation or deletion can alter what a specifier matches.
+_SPEC_CHANGE_CLASSES = ('Atom', 'Bond', 'Pseudobond', 'Residue', 'Chain', 'Structure',
+                        'PseudobondGroup')
+
+
+def _cacheable(spec):
+    # Specifiers naming only models, chains, residues and atoms depend on state
+    # whose changes the cache tracks.  Selectors, zones and attribute tests can
+    # depend on anything (selection, coordinates, custom attributes), so they
+    # are always evaluated.
+    if isinstance(spec, AtomSpec):
+        return _cacheable(spec._left_spec) and (
+            spec._operator is None or _cacheable(spec._right_spec))
+    if isinstance(spec, _Invert):
+        return _cacheable(spec._atomspec)
+    if isinstance(spec, _Term):
+        return _cacheable(spec._specifier)
+    if isinstance(spec, _ModelList):
+        return all(_cacheable(m) for m in spec)
+    if isinstance(spec, _SubPart):
+        return not spec.my_attrs and all(_cacheable(p) for p in (spec.sub_parts or ()))
+    return False
+
+
+class _AtomSpecCache:
+    """Results of atom specifiers evaluated for all models.
+
+    Entries are dropped when models are added, removed or renumbered, and
+    when atomic structures change in ways that can alter which atoms a
+    specifier names (atoms, bonds, residues or chains created or deleted,
+    or names, numbers or chain ids changed).  Changes not yet reported by
+    the atomic "changes" trigger are checked when an entry is used.
+    """
+
+    max_entries = 64
+
+    def __init__(self, session):
+        self._session = session
+        self._entries = {}      # key -> (models, change state, Objects), least recent first
+        self.profile = None     # spec string -> [evaluations, cache hits, seconds]
+        from ..models import ADD_MODELS, REMOVE_MODELS, MODEL_ID_CHANGED
+        t = session.triggers
+        self._handlers = [(t, t.add_handler(name, self._models_changed))
+                          for name in (ADD_MODELS, REMOVE_MODELS, MODEL_ID_CHANGED)]
+        try:
+            from chimerax.atomic import get_triggers
+        except ImportError:
+            pass
+        else:
+            at = get_triggers()
+            self._handlers.append((at, at.add_handler('changes', self._atomic_changes)))
+
+    def evaluate(self, spec, models, order_implicit_atoms, add_implied, kw):
+        if self.profile is not None:
+            from time import perf_counter
+            t0 = perf_counter()
+        key = self._key(spec, order_implicit_atoms, add_implied, kw)
+        results = None if key is None else self._lookup(key, models)
+        hit = results is not None
+        if not hit:
+            results = spec._evaluate(self._session, models, order_implicit_atoms=order_implicit_atoms,
+                                     add_implied=add_implied)
+            if key is not None:
+                self._store(key, models, results)
+        if self.profile is not None:
+            p = self.profile.setdefault(str(spec), [0, 0, 0.0])
+            p[0] += 1
+            p[1] += hit
+            p[2] += perf_counter() - t0
+        return results
+
+    def _key(self, spec, order_implicit_atoms, add_implied, kw):
+        if not _cacheable(spec):
+            return None
+        try:
+            key = (str(spec), bool(order_implicit_atoms), add_implied, tuple(sorted(kw.items())))
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def _lookup(self, key, models):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        emodels, change_state, results = entry
+        if (len(emodels) != len(models) or any(m1 is not m2 for m1, m2 in zip(emodels, models))
+                or change_state != self._change_state()):
+            return None
+        self._entries[key] = entry     # Most recently used
+        return results.copy()
+
+    def _store(self, key, models, results):
+        entries = self._entries
+        entries[key] = (tuple(models), self._change_state(), results.copy())
+        while len(entries) > self.max_entries:
+            del entries[next(iter(entries))]
+
+    def _change_state(self):
+        # Summary of atomic changes not yet reported by the "changes" trigger.
+        # Such changes accumulate until reported, so an entry is still valid if
+        # the summary is the same as when the entry was made.
+        ct = getattr(self._session, 'change_tracker', None)
+        if ct is None or not ct.changed:
+            return ()
+        global_changes, structure_changes = ct.changes
+        state = []
+        for class_name in _SPEC_CHANGE_CLASSES:
+            c = global_changes.get(class_name)
+            if c is None:
+                continue
+            reasons = _SPEC_CHANGE_REASONS.intersection(c.reasons)
+            state.append((len(c.created), c.total_deleted,
+                          len(c.modified) if reasons else 0, tuple(sorted(reasons))))
+        return tuple(state)
+
+    def clear(self):
+        self._entries.clear()
+
+    def _models_changed(self, trigger_name, models):
+        self._entries.clear()
+
+    def _atomic_changes(self, trigger_name, changes):
+        if not self._entries:
+            return
+        reasons = (changes.atom_reasons(), changes.residue_reasons(),
+                   changes.chain_reasons(), changes.structure_reasons())
+        relevant = (any(_SPEC_CHANGE_REASONS.intersection(r) for r in reasons)
+                    or changes.num_deleted_atoms() or changes.num_deleted_bonds()
+                    or changes.num_deleted_pseudobonds() or changes.num_deleted_residues()
+                    or changes.num_deleted_chains()
+                    or len(changes.created_atoms(False)) or len(changes.created_bonds(False))
+                    or len(changes.created_residues(False)) or len(changes.created_chains(False))
+                    or len(changes.created_pseudobonds()))
+        if relevant:
+            self._entries.clear()
+        else:
+            # Reported changes have been cleared from the change tracker.
+            for key, (models, change_state, results) in tuple(self._entries.items()):
+                self._entries[key] = (models, (), results)
+
+
+def atomspec_cache(session):
+    """Return the atom specifier results cache for the session."""
+    cache = getattr(session, '_atomspec_cache', None)
+    if cache is None:
+        session._atomspec_cache = cache = _AtomSpecCache(session)
+    return cache
+
+
+def clear_atomspec_cache(session):
+    """Discard cached atom specifier results.  Needed only if code changes
+    which atoms a specifier names without reporting it to the atomic change
+    tracker."""
+    atomspec_cache(session).clear()
+
+
+def set_atomspec_profiling(session, enable=True):
+    """Start or stop recording the time taken to evaluate each atom specifier.
+    Starting discards previously recorded times."""
+    atomspec_cache(session).profile = {} if enable else None
+
+
+def report_atomspec_profile(session):
+    """Log evaluation times recorded since profiling was started, slowest
+    specifiers first, and return them as a list of
+    (specifier, evaluations, cache hits, seconds) tuples."""
+    profile = atomspec_cache(session).profile
+    if profile is None:
+        from ..errors import UserError
+        raise UserError('Atom specifier profiling is not on')
+    times = sorted(((spec, n, hits, t) for spec, (n, hits, t) in profile.items()),
+                   key=lambda st: st[3], reverse=True)
+    lines = ['Atom specifier evaluation times for %d specifiers' % len(times),
+             '%8s %8s %10s %10s  %s' % ('count', 'cached', 'total ms', 'mean ms', 'specifier')]
+    lines.extend('%8d %8d %10.2f %10.3f  %s' % (n, hits, 1000 * t, 1000 * t / n, spec)
+                 for spec, n, hits, t in times)
+    session.logger.info('\n'.join(lines))
+    return times
+
+
 def add_implied_bonds(objects):
     atoms = objects.atoms
     objects.add_bonds(atoms.intra_bonds)
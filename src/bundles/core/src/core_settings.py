@@ -43,6 +43,8 @@ class _CoreSettings(Settings):
         'http_proxy': ("", 80),
         'https_proxy': ("", 443),
         'resize_window_on_session_restore': False,
+        'thread_pool_size': 0,  # worker threads for calculations, 0 = number of CPU cores
+        'fetch_cache_max_size': 0,  # bytes, 0 = no limit
     }
     AUTO_SAVE = {
         'toolshed_update_interval': 'week',
@@ -60,6 +60,10 @@ def fetch_file(session, url, name, save_name, save_dir, *,
     :param error_status: whether to give a status message if fetching fails
     :returns: the filename
     :raises UserError: if unsuccessful
+
+    Files saved in the cache are recorded in the
+    :py:class:`~chimerax.core.fetch_cache.FetchCache` index, which
+    removes least recently used files when over its size limit.
     """
     from os import path, makedirs
     from urllib.request import URLError, urlparse
@@ -77,7 +81,13 @@ def fetch_file(session, url, name, save_name, save_dir, *,
                 in_timeout_cache = True
                 ignore_cache = False
     cache_dirs = cache_directories()
+    from .fetch_cache import fetch_cache
+    cache = fetch_cache()
     if not ignore_cache and save_dir is not None:
+        filename = cache.lookup(save_dir, save_name)
+        if filename is not None:
+            return filename
+        # Files not in the index, e.g. fetched before the index existed
         for d in cache_dirs:
             filename = path.join(d, save_dir, save_name)
             if path.exists(filename):
@@ -95,12 +105,18 @@ def fetch_file(session, url, name, save_name, save_dir, *,
         filename = path.join(dirname, save_name)
         makedirs(dirname, exist_ok=True)
 
+    response_headers = {}
     try:
         retrieve_url(url, filename, uncompress=uncompress, transmit_compressed=transmit_compressed,
-                     logger=session.logger, check_certificates=check_certificates, name=name,
-                     timeout=timeout, error_status=error_status)
+                     logger=session.logger if session else None,
+                     check_certificates=check_certificates, name=name,
+                     timeout=timeout, error_status=error_status,
+                     response_headers=response_headers)
     except (URLError, EOFError) as err:
         raise UserError('Fetching url %s failed:\n%s' % (url, str(err)))
+    if save_dir is not None:
+        cache.add(save_dir, save_name, url, etag=response_headers.get('etag'),
+                  last_modified=response_headers.get('last-modified'))
     return filename
 
 
@@ -123,7 +139,8 @@ def cache_directories():
 # -----------------------------------------------------------------------------
 #
 def retrieve_url(url, filename, *, logger=None, uncompress=False, transmit_compressed=True,
-                 update=False, check_certificates=True, name=None, timeout=60, error_status=True):
+                 update=False, check_certificates=True, name=None, timeout=60, error_status=True,
+                 response_headers=None):
     """Return requested URL in filename
 
     :param url: the URL to retrive
@@ -135,6 +152,8 @@ def retrieve_url(url, filename, *, logger=None, uncompress=False, transmit_compr
     :param check_certificates: if true
     :param timeout: maximum time to wait for http response
     :param error_status: whether to give a status message if fetching fails
+    :param response_headers: optional dictionary filled in with the HTTP response headers,
+        keyed by lowercase header name
     :returns: None if an existing file, otherwise the content type
     :raises urllib.request.URLError or EOFError: if unsuccessful
 
@@ -206,6 +225,8 @@ def retrieve_url(url, filename, *, logger=None, uncompress=False, transmit_compr
                     request.get_full_url()))
             d = response.headers['Last-modified']
             last_modified = _convert_to_timestamp(d)
+            if response_headers is not None:
+                response_headers.update((k.lower(), v) for k, v in response.headers.items())
             content_length = response.headers['Content-Length']
             if content_length is not None:
                 content_length = int(content_length)
@@ -265,7 +286,8 @@ def read_and_report_progress(file_in, file_out, name, content_length, logger, ch
             msg = 'Fetching %s, %.3g of %.3g Mbytes received' % (name, tb / 1048576, content_length / 1048576)
         else:
             msg = 'Fetching %s, %.3g Mbytes received' % (name, tb / 1048576)
-        logger.status(msg)
+        if logger:
+            logger.status(msg)
 
     if content_length is not None and tb != content_length:
         # In ChimeraX bug #2747 zero bytes were read and no error reported.
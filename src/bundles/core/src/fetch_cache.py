@@ -0,0 +1,360 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+"""
+fetch_cache: Index and size limit for the fetched file cache
+=============================================================
+
+Files fetched by :py:func:`~chimerax.core.fetch.fetch_file` are kept in
+per-database subdirectories of the cache directory.  The cache keeps an index
+in that directory recording each file's size, source URL, HTTP ETag and
+last-modified date, SHA-256 checksum, and last access time, so least recently
+used files can be removed to keep the cache under a size limit.  Only files
+recorded by fetch_file() are in the index.  Other files in the cache directory,
+such as files saved there by the user, are never removed.  Several ChimeraX
+processes can share the cache since each merges its changes with the index
+file under a file lock when writing it.
+"""
+
+INDEX_FILE_NAME = '.fetch_cache_index.json'
+INDEX_VERSION = 1
+
+
+class FetchCache:
+    """Index of the files in a fetch cache directory.
+
+    Methods may be called from multiple threads.
+    """
+
+    def __init__(self, directory, max_size=None):
+        self.directory = directory
+        self.max_size = max_size        # bytes, None or 0 for no limit
+        self.hits = 0
+        self.misses = 0
+        import threading
+        self._lock = threading.RLock()
+        self._entries = None            # relative path -> entry dict
+        self._changed = set()           # relative paths added or accessed since last write
+        self._removed = set()           # relative paths removed since last write
+
+    # Entries are loaded on first use.
+    def _index(self):
+        if self._entries is None:
+            self._entries = self._load_index()
+        return self._entries
+
+    def _load_index(self):
+        import json
+        from os import path
+        index_path = path.join(self.directory, INDEX_FILE_NAME)
+        try:
+            with open(index_path, encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get('version') == INDEX_VERSION:
+                return index.get('entries', {})
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def _set_changed(self, rel_path):
+        self._changed.add(rel_path)
+        self._removed.discard(rel_path)
+
+    def _set_removed(self, rel_path):
+        self._removed.add(rel_path)
+        self._changed.discard(rel_path)
+
+    def save_index(self):
+        """Write the index file if it has changed."""
+        with self._lock:
+            if self._entries is not None and (self._changed or self._removed):
+                self._sync()
+
+    def _sync(self):
+        # Merge changes with the index file, which other ChimeraX processes
+        # may have changed, and write it if there are changes.
+        import filelock
+        import json
+        import os
+        os.makedirs(self.directory, exist_ok=True)
+        index_path = os.path.join(self.directory, INDEX_FILE_NAME)
+        with filelock.FileLock(index_path + '.lock').acquire():
+            entries = self._load_index()
+            mine = self._index()
+            for rel_path in self._removed:
+                entries.pop(rel_path, None)
+            for rel_path in self._changed:
+                e = mine.get(rel_path)
+                if e is None:
+                    continue
+                other = entries.get(rel_path)
+                if other is not None and other['fetched'] > e['fetched']:
+                    # Another process fetched the file again.
+                    other['last_access'] = max(other['last_access'], e['last_access'])
+                else:
+                    if other is not None:
+                        e['last_access'] = max(other['last_access'], e['last_access'])
+                    entries[rel_path] = e
+            if self._changed or self._removed:
+                tmp_path = index_path + '.%d.tmp' % os.getpid()
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'version': INDEX_VERSION, 'entries': entries}, f)
+                os.replace(tmp_path, index_path)
+            self._entries = entries
+            self._changed.clear()
+            self._removed.clear()
+
+    @staticmethod
+    def _rel_path(save_dir, save_name):
+        return '%s/%s' % (save_dir, save_name)
+
+    def path(self, save_dir, save_name):
+        from os import path
+        return path.join(self.directory, save_dir, save_name)
+
+    def lookup(self, save_dir, save_name):
+        """Return path to cached file or None, and record the access.
+        Files deleted outside ChimeraX are removed from the index."""
+        import os
+        import time
+        rel_path = self._rel_path(save_dir, save_name)
+        filename = self.path(save_dir, save_name)
+        with self._lock:
+            entries = self._index()
+            entry = entries.get(rel_path)
+            if entry is not None and not os.path.exists(filename):
+                del entries[rel_path]
+                self._set_removed(rel_path)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry['last_access'] = time.time()
+            self._set_changed(rel_path)
+        return filename
+
+    def add(self, save_dir, save_name, url, etag=None, last_modified=None):
+        """Record a newly fetched file and remove old files if over the size limit."""
+        import os
+        import time
+        filename = self.path(save_dir, save_name)
+        size = os.path.getsize(filename)
+        checksum = file_checksum(filename)
+        now = time.time()
+        rel_path = self._rel_path(save_dir, save_name)
+        with self._lock:
+            self._index()[rel_path] = {'size': size, 'url': url, 'etag': etag,
+                                       'last_modified': last_modified, 'sha256': checksum,
+                                       'fetched': now, 'last_access': now}
+            self._set_changed(rel_path)
+            if self.max_size:
+                self.prune(self.max_size, keep=(rel_path,))
+            self.save_index()
+
+    def entry(self, save_dir, save_name):
+        with self._lock:
+            e = self._index().get(self._rel_path(save_dir, save_name))
+            return None if e is None else dict(e)
+
+    def entries(self):
+        """Return list of (relative path, entry) for all cached files."""
+        with self._lock:
+            return [(p, dict(e)) for p, e in self._index().items()]
+
+    def total_size(self, database=None):
+        with self._lock:
+            return sum(e['size'] for p, e in self._index().items()
+                       if database is None or p.split('/', 1)[0] == database)
+
+    def databases(self):
+        """Return dictionary mapping cache subdirectory to (file count, total bytes)."""
+        dbs = {}
+        with self._lock:
+            for p, e in self._index().items():
+                db = p.split('/', 1)[0]
+                count, size = dbs.get(db, (0, 0))
+                dbs[db] = (count + 1, size + e['size'])
+        return dbs
+
+    def prune(self, max_size, database=None, older_than=None, keep=()):
+        """Remove least recently used files until the cache (or the database subdirectory)
+        is no bigger than max_size bytes, and remove files last accessed more than
+        older_than seconds ago.  Only files in the index are removed.
+        Returns the number of files and bytes removed."""
+        import time
+        with self._lock:
+            # Include files fetched by other ChimeraX processes.
+            self._sync()
+            entries = self._index()
+            candidates = [(e['last_access'], p) for p, e in entries.items()
+                          if p not in keep and (database is None or p.split('/', 1)[0] == database)]
+            candidates.sort()
+            size = sum(entries[p]['size'] for a, p in candidates) + \
+                sum(entries[p]['size'] for p in keep if p in entries)
+            cutoff = None if older_than is None else time.time() - older_than
+            nfiles = nbytes = 0
+            for last_access, p in candidates:
+                too_big = max_size is not None and size > max_size
+                too_old = cutoff is not None and last_access < cutoff
+                if not too_big and not too_old:
+                    break       # Remaining files were accessed more recently.
+                s = self._remove(p)
+                size -= s
+                nfiles += 1
+                nbytes += s
+            if nfiles:
+                self.save_index()
+        return nfiles, nbytes
+
+    def clear(self, database=None):
+        """Remove all indexed cached files, or those of one database subdirectory."""
+        return self.prune(0, database=database)
+
+    def _remove(self, rel_path):
+        import os
+        entry = self._entries.pop(rel_path)
+        self._set_removed(rel_path)
+        try:
+            os.remove(os.path.join(self.directory, *rel_path.split('/')))
+        except OSError:
+            pass
+        return entry['size']
+
+    def verify(self, remove_bad=True):
+        """Check file sizes and checksums against the index.  Returns list of bad files,
+        which are removed from the cache if remove_bad is true."""
+        import os
+        bad = []
+        for rel_path, e in self.entries():
+            filename = os.path.join(self.directory, *rel_path.split('/'))
+            try:
+                size = os.path.getsize(filename)
+            except OSError:
+                size = None
+            if size != e['size'] or (e['sha256'] and file_checksum(filename) != e['sha256']):
+                bad.append(rel_path)
+        if remove_bad and bad:
+            with self._lock:
+                for rel_path in bad:
+                    if rel_path in self._entries:
+                        self._remove(rel_path)
+                self.save_index()
+        return bad
+
+
+def file_checksum(filename, chunk_size=1048576):
+    """SHA-256 checksum of a file as a hex string."""
+    import hashlib
+    h = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        while True:
+            data = f.read(chunk_size)
+            if not data:
+                break
+            h.update(data)
+    return h.hexdigest()
+
+
+_fetch_cache = None
+
+
+def fetch_cache():
+    """Return the fetch cache for the primary cache directory."""
+    global _fetch_cache
+    if _fetch_cache is None:
+        from .fetch import cache_directories
+        _fetch_cache = FetchCache(cache_directories()[0], _max_size_setting())
+        import atexit
+        atexit.register(_fetch_cache.save_index)
+    return _fetch_cache
+
+
+def set_fetch_cache_size(max_size):
+    """Set the fetch cache size limit in bytes (None or 0 for no limit) and save it as a setting."""
+    fc = fetch_cache()
+    fc.max_size = max_size or None
+    try:
+        from .core_settings import settings
+        settings.fetch_cache_max_size = max_size or 0
+        settings.save('fetch_cache_max_size')
+    except ImportError:
+        pass
+    if fc.max_size:
+        fc.prune(fc.max_size)
+
+
+def _max_size_setting():
+    try:
+        from .core_settings import settings
+        return settings.fetch_cache_max_size or None
+    except (ImportError, AttributeError):
+        return None
+
+
+def prefetch(session, fetches, nthread=4, ignore_cache=False):
+    """Fetch several files concurrently into the cache.
+
+    :param fetches: sequence of (url, name, save_name, save_dir) tuples as used
+        by :py:func:`~chimerax.core.fetch.fetch_file`
+    :param nthread: maximum number of simultaneous downloads
+    :returns: list of (filename or None, error message or None) in the order of fetches
+    """
+    from .fetch import fetch_file
+    from .errors import UserError
+
+    def fetch_one(url, name, save_name, save_dir):
+        try:
+            return fetch_file(None, url, name, save_name, save_dir,
+                              ignore_cache=ignore_cache, error_status=False), None
+        except UserError as e:
+            return None, str(e)
+
+    from .threadq import thread_pool
+    results = thread_pool().map(fetch_one, fetches, nthread=nthread)
+    failed = [r[1] for r in results if r[0] is None]
+    msg = 'Prefetched %d of %d files' % (len(results) - len(failed), len(results))
+    if failed:
+        msg += ', %d failed: %s' % (len(failed), '; '.join(failed[:5]))
+    session.logger.info(msg)
+    return results
+
+
+def prefetch_ids(session, ids, url_template, save_dir, save_name_template=None, nthread=4,
+                 ignore_cache=False):
+    """Prefetch files for a list of database identifiers.
+
+    The url and optional save name templates are formatted with keyword 'id',
+    e.g. 'https://files.rcsb.org/download/{id}.cif'.  The default save name is
+    the last component of the URL.
+    """
+    fetches = []
+    for ident in ids:
+        url = url_template.format(id=ident)
+        if save_name_template is None:
+            save_name = url.rstrip('/').rsplit('/', 1)[-1]
+        else:
+            save_name = save_name_template.format(id=ident)
+        fetches.append((url, '%s %s' % (save_dir, ident), save_name, save_dir))
+    return prefetch(session, fetches, nthread=nthread, ignore_cache=ignore_cache)
@@ -0,0 +1,166 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+"""
+frame_profiler: Time the phases of graphics frame updates and trigger handlers
+==============================================================================
+
+While recording, the update loop reports the time of each frame phase
+('new frame', 'changes', 'graphics update', 'draw', 'frame drawn') and every
+trigger handler invocation is timed.  The most recent durations for each
+phase and handler are kept for summary statistics and histograms, and the
+most recent timed intervals are kept as events that can be saved in Chrome
+trace format (viewable with chrome://tracing or https://ui.perfetto.dev)
+to see which handlers stall interactive rendering.
+"""
+
+# Histogram bin upper edges in milliseconds.
+HISTOGRAM_BINS_MS = (0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, float('inf'))
+
+class FrameProfiler:
+    """Supported API. Record frame phase and trigger handler times."""
+
+    def __init__(self, max_samples = 1000, max_events = 100000, time_handlers = True):
+        self.max_samples = max_samples		# Durations kept per phase or handler
+        self.max_events = max_events		# Intervals kept for trace output
+        self.time_handlers = time_handlers
+        self.recording = False
+        self.clear()
+
+    def clear(self):
+        self._samples = {}		# Maps (category, name) to deque of durations in seconds
+        self._counts = {}		# Maps (category, name) to total call count
+        self._totals = {}		# Maps (category, name) to total time in seconds
+        from collections import deque
+        self._events = deque(maxlen = self.max_events)
+        from time import perf_counter
+        self._start_time = perf_counter()
+        self.num_frames = 0
+
+    def start(self):
+        """Supported API. Clear previous results and start recording."""
+        self.clear()
+        self.recording = True
+        if self.time_handlers:
+            from . import triggerset
+            triggerset.set_handler_profiler(self)
+
+    def stop(self):
+        """Supported API. Stop recording.  Recorded times are kept."""
+        self.recording = False
+        from . import triggerset
+        if triggerset.handler_profiler() is self:
+            triggerset.set_handler_profiler(None)
+
+    def record(self, category, name, start, duration):
+        """Record a timed interval.  Start and duration are perf_counter() seconds."""
+        key = (category, name)
+        s = self._samples.get(key)
+        if s is None:
+            from collections import deque
+            self._samples[key] = s = deque(maxlen = self.max_samples)
+            self._counts[key] = 0
+            self._totals[key] = 0
+        s.append(duration)
+        self._counts[key] += 1
+        self._totals[key] += duration
+        from threading import get_ident
+        self._events.append((category, name, start, duration, get_ident()))
+
+    def record_frame(self, phases):
+        """Record a frame given a list of (phase name, start time, end time)."""
+        if not phases:
+            return
+        for name, t0, t1 in phases:
+            self.record('frame phase', name, t0, t1 - t0)
+        start, end = phases[0][1], phases[-1][2]
+        self.record('frame', 'frame', start, end - start)
+        self.num_frames += 1
+
+    def record_handler(self, trigger_name, handler_name, start, duration):
+        self.record('trigger handler', '%s: %s' % (trigger_name, handler_name), start, duration)
+
+    def statistics(self):
+        """
+        Supported API. Return a list of dictionaries, one per frame phase or trigger
+        handler, ordered by decreasing total time.  Times are in milliseconds and
+        statistics other than call count and total time are for the most recent
+        max_samples calls.
+        """
+        stats = []
+        for key, samples in self._samples.items():
+            category, name = key
+            ms = sorted(1000 * t for t in samples)
+            n = len(ms)
+            stats.append({
+                'category': category,
+                'name': name,
+                'count': self._counts[key],
+                'total_ms': 1000 * self._totals[key],
+                'mean_ms': sum(ms) / n,
+                'median_ms': ms[n//2],
+                'p95_ms': ms[min(n-1, int(0.95*n))],
+                'max_ms': ms[-1],
+                'histogram': _histogram(ms),
+            })
+        stats.sort(key = lambda s: s['total_ms'], reverse = True)
+        return stats
+
+    def json_results(self):
+        """Supported API. Return statistics and histogram bins as a JSON string."""
+        from time import perf_counter
+        results = {
+            'duration_seconds': perf_counter() - self._start_time,
+            'frames': self.num_frames,
+            'histogram_bins_ms': [str(b) if b == float('inf') else b for b in HISTOGRAM_BINS_MS],
+            'statistics': self.statistics(),
+        }
+        import json
+        return json.dumps(results, indent = 2)
+
+    def chrome_trace(self):
+        """Supported API. Return recorded intervals as a JSON string in Chrome trace event format."""
+        import os
+        pid = os.getpid()
+        t0 = self._start_time
+        events = [{'name': name, 'cat': category, 'ph': 'X', 'pid': pid, 'tid': tid,
+                   'ts': round(1e6 * (start - t0), 3), 'dur': round(1e6 * duration, 3)}
+                  for category, name, start, duration, tid in self._events]
+        import json
+        return json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'})
+
+    def save(self, path, format = 'json'):
+        """Supported API. Save results to a file, format 'json' for statistics or 'trace' for Chrome trace."""
+        text = self.chrome_trace() if format == 'trace' else self.json_results()
+        with open(path, 'w') as f:
+            f.write(text)
+
+def _histogram(sorted_ms):
+    counts = [0] * len(HISTOGRAM_BINS_MS)
+    b = 0
+    for t in sorted_ms:
+        while t > HISTOGRAM_BINS_MS[b]:
+            b += 1
+        counts[b] += 1
+    return counts
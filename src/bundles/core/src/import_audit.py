@@ -0,0 +1,132 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+"""
+import_audit: Report time spent importing each bundle
+=====================================================
+
+Used with the --importtimes command-line option to find which bundles are
+imported at startup and by scripts, and how long each takes to import.
+The time for a bundle is the time to execute its modules, including
+modules from other packages (e.g. numpy) they import, but excluding
+modules of other ChimeraX bundles, which are reported separately.
+"""
+
+class ImportAudit:
+    """Time execution of imported modules whose names start with a prefix."""
+
+    def __init__(self, prefix = 'chimerax.'):
+        self.prefix = prefix
+        self.module_times = {}		# Module name -> seconds excluding nested audited modules
+        self._stack = []		# Nested time of modules being executed
+        self._finder = None
+
+    def start(self):
+        if self._finder is None:
+            import sys
+            self._finder = _AuditFinder(self)
+            sys.meta_path.insert(0, self._finder)
+
+    def stop(self):
+        if self._finder is not None:
+            import sys
+            sys.meta_path.remove(self._finder)
+            self._finder = None
+
+    def _exec_module(self, loader, module):
+        from time import perf_counter
+        stack = self._stack
+        stack.append(0.0)
+        t0 = perf_counter()
+        try:
+            loader.exec_module(module)
+        finally:
+            t = perf_counter() - t0
+            nested = stack.pop()
+            self.module_times[module.__name__] = t - nested
+            if stack:
+                stack[-1] += t
+
+    def bundle_times(self, toolshed = None):
+        """
+        Return list of (bundle name, seconds, number of modules) ordered by
+        decreasing time.  Modules are grouped using the toolshed to find
+        their bundle, or if it is None or no bundle is found, by the first
+        two components of the module name.
+        """
+        totals = {}
+        for module_name, t in self.module_times.items():
+            bi = toolshed.find_bundle_for_module(module_name) if toolshed else None
+            name = bi.name if bi else '.'.join(module_name.split('.')[:2])
+            tn = totals.setdefault(name, [0.0, 0])
+            tn[0] += t
+            tn[1] += 1
+        btimes = [(name, t, n) for name, (t, n) in totals.items()]
+        btimes.sort(key = lambda btn: btn[1], reverse = True)
+        return btimes
+
+    def report(self, file, toolshed = None):
+        btimes = self.bundle_times(toolshed)
+        print("import time %-36s %8s %8s" % ("bundle", "ms", "modules"), file = file)
+        for name, t, n in btimes:
+            print("import time %-36s %8.1f %8d" % (name, 1000 * t, n), file = file)
+        total = sum(t for name, t, n in btimes)
+        print("import time %-36s %8.1f %8d" % ("total (%d bundles)" % len(btimes), 1000 * total,
+                                               len(self.module_times)), file = file, flush = True)
+
+class _AuditFinder:
+    """Meta path finder that wraps loaders of audited modules to time them."""
+
+    def __init__(self, audit):
+        self._audit = audit
+
+    def find_spec(self, name, path, target = None):
+        if not name.startswith(self._audit.prefix):
+            return None
+        import sys
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimedLoader(spec.loader, self._audit)
+                return spec
+        return None
+
+class _TimedLoader:
+    """Delegate to a module loader, timing module execution."""
+
+    def __init__(self, loader, audit):
+        self._loader = loader
+        self._audit = audit
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._audit._exec_module(self._loader, module)
@@ -129,6 +129,14 @@ class Objects:
         self.add_bonds(other.bonds)
         self.add_pseudobonds(other.pseudobonds)
 
+    def copy(self):
+        """Return a new collection with the same contents."""
+        c = Objects(atoms = self.atoms, bonds = self.bonds, pseudobonds = self.pseudobonds,
+                    models = self._models)
+        for m, minst in self.model_instances.items():
+            c.add_model_instances(m, minst)
+        return c
+
     def invert(self, session, models):
         from chimerax.atomic import Structure, PseudobondGroup, Atoms, Bonds, Pseudobonds, concatenate
         matoms = []
@@ -227,6 +227,15 @@ def _obj_stack(parents, obj):
     return " -> ".join(stack)
 
 
+def _top_model_number(obj, parents):
+    # top level model number of the model that obj was found in, or None
+    from .models import Model
+    for o in (obj,) + tuple(reversed(parents)):
+        if isinstance(o, Model) and o.id:
+            return o.id[0]
+    return None
+
+
 class _SaveManager:
     """Manage session saving"""
 
@@ -236,6 +245,7 @@ class _SaveManager:
         self.graph = {}         # dependency graph
         self.unprocessed = []   # item: LIFO [obj]
         self.processed = {}     # item: {_UniqueName(obj)/attr_name: data}
+        self.owners = {}        # item: (state manager tag, top level model number)
         self._found_objs = []
         _UniqueName.reset()
 
@@ -244,15 +254,28 @@ class _SaveManager:
         self.graph.clear()
         self.unprocessed.clear()
         self.processed.clear()
+        self.owners.clear()
         self._found_objs.clear()
         _UniqueName.reset()
 
     def discovery(self, containers):
-        for key, value in containers.items():
+        # Discover everything reachable from the 'models' container before
+        # other state managers, such as named views, so that objects in the
+        # model hierarchy are owned by 'models' and can be restored by model number.
+        keys = list(containers.keys())
+        if 'models' in containers:
+            keys.remove('models')
+            self._discover(containers, ['models'])
+        self._discover(containers, keys)
+
+    def _discover(self, containers, keys):
+        for key in keys:
+            value = containers[key]
             sm = self.session.snapshot_methods(value)
             if sm is None and len(value) == 0:
                 continue
             try:
+                self.owners[key] = (key, None)
                 if sm is None:
                     self.processed[key] = self.process(value, (key,))
                     self.graph[key] = self._found_objs
@@ -276,6 +299,7 @@ class _SaveManager:
                 except Exception as e:
                     raise ValueError("error processing: %s: %s" % (_obj_stack(parents, obj), e))
                 self.graph[key] = self._found_objs
+                self.owners[key] = (parents[0], _top_model_number(obj, parents))
 
     def _add_obj(self, obj, parents=()):
         uid = _UniqueName.from_obj(self.session, obj)
@@ -321,6 +345,13 @@ class _SaveManager:
             except StopIteration:
                 return
 
+    def walk_with_owners(self):
+        # like walk, but also gives the state manager tag and top level model number of each item
+        owners = self.owners
+        for key, value in self.walk():
+            tag, model_number = owners.get(key, (None, None))
+            yield key, value, tag, model_number
+
     def bundle_infos(self):
         bundle_infos = {}
         for bi in _UniqueName._bundle_infos:
@@ -395,6 +426,195 @@ class _RestoreManager:
         session.logger.warning(msg, is_html=True, add_newline=False)
 
 
+#: Approximate uncompressed size of the sections of a version 4 session file
+SESSION_SECTION_SIZE = 4 * 1024 * 1024
+_SECTION_INDEX_MAGIC = b'CXSINDEX'
+
+
+def _section_codec(compress):
+    # (compress, decompress) functions for session file sections
+    if compress is None or compress == 'none':
+        def identity(data):
+            return data
+        return identity, identity
+    if compress == 'lz4':
+        import lz4.frame
+        return lz4.frame.compress, lz4.frame.decompress
+    if compress == 'gzip':
+        import zlib
+        return zlib.compress, zlib.decompress
+    raise UserError('Unknown session file compression "%s"' % compress)
+
+
+class _SectionWriter:
+    """Write version 4 session files
+
+    A version 4 session file has a header line, followed by sections of
+    serialized (name, data) items that are compressed independently, then
+    an index of the sections, and finally the file offset of the index.
+    Sections hold items from a single state manager and are compressed in
+    parallel.  The index records the state manager and top level model number
+    of each item so files can be restored section by section, or only
+    for some models.
+    """
+
+    def __init__(self, stream, compress):
+        self.stream = stream
+        self.compress = compress
+        self._compress = _section_codec(compress)[0]
+        from . import serialize
+        self._packer = serialize.msgpack_serialize_stream(None)[1]
+        import os
+        from concurrent.futures import ThreadPoolExecutor
+        self._max_pending = os.cpu_count() or 1
+        self._executor = ThreadPoolExecutor(max_workers=self._max_pending)
+        self._pending = []      # (section info, future compressed data)
+        self._sections = []
+        header = b'# ChimeraX Session version 4\n'
+        stream.write(header)
+        self._offset = len(header)
+        self._start_section(None)
+
+    def _start_section(self, tag):
+        self._buffer = []
+        self._buffer_size = 0
+        self._info = {'tag': tag, 'names': [], 'models': []}
+
+    def add(self, name, data, tag, model_number):
+        info = self._info
+        if info['names'] and (tag != info['tag'] or self._buffer_size >= SESSION_SECTION_SIZE):
+            self._finish_section()
+            self._start_section(tag)
+        self._info['tag'] = tag
+        pack = self._packer.pack
+        for obj in (name, data):
+            b = pack(obj)
+            self._buffer.append(b)
+            self._buffer_size += len(b)
+        self._info['names'].append(name)
+        self._info['models'].append(model_number)
+
+    def _finish_section(self):
+        if not self._info['names']:
+            return
+        data = b''.join(self._buffer)
+        self._buffer = []
+        self._info['data_size'] = len(data)
+        self._pending.append((self._info, self._executor.submit(self._compress, data)))
+        while len(self._pending) > self._max_pending:
+            self._write_section()
+
+    def _write_section(self):
+        info, future = self._pending.pop(0)
+        data = future.result()
+        info['offset'] = self._offset
+        info['size'] = len(data)
+        self.stream.write(data)
+        self._offset += len(data)
+        self._sections.append(info)
+
+    def finish(self, metadata, bundle_infos):
+        self._finish_section()
+        while self._pending:
+            self._write_section()
+        self._executor.shutdown()
+        index = {
+            'metadata': metadata,
+            'bundle_infos': bundle_infos,
+            'compression': self.compress,
+            'sections': self._sections,
+        }
+        index_offset = self._offset
+        self.stream.write(self._packer.pack(index))
+        import struct
+        self.stream.write(struct.pack('<Q', index_offset) + _SECTION_INDEX_MAGIC)
+
+    def abort(self):
+        self._executor.shutdown(cancel_futures=True)
+
+
+class _SectionReader:
+    """Read version 4 session files written by :py:class:`_SectionWriter`"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        if not stream.seekable():
+            raise UserError("version 4 session files must be read from a seekable file")
+        import struct
+        trailer_size = 8 + len(_SECTION_INDEX_MAGIC)
+        file_size = stream.seek(0, 2)
+        stream.seek(file_size - trailer_size)
+        trailer = stream.read(trailer_size)
+        if len(trailer) != trailer_size or trailer[8:] != _SECTION_INDEX_MAGIC:
+            raise UserError("corrupt session file (missing section index)")
+        index_offset = struct.unpack('<Q', trailer[:8])[0]
+        stream.seek(index_offset)
+        index = self._unpack(stream.read(file_size - trailer_size - index_offset))
+        if len(index) != 1:
+            raise UserError("corrupt session file (bad section index)")
+        index = index[0]
+        self.metadata = index['metadata']
+        self.bundle_infos = index['bundle_infos']
+        self.compression = index['compression']
+        self.sections = index['sections']
+        self._decompress = _section_codec(self.compression)[1]
+
+    @staticmethod
+    def _unpack(data):
+        from . import serialize
+        from io import BytesIO
+        return list(serialize.msgpack_deserialize_stream(BytesIO(data)))
+
+    def _read_compressed(self, section):
+        stream = self.stream
+        stream.seek(section['offset'])
+        data = stream.read(section['size'])
+        if len(data) != section['size']:
+            raise UserError("corrupt session file (truncated section)")
+        return data
+
+    def read_section(self, i):
+        """Return list of (name, data) items in section i"""
+        section = self.sections[i]
+        values = self._unpack(self._decompress(self._read_compressed(section)))
+        return list(zip(values[0::2], values[1::2]))
+
+    def items(self, wanted=None):
+        """Generate (name, data) items in restore order.
+
+        If wanted is given, it is called with the state manager tag and top level
+        model number of each item and only items it returns true for are generated.
+        Sections without any wanted items are not read.  Sections are decompressed
+        in parallel a few sections ahead of the item being restored.
+        """
+        sections = []
+        for section in self.sections:
+            if wanted is None:
+                keep = None
+            else:
+                keep = [wanted(section['tag'], m) for m in section['models']]
+                if not any(keep):
+                    continue
+            sections.append((section, keep))
+        import os
+        from concurrent.futures import ThreadPoolExecutor
+        max_pending = os.cpu_count() or 1
+        pending = []
+        with ThreadPoolExecutor(max_workers=max_pending) as executor:
+            next_section = 0
+            while next_section < len(sections) or pending:
+                while next_section < len(sections) and len(pending) < max_pending:
+                    section, keep = sections[next_section]
+                    future = executor.submit(self._decompress, self._read_compressed(section))
+                    pending.append((future, keep))
+                    next_section += 1
+                future, keep = pending.pop(0)
+                values = self._unpack(future.result())
+                for i, (name, data) in enumerate(zip(values[0::2], values[1::2])):
+                    if keep is None or keep[i]:
+                        yield name, data
+
+
 class UserAliases(StateManager):
 
     def reset_state(self, session):
@@ -455,6 +675,7 @@ class Session:
                  offscreen_rendering=False):
         self._snapshot_methods = {}     # For saving classes with no State base class.
         self._state_containers = {}     # stuff to save in sessions.
+        self._deferred_attributes = {}  # attribute name -> function to set attribute
 
         self.app_name = app_name
         self.debug = debug
@@ -553,6 +774,24 @@ class Session:
             else:
                 container.clear()
 
+    def defer_attribute(self, name, create):
+        """Supported API. Call create() to set the named attribute when it is first used.
+
+        This allows starting managers only when needed.
+        The attribute is not deferred if it is set before it is used.
+        """
+        self._deferred_attributes[name] = create
+
+    def __getattr__(self, name):
+        # Only called for attributes that are not set.
+        deferred = self.__dict__.get('_deferred_attributes')
+        create = deferred.pop(name, None) if deferred else None
+        if create is None:
+            raise AttributeError("%r object has no attribute %r"
+                                 % (self.__class__.__name__, name))
+        create()
+        return object.__getattribute__(self, name)
+
     def __setattr__(self, name, value):
         object.__setattr__(self, name, value)
         if not name.startswith('_') and self.snapshot_methods(value, base_type=StateManager) is not None:
@@ -608,25 +847,26 @@ class Session:
         '''
         self._snapshot_methods.update(methods)
 
-    def save(self, stream, version, include_maps=False):
-        """Serialize session to binary stream."""
+    def save(self, stream, version, include_maps=False, compress='lz4'):
+        """Serialize session to binary stream.
+
+        Compress is only used by version 4 files, which compress each section
+        of the file separately, and can be 'lz4', 'gzip' or None.
+        """
         from . import serialize
         flags = State.SESSION
         if include_maps:
             flags |= State.INCLUDE_MAPS
         mgr = _SaveManager(self, flags)
         self.triggers.activate_trigger("begin save session", self)
+        writer = None
         try:
             if version == 1:
                 raise UserError("Version 1 formatted session files are no longer supported")
             elif version == 2:
                 raise UserError("Version 2 formatted session files are no longer supported")
-            else:
-                if version != 3:
-                    raise UserError("Only version 3 formatted session files are supported")
-                stream.write(b'# ChimeraX Session version 3\n')
-                stream = serialize.msgpack_serialize_stream(stream)
-                fserialize = serialize.msgpack_serialize
+            elif version not in (3, 4):
+                raise UserError("Only version 3 and 4 formatted session files are supported")
             metadata = standard_metadata(self.metadata)
             # TODO: put thumbnail in metadata
             # stash attribute info into metadata...
@@ -634,6 +874,17 @@ class Session:
             for tag, container in self._state_containers.items():
                 attr_info[tag] = getattr(self, tag, None) == container
             metadata['attr_info'] = attr_info
+            if version == 4:
+                writer = _SectionWriter(stream, compress)
+                mgr.discovery(self._state_containers)
+                for name, data, tag, model_number in mgr.walk_with_owners():
+                    writer.add(name, data, tag, model_number)
+                writer.finish(metadata, mgr.bundle_infos())
+                writer = None
+                return
+            stream.write(b'# ChimeraX Session version 3\n')
+            stream = serialize.msgpack_serialize_stream(stream)
+            fserialize = serialize.msgpack_serialize
             fserialize(stream, metadata)
             # guarantee that bundles are serialized first, so on restoration,
             # all of the related code will be loaded before the rest of the
@@ -646,12 +897,18 @@ class Session:
                 fserialize(stream, data)
             fserialize(stream, None)
         finally:
+            if writer is not None:
+                writer.abort()
             mgr.cleanup()
             self.triggers.activate_trigger("end save session", self)
 
     def restore(self, stream, path=None, resize_window=None, restore_camera=True,
-                clear_log=True, metadata_only=False, combine=False):
-        """Deserialize session from binary stream."""
+                clear_log=True, metadata_only=False, combine=False, models=None):
+        """Deserialize session from binary stream.
+
+        If models is a list of top level model numbers, only those models are
+        restored, and no other session state.  This requires a version 4 file.
+        """
         from . import serialize
         if hasattr(stream, 'peek'):
             first_byte = stream.peek(1)
@@ -683,12 +940,19 @@ class Session:
             if version == 2:
                 raise UserError("session file format version 2 detected.  DO NOT USE.  Recreate session from scratch, and then save.")
             elif version == 3:
+                if models is not None:
+                    raise UserError("restoring only some models needs a version 4 session file")
                 stream = serialize.msgpack_deserialize_stream(stream)
+            elif version == 4:
+                reader = _SectionReader(stream)
             else:
                 raise UserError(
                     "need newer version of ChimeraX to restore session")
             fdeserialize = serialize.msgpack_deserialize
-        metadata = fdeserialize(stream)
+        if version == 4:
+            metadata = reader.metadata
+        else:
+            metadata = fdeserialize(stream)
         if metadata is None:
             raise UserError("corrupt session file (missing metadata)")
         metadata['session_version'] = version
@@ -697,7 +961,24 @@ class Session:
             return
 
         mgr = _RestoreManager()
-        bundle_infos = fdeserialize(stream)
+        if version == 4:
+            bundle_infos = reader.bundle_infos
+            if models is None:
+                wanted = None
+            else:
+                model_numbers = set(models)
+                def wanted(tag, model_number):
+                    return tag == 'models' and (model_number is None or model_number in model_numbers)
+            items = reader.items(wanted)
+        else:
+            bundle_infos = fdeserialize(stream)
+            def stream_items():
+                while True:
+                    name = fdeserialize(stream)
+                    if name is None:
+                        break
+                    yield name, fdeserialize(stream)
+            items = stream_items()
         try:
             mgr.check_bundles(self, bundle_infos)
         except RestoreError as e:
@@ -719,11 +1000,7 @@ class Session:
             self.session_file_path = path
             self.metadata.update(metadata)
             attr_info = self.metadata.pop('attr_info', {})
-            while True:
-                name = fdeserialize(stream)
-                if name is None:
-                    break
-                data = fdeserialize(stream)
+            for name, data in items:
                 data = mgr.resolve_references(data)
                 if isinstance(name, str):
                     if attr_info.get(name, False):
@@ -878,7 +1155,11 @@ def save(session, path, version=3, compress='lz4', include_maps=False):
     Option compress can be lz4 (default), gzip, or None.
     Tests saving 3j3z show lz4 is as fast as uncompressed and 4x smaller file size,
     and gzip is 2.5 times slower with 7x smaller file size.
+    Version 3 files (default) compress the whole file, while version 4 files
+    compress each section of the file separately and in parallel.  Version 4
+    files cannot be opened by ChimeraX versions before it was introduced.
     """
+    open_func = None
     if hasattr(path, 'write'):
         # called via export, it's really a stream
         output = path
@@ -888,7 +1169,7 @@ def save(session, path, version=3, compress='lz4', include_maps=False):
         if not path.endswith(SESSION_SUFFIX):
             path += SESSION_SUFFIX
 
-        if compress is None or compress == 'none':
+        if compress is None or compress == 'none' or version >= 4:
             from .safesave import SaveBinaryFile
             open_func = SaveBinaryFile
         elif compress == 'gzip':
@@ -914,7 +1195,7 @@ def save(session, path, version=3, compress='lz4', include_maps=False):
 
     session.session_file_path = path
     try:
-        session.save(output, version=version, include_maps=include_maps)
+        session.save(output, version=version, include_maps=include_maps, compress=compress)
     except Exception:
         if open_func is not None:
             output.close("exceptional")
@@ -978,17 +1259,29 @@ def sdump(session, session_file, output=None):
             version = int(tokens[4])
             if version == 2:
                 raise UserError("Use UCSF ChimeraX 0.8 for Session file format version 2.")
+            elif version == 4:
+                reader = _SectionReader(stream)
             else:
                 stream = serialize.msgpack_deserialize_stream(stream)
             fdeserialize = serialize.msgpack_deserialize
         print("==== session version:", file=output)
         pprint(version, stream=output)
         print("==== session metadata:", file=output)
-        metadata = fdeserialize(stream)
+        metadata = reader.metadata if version == 4 else fdeserialize(stream)
         pprint(metadata, stream=output)
         print("==== bundle info:", file=output)
-        bundle_infos = fdeserialize(stream)
+        bundle_infos = reader.bundle_infos if version == 4 else fdeserialize(stream)
         pprint(bundle_infos, stream=output)
+        if version == 4:
+            for i, section in enumerate(reader.sections):
+                print('==== section %d: state manager %r, %d items, %d bytes (%d compressed)'
+                      % (i, section['tag'], len(section['names']), section['data_size'],
+                         section['size']), file=output)
+                for name, data in reader.read_section(i):
+                    data = dereference_state(data, lambda x: x, _UniqueName)
+                    print('==== name/uid:', name, file=output)
+                    pprint(data, stream=output)
+            return
         while True:
             name = fdeserialize(stream)
             if name is None:
@@ -999,7 +1292,7 @@ def sdump(session, session_file, output=None):
             pprint(data, stream=output)
 
 
-def open(session, path, resize_window=None, combine=False):
+def open(session, path, resize_window=None, combine=False, models=None):
     if hasattr(path, 'read'):
         # Given a stream instead of a file name.
         fname = path.name
@@ -1019,7 +1312,8 @@ def open(session, path, resize_window=None, combine=False):
     # current session
     session.session_file_path = path
     try:
-        session.restore(stream, path=path, resize_window=resize_window, combine=combine)
+        session.restore(stream, path=path, resize_window=resize_window, combine=combine,
+                        models=models)
     except UserError as ue:
         raise UserError(f"Unable to restore session: {ue}")
     return [], "opened ChimeraX session"
@@ -0,0 +1,66 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Measure ChimeraX startup time for each phase of initialization by starting
+# ChimeraX without graphics several times with the --startuptimes option.
+# The first run can rebuild the installed bundle cache, so it is reported
+# separately from the following runs.
+#
+#   ChimeraX --nogui --exit --script "startup_benchmark.py [num_runs]"
+#
+def benchmark(num_runs = 5, log = print):
+
+    import subprocess, sys
+    command = [sys.executable, '-m', 'chimerax.core', '--nogui', '--exit', '--silent',
+               '--nostatus', '--startuptimes']
+    runs = []
+    for r in range(num_runs):
+        p = subprocess.run(command, stdout = subprocess.PIPE, stderr = subprocess.PIPE)
+        times = _parse_startup_times(p.stderr.decode('utf-8', 'replace'))
+        if p.returncode != 0 or not times:
+            log('ChimeraX startup failed, exit code %d' % p.returncode)
+            return
+        runs.append(times)
+
+    phases = list(runs[0].keys())
+    log('%-24s %10s %10s %10s' % ('phase', 'first ms', 'mean ms', 'min ms'))
+    for phase in phases:
+        later = [times[phase] for times in runs[1:] if phase in times] or [runs[0][phase]]
+        log('%-24s %10.1f %10.1f %10.1f'
+            % (phase, runs[0][phase], sum(later) / len(later), min(later)))
+
+def _parse_startup_times(text):
+    times = {}
+    prefix = 'startup phase '
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            fields = line[len(prefix):].split()
+            times[' '.join(fields[:-2])] = float(fields[-2])
+    return times
+
+if __name__ == '__main__' or __name__.startswith('ChimeraX_sandbox'):
+    import sys
+    num_runs = int(sys.argv[1]) if len(sys.argv) >= 2 else 5
+    benchmark(num_runs)
@@ -9,6 +9,7 @@
 # or derivations thereof.
 # === UCSF ChimeraX Copyright ===
 
+import os
 import threading
 class WorkThread(threading.Thread):
     """Run a function in a thread."""
@@ -34,40 +35,292 @@ class WorkThread(threading.Thread):
             self.out_queue.put(r)
             self.in_queue.task_done()
 
-# List of return values does not match args ordering.
-def apply_to_list(func, args, nthread = None):
+# -----------------------------------------------------------------------------
+# Process-wide pool of worker threads shared by all sessions so that
+# calculations do not pay thread startup costs on every call.
+#
+_pool = None
+_pool_lock = threading.Lock()
+_worker_state = threading.local()
+
+class ThreadPool:
+    """
+    Pool of worker threads with futures, ordered map over argument lists,
+    and chunked map/reduce over NumPy arrays.  Batches of work can be
+    registered with a session's Tasks manager so they show in the task panel
+    with their run time and can be canceled.
+    """
+    def __init__(self, max_workers = None):
+        self._executor = None
+        self._max_workers = None
+        self.resize(max_workers)
+
+    @property
+    def max_workers(self):
+        return self._max_workers
+
+    def resize(self, max_workers = None):
+        """Set the number of worker threads, default is the number of CPU cores."""
+        if not max_workers:
+            max_workers = os.cpu_count() or 1
+        if max_workers == self._max_workers and self._executor is not None:
+            return
+        old = self._executor
+        from concurrent.futures import ThreadPoolExecutor
+        self._executor = ThreadPoolExecutor(max_workers = max_workers,
+                                            thread_name_prefix = 'ChimeraX worker',
+                                            initializer = _mark_worker_thread)
+        self._max_workers = max_workers
+        if old is not None:
+            old.shutdown(wait = False)
+
+    def shutdown(self, wait = True, cancel_futures = True):
+        """Stop the worker threads.  They are started again if the pool is used later."""
+        if self._executor is not None:
+            self._executor.shutdown(wait = wait, cancel_futures = cancel_futures)
+            self._executor = None
+
+    def _running_executor(self):
+        with _pool_lock:
+            if self._executor is None:
+                self.resize(self._max_workers)
+            return self._executor
+
+    def submit(self, func, *args, **kw):
+        """Run func(*args, **kw) in a worker thread and return a concurrent.futures.Future."""
+        return self._running_executor().submit(func, *args, **kw)
+
+    def map(self, func, args, nthread = None, session = None, name = None, log_time = False):
+        """
+        Apply func(*a) for each tuple a in args using worker threads and return
+        the list of results in the same order as args.  An exception raised by
+        any call is raised here after the remaining calls are canceled.
+        If called from a worker thread the calls are made serially to avoid
+        waiting on the pool from inside the pool.  If session is given the
+        calculation is shown as a task which can be terminated, raising
+        chimerax.core.errors.CancelOperation.
+        """
+        args = list(args)
+        if nthread is None:
+            nthread = self._max_workers
+        if nthread <= 1 or len(args) <= 1 or in_worker_thread():
+            return [func(*a) for a in args]
+        return self._run(func, args, nthread, session, name, log_time)
+
+    def map_chunks(self, func, array, reduce = None, chunk_size = None, axis = 0,
+                   nthread = None, session = None, name = None, log_time = False):
+        """
+        Split a NumPy array along an axis into chunks and call func(chunk, start)
+        for each in worker threads, where start is the index of the chunk's first
+        element along the axis.  Chunks are views of the array, so func can modify
+        them in place.  If reduce is None the list of results in chunk order is
+        returned, otherwise reduce(results) is returned.  The default chunk size
+        gives about 4 chunks per worker thread.  Errors, cancellation and task
+        reporting are as for map().
+        """
+        n = array.shape[axis]
+        if nthread is None:
+            nthread = self._max_workers
+        if chunk_size is None:
+            chunk_size = max(1, -(-n // (4*nthread)))
+        args = []
+        for start in range(0, n, chunk_size):
+            index = [slice(None)] * array.ndim
+            index[axis] = slice(start, min(n, start + chunk_size))
+            args.append((array[tuple(index)], start))
+        results = self.map(func, args, nthread = nthread, session = session,
+                           name = name, log_time = log_time)
+        return results if reduce is None else reduce(results)
+
+    def map_async(self, session, func, args, callback, name = None, log_time = False):
+        """
+        Like map() but returns immediately with a PoolTask shown in the task list.
+        When all calls finish, callback(results) is called in the main thread, or
+        callback(None) if the task was terminated.  If a call raised an error,
+        it is reported in the log and the callback is not called.
+        """
+        args = list(args)
+        task = PoolTask(session, name or _func_name(func), len(args))
+        timed_func = _timed_call(func)
+        results = [None] * len(args)
+        call_times = [0.0] * len(args)
+        from time import perf_counter
+        t0 = perf_counter()
+        def done(f, i):
+            if not f.cancelled():
+                try:
+                    results[i], call_times[i] = f.result()
+                except BaseException as e:
+                    task.error = e
+            with _pool_lock:
+                task.completed += 1
+                last = (task.completed == task.count)
+            if last:
+                session.ui.thread_safe(finish)
+        def finish():
+            elapsed = perf_counter() - t0
+            if task.terminating():
+                task.finished(canceled = True)
+                callback(None)
+                return
+            task.finished(call_times = call_times)
+            if task.error is not None:
+                session.logger.report_exception(exc_info = (type(task.error), task.error,
+                                                            task.error.__traceback__))
+                return
+            if log_time:
+                session.logger.info('%s: %d calls in %.3g seconds, %.3g seconds total in threads'
+                                    % (task.name, len(args), elapsed, sum(call_times)))
+            callback(results)
+        if len(args) == 0:
+            session.ui.thread_safe(finish)
+        executor = self._running_executor()
+        for i, a in enumerate(args):
+            f = executor.submit(timed_func, *a)
+            task.futures.append(f)
+            f.add_done_callback(lambda f, i=i: done(f, i))
+        return task
+
+    def _run(self, func, args, nthread, session, name, log_time):
+        from time import perf_counter
+        t0 = perf_counter()
+        task = None if session is None else PoolTask(session, name or _func_name(func), len(args))
+        timed_func = _timed_call(func)
+        futures = {}
+        next_arg = 0
+        results = [None] * len(args)
+        call_times = [0.0] * len(args)
+        from concurrent.futures import wait, FIRST_COMPLETED
+        executor = self._running_executor()
+        try:
+            # Limit queued calls to the requested thread count.
+            while next_arg < len(args) or futures:
+                while next_arg < len(args) and len(futures) < nthread:
+                    f = executor.submit(timed_func, *args[next_arg])
+                    futures[f] = next_arg
+                    next_arg += 1
+                done, not_done = wait(futures, timeout = 0.1 if task else None,
+                                      return_when = FIRST_COMPLETED)
+                for f in done:
+                    i = futures.pop(f)
+                    results[i], call_times[i] = f.result()
+                    if task:
+                        task.completed += 1
+                if task and task.terminating():
+                    from .errors import CancelOperation
+                    raise CancelOperation('%s canceled' % task.name)
+        except BaseException:
+            for f in futures:
+                f.cancel()
+            if task:
+                task.finished(canceled = True)
+            raise
+        elapsed = perf_counter() - t0
+        if task:
+            task.finished(call_times = call_times)
+        if log_time and session is not None:
+            session.logger.info('%s: %d calls in %.3g seconds, %d threads, %.3g seconds total in threads'
+                                % (name or _func_name(func), len(args), elapsed,
+                                   nthread, sum(call_times)))
+        return results
+
+def _mark_worker_thread():
+    _worker_state.is_worker = True
+
+def in_worker_thread():
+    """Return whether the current thread is a thread pool worker."""
+    return getattr(_worker_state, 'is_worker', False)
+
+def _timed_call(func):
+    from time import perf_counter
+    def timed(*args):
+        t0 = perf_counter()
+        r = func(*args)
+        return r, perf_counter() - t0
+    return timed
 
+def _func_name(func):
+    return getattr(func, '__name__', 'calculation')
+
+def thread_pool():
+    """
+    Return the process-wide thread pool, creating it if needed.
+    Its size is the thread_pool_size core setting, 0 meaning the number of CPU cores.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPool(_thread_pool_size_setting())
+    return _pool
+
+def set_thread_pool_size(max_workers):
+    """Change the number of worker threads, 0 or None means number of CPU cores."""
+    thread_pool().resize(max_workers)
+
+def _thread_pool_size_setting():
+    try:
+        from .core_settings import settings
+        return settings.thread_pool_size
+    except (ImportError, AttributeError):
+        return None
+
+def _reset_pool_after_fork():
+    # A forked child process has none of the parent's threads, so using the
+    # inherited pool would hang.  A new pool is made when next needed.
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child = _reset_pool_after_fork)
+
+# -----------------------------------------------------------------------------
+#
+from .tasks import Task
+class PoolTask(Task):
+    """
+    Task shown in the session task list while a batch of thread pool calls runs.
+    Terminating the task cancels the batch.
+    """
+    def __init__(self, session, name, count):
+        Task.__init__(self, session)
+        self.name = name
+        self.count = count
+        self.completed = 0
+        self.call_times = None
+        self.futures = []
+        self.error = None
+        import datetime, threading
+        self.start_time = datetime.datetime.now()
+        self._terminate = threading.Event()
+        self.state = 'running'
+
+    def __str__(self):
+        return '%s (%d of %d done)' % (self.name, self.completed, self.count)
+
+    def run(self):
+        pass
+
+    def terminate(self):
+        for f in self.futures:
+            f.cancel()
+        Task.terminate(self)
+
+    def finished(self, call_times = None, canceled = False):
+        import datetime
+        self.end_time = datetime.datetime.now()
+        self.call_times = call_times
+        if self.id in self.session.tasks:
+            self.session.tasks.remove(self)
+        self.state = 'terminated' if canceled else 'finished'
+
+# -----------------------------------------------------------------------------
+#
+def apply_to_list(func, args, nthread = None):
+    """
+    Apply func(*a) for each tuple a in args using the shared thread pool.
+    Returns the list of results in the same order as args.
+    """
     if nthread is None:
-        from multiprocessing import cpu_count
-        nthread = cpu_count()//2
-
-    nthread = min(len(args), nthread)
-
-    if nthread <= 1:
-        return [func(*a) for a in args]
-
-    # Create input and output queues.
-    from queue import Queue
-    in_queue = Queue()
-    for a in args:
-        in_queue.put(a)
-    out_queue = Queue()
-
-    # Create threads.
-    # Threads will exit when there is no more input.
-    for i in range(nthread):
-        t = WorkThread(func, in_queue, out_queue)
-        t.daemon = True
-        t.start()
-
-    # Wait until input queue is empty.
-    in_queue.join()
-
-    results = []
-    while not out_queue.empty():
-        r = out_queue.get()
-        if isinstance(r, Exception):
-            raise r
-        results.append(r)
-
-    return results
+        nthread = max(1, (os.cpu_count() or 1)//2)
+    return thread_pool().map(func, args, nthread = nthread)
@@ -743,16 +743,17 @@ class Toolshed:
         """Supported API. Find bundle registering given command
 
         `cmd` must be the full command name, not an abbreviation."""
-        for bi in self._installed_bundle_info:
-            for ci in bi.commands:
-                if ci.name == cmd:
-                    return bi
-        return None
+        return self._installed_bundle_info.bundle_for_command(cmd)
 
     def find_bundle_for_class(self, cls):
         """Supported API. Find bundle that has given class"""
 
-        package = tuple(cls.__module__.split('.'))
+        return self.find_bundle_for_module(cls.__module__)
+
+    def find_bundle_for_module(self, module_name):
+        """Supported API. Find bundle that has the named module"""
+
+        package = tuple(module_name.split('.'))
         while package:
             try:
                 return self._installed_packages[package]
@@ -852,23 +853,37 @@ class Toolshed:
                 if kw.pop("autostart", "true") == "false":
                     _debug("skip non-autostart manager %s for bundle %r" % (mgr, bi.name))
                     continue
+                if kw.pop("lazy", "false") == "true" and not session.ui.is_gui:
+                    # Graphical interface managers may add menus at startup
+                    # so lazy managers are only deferred without a gui.
+                    _debug("defer manager %s for bundle %r until first use" % (mgr, bi.name))
+                    self._defer_manager(session, bi, mgr, kw)
+                    continue
                 _debug("initialize manager %s for bundle %r" % (mgr, bi.name))
                 bi.init_manager(session, mgr, **kw)
         except ToolshedError:
             failed.append(bi)
         done.add(bi)
 
+    def _defer_manager(self, session, bi, mgr, kw):
+        # Lazy managers are session attributes named by the manager name
+        # with spaces replaced by underscores, e.g. session.open_command.
+        # The manager and its providers are created on first use.
+        def start_manager(session=session, bi=bi, mgr=mgr, kw=kw):
+            _debug("initialize deferred manager %s for bundle %r" % (mgr, bi.name))
+            bi.init_manager(session, mgr, **kw)
+        session.defer_attribute(mgr.replace(' ', '_'), start_manager)
+
     def _init_single_manager(self, mgr):
-        if self._available_bundle_info:
-            all_bundles = self._installed_bundle_info + self._available_bundle_info
-        else:
-            all_bundles = self._installed_bundle_info
         self._manager_instances[mgr.name] = mgr
-        for pbi in all_bundles:
-            for name, kw in pbi.providers.items():
-                p_mgr, pvdr = name.split('/', 1)
-                if p_mgr == mgr.name:
-                    mgr.add_provider(pbi, pvdr, **kw)
+        for pbi, pvdr, kw in self._installed_bundle_info.manager_providers(mgr.name):
+            mgr.add_provider(pbi, pvdr, **kw)
+        if self._available_bundle_info:
+            for pbi in self._available_bundle_info:
+                for name, kw in pbi.providers.items():
+                    p_mgr, pvdr = name.split('/', 1)
+                    if p_mgr == mgr.name:
+                        mgr.add_provider(pbi, pvdr, **kw)
         mgr.end_providers()
 
     def import_bundle(self, bundle_name, logger,
@@ -980,7 +995,7 @@ class Toolshed:
             import os
             os.makedirs(self._cache_dir, exist_ok=True)
         import os.path
-        return os.path.join(self._cache_dir, "bundle_info.cache")
+        return os.path.join(self._cache_dir, "bundle_info.bcache")
 
 
 class ProviderManager(metaclass=abc.ABCMeta):
@@ -279,6 +279,66 @@ class BundleInfo:
             bi.inits = more['inits']
         return bi
 
+    # Installed bundle cache data needed to register and initialize a bundle.
+    # The remaining attributes are read from the cache when first used.
+    _REGISTRATION_KEYWORDS = ('version', 'api_package_name', 'packages',
+                              'custom_init', 'library_dir')
+    _REGISTRATION_MORE = ('commands', 'selectors', 'managers', 'providers', 'inits')
+    _DEFERRED_ATTRIBUTES = frozenset((
+        'categories', '_synopsis', 'description', 'session_versions',
+        'session_write_version', 'supersedes', 'installed_data_dir',
+        'installed_include_dir', 'installed_executable_dir',
+        'tools', 'formats', 'fetches'))
+
+    def registration_cache_data(self):
+        """Return the part of the cache data needed to register and initialize the bundle.
+
+        Returns
+        -------
+        3-tuple of (list, dict, dict)
+            Suitable for passing to :py:meth:`from_registration_cache_data`.
+        """
+        args, kw, more = self.cache_data()
+        kw = {k: kw[k] for k in self._REGISTRATION_KEYWORDS}
+        more = {k: more[k] for k in self._REGISTRATION_MORE}
+        return args, kw, more
+
+    @classmethod
+    def from_registration_cache_data(cls, data, load_cache_data):
+        """Reconstruct an instance from registration cache data.
+
+        The remaining attributes are set from the full cache data,
+        returned by calling load_cache_data(), when one is first used.
+        """
+        args, kw, more = data
+        kw['packages'] = [tuple(x) for x in kw['packages']]
+        bi = BundleInfo(*args, **kw)
+        bi.commands = [CommandInfo.from_cache_data(d) for d in more['commands']]
+        bi.selectors = [SelectorInfo.from_cache_data(d) for d in more['selectors']]
+        bi.managers = more['managers']
+        bi.providers = more['providers']
+        bi.inits = more['inits']
+        d = bi.__dict__
+        for attr in cls._DEFERRED_ATTRIBUTES:
+            del d[attr]
+        bi._load_cache_data = load_cache_data
+        return bi
+
+    def __getattr__(self, name):
+        # Only called for missing attributes, which are those not
+        # yet read from the installed bundle cache.
+        d = self.__dict__
+        load_cache_data = d.get('_load_cache_data')
+        if load_cache_data is None or name not in self._DEFERRED_ATTRIBUTES:
+            raise AttributeError("%r object has no attribute %r"
+                                 % (self.__class__.__name__, name))
+        d['_load_cache_data'] = None
+        full = BundleInfo.from_cache_data(load_cache_data())
+        for attr in self._DEFERRED_ATTRIBUTES:
+            if attr not in d:
+                d[attr] = getattr(full, attr)
+        return d[name]
+
     def distribution(self):
         """Supported API. Return distribution information.
 
@@ -505,15 +565,17 @@ class BundleInfo:
 
     def update_library_path(self):
         # _debug("update_library_path", self.name, self.package_name)
+        import sys
+        if not sys.platform.startswith('win') or not self.installed_library_dir:
+            # Avoid finding the package location for every bundle at startup
+            return
         libdir = self.library_dir()
         if not libdir:
             # _debug("  update_library_path: no libdir")
             return
-        import sys
-        if sys.platform.startswith('win'):
-            import os
-            os.add_dll_directory(libdir)
-            # _debug("  update_library_path: windows", paths)
+        import os
+        os.add_dll_directory(libdir)
+        # _debug("  update_library_path: windows", paths)
 
     def _get_api(self, logger=None):
         """Return BundleAPI instance for this bundle."""
@@ -28,11 +28,65 @@ from . import _TIMESTAMP
 from . import ToolshedError
 
 
+# Binary installed bundle cache file layout:
+#   magic bytes, little-endian uint32 header length, marshaled header,
+#   marshaled full cache data for each bundle.  Bundle data offsets are
+#   relative to the end of the header.
+# The header has the executable, its modification time, the Python version
+# (marshal format can change between versions) and for each bundle its
+# registration cache data plus the offset and length of its full data.
+# The file is memory mapped so the full bundle data is only read when a
+# bundle attribute not needed for registration (tools, formats, ...) is used.
+_CACHE_MAGIC = b'CXBNDL\x00\x01'
+_CACHE_HEADER_SIZE = len(_CACHE_MAGIC) + 4
+
+
 class InstalledBundleCache(list):
 
     def __init__(self, *args, **kw):
         super().__init__(*args, **kw)
         self._help_directories = None
+        self._cache_map = None
+        self._command_table = None
+        self._provider_table = None
+
+    # Lookup tables are built on first use and discarded if the list changes.
+    def append(self, bi):
+        super().append(bi)
+        self._clear_tables()
+
+    def extend(self, bundles):
+        super().extend(bundles)
+        self._clear_tables()
+
+    def remove(self, bi):
+        super().remove(bi)
+        self._clear_tables()
+
+    def _clear_tables(self):
+        self._command_table = None
+        self._provider_table = None
+
+    def bundle_for_command(self, name):
+        """Return bundle that registers the named command or None."""
+        if self._command_table is None:
+            table = {}
+            for bi in self:
+                for ci in bi.commands:
+                    table.setdefault(ci.name, bi)
+            self._command_table = table
+        return self._command_table.get(name)
+
+    def manager_providers(self, manager_name):
+        """Return list of (bundle, provider name, keywords) for the named manager."""
+        if self._provider_table is None:
+            table = {}
+            for bi in self:
+                for name, kw in bi.providers.items():
+                    mgr, pvdr = name.split('/', 1)
+                    table.setdefault(mgr, []).append((bi, pvdr, kw))
+            self._provider_table = table
+        return self._provider_table.get(manager_name, [])
 
     def load(self, logger, cache_file=None, rebuild_cache=False, write_cache=True):
         """Load list of installed bundles.
@@ -133,48 +187,54 @@ class InstalledBundleCache(list):
 
         Returns boolean on whether cache file was read."""
         _debug("InstalledBundleCache._read_cache:", cache_file)
-        import os.path
-        if not os.path.exists(cache_file):
-            return False
-        import filelock, json, os, sys
+        # The cache file is replaced atomically when written,
+        # so no lock is needed to read it.
+        import marshal, os, sys
         from .info import BundleInfo
         try:
-            lock_file = cache_file + '.lock'
-            lock = filelock.FileLock(lock_file)
-            with lock.acquire():
-                if not lock.is_locked:
-                    # As of filelock==2.0.8:
-                    # On Unix, failing to create the lock file results
-                    # in an exception, but on Windows the acquire fails
-                    # silently but leaves the lock unlocked
-                    raise OSError("cannot create lock file %r" % lock_file)
-                f = open(cache_file, "r", encoding='utf-8')
-                try:
-                    with f:
-                        data = f.readline()
-                        data = json.loads(data)
-                        if not isinstance(data[0], str):
-                            _debug("InstalledBundleCache._read_cache: obsolete cache")
-                            return None  # obsolete cache format
-                        executable, mtime = data
-                        if executable != sys.executable:
-                            _debug("InstalledBundleCache._read_cache: different executable")
-                            return None
-                        if mtime != os.path.getmtime(executable):
-                            _debug("InstalledBundleCache._read_cache: changed executable")
-                            return None
-                        if not self._is_cache_newer(cache_file):
-                            return None
-                        data = json.load(f)
-                    self.extend([BundleInfo.from_cache_data(x) for x in data])
-                    _debug("InstalledBundleCache._read_cache: %d bundles" % len(self))
-                    return True
-                except Exception as e:
-                    _debug("InstalledBundleCache._read_cache: failed:", e)
-                    return False
+            f = open(cache_file, 'rb')
         except OSError as e:
             _debug("InstalledBundleCache._read_cache: failed os:", str(e))
             return False
+        try:
+            with f:
+                if sys.platform.startswith('win'):
+                    # A mapped file cannot be replaced on Windows
+                    data = f.read()
+                else:
+                    import mmap
+                    data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if data[:len(_CACHE_MAGIC)] != _CACHE_MAGIC:
+                _debug("InstalledBundleCache._read_cache: obsolete cache")
+                return False
+            hsize = int.from_bytes(data[len(_CACHE_MAGIC):_CACHE_HEADER_SIZE], 'little')
+            header = marshal.loads(data[_CACHE_HEADER_SIZE:_CACHE_HEADER_SIZE + hsize])
+            if header['python'] != tuple(sys.version_info[:2]):
+                _debug("InstalledBundleCache._read_cache: different python")
+                return False
+            executable = header['executable']
+            if executable != sys.executable:
+                _debug("InstalledBundleCache._read_cache: different executable")
+                return False
+            if header['mtime'] != os.path.getmtime(executable):
+                _debug("InstalledBundleCache._read_cache: changed executable")
+                return False
+            if not self._is_cache_newer(cache_file):
+                return False
+
+            # Bundle data offsets are relative to the end of the header
+            start = _CACHE_HEADER_SIZE + hsize
+            def loader(offset, length):
+                return lambda: marshal.loads(data[start + offset:start + offset + length])
+            self.extend([BundleInfo.from_registration_cache_data(reg_data, loader(offset, length))
+                         for reg_data, offset, length in header['bundles']])
+            self._cache_map = data
+            _debug("InstalledBundleCache._read_cache: %d bundles" % len(self))
+            return True
+        except Exception as e:
+            _debug("InstalledBundleCache._read_cache: failed:", e)
+            del self[:]
+            return False
 
     def _is_cache_newer(self, cache_file):
         """Check if cache is newer than timestamps."""
@@ -202,21 +262,44 @@ class InstalledBundleCache(list):
     def _write_cache(self, cache_file, logger):
         """Write current bundle information to cache file."""
         _debug("InstalledBundleCache._write_cache", cache_file)
-        import os, os.path, filelock, json, sys
+        import os, os.path, filelock, marshal, sys
+        try:
+            blobs = [marshal.dumps(bi.cache_data()) for bi in self]
+            bundles = []
+            offset = 0
+            for bi, blob in zip(self, blobs):
+                bundles.append((bi.registration_cache_data(), offset, len(blob)))
+                offset += len(blob)
+            header = {
+                'python': tuple(sys.version_info[:2]),
+                'executable': sys.executable,
+                'mtime': os.path.getmtime(sys.executable),
+                'bundles': bundles,
+            }
+            hdata = marshal.dumps(header)
+        except ValueError as e:
+            # Cache data has a type that marshal does not handle
+            logger.error("Unable to write bundle cache: %s" % str(e))
+            return
         os.makedirs(os.path.dirname(cache_file), exist_ok=True)
         lock = filelock.FileLock(cache_file + '.lock')
         with lock.acquire():
+            # Write a temporary file and rename it so readers never see a partial file
+            tmp_file = cache_file + '.%d.tmp' % os.getpid()
             try:
-                f = open(cache_file, 'w', encoding='utf-8')
-            except IOError as e:
+                with open(tmp_file, 'wb') as f:
+                    f.write(_CACHE_MAGIC)
+                    f.write(len(hdata).to_bytes(4, 'little'))
+                    f.write(hdata)
+                    for blob in blobs:
+                        f.write(blob)
+                os.replace(tmp_file, cache_file)
+            except OSError as e:
                 logger.error("\"%s\": %s" % (cache_file, str(e)))
-            else:
-                with f:
-                    data = [sys.executable, os.path.getmtime(sys.executable)]
-                    json.dump(data, f, ensure_ascii=False)
-                    print(file=f)
-                    json.dump([bi.cache_data() for bi in self], f,
-                              ensure_ascii=False, check_circular=False)
+                try:
+                    os.remove(tmp_file)
+                except OSError:
+                    pass
 
     @property
     def help_directories(self):
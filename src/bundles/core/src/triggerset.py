@@ -130,6 +130,19 @@ def set_exception_reporter(f):
     return old
 
 
+_handler_profiler = None
+
+
+def set_handler_profiler(profiler):
+    """Time every trigger handler call with profiler.record_handler(), or stop if None."""
+    global _handler_profiler
+    _handler_profiler = profiler
+
+
+def handler_profiler():
+    return _handler_profiler
+
+
 class _TriggerHandler:
     """Describes callback routine registered with _Trigger"""
 
@@ -145,12 +158,39 @@ class _TriggerHandler:
     def invoke(self, data, remove_if_error):
         if self._blocked:
             return
+        if _handler_profiler is not None:
+            return self._timed_invoke(data, remove_if_error)
+        try:
+            return self._func(self._name, data)
+        except Exception:
+            _report('%s "%s"' % (TRIGGER_ERROR, self._name))	# Report function will add exception info.
+            if remove_if_error:
+                return DEREGISTER
+
+    def _timed_invoke(self, data, remove_if_error):
+        profiler = _handler_profiler
+        from time import perf_counter
+        t0 = perf_counter()
         try:
             return self._func(self._name, data)
         except Exception:
             _report('%s "%s"' % (TRIGGER_ERROR, self._name))	# Report function will add exception info.
             if remove_if_error:
                 return DEREGISTER
+        finally:
+            profiler.record_handler(self._name, self.func_name, t0, perf_counter() - t0)
+
+    @property
+    def func_name(self):
+        """Module and qualified name of the handler function, to identify the bundle it is from."""
+        fname = getattr(self, '_func_name', None)
+        if fname is None:
+            f = self._func
+            f = getattr(f, 'func', f)	# functools.partial
+            module = getattr(f, '__module__', None) or '?'
+            name = getattr(f, '__qualname__', None) or getattr(f, '__name__', None) or repr(f)
+            self._func_name = fname = '%s.%s' % (module, name)
+        return fname
 
     @contextmanager
     def blocked(self):
@@ -32,6 +32,7 @@ class UpdateLoop:
         self.last_atomic_check_for_changes_time = 0
         self.last_drawing_change_time = 0
         self.last_clip_time = 0
+        self.profiler = None	# FrameProfiler recording times of each frame phase
 
         # TODO: perhaps redraw interval should be 10 to reduce frame drops at 60 frames/sec
         self.redraw_interval = 16.667  # milliseconds, 60 frames per second, can be 0, only integer part used.
@@ -59,22 +60,33 @@ class UpdateLoop:
         session = self.session
         view = session.main_view
         self.block_redraw()
-        from time import time
+        from time import perf_counter as time
+        prof = self.profiler
+        phases = [] if prof and prof.recording else None
         try:
             t0 = time()
             session.triggers.activate_trigger('new frame', self)
-            self.last_new_frame_time = time() - t0
+            t1 = time()
+            self.last_new_frame_time = t1 - t0
+            if phases is not None:
+                phases.append(('new frame', t0, t1))
             from chimerax import atomic
             t0 = time()
             atomic.check_for_changes(session)
-            self.last_atomic_check_for_changes_time = time() - t0
+            t1 = time()
+            self.last_atomic_check_for_changes_time = t1 - t0
+            if phases is not None:
+                phases.append(('changes', t0, t1))
             from chimerax import surface
-            t0 = time()
+            tu = t0 = time()
             surface.update_clip_caps(view)
             self.last_clip_time = time() - t0
             t0 = time()
             changed = view.check_for_drawing_change()
-            self.last_drawing_change_time = time() - t0
+            t1 = time()
+            self.last_drawing_change_time = t1 - t0
+            if phases is not None:
+                phases.append(('graphics update', tu, t1))
             if changed:
                 from chimerax.graphics import OpenGLError, OpenGLVersionError
                 try:
@@ -82,7 +94,10 @@ class UpdateLoop:
                         or getattr(view.camera, 'always_draw', False)):
                         t0 = time()
                         view.draw(check_for_changes = False)
-                        self.last_draw_time = time() - t0
+                        t1 = time()
+                        self.last_draw_time = t1 - t0
+                        if phases is not None:
+                            phases.append(('draw', t0, t1))
                         drew = True
                 except OpenGLVersionError as e:
                     self.block_redraw()
@@ -97,10 +112,16 @@ class UpdateLoop:
                     msg = 'An error occurred in drawing the scene. Redrawing graphics is now stopped to avoid a continuous stream of error messages. To restart graphics use the command "graphics restart" after changing the settings that caused the error.'
                     import traceback
                     session.logger.bug(msg + '\n\n' + str(e) + '\n\n' + traceback.format_exc())
+                t0 = time()
                 session.triggers.activate_trigger('frame drawn', self)
+                if phases is not None:
+                    phases.append(('frame drawn', t0, time()))
         finally:
             self.unblock_redraw()
 
+        if phases:
+            prof.record_frame(phases)
+
         view.frame_number += 1
 
         return drew
@@ -38,8 +38,8 @@ class _SessionAPI(BundleAPI):
 
                     @property
                     def open_args(self):
-                        from chimerax.core.commands import BoolArg
-                        return { 'resize_window': BoolArg, 'combine': BoolArg }
+                        from chimerax.core.commands import BoolArg, IntsArg
+                        return { 'resize_window': BoolArg, 'combine': BoolArg, 'models': IntsArg }
 
             elif name == "ChimeraX commands":
                 class Info(OpenerInfo):
@@ -103,10 +103,6 @@ class _SessionAPI(BundleAPI):
                             'version': IntArg,
                         }
 
-                    @property
-                    def hidden_args(self):
-                        return ['version']
-
                     def save_args_widget(self, session):
                         from .gui import SaveOptionsWidget
                         return SaveOptionsWidget(session)
@@ -122,9 +122,146 @@ potential_at_points(PyObject*, PyObject* args)
     return py_values;
 }
 
+// Atoms within the cutoff distance a of a point contribute the Coulomb potential
+// minus a smoothed potential that matches it in value and first two derivatives
+// at distance a.  The smoothed part for all atoms is computed on a grid by the
+// Python code.  With t = r*r/(a*a) the smoothed kernels are
+//   1/r:   (15/8 - 5/4 t + 3/8 t^2) / a
+//   1/r^2: (3 - 3 t + t^2) / a^2
+static float
+smoothed_kernel(float r2, float a2, float inv_a, bool dist_dep)
+{
+    float t = r2 / a2;
+    if (dist_dep)
+        return (3.0f - 3.0f*t + t*t) / a2;
+    return (1.875f - 1.25f*t + 0.375f*t*t) * inv_a;
+}
+
+struct CellGrid
+{
+    float origin[3], cell_size;
+    int64_t size[3];
+    std::vector<int64_t> cell_start;	// Index into atoms for each cell, size num_cells+1
+    std::vector<int64_t> atoms;		// Atom indices sorted by cell
+
+    CellGrid(const float* coords, int64_t num_atoms, float cell_size) : cell_size(cell_size)
+    {
+        for (int a = 0; a < 3; ++a) {
+            float cmin = (num_atoms > 0 ? coords[a] : 0), cmax = cmin;
+            for (int64_t i = 0; i < num_atoms; ++i) {
+                float c = coords[3*i+a];
+                cmin = std::min(cmin, c);
+                cmax = std::max(cmax, c);
+            }
+            origin[a] = cmin;
+            size[a] = static_cast<int64_t>((cmax - cmin) / cell_size) + 1;
+        }
+        int64_t num_cells = size[0]*size[1]*size[2];
+        std::vector<int64_t> atom_cell(num_atoms);
+        cell_start.assign(num_cells+1, 0);
+        for (int64_t i = 0; i < num_atoms; ++i) {
+            int64_t c = cell_index(coords + 3*i);
+            atom_cell[i] = c;
+            cell_start[c+1] += 1;
+        }
+        for (int64_t c = 0; c < num_cells; ++c)
+            cell_start[c+1] += cell_start[c];
+        std::vector<int64_t> fill(cell_start.begin(), cell_start.end()-1);
+        atoms.resize(num_atoms);
+        for (int64_t i = 0; i < num_atoms; ++i)
+            atoms[fill[atom_cell[i]]++] = i;
+    }
+    int64_t cell(const float* xyz, int a) const
+    {
+        float f = (xyz[a] - origin[a]) / cell_size;
+        return (f < 0 ? -1 : static_cast<int64_t>(f));
+    }
+    int64_t cell_index(const float* xyz) const
+    {
+        int64_t i = std::min(cell(xyz,0), size[0]-1), j = std::min(cell(xyz,1), size[1]-1),
+            k = std::min(cell(xyz,2), size[2]-1);
+        return (k*size[1] + j)*size[0] + i;
+    }
+};
+
+static void
+compute_short_range_esp(const float* target_points, float* values, int64_t num_points,
+        const float* atom_coords, const float* charges, const CellGrid* cells, float cutoff,
+        bool dist_dep, float dielectric)
+{
+    float conv_factor = 331.62 / dielectric;
+    float a2 = cutoff * cutoff, inv_a = 1.0f / cutoff;
+    for (int64_t p = 0; p < num_points; ++p, ++values, target_points+=3) {
+        float tx = target_points[0], ty = target_points[1], tz = target_points[2];
+        int64_t ci = cells->cell(target_points,0), cj = cells->cell(target_points,1),
+            ck = cells->cell(target_points,2);
+        float esp = 0.0;
+        for (int64_t k = std::max<int64_t>(ck-1,0); k <= std::min(ck+1, cells->size[2]-1); ++k)
+          for (int64_t j = std::max<int64_t>(cj-1,0); j <= std::min(cj+1, cells->size[1]-1); ++j)
+            for (int64_t i = std::max<int64_t>(ci-1,0); i <= std::min(ci+1, cells->size[0]-1); ++i) {
+                int64_t c = (k*cells->size[1] + j)*cells->size[0] + i;
+                for (int64_t n = cells->cell_start[c]; n < cells->cell_start[c+1]; ++n) {
+                    int64_t a = cells->atoms[n];
+                    const float* xyz = atom_coords + 3*a;
+                    float dx = xyz[0] - tx, dy = xyz[1] - ty, dz = xyz[2] - tz;
+                    float r2 = dx*dx + dy*dy + dz*dz;
+                    if (r2 >= a2)
+                        continue;
+                    float k_exact = (dist_dep ? 1.0f / r2 : 1.0f / sqrtf(r2));
+                    esp += charges[a] * (k_exact - smoothed_kernel(r2, a2, inv_a, dist_dep));
+                }
+            }
+        *values = esp * conv_factor;
+    }
+}
+
+static PyObject*
+short_range_potential_at_points(PyObject*, PyObject* args)
+{
+    FArray target_points, atom_coords, charges, values;
+    int py_dist_dep, num_cpus;
+    float dielectric, cutoff;
+    if (!PyArg_ParseTuple(args, const_cast<char *>("O&O&O&pffi"),
+                   parse_float_n3_array, &target_points,
+                   parse_float_n3_array, &atom_coords,
+                   parse_float_n_array, &charges,
+                   &py_dist_dep, &dielectric, &cutoff, &num_cpus))
+        return NULL;
+    if (atom_coords.size(0) != charges.size())
+        return PyErr_Format(PyExc_ValueError, "Number of atoms (%d) differs from number of charges (%d)",
+            atom_coords.size(0), charges.size());
+    if (cutoff <= 0)
+        return PyErr_Format(PyExc_ValueError, "Cutoff distance must be positive, got %g", cutoff);
+    bool dist_dep = (py_dist_dep != 0);
+
+    FArray tp_contig = target_points.contiguous_array();
+    FArray ac_contig = atom_coords.contiguous_array();
+    FArray ch_contig = charges.contiguous_array();
+    int64_t n = target_points.size(0);
+
+    parse_writable_float_n_array(python_float_array(n), &values);
+
+    Py_BEGIN_ALLOW_THREADS
+    CellGrid cells(ac_contig.values(), ac_contig.size(0), cutoff);
+    int64_t num_threads = std::max<int64_t>(std::min<int64_t>(num_cpus, n), 1);
+    int64_t per_thread = (n + num_threads - 1) / num_threads;
+    std::vector<std::thread> threads;
+    for (int64_t start = 0; start < n; start += per_thread)
+        threads.push_back(std::thread(compute_short_range_esp, tp_contig.values() + 3*start,
+            values.values() + start, std::min(per_thread, n - start), ac_contig.values(),
+            ch_contig.values(), &cells, cutoff, dist_dep, dielectric));
+    for (auto& th: threads)
+        th.join();
+    Py_END_ALLOW_THREADS
+
+    PyObject *py_values = array_python_source(values, false);
+    return py_values;
+}
+
 static struct PyMethodDef esp_methods[] =
 {
   {const_cast<char*>("potential_at_points"), potential_at_points, METH_VARARGS, NULL},
+  {const_cast<char*>("short_range_potential_at_points"), short_range_potential_at_points, METH_VARARGS, NULL},
   {nullptr, nullptr, 0, nullptr}
 };
 
@@ -0,0 +1,75 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Compare the grid Coulombic potential calculation with the direct sum.
+#
+#   ChimeraX --nogui --exit --script "benchmark.py [num_atoms] [num_points] [num_threads]"
+#
+# Atoms with partial charges are placed randomly with roughly protein density
+# (including hydrogens) and points are placed about 1.5 Angstroms from atoms,
+# like surface vertices offset along their normals.
+#
+def benchmark(num_atoms = 100000, num_points = 100000, num_threads = None,
+              tolerances = (0.01, 0.003, 0.001), log = print):
+
+    from numpy import random, float32, sqrt, abs
+    random.seed(0)
+    density = 0.1	# Atoms per cubic Angstrom
+    size = (num_atoms / density) ** (1/3)
+    xyz = (size * random.random((num_atoms, 3))).astype(float32)
+    charges = random.choice([-0.5, -0.3, 0.0, 0.3, 0.5], num_atoms).astype(float32)
+    points = (xyz[random.randint(0, num_atoms, num_points)]
+              + random.normal(0, 1.5, (num_points, 3))).astype(float32)
+    log('%d atoms, %d points, box size %.0f Angstroms' % (num_atoms, num_points, size))
+
+    if num_threads is None:
+        import os
+        num_threads = os.cpu_count() or 1
+    from chimerax.coulombic.grid_potential import potential_at_points
+    from time import time
+    for dist_dep in (True, False):
+        t0 = time()
+        exact, err = potential_at_points(points, xyz, charges, dist_dep, 4.0,
+                                         method = 'direct', num_threads = num_threads)
+        td = time() - t0
+        log('distDep %s, direct sum %d threads: %.2f seconds' % (dist_dep, num_threads, td))
+        erms = sqrt((exact.astype(float)**2).mean())
+        for tolerance in tolerances:
+            t0 = time()
+            values, est = potential_at_points(points, xyz, charges, dist_dep, 4.0, method = 'grid',
+                                              tolerance = tolerance, num_threads = num_threads)
+            tg = time() - t0
+            diff = values.astype(float) - exact
+            log('  grid tolerance %.3g: %.2f seconds (%.1f times faster), relative RMS error %.2g'
+                ' (estimated %.2g), maximum error %.3g (values %.3g to %.3g)'
+                % (tolerance, tg, td/max(tg, 1e-6), sqrt((diff**2).mean())/erms, est,
+                   abs(diff).max(), exact.min(), exact.max()))
+
+if __name__ == '__main__' or __name__.startswith('ChimeraX_sandbox'):
+    import sys
+    num_atoms = int(sys.argv[1]) if len(sys.argv) >= 2 else 100000
+    num_points = int(sys.argv[2]) if len(sys.argv) >= 3 else 100000
+    num_threads = int(sys.argv[3]) if len(sys.argv) >= 4 else None
+    benchmark(num_atoms, num_points, num_threads = num_threads)
@@ -27,7 +27,13 @@ from chimerax.add_charge import ChargeMethodArg
 
 def cmd_coulombic(session, atoms, *, surfaces=None, his_scheme=None, offset=1.4, gspacing=None,
         gpadding=None, map=None, palette=None, range=None, dist_dep=True, dielectric=4.0,
-        charge_method=ChargeMethodArg.default_value, key=False, reassign_charges=False):
+        charge_method=ChargeMethodArg.default_value, key=False, reassign_charges=False,
+        esp_method='direct', tolerance=None):
+    from .grid_potential import DEFAULT_TOLERANCE
+    if tolerance is None:
+        tolerance = DEFAULT_TOLERANCE
+    elif tolerance <= 0:
+        raise UserError("Tolerance must be positive")
     session.logger.status("Computing Coulombic potential%s" % (" map" if map else ""))
     if palette is None:
         from chimerax.core.colors import BuiltinColormaps
@@ -129,10 +135,12 @@ def cmd_coulombic(session, atoms, *, surfaces=None, his_scheme=None, offset=1.4,
                     if getattr(cs, 'is_clip_cap', False)]:
                 clip_surface.auto_recolor_vertices = lambda *args, ses=session, s=clip_surface, \
                     charged_atoms=charged_atoms, dist_dep=dist_dep, dielectric=dielectric, \
-                    cmap=cmap, f=color_vertices: f(ses, s, 0.0, charged_atoms, dist_dep, dielectric,
-                    cmap, log=False)
+                    cmap=cmap, esp_method=esp_method, tolerance=tolerance, f=color_vertices: \
+                    f(ses, s, 0.0, charged_atoms, dist_dep, dielectric, cmap, log=False,
+                    esp_method=esp_method, tolerance=tolerance)
             color_vertices(session, target_surface, offset, charged_atoms, dist_dep, dielectric, cmap,
-                undo_info=(undo_owners, undo_old_vals, undo_new_vals))
+                undo_info=(undo_owners, undo_old_vals, undo_new_vals), esp_method=esp_method,
+                tolerance=tolerance)
     undo_state.add(undo_owners, "vertex_colors", undo_old_vals, undo_new_vals, option="S")
     session.undo.register(undo_state)
     if key:
@@ -150,12 +158,10 @@ def cmd_coulombic(session, atoms, *, surfaces=None, his_scheme=None, offset=1.4,
         gspacing = 1.0
     if gpadding is None:
         gpadding = 5.0
-    import numpy, os
-    import chimerax.arrays # Make sure _esp can runtime link shared library libarrays.
-    from ._esp import potential_at_points
+    import numpy
+    from .grid_potential import potential_at_points
     from chimerax.map import volume_from_grid_data
     from chimerax.map_data import ArrayGridData
-    cpu_count = os.cpu_count()
     for atoms, surf in grid_data:
         coords = atoms.coords
         min_xyz = numpy.min(coords, axis=0) - [gpadding+gspacing/2.0]*3
@@ -164,9 +170,9 @@ def cmd_coulombic(session, atoms, *, surfaces=None, his_scheme=None, offset=1.4,
         y_range = numpy.arange(min_xyz[1], max_xyz[1], gspacing)
         z_range = numpy.arange(min_xyz[2], max_xyz[2], gspacing)
         grid_vertices = numpy.array([(x,y,z) for x in x_range for y in y_range for z in z_range])
-        grid_potentials = potential_at_points(grid_vertices,
+        grid_potentials, error = potential_at_points(grid_vertices,
             atoms.coords, numpy.array([a.charge for a in atoms], dtype=numpy.double),
-            dist_dep, dielectric, 1 if cpu_count is None else cpu_count)
+            dist_dep, dielectric, method=esp_method, tolerance=tolerance)
         grid_potentials.shape = (len(x_range), len(y_range), len(z_range))
         agd = ArrayGridData(grid_potentials.transpose(), min_xyz, [gspacing]*3)
         agd.polar_values = True
@@ -180,7 +186,7 @@ def cmd_coulombic(session, atoms, *, surfaces=None, his_scheme=None, offset=1.4,
     session.logger.status("Finished computing Coulombic potential grids")
 
 def color_vertices(session, surface, offset, charged_atoms, dist_dep, dielectric, cmap, *, log=True,
-        undo_info=None):
+        undo_info=None, esp_method='direct', tolerance=None):
     if surface.vertices is None:
         return
     if undo_info:
@@ -195,13 +201,12 @@ def color_vertices(session, surface, offset, charged_atoms, dist_dep, dielectric
     else:
         target_points = surface.vertices + offset * surface.normals
     arv = surface.auto_recolor_vertices
-    import numpy, os
-    import chimerax.arrays # Make sure _esp can runtime link shared library libarrays.
-    from ._esp import potential_at_points
-    cpu_count = os.cpu_count()
-    vertex_values = potential_at_points(surface.scene_position.transform_points(target_points),
+    import numpy
+    from .grid_potential import potential_at_points, DEFAULT_TOLERANCE
+    vertex_values, error = potential_at_points(surface.scene_position.transform_points(target_points),
         charged_atoms.scene_coords, numpy.array([a.charge for a in charged_atoms], dtype=numpy.double),
-        dist_dep, dielectric, 1 if cpu_count is None else cpu_count)
+        dist_dep, dielectric, method=esp_method,
+        tolerance=DEFAULT_TOLERANCE if tolerance is None else tolerance)
     rgba = cmap.interpolated_rgba(vertex_values)
     from numpy import uint8, amin, mean, amax
     rgba8 = (255*rgba).astype(uint8)
@@ -212,6 +217,9 @@ def color_vertices(session, surface, offset, charged_atoms, dist_dep, dielectric
     if log:
         session.logger.info("Coulombic values for %s: minimum, %.2f, mean %.2f, maximum %.2f"
             % (surface, amin(vertex_values), mean(vertex_values), amax(vertex_values)))
+        if error is not None:
+            session.logger.info("Grid Coulombic values for %s differ from direct sum by %.2g%%"
+                " (relative RMS, sampled)" % (surface, 100*error))
 
 def register_command(logger):
     from chimerax.core.commands import CmdDesc, register, Or, EmptyArg, SurfacesArg, EnumOf, FloatArg
@@ -233,6 +241,8 @@ def register_command(logger):
             ('charge_method', ChargeMethodArg),
             ('key', BoolArg),
             ('reassign_charges', BoolArg),
+            ('esp_method', EnumOf(['direct', 'grid'])),
+            ('tolerance', FloatArg),
         ],
         synopsis = 'Color surfaces by coulombic potential'
     )
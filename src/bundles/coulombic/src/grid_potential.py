@@ -0,0 +1,166 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# Coulombic potential at many points computed by splitting the Coulomb kernel
+# into a short range part and a smooth part.  Within the cutoff distance a the
+# kernel is replaced by a polynomial in r*r matching it in value and first two
+# derivatives at a.  The difference (zero beyond a) is summed directly over
+# nearby atoms in C++, and the smooth part is computed for all atoms at once by
+# spreading charges onto a grid and convolving with the smoothed kernel using
+# FFTs, then interpolating at the points.  This is the first level of the
+# multilevel summation method.  The error relative to the direct sum over all
+# atoms falls as the square of grid spacing over cutoff.
+
+DEFAULT_TOLERANCE = 0.01
+DEFAULT_CUTOFF = 8.0
+MAX_GRID_POINTS = 2**21
+
+def potential_at_points(points, atom_coords, charges, dist_dep, dielectric, *, method='direct',
+        tolerance=DEFAULT_TOLERANCE, num_threads=None):
+    """Return the Coulombic potential at the points and an estimate of the relative
+       root-mean-square error, None for the exact direct sum."""
+    if num_threads is None:
+        import os
+        num_threads = os.cpu_count() or 1
+    import numpy
+    charges = numpy.asarray(charges, dtype=numpy.float32)
+    if method == 'grid':
+        return grid_potential_at_points(points, atom_coords, charges, dist_dep, dielectric,
+            tolerance=tolerance, num_threads=num_threads)
+    if method != 'direct':
+        raise ValueError('Unknown Coulombic potential method "%s"' % method)
+    import chimerax.arrays # Make sure _esp can runtime link shared library libarrays.
+    from ._esp import potential_at_points as direct_potential
+    return direct_potential(points, atom_coords, charges, dist_dep, dielectric, num_threads), None
+
+def grid_potential_at_points(points, atom_coords, charges, dist_dep, dielectric, *,
+        tolerance=DEFAULT_TOLERANCE, cutoff=DEFAULT_CUTOFF, num_threads=1, check_points=256,
+        max_refinements=3):
+    """Return the potential at the points and the relative root-mean-square error compared
+       to the direct sum, measured at check_points randomly chosen points.  The grid spacing
+       is halved, up to max_refinements times, until the error is less than tolerance."""
+    import numpy
+    points = numpy.asarray(points, dtype=numpy.float32)
+    atom_coords = numpy.asarray(atom_coords, dtype=numpy.float32)
+    charges = numpy.asarray(charges, dtype=numpy.float32)
+    if len(points) == 0 or len(atom_coords) == 0:
+        return numpy.zeros(len(points), numpy.float32), 0.0
+
+    import chimerax.arrays # Make sure _esp can runtime link shared library libarrays.
+    from ._esp import potential_at_points as direct_potential, short_range_potential_at_points
+
+    # Empirically the relative RMS error is about 0.04 * (spacing / cutoff)**2.
+    xyz_min = numpy.minimum(points.min(axis=0), atom_coords.min(axis=0))
+    xyz_max = numpy.maximum(points.max(axis=0), atom_coords.max(axis=0))
+    ratio = max(2.0, (0.04 / max(tolerance, 1e-6)) ** 0.5)
+    spacing = cutoff / ratio
+    min_spacing = _min_grid_spacing(xyz_min, xyz_max)
+    if spacing < min_spacing:
+        # Grid would be too large; lengthen the cutoff instead of refining the grid.
+        spacing = min_spacing
+        cutoff = spacing * ratio
+
+    if len(points) > check_points:
+        rng = numpy.random.default_rng(0)
+        check = points[rng.choice(len(points), check_points, replace=False)]
+    else:
+        check = points
+    exact = direct_potential(check, atom_coords, charges, dist_dep, dielectric, num_threads)
+    exact_rms = numpy.sqrt((exact.astype(numpy.float64)**2).mean())
+    check_short = short_range_potential_at_points(check, atom_coords, charges, dist_dep, dielectric,
+        cutoff, num_threads)
+
+    for refinement in range(max_refinements + 1):
+        origin, grid_potential = _smooth_potential_grid(atom_coords, charges, xyz_min, xyz_max,
+            spacing, cutoff, dist_dep, dielectric)
+        approx = check_short + _interpolate(grid_potential, origin, spacing, check)
+        error = numpy.sqrt(((approx - exact)**2).mean()) / exact_rms if exact_rms > 0 else 0.0
+        if error <= tolerance or spacing / 2 < min_spacing:
+            break
+        spacing /= 2
+
+    if check is points:
+        values = approx
+    else:
+        values = short_range_potential_at_points(points, atom_coords, charges, dist_dep, dielectric,
+            cutoff, num_threads)
+        values += _interpolate(grid_potential, origin, spacing, points)
+    return values.astype(numpy.float32), float(error)
+
+def _min_grid_spacing(xyz_min, xyz_max):
+    size = xyz_max - xyz_min
+    return float((size[0]*size[1]*size[2] / MAX_GRID_POINTS) ** (1/3))
+
+def _smoothed_kernel(r2, cutoff, dist_dep):
+    import numpy
+    a2 = cutoff * cutoff
+    t = r2 / a2
+    if dist_dep:
+        inside = (3 - 3*t + t*t) / a2
+        outside = 1 / numpy.maximum(r2, 1e-12)
+    else:
+        inside = (15/8 - 5/4*t + 3/8*t*t) / cutoff
+        outside = 1 / numpy.sqrt(numpy.maximum(r2, 1e-12))
+    return numpy.where(t < 1, inside, outside)
+
+def _smooth_potential_grid(atom_coords, charges, xyz_min, xyz_max, spacing, cutoff, dist_dep,
+        dielectric):
+    import numpy
+    origin = xyz_min - spacing
+    size = numpy.ceil((xyz_max + spacing - origin) / spacing).astype(int) + 2
+    charge_grid = numpy.zeros(tuple(size[::-1]), numpy.float64)
+    for corner, weights in _trilinear_corners(origin, spacing, atom_coords):
+        index = numpy.ravel_multi_index(tuple(corner[:,::-1].T), charge_grid.shape)
+        charge_grid += numpy.bincount(index, charges*weights,
+            charge_grid.size).reshape(charge_grid.shape)
+
+    # Zero padding to twice the grid size makes the FFT convolution non-periodic.
+    fft_size = tuple(2*s for s in charge_grid.shape)
+    offsets = [numpy.fft.fftfreq(s, 1/s) * spacing for s in fft_size]
+    r2 = (offsets[0][:,None,None]**2 + offsets[1][None,:,None]**2 + offsets[2][None,None,:]**2)
+    kernel = _smoothed_kernel(r2, cutoff, dist_dep)
+    del r2
+    from numpy.fft import rfftn, irfftn
+    axes = (0,1,2)
+    potential = irfftn(rfftn(charge_grid, fft_size, axes) * rfftn(kernel, axes=axes), fft_size, axes)
+    kz, ky, kx = charge_grid.shape
+    potential = potential[:kz,:ky,:kx] * (331.62 / dielectric)
+    return origin, potential
+
+def _trilinear_corners(origin, spacing, xyz):
+    import numpy
+    f = (xyz - origin) / spacing
+    base = numpy.floor(f).astype(int)
+    frac = f - base
+    for c in range(8):
+        offset = numpy.array((c & 1, (c >> 1) & 1, (c >> 2) & 1))
+        weights = numpy.prod(numpy.where(offset, frac, 1 - frac), axis=1)
+        yield base + offset, weights
+
+def _interpolate(grid, origin, spacing, xyz):
+    import numpy
+    values = numpy.zeros(len(xyz), numpy.float64)
+    for corner, weights in _trilinear_corners(origin, spacing, xyz):
+        values += weights * grid[corner[:,2], corner[:,1], corner[:,0]]
+    return values
@@ -0,0 +1,206 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+'''
+triangle_tree: Bounding volume hierarchy for triangles
+======================================================
+
+Speed up finding the triangles of a large surface hit by a line segment or
+within a set of planes by only checking triangles in bounding boxes that
+pass the test.
+'''
+
+class TriangleTree:
+    '''
+    Bounding volume hierarchy of axis aligned boxes over triangles.
+    Triangles are sorted along a space filling (Morton) curve through their
+    centers and consecutive groups of leaf_size triangles form the leaves.
+    The boxes of each level of the binary tree above the leaves bound
+    consecutive pairs of boxes from the level below, so node i has children
+    2*i and 2*i+1.  Searches test all boxes of a level with array operations
+    then descend to the children of the boxes that pass.
+
+    The vertex and triangle arrays are not copied so the tree must be
+    discarded if they are changed.
+    '''
+    def __init__(self, vertices, triangles, leaf_size = 64):
+        self.vertices = vertices
+        self.triangles = triangles
+        self.leaf_size = leaf_size
+
+        from numpy import float32, int32, empty
+        nt = len(triangles)
+        if nt == 0:
+            self._order = empty((0,), int32)
+            self._levels = []
+            return
+
+        # Triangle bounds with coordinates as rows for fast reductions.
+        # Array take() is used since it is faster than fancy indexing.
+        from numpy import minimum, maximum, ascontiguousarray
+        x0, x1, x2 = [vertices.take(triangles[:,i], axis = 0) for i in (0,1,2)]
+        tmin = ascontiguousarray(minimum(minimum(x0, x1), x2).T)
+        tmax = ascontiguousarray(maximum(maximum(x0, x1), x2).T)
+        x0 = x1 = x2 = None
+        order = _morton_order(0.5 * (tmin + tmax))
+        self._order = order.astype(int32)	# Triangle indices in leaf order
+        self._sorted_triangles = triangles.take(order, axis = 0)
+
+        # Leaf bounds.  Pad the last leaf by repeating its final triangle.
+        nleaf = (nt + leaf_size - 1) // leaf_size
+        pad = nleaf * leaf_size - nt
+        if pad:
+            from numpy import concatenate
+            order = concatenate((order, order[-1:].repeat(pad)))
+        bmin = tmin.take(order, axis = 1).reshape((3, nleaf, leaf_size)).min(axis = 2).T.astype(float32)
+        bmax = tmax.take(order, axis = 1).reshape((3, nleaf, leaf_size)).max(axis = 2).T.astype(float32)
+
+        # Build levels up to the single root box.
+        levels = [(bmin, bmax)]
+        while len(bmin) > 1:
+            n = len(bmin)
+            if n % 2:
+                from numpy import concatenate
+                bmin = concatenate((bmin, bmin[-1:]))
+                bmax = concatenate((bmax, bmax[-1:]))
+            from numpy import minimum, maximum
+            bmin = minimum(bmin[0::2], bmin[1::2])
+            bmax = maximum(bmax[0::2], bmax[1::2])
+            levels.append((bmin, bmax))
+        levels.reverse()
+        self._levels = levels		# Root level first, leaf level last.
+
+    @property
+    def num_triangles(self):
+        return len(self.triangles)
+
+    def _leaf_triangles(self, leaves):
+        '''Indices into the triangle array for the given leaves in leaf order.'''
+        from numpy import arange, int32
+        ls = self.leaf_size
+        tnum = (leaves.astype(int32).reshape((len(leaves),1))*ls + arange(ls, dtype = int32)).ravel()
+        return tnum[tnum < len(self._order)]
+
+    def _search(self, box_test):
+        '''Return leaf numbers whose boxes and all ancestor boxes pass box_test(bmin, bmax).'''
+        from numpy import zeros, int32, concatenate
+        nodes = zeros((1,), int32)
+        last = len(self._levels) - 1
+        for level, (bmin, bmax) in enumerate(self._levels):
+            nodes = nodes[box_test(bmin[nodes], bmax[nodes])]
+            if len(nodes) == 0 or level == last:
+                break
+            nodes = concatenate((2*nodes, 2*nodes+1))
+            nodes = nodes[nodes < len(self._levels[level+1][0])]
+            nodes.sort()
+        return nodes
+
+    def segment_triangles(self, xyz1, xyz2):
+        '''Indices of triangles in boxes intercepted by the line segment.'''
+        if len(self._order) == 0:
+            from numpy import empty, int32
+            return empty((0,), int32)
+        from numpy import array, float64, errstate
+        p = array(xyz1, float64)
+        d = array(xyz2, float64) - p
+        with errstate(divide = 'ignore', invalid = 'ignore'):
+            dinv = 1.0 / d
+        def segment_hits_boxes(bmin, bmax, p = p, dinv = dinv):
+            from numpy import fmin, fmax, errstate
+            with errstate(invalid = 'ignore'):
+                t1 = (bmin - p) * dinv
+                t2 = (bmax - p) * dinv
+            tenter = fmin(t1, t2).max(axis = 1)
+            texit = fmax(t1, t2).min(axis = 1)
+            return (tenter <= texit) & (texit >= 0) & (tenter <= 1)
+        leaves = self._search(segment_hits_boxes)
+        return self._leaf_triangles(leaves)
+
+    def closest_triangle_intercept(self, xyz1, xyz2):
+        '''
+        Find first triangle intercept along line segment from xyz1 to xyz2.
+        Returns the fraction of the distance along the segment and the triangle
+        number, or None, None if no triangle is intercepted.
+        '''
+        tleaf = self.segment_triangles(xyz1, xyz2)
+        if len(tleaf) == 0:
+            return None, None
+        from ._geometry import closest_triangle_intercept
+        fmin, ti = closest_triangle_intercept(self.vertices, self._sorted_triangles[tleaf], xyz1, xyz2)
+        if fmin is None:
+            return None, None
+        return fmin, int(self._order[tleaf[ti]])
+
+    def planes_triangles(self, planes):
+        '''
+        Return a mask of the triangles with at least one vertex within all of the planes.
+        Each plane is a 4-vector v with points in the region satisfying
+        v0*x + v1*y + v2*z + v3 >= 0.
+        '''
+        from numpy import zeros, array, float64
+        tmask = zeros((len(self.triangles),), bool)
+        if len(self._order) == 0:
+            return tmask
+        planes = array(planes, float64).reshape((-1,4))
+        normals, offsets = planes[:,:3], planes[:,3]
+        def boxes_within_planes(bmin, bmax):
+            # Box is outside a plane if its corner farthest along the plane normal is outside.
+            from numpy import maximum
+            pmax = maximum(bmin[:,None,:]*normals, bmax[:,None,:]*normals).sum(axis = 2) + offsets
+            return (pmax >= 0).all(axis = 1)
+        leaves = self._search(boxes_within_planes)
+        tleaf = self._leaf_triangles(leaves)
+        if len(tleaf) == 0:
+            return tmask
+        from ._geometry import points_within_planes
+        t = self._sorted_triangles[tleaf]
+        vmask = points_within_planes(self.vertices[t.ravel()], planes)
+        inside = vmask.reshape((len(t),3)).any(axis = 1)
+        tmask[self._order[tleaf[inside]]] = True
+        return tmask
+
+def _morton_order(xyz, bits = 10):
+    '''
+    Return permutation sorting points along a Z-order space filling curve.
+    The points array has shape (3,n) with the x, y and z coordinates as rows.
+    '''
+    from numpy import uint64, float64
+    code = None
+    for axis in range(3):
+        x = xyz[axis]
+        xmin, xmax = x.min(), x.max()
+        scale = ((1 << bits) - 1) / (float64(xmax - xmin) if xmax > xmin else 1)
+        q = _spread_bits(((x - xmin) * scale).astype(uint64))
+        code = q if code is None else (code | (q << uint64(axis)))
+    return code.argsort()
+
+def _spread_bits(v):
+    '''Insert two zero bits between each of the low 10 bits.'''
+    from numpy import uint64
+    v = v & uint64(0x3ff)
+    v = (v | (v << uint64(16))) & uint64(0x030000ff)
+    v = (v | (v << uint64(8))) & uint64(0x0300f00f)
+    v = (v | (v << uint64(4))) & uint64(0x030c30c3)
+    v = (v | (v << uint64(2))) & uint64(0x09249249)
+    return v
@@ -93,6 +93,7 @@ class Drawing:
 
         self._cached_geometry_bounds = None	# Triangles, positions not included. Local coords.
         self._cached_position_bounds = None	# Triangles including positions, children not included. Scene coords.
+        self._pick_tree = None		# TriangleTree for picking masked triangles, False to make on next pick.
 
         # Geometry and colors
         self._vertices = None		# N x 3 float32 numpy array
@@ -257,6 +258,7 @@ class Drawing:
             if sc:
                 self._cached_geometry_bounds = None
                 self._cached_position_bounds = None
+                self._pick_tree = None
             else:
                 sc = key in ('_displayed_positions', '_positions')
                 if sc:
@@ -1091,26 +1093,56 @@ class Drawing:
     def _first_intercept_excluding_children(self, mxyz1, mxyz2):
         if self.empty_drawing():
             return None
-        va = self.vertices
-        ta = self.masked_triangles
-        if ta.shape[1] != 3:
+        if self.triangles.shape[1] != 3:
             # TODO: Intercept only for triangles, not lines or points.
             return None
+        tree = self._picking_tree()
+        if tree is None:
+            va, ta = self.vertices, self.masked_triangles
+            from chimerax.geometry import closest_triangle_intercept
+            def intercept(xyz1, xyz2):
+                return closest_triangle_intercept(va, ta, xyz1, xyz2)
+        else:
+            intercept = tree.closest_triangle_intercept
         p = None
-        from chimerax.geometry import closest_triangle_intercept
         if self.positions.is_identity():
-            fmin, tmin = closest_triangle_intercept(va, ta, mxyz1, mxyz2)
+            fmin, tmin = intercept(mxyz1, mxyz2)
             if fmin is not None:
                 p = PickedTriangle(fmin, tmin, 0, self)
         else:
             pos_nums = self.bounds_intercept_copies(self.geometry_bounds(), mxyz1, mxyz2)
             for i in pos_nums:
                 cxyz1, cxyz2 = self.positions[i].inverse() * (mxyz1, mxyz2)
-                fmin, tmin = closest_triangle_intercept(va, ta, cxyz1, cxyz2)
+                fmin, tmin = intercept(cxyz1, cxyz2)
                 if fmin is not None and (p is None or fmin < p.distance):
                     p = PickedTriangle(fmin, tmin, i, self)
         return p
 
+    pick_tree_min_triangles = 50000
+    '''
+    Drawings with at least this many displayed triangles use a bounding volume
+    hierarchy to speed up picking.
+    '''
+
+    def _picking_tree(self):
+        '''
+        Return a TriangleTree for the masked triangles, or None if picking should
+        check every triangle.  The tree is made on the second pick after the
+        geometry or triangle mask changes so that drawings which change shape
+        often do not pay the cost of building a tree that is used only once.
+        '''
+        tree = self._pick_tree
+        if tree is None:
+            t = self.triangles
+            if (t is None or t.shape[1] != 3 or
+                self.num_masked_triangles < self.pick_tree_min_triangles):
+                return None
+            self._pick_tree = False
+        elif tree is False:
+            from chimerax.geometry import TriangleTree
+            self._pick_tree = tree = TriangleTree(self.vertices, self.masked_triangles)
+        return tree or None
+
     def bounds_intercept_copies(self, bounds, mxyz1, mxyz2):
         '''
         Return indices of positions where line segment intercepts displayed bounds.
@@ -1180,17 +1212,9 @@ class Drawing:
                 # For non-instances pick using all vertices.
                 from chimerax.geometry import transform_planes
                 pplanes = transform_planes(self.position, planes)
-                vmask = points_within_planes(self.vertices, pplanes)
-                if vmask.sum() > 0:
-                    t = self.triangles
-                    from numpy import logical_or, logical_and
-                    tmask = logical_or(vmask[t[:,0]], vmask[t[:,1]])
-                    logical_or(tmask, vmask[t[:,2]], tmask)
-                    tm = self._triangle_mask
-                    if tm is not None:
-                        logical_and(tmask, tm, tmask)
-                    if tmask.sum() > 0:
-                        picks.append(PickedTriangles(tmask, self))
+                tmask = self._planes_triangles_mask(pplanes)
+                if tmask is not None and tmask.sum() > 0:
+                    picks.append(PickedTriangles(tmask, self))
 
         # Pick child drawings
         from chimerax.geometry import transform_planes
@@ -1201,6 +1225,34 @@ class Drawing:
 
         return picks
 
+    def _planes_triangles_mask(self, planes):
+        '''
+        Return mask of displayed triangles with at least one vertex within all
+        the planes, or None if no vertices are within the planes.
+        '''
+        tm = self._triangle_mask
+        tree = self._picking_tree()
+        if tree is not None:
+            mtmask = tree.planes_triangles(planes)
+            if tm is None:
+                return mtmask
+            from numpy import zeros
+            tmask = zeros((len(tm),), bool)
+            tmask[tm] = mtmask
+            return tmask
+
+        from chimerax.geometry import points_within_planes
+        vmask = points_within_planes(self.vertices, planes)
+        if vmask.sum() == 0:
+            return None
+        t = self.triangles
+        from numpy import logical_or, logical_and
+        tmask = logical_or(vmask[t[:,0]], vmask[t[:,1]])
+        logical_or(tmask, vmask[t[:,2]], tmask)
+        if tm is not None:
+            logical_and(tmask, tm, tmask)
+        return tmask
+
     def all_allow_clipping(self, displayed_only = True):
         if displayed_only and not self.display:
             return True
@@ -0,0 +1,76 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Measure mouse pick latency on bumpy sphere surfaces of increasing triangle
+# count, checking every triangle and using the bounding volume hierarchy.
+#
+#   ChimeraX --nogui --exit --script "pick_benchmark.py [max_triangles] [num_picks]"
+#
+def benchmark(max_triangles = 4000000, num_picks = 100, log = print):
+
+    from chimerax.graphics import Drawing
+    from chimerax.surface import sphere_geometry2
+    from numpy import random, float32
+    from time import perf_counter
+    random.seed(0)
+    ntri = 10000
+    while ntri <= max_triangles:
+        va, na, ta = sphere_geometry2(ntri)
+        va *= (100 * (1 + 0.02*random.random(len(va)))).reshape((len(va),1)).astype(float32)
+        d = Drawing('pick benchmark')
+        d.set_geometry(va, na, ta)
+
+        # Segments through the sphere from random directions.
+        dirs = random.normal(size = (num_picks, 3))
+        dirs /= ((dirs*dirs).sum(axis = 1)**0.5).reshape((num_picks,1))
+        segments = [(200*u, -200*u + random.normal(0, 20, 3)) for u in dirs]
+
+        d.pick_tree_min_triangles = len(ta) + 1
+        t0 = perf_counter()
+        linear = [d.first_intercept(xyz1, xyz2) for xyz1, xyz2 in segments]
+        tlinear = (perf_counter() - t0) / num_picks
+
+        d.pick_tree_min_triangles = 0
+        d.first_intercept(*segments[0])
+        t0 = perf_counter()
+        d.first_intercept(*segments[0])
+        tbuild = perf_counter() - t0
+        t0 = perf_counter()
+        tree = [d.first_intercept(xyz1, xyz2) for xyz1, xyz2 in segments]
+        ttree = (perf_counter() - t0) / num_picks
+
+        same = sum(1 for p1, p2 in zip(linear, tree)
+                   if (p1 is None and p2 is None) or
+                   (p1 and p2 and p1.triangle_number == p2.triangle_number))
+        log('%8d triangles: pick %.3g ms linear, %.3g ms tree, tree build %.3g ms, %d of %d picks agree'
+            % (len(ta), 1000*tlinear, 1000*ttree, 1000*tbuild, same, num_picks))
+        d.delete()
+        ntri *= 4
+
+if __name__ == '__main__' or __name__.startswith('ChimeraX_sandbox'):
+    import sys
+    max_triangles = int(sys.argv[1]) if len(sys.argv) >= 2 else 4000000
+    num_picks = int(sys.argv[2]) if len(sys.argv) >= 3 else 100
+    benchmark(max_triangles, num_picks)
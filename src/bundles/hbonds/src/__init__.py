@@ -22,7 +22,8 @@
 # copies, of the software or any revisions or derivations thereof.
 # === UCSF ChimeraX Copyright ===
 
-from .hbond import find_hbonds, rec_dist_slop, rec_angle_slop, find_coordset_hbonds, flush_cache
+from .hbond import find_hbonds, rec_dist_slop, rec_angle_slop, find_coordset_hbonds, flush_cache, \
+    iter_coordset_hbonds, write_coordset_hbonds_table
 
 from chimerax.core.toolshed import BundleAPI
 
@@ -301,19 +301,93 @@ def find_coordset_hbonds(session, structure, **kw):
        and finds the hydrogen bonds for each.  Returns a list of lists of hydrogen
        bonds, one list per coordset.
     """
-    hbonds = []
+    return [hbonds for cs_id, hbonds in iter_coordset_hbonds(session, structure, **kw)]
+
+def iter_coordset_hbonds(session, structure, *, inter_model=True, intra_model=True, donors=None,
+        acceptors=None, dist_slop=0.0, angle_slop=0.0, inter_submodel=False, cache_da=False,
+        status=True):
+    """Generator version of find_coordset_hbonds that yields (coordset ID, H-bond list) for
+       each coordset of 'structure' in turn, so that long trajectories can be processed
+       (e.g. written out as a per-frame table) without holding all the results.
+
+       Donors and acceptors are classified once for the structure's topology and only the
+       distance and angle tests are redone for each coordset.  If 'cache_da' is True, the
+       classification is also kept for later find_hbonds calls.  Other arguments are as
+       for find_hbonds.
+    """
+    global _problem, _truncated
+    from chimerax.atomic import Atom
     cs_ids = structure.coordset_ids
-    structure.active_coordset_change_notify = False
+    limited_donors, limited_acceptors = _start_hbond_search(donors, acceptors, cache_da)
+    params = _hbond_params(dist_slop, angle_slop)
+    if status:
+        session.logger.status("Finding donors and acceptors in model '%s'" % structure.name,
+            blank_after=0)
+    Atom._hb_coord = Atom.coord
+    try:
+        da_info = { structure: _donors_and_acceptors(structure, params, limited_donors,
+            limited_acceptors, cache_da) }
+    finally:
+        delattr(Atom, "_hb_coord")
+    # Other H-bond searches may run between yields, so keep the problems found while
+    # classifying donors and acceptors to report at the end.
+    problems = (_problem, _truncated)
+    bad_connectivities = 0
+    for cs_id in cs_ids:
+        if status:
+            session.logger.status("Finding H-bonds in coordset %d of model '%s'"
+                % (cs_id, structure.name), blank_after=0)
+        hbonds, bad = _coordset_hbonds(session, structure, cs_id, da_info, params,
+            inter_model, intra_model, inter_submodel)
+        bad_connectivities += bad
+        yield cs_id, hbonds
+    if status:
+        session.logger.status("")
+    _problem, _truncated = problems
+    _report_problems(session, bad_connectivities)
+
+def _coordset_hbonds(session, structure, cs_id, da_info, params, inter_model, intra_model,
+        inter_submodel):
+    """Match donors to acceptors using the coordinates of coordset 'cs_id'.  The active
+       coordset and coordinate lookup are changed only for the duration of the call, so that
+       callers of iter_coordset_hbonds may do other work (including H-bond searches) between
+       coordsets.
+    """
+    from chimerax.atomic import Atom
+    Atom._hb_coord = Atom.coord
     cur_cs_id = structure.active_coordset_id
+    structure.active_coordset_change_notify = False
     try:
-        for cs_id in cs_ids:
-            structure.active_coordset_id = cs_id
-            kw['cache_da'] = cs_id != cs_ids[-1]
-            hbonds.append(find_hbonds(session, [structure], **kw))
+        structure.active_coordset_id = cs_id
+        return _match_donors_to_acceptors(session, [structure], da_info, params,
+            inter_model, intra_model, inter_submodel)
     finally:
-        structure.active_coordset_od = cur_cs_id
+        structure.active_coordset_id = cur_cs_id
         structure.active_coordset_change_notify = True
-    return hbonds
+        delattr(Atom, "_hb_coord")
+
+def write_coordset_hbonds_table(session, structure, output, **kw):
+    """Find the H-bonds in each coordset of 'structure' and write them as they are found
+       to 'output' (a file name or open text stream) as a tab-separated table with columns
+       for coordset ID, donor, acceptor, and donor-acceptor distance.  Keywords are as for
+       find_hbonds.  Returns the total number of H-bonds written.
+    """
+    from chimerax.io import open_output
+    out_file = open_output(output, 'utf-8')
+    out_file.write("coordset\tdonor\tacceptor\tdistance\n")
+    from chimerax.geometry import distance
+    num_hbonds = 0
+    try:
+        for cs_id, hbonds in iter_coordset_hbonds(session, structure, **kw):
+            for don, acc in hbonds:
+                out_file.write("%d\t%s\t%s\t%.3f\n" % (cs_id, don.string(), acc.string(),
+                    distance(don.coord, acc.coord)))
+            num_hbonds += len(hbonds)
+    finally:
+        if out_file != output:
+            # we opened it, so close it...
+            out_file.close()
+    return num_hbonds
 
 def find_hbonds(session, structures, *, inter_model=True, intra_model=True, donors=None, acceptors=None,
         dist_slop=0.0, angle_slop=0.0, inter_submodel=False, cache_da=False, status=True):
@@ -331,18 +405,16 @@ def find_hbonds(session, structures, *, inter_model=True, intra_model=True, dono
 
         'cache_da' allows donors/acceptors in molecules to be cached if it is anticipated that
         the same structures will be examined for H-bonds repeatedly (e.g. a dynamics trajectory).
-
-        If 'per_coordset' is True and 'structures' contains a single structure with multiple coordinate
-        sets, then hydrogen bonds will be computed for each coordset.
+        For the coordsets of a single structure, find_coordset_hbonds or iter_coordset_hbonds
+        are more efficient.
 
         If 'status' is True, progress will be logged to the status line.
 
-        Returns a list of donor/acceptor pairs, unless the conditions for 'per_coordset' are
-        satisfied, in which case a list of such lists will be returned, one per coordset.
+        Returns a list of donor/acceptor pairs.
     """
 
     # hack to speed up coordinate lookup...
-    from chimerax.atomic import Atoms, Atom
+    from chimerax.atomic import Atom
     if len(structures) == 1 or not inter_model or (
             len(set([m if m.id is None else (m.id[0] if len(m.id) == 1 else m.id[:-1])
             for m in structures])) == 1 and not inter_submodel):
@@ -350,355 +422,400 @@ def find_hbonds(session, structures, *, inter_model=True, intra_model=True, dono
     else:
         Atom._hb_coord = Atom.scene_coord
     try:
-        if donors and not isinstance(donors, Atoms):
-            limited_donors = Atoms(donors)
-        else:
-            limited_donors = donors
-        if acceptors and not isinstance(acceptors, Atoms):
-            limited_acceptors = Atoms(acceptors)
+        limited_donors, limited_acceptors = _start_hbond_search(donors, acceptors, cache_da)
+        params = _hbond_params(dist_slop, angle_slop)
+        da_info = {}
+        for structure in structures:
+            if status:
+                session.logger.status("Finding donors and acceptors in model '%s'" % structure.name,
+                    blank_after=0)
+            da_info[structure] = _donors_and_acceptors(structure, params, limited_donors,
+                limited_acceptors, cache_da)
+        if status:
+            session.logger.status("Matching donors to acceptors", blank_after=0)
+        hbonds, bad_connectivities = _match_donors_to_acceptors(session, structures, da_info, params,
+            inter_model, intra_model, inter_submodel)
+        if status:
+            session.logger.status("")
+        _report_problems(session, bad_connectivities)
+    finally:
+        delattr(Atom, "_hb_coord")
+    return hbonds
+
+def _start_hbond_search(donors, acceptors, cache_da):
+    """Reset per-search state and return the limiting donor and acceptor Atoms (or None)"""
+    from chimerax.atomic import Atoms
+    if donors and not isinstance(donors, Atoms):
+        limited_donors = Atoms(donors)
+    else:
+        limited_donors = donors
+    if acceptors and not isinstance(acceptors, Atoms):
+        limited_acceptors = Atoms(acceptors)
+    else:
+        limited_acceptors = acceptors
+    global _d_cache, _a_cache, _prev_limited
+    if cache_da:
+        if limited_donors:
+            dIDs = [id(d) for d in limited_donors]
+            dIDs.sort()
         else:
-            limited_acceptors = acceptors
-        global _d_cache, _a_cache, _prev_limited
-        if cache_da:
-            if limited_donors:
-                dIDs = [id(d) for d in limited_donors]
-                dIDs.sort()
-            else:
-                dIDs = None
-            if limited_acceptors:
-                aIDs = [id(a) for a in limited_acceptors]
-                aIDs.sort()
-            else:
-                aIDs = None
-            key = (dIDs, aIDs)
-            if _prev_limited and _prev_limited != key:
-                flush_cache()
-            _prev_limited = key
-            from weakref import WeakKeyDictionary
-            if _d_cache is None:
-                _d_cache = WeakKeyDictionary()
-                _a_cache = WeakKeyDictionary()
+            dIDs = None
+        if limited_acceptors:
+            aIDs = [id(a) for a in limited_acceptors]
+            aIDs.sort()
         else:
+            aIDs = None
+        key = (dIDs, aIDs)
+        if _prev_limited and _prev_limited != key:
             flush_cache()
-        global donor_params, acceptor_params
-        global processed_donor_params, processed_acceptor_params
-        global _compute_cache
-        global verbose
-        global _problem
-        _problem = None
-        global _truncated
-        _truncated = set()
+        _prev_limited = key
+        from weakref import WeakKeyDictionary
+        if _d_cache is None:
+            _d_cache = WeakKeyDictionary()
+            _a_cache = WeakKeyDictionary()
+    else:
+        flush_cache()
+    global _problem, _truncated, _compute_cache
+    _problem = None
+    _truncated = set()
+    # Used (as necessary) to cache expensive calculations (by other functions also)
+    _compute_cache = {}
+    return limited_donors, limited_acceptors
 
-        bad_connectivities = 0
+class _HBondParams:
+    """Donor/acceptor criteria with the distance/angle slop applied"""
+    pass
 
-        # Used (as necessary) to cache expensive calculations (by other functions also)
-        _compute_cache = {}
+_hbond_params_cache = {}
+def _hbond_params(dist_slop, angle_slop):
+    process_key = (dist_slop, angle_slop)
+    try:
+        return _hbond_params_cache[process_key]
+    except KeyError:
+        pass
+    params = _HBondParams()
+    params.key = process_key
 
-        process_key = (dist_slop, angle_slop)
-        if process_key not in processed_acceptor_params:
-            # copy.deepcopy() refuses to copy functions (even as
-            # references), so do this instead...
-            a_params = []
-            for p in acceptor_params:
-                a_params.append(copy.copy(p))
+    global processed_donor_params, processed_acceptor_params
+    if process_key not in processed_acceptor_params:
+        # copy.deepcopy() refuses to copy functions (even as
+        # references), so do this instead...
+        a_params = []
+        for p in acceptor_params:
+            a_params.append(copy.copy(p))
 
-            for i in range(len(a_params)):
-                a_params[i][3] = _process_arg_tuple(a_params[i][3], dist_slop, angle_slop)
-            processed_acceptor_params[process_key] = a_params
-        else:
-            a_params = processed_acceptor_params[process_key]
-
-        # compute some info for generic acceptors/donors
-        generic_acc_info = {}
-        # oxygens...
-        generic_O_acc_args = _process_arg_tuple([3.53, 90], dist_slop, angle_slop)
-        generic_acc_info['misc_O'] = (acc_generic, generic_O_acc_args)
-        # dictionary based on bonded atom's geometry...
-        generic_acc_info['O2-'] = {
-            single: (acc_generic, generic_O_acc_args),
-            linear: (acc_generic, generic_O_acc_args),
-            planar: (acc_phi_psi, _process_arg_tuple([3.53, 90, 130], dist_slop, angle_slop)),
-            tetrahedral: (acc_generic, generic_O_acc_args)
-        }
-        generic_acc_info['O3-'] = generic_acc_info['O2-']
-        generic_acc_info['O2'] = {
-            single: (acc_generic, generic_O_acc_args),
-            linear: (acc_generic, generic_O_acc_args),
-            planar: (acc_phi_psi, _process_arg_tuple([3.30, 110, 130], dist_slop, angle_slop)),
-            tetrahedral: (acc_theta_tau, _process_arg_tuple(
-                [3.03, 100, -180, 145], dist_slop, angle_slop))
-        }
-        # list based on number of known bonded atoms...
-        generic_acc_info['O3'] = [
-            (acc_generic, generic_O_acc_args),
-            (acc_theta_tau, _process_arg_tuple([3.17, 100, -161, 145], dist_slop, angle_slop)),
-            (acc_phi_psi, _process_arg_tuple([3.42, 120, 135], dist_slop, angle_slop))
-        ]
-        # nitrogens...
-        generic_N_acc_args = _process_arg_tuple([3.42, 90], dist_slop, angle_slop)
-        generic_acc_info['misc_N'] = (acc_generic, generic_N_acc_args)
-        generic_acc_info['N2'] = (acc_phi_psi, _process_arg_tuple([3.42, 140, 135],
-                dist_slop, angle_slop))
-        # tuple based on number of bonded heavy atoms...
-        generic_N3_mult_heavy_acc_args = _process_arg_tuple([3.30, 153, -180, 145],
-                dist_slop, angle_slop)
-        generic_acc_info['N3'] = (
-            (acc_generic, generic_N_acc_args),
-            # only one example to draw from; weaken by .1A, 5 degrees
-            (acc_theta_tau, _process_arg_tuple([3.13, 98, -180, 150], dist_slop, angle_slop)),
-            (acc_theta_tau, generic_N3_mult_heavy_acc_args),
-            (acc_theta_tau, generic_N3_mult_heavy_acc_args)
-        )
-        # one example only; weaken by .1A, 5 degrees
-        generic_acc_info['N1'] = (acc_theta_tau, _process_arg_tuple(
-                    [3.40, 136, -180, 145], dist_slop, angle_slop))
-        # sulfurs...
-        # one example only; weaken by .1A, 5 degrees
-        generic_acc_info['S2'] = (acc_phi_psi, _process_arg_tuple([3.83, 85, 140],
-                dist_slop, angle_slop))
-        generic_acc_info['Sar'] = generic_acc_info['S3-'] = (acc_generic,
-                _process_arg_tuple([3.83, 85], dist_slop, angle_slop))
-        # now the donors...
-
-        # planar nitrogens
-        gen_don_Npl_1h_params = (don_theta_tau, _process_arg_tuple([2.23, 136,
-            2.23, 141, 140, 2.46, 136, 140], dist_slop, angle_slop))
-        gen_don_Npl_2h_params = (don_upsilon_tau, _process_arg_tuple([3.30, 90, -153,
-            135, -45, 3.30, 90, -146, 140, -37.5, 130, 3.40, 108, -166, 125, -35, 140],
+        for i in range(len(a_params)):
+            a_params[i][3] = _process_arg_tuple(a_params[i][3], dist_slop, angle_slop)
+        processed_acceptor_params[process_key] = a_params
+    else:
+        a_params = processed_acceptor_params[process_key]
+    params.a_params = a_params
+
+    # compute some info for generic acceptors/donors
+    generic_acc_info = {}
+    # oxygens...
+    generic_O_acc_args = _process_arg_tuple([3.53, 90], dist_slop, angle_slop)
+    generic_acc_info['misc_O'] = (acc_generic, generic_O_acc_args)
+    # dictionary based on bonded atom's geometry...
+    generic_acc_info['O2-'] = {
+        single: (acc_generic, generic_O_acc_args),
+        linear: (acc_generic, generic_O_acc_args),
+        planar: (acc_phi_psi, _process_arg_tuple([3.53, 90, 130], dist_slop, angle_slop)),
+        tetrahedral: (acc_generic, generic_O_acc_args)
+    }
+    generic_acc_info['O3-'] = generic_acc_info['O2-']
+    generic_acc_info['O2'] = {
+        single: (acc_generic, generic_O_acc_args),
+        linear: (acc_generic, generic_O_acc_args),
+        planar: (acc_phi_psi, _process_arg_tuple([3.30, 110, 130], dist_slop, angle_slop)),
+        tetrahedral: (acc_theta_tau, _process_arg_tuple(
+            [3.03, 100, -180, 145], dist_slop, angle_slop))
+    }
+    # list based on number of known bonded atoms...
+    generic_acc_info['O3'] = [
+        (acc_generic, generic_O_acc_args),
+        (acc_theta_tau, _process_arg_tuple([3.17, 100, -161, 145], dist_slop, angle_slop)),
+        (acc_phi_psi, _process_arg_tuple([3.42, 120, 135], dist_slop, angle_slop))
+    ]
+    # nitrogens...
+    generic_N_acc_args = _process_arg_tuple([3.42, 90], dist_slop, angle_slop)
+    generic_acc_info['misc_N'] = (acc_generic, generic_N_acc_args)
+    generic_acc_info['N2'] = (acc_phi_psi, _process_arg_tuple([3.42, 140, 135],
             dist_slop, angle_slop))
-        gen_don_O_dists = [2.41, 2.28, 2.28, 3.27, 3.14, 3.14]
-        gen_don_O_params = (don_generic, _process_arg_tuple(gen_don_O_dists, dist_slop, angle_slop))
-        gen_don_N_dists = [2.36, 2.48, 2.48, 3.30, 3.42, 3.42]
-        gen_don_N_params = (don_generic, _process_arg_tuple(gen_don_N_dists, dist_slop, angle_slop))
-        gen_don_S_dists = [2.42, 2.42, 2.42, 3.65, 3.65, 3.65]
-        gen_don_S_params = (don_generic, _process_arg_tuple(gen_don_S_dists, dist_slop, angle_slop))
-        generic_don_info = {
-            'O': gen_don_O_params,
-            'N': gen_don_N_params,
-            'S': gen_don_S_params
-        }
-
-        from chimerax.atom_search import AtomSearchTree
-        metal_coord = {}
-        acc_trees = {}
-        hbonds = []
-        has_sulfur = {}
-        for structure in structures:
-            if status:
-                session.logger.status("Finding acceptors in model '%s'" % structure.name, blank_after=0)
-            if cache_da and structure in _a_cache and (dist_slop,
-                    angle_slop) in _a_cache[structure]:
-                acc_atoms = []
-                acc_data = []
-                for acc_atom, data in _a_cache[structure][(dist_slop, angle_slop)].items():
-                    if not acc_atom.deleted:
-                        acc_atoms.append(acc_atom)
-                        acc_data.append(data)
-            else:
-                acc_atoms, acc_data = _find_acceptors(structure, a_params,
-                        limited_acceptors, generic_acc_info)
-                if cache_da:
-                    cache = WeakKeyDictionary()
-                    for i in range(len(acc_atoms)):
-                        cache[acc_atoms[i]] = acc_data[i]
-                    if structure not in _a_cache:
-                        _a_cache[structure] = {}
-                    _a_cache[structure][(dist_slop, angle_slop)] = cache
-            #xyz = []
-            has_sulfur[structure] = False
-            for acc_atom in acc_atoms:
-                #c = acc_atom._hb_coord
-                #xyz.append([c[0], c[1], c[2]])
-                if acc_atom.element == Element.get_element('S'):
-                    has_sulfur[structure] = True
-            if status:
-                session.logger.status("Building search tree of acceptor atoms", blank_after=0)
-            acc_tree = acc_trees[structure] = AtomSearchTree(acc_atoms, data=acc_data, sep_val=3.0,
-                scene_coords=(Atom._hb_coord == Atom.scene_coord))
-            metals = structure.atoms.filter(structure.atoms.elements.is_metal)
-            for metal in metals:
-                for acc_atom, geom_func, args in acc_tree.search(metal._hb_coord, 4.0):
-                    metal_coord.setdefault(acc_atom, []).append(metal)
-
-        if process_key not in processed_donor_params:
-            # find max donor distances before they get squared..
-
-            # copy.deepcopy() refuses to copy functions (even as
-            # references), so do this instead...
-            d_params = []
-            for p in donor_params:
-                d_params.append(copy.copy(p))
-
-            for di in range(len(d_params)):
-                geom_type = d_params[di][2]
-                arg_list = d_params[di][4]
-                don_rad = Element.bond_radius('N')
-                if geom_type == theta_tau:
-                    max_dist = max((arg_list[0], arg_list[2], arg_list[5]))
-                elif geom_type == upsilon_tau:
-                    max_dist = max((arg_list[0], arg_list[5], arg_list[11]))
-                elif geom_type == water:
-                    max_dist = max((arg_list[1], arg_list[4], arg_list[8]))
-                else:
-                    max_dist = max(gen_don_O_dists + gen_don_N_dists + gen_don_S_dists)
-                    don_rad = Element.bond_radius('S')
-                d_params[di].append(max_dist + dist_slop + don_rad + Element.bond_radius('H'))
+    # tuple based on number of bonded heavy atoms...
+    generic_N3_mult_heavy_acc_args = _process_arg_tuple([3.30, 153, -180, 145],
+            dist_slop, angle_slop)
+    generic_acc_info['N3'] = (
+        (acc_generic, generic_N_acc_args),
+        # only one example to draw from; weaken by .1A, 5 degrees
+        (acc_theta_tau, _process_arg_tuple([3.13, 98, -180, 150], dist_slop, angle_slop)),
+        (acc_theta_tau, generic_N3_mult_heavy_acc_args),
+        (acc_theta_tau, generic_N3_mult_heavy_acc_args)
+    )
+    # one example only; weaken by .1A, 5 degrees
+    generic_acc_info['N1'] = (acc_theta_tau, _process_arg_tuple(
+                [3.40, 136, -180, 145], dist_slop, angle_slop))
+    # sulfurs...
+    # one example only; weaken by .1A, 5 degrees
+    generic_acc_info['S2'] = (acc_phi_psi, _process_arg_tuple([3.83, 85, 140],
+            dist_slop, angle_slop))
+    generic_acc_info['Sar'] = generic_acc_info['S3-'] = (acc_generic,
+            _process_arg_tuple([3.83, 85], dist_slop, angle_slop))
+    params.generic_acc_info = generic_acc_info
+    # now the donors...
 
-            for i in range(len(d_params)):
-                d_params[i][4] = _process_arg_tuple(d_params[i][4], dist_slop, angle_slop)
-            processed_donor_params[process_key] = d_params
-        else:
-            d_params = processed_donor_params[process_key]
-
-        generic_water_params = _process_arg_tuple([2.36, 2.36 + OH_bond_dist, 146],
-                                dist_slop, angle_slop)
-        generic_theta_tau_params = _process_arg_tuple([2.48, 132], dist_slop, angle_slop)
-        generic_upsilon_tau_params = _process_arg_tuple([3.42, 90, -161, 125], dist_slop, angle_slop)
-        generic_generic_params = _process_arg_tuple([2.48, 3.42, 130, 90], dist_slop, angle_slop)
-        for dmi in range(len(structures)):
-            structure = structures[dmi]
-            if status:
-                session.logger.status("Finding donors in model '%s'" % structure.name, blank_after=0)
-            if cache_da and structure in _d_cache and (dist_slop, angle_slop) in _d_cache[structure]:
-                don_atoms = []
-                don_data = []
-                for don_atom, data in _d_cache[structure][(dist_slop, angle_slop)].items():
-                    if not don_atom.deleted:
-                        don_atoms.append(don_atom)
-                        don_data.append(data)
+    # planar nitrogens
+    params.gen_don_Npl_1h_params = (don_theta_tau, _process_arg_tuple([2.23, 136,
+        2.23, 141, 140, 2.46, 136, 140], dist_slop, angle_slop))
+    params.gen_don_Npl_2h_params = (don_upsilon_tau, _process_arg_tuple([3.30, 90, -153,
+        135, -45, 3.30, 90, -146, 140, -37.5, 130, 3.40, 108, -166, 125, -35, 140],
+        dist_slop, angle_slop))
+    gen_don_O_dists = [2.41, 2.28, 2.28, 3.27, 3.14, 3.14]
+    gen_don_O_params = (don_generic, _process_arg_tuple(gen_don_O_dists, dist_slop, angle_slop))
+    gen_don_N_dists = [2.36, 2.48, 2.48, 3.30, 3.42, 3.42]
+    gen_don_N_params = (don_generic, _process_arg_tuple(gen_don_N_dists, dist_slop, angle_slop))
+    gen_don_S_dists = [2.42, 2.42, 2.42, 3.65, 3.65, 3.65]
+    gen_don_S_params = (don_generic, _process_arg_tuple(gen_don_S_dists, dist_slop, angle_slop))
+    params.generic_don_info = {
+        'O': gen_don_O_params,
+        'N': gen_don_N_params,
+        'S': gen_don_S_params
+    }
+
+    if process_key not in processed_donor_params:
+        # find max donor distances before they get squared..
+
+        # copy.deepcopy() refuses to copy functions (even as
+        # references), so do this instead...
+        d_params = []
+        for p in donor_params:
+            d_params.append(copy.copy(p))
+
+        for di in range(len(d_params)):
+            geom_type = d_params[di][2]
+            arg_list = d_params[di][4]
+            don_rad = Element.bond_radius('N')
+            if geom_type == theta_tau:
+                max_dist = max((arg_list[0], arg_list[2], arg_list[5]))
+            elif geom_type == upsilon_tau:
+                max_dist = max((arg_list[0], arg_list[5], arg_list[11]))
+            elif geom_type == water:
+                max_dist = max((arg_list[1], arg_list[4], arg_list[8]))
             else:
-                don_atoms, don_data = _find_donors(structure, d_params, limited_donors, generic_don_info)
-                if cache_da:
-                    cache = WeakKeyDictionary()
-                    for i in range(len(don_atoms)):
-                        cache[don_atoms[i]] = don_data[i]
-                    if structure not in _d_cache:
-                        _d_cache[structure] = {}
-                    _d_cache[structure][(dist_slop, angle_slop)] = cache
+                max_dist = max(gen_don_O_dists + gen_don_N_dists + gen_don_S_dists)
+                don_rad = Element.bond_radius('S')
+            d_params[di].append(max_dist + dist_slop + don_rad + Element.bond_radius('H'))
 
-            if status:
-                session.logger.status("Matching donors in model '%s' to acceptors" % structure.name,
-                    blank_after=0)
+        for i in range(len(d_params)):
+            d_params[i][4] = _process_arg_tuple(d_params[i][4], dist_slop, angle_slop)
+        processed_donor_params[process_key] = d_params
+    else:
+        d_params = processed_donor_params[process_key]
+    params.d_params = d_params
+
+    params.generic_water_params = _process_arg_tuple([2.36, 2.36 + OH_bond_dist, 146],
+                            dist_slop, angle_slop)
+    params.generic_theta_tau_params = _process_arg_tuple([2.48, 132], dist_slop, angle_slop)
+    params.generic_upsilon_tau_params = _process_arg_tuple([3.42, 90, -161, 125], dist_slop, angle_slop)
+    params.generic_generic_params = _process_arg_tuple([2.48, 3.42, 130, 90], dist_slop, angle_slop)
+    _hbond_params_cache[process_key] = params
+    return params
+
+def _donors_and_acceptors(structure, params, limited_donors, limited_acceptors, cache_da):
+    """Classify the donors and acceptors of a structure.  The classification only depends on
+       the structure's topology, so it can be reused for all coordsets.
+    """
+    from weakref import WeakKeyDictionary
+    slop_key = params.key
+    if cache_da and structure in _a_cache and slop_key in _a_cache[structure]:
+        acc_atoms = []
+        acc_data = []
+        for acc_atom, data in _a_cache[structure][slop_key].items():
+            if not acc_atom.deleted:
+                acc_atoms.append(acc_atom)
+                acc_data.append(data)
+    else:
+        acc_atoms, acc_data = _find_acceptors(structure, params.a_params,
+                limited_acceptors, params.generic_acc_info)
+        if cache_da:
+            cache = WeakKeyDictionary()
+            for i in range(len(acc_atoms)):
+                cache[acc_atoms[i]] = acc_data[i]
+            if structure not in _a_cache:
+                _a_cache[structure] = {}
+            _a_cache[structure][slop_key] = cache
+
+    if cache_da and structure in _d_cache and slop_key in _d_cache[structure]:
+        don_atoms = []
+        don_data = []
+        for don_atom, data in _d_cache[structure][slop_key].items():
+            if not don_atom.deleted:
+                don_atoms.append(don_atom)
+                don_data.append(data)
+    else:
+        don_atoms, don_data = _find_donors(structure, params.d_params, limited_donors,
+            params.generic_don_info)
+        if cache_da:
+            cache = WeakKeyDictionary()
             for i in range(len(don_atoms)):
-                donor_atom = don_atoms[i]
-                geom_type, tau_sym, arg_list, test_dist = don_data[i]
-                donor_hyds = hyd_positions(donor_atom)
-                coord = donor_atom._hb_coord
-                for acc_structure in structures:
-                    if acc_structure == structure and not intra_model or acc_structure != structure and not inter_model:
+                cache[don_atoms[i]] = don_data[i]
+            if structure not in _d_cache:
+                _d_cache[structure] = {}
+            _d_cache[structure][slop_key] = cache
+
+    sulfur = Element.get_element('S')
+    has_sulfur = False
+    for acc_atom in acc_atoms:
+        if acc_atom.element == sulfur:
+            has_sulfur = True
+            break
+    metals = structure.atoms.filter(structure.atoms.elements.is_metal)
+    return acc_atoms, acc_data, don_atoms, don_data, has_sulfur, metals
+
+def _match_donors_to_acceptors(session, structures, da_info, params, inter_model, intra_model,
+        inter_submodel):
+    """Apply the distance and angle tests to the current coordinates of the classified
+       donors and acceptors.  Returns the H-bond list and the number of atoms skipped
+       due to bad connectivity.
+    """
+    from chimerax.atomic import Atom
+    from chimerax.atom_search import AtomSearchTree
+    bad_connectivities = 0
+    metal_coord = {}
+    acc_trees = {}
+    hbonds = []
+    for structure in structures:
+        acc_atoms, acc_data, don_atoms, don_data, has_sulfur, metals = da_info[structure]
+        acc_tree = acc_trees[structure] = AtomSearchTree(acc_atoms, data=acc_data, sep_val=3.0,
+            scene_coords=(Atom._hb_coord == Atom.scene_coord))
+        for metal in metals:
+            for acc_atom, geom_func, args in acc_tree.search(metal._hb_coord, 4.0):
+                metal_coord.setdefault(acc_atom, []).append(metal)
+
+    for structure in structures:
+        don_atoms, don_data = da_info[structure][2:4]
+        for i in range(len(don_atoms)):
+            donor_atom = don_atoms[i]
+            geom_type, tau_sym, arg_list, test_dist = don_data[i]
+            donor_hyds = hyd_positions(donor_atom)
+            coord = donor_atom._hb_coord
+            for acc_structure in structures:
+                if acc_structure == structure and not intra_model or acc_structure != structure and not inter_model:
+                    continue
+                if not inter_submodel \
+                and acc_structure.id and structure.id \
+                and acc_structure.id[0] == structure.id[0] \
+                and acc_structure.id[:-1] == structure.id[:-1] \
+                and acc_structure.id[1:] != structure.id[1:]:
+                    continue
+                if da_info[acc_structure][4]:
+                    from .common_geom import SULFUR_COMP
+                    td = test_dist + SULFUR_COMP
+                else:
+                    td = test_dist
+                accs = acc_trees[acc_structure].search(coord, td)
+                if verbose:
+                    session.logger.info("Found %d possible acceptors for donor %s:"
+                        % (len(accs), donor_atom))
+                    for acc_data in accs:
+                        session.logger.info("\t%s\n" % acc_data[0])
+                for acc_atom, geom_func, args in accs:
+                    if acc_atom == donor_atom:
+                        # e.g. hydroxyl
+                        if verbose:
+                            print("skipping: donor == acceptor")
                         continue
-                    if not inter_submodel \
-                    and acc_structure.id and structure.id \
-                    and acc_structure.id[0] == structure.id[0] \
-                    and acc_structure.id[:-1] == structure.id[:-1] \
-                    and acc_structure.id[1:] != structure.id[1:]:
+                    try:
+                        if not geom_func(donor_atom, donor_hyds, *args):
+                            continue
+                    except ConnectivityError as e:
+                        session.logger.info("Skipping possible acceptor with bad geometry: %s\n%s\n"
+                            % (acc_atom, e))
+                        bad_connectivities += 1
                         continue
-                    if has_sulfur[acc_structure]:
-                        from .common_geom import SULFUR_COMP
-                        td = test_dist + SULFUR_COMP
-                    else:
-                        td = test_dist
-                    accs = acc_trees[acc_structure].search(coord, td)
+                    except Exception:
+                        print("donor:", donor_atom, " acceptor:", acc_atom)
+                        raise
                     if verbose:
-                        session.logger.info("Found %d possible acceptors for donor %s:"
-                            % (len(accs), donor_atom))
-                        for acc_data in accs:
-                            session.logger.info("\t%s\n" % acc_data[0])
-                    for acc_atom, geom_func, args in accs:
-                        if acc_atom == donor_atom:
-                            # e.g. hydroxyl
-                            if verbose:
-                                print("skipping: donor == acceptor")
-                            continue
-                        try:
-                            if not geom_func(donor_atom, donor_hyds, *args):
-                                continue
-                        except ConnectivityError as e:
-                            session.logger.info("Skipping possible acceptor with bad geometry: %s\n%s\n"
-                                % (acc_atom, e))
-                            bad_connectivities += 1
-                            continue
-                        except Exception:
-                            print("donor:", donor_atom, " acceptor:", acc_atom)
-                            raise
-                        if verbose:
-                            session.logger.info("\t%s satisfies acceptor criteria" % acc_atom)
-                        if geom_type == upsilon_tau:
-                            donor_func = don_upsilon_tau
-                            add_args = generic_upsilon_tau_params + [tau_sym]
-                        elif geom_type == theta_tau:
-                            donor_func = don_theta_tau
-                            add_args = generic_theta_tau_params
-                        elif geom_type == water:
-                            donor_func = don_water
-                            add_args = generic_water_params
-                        else:
-                            if donor_atom.idatm_type in ["Npl", "N2+"]:
-                                heavys = 0
-                                for bonded in donor_atom.neighbors:
-                                    if bonded.element.number > 1:
-                                        heavys += 1
-                                if heavys > 1:
-                                    info = gen_don_Npl_1h_params
-                                else:
-                                    info = gen_don_Npl_2h_params
+                        session.logger.info("\t%s satisfies acceptor criteria" % acc_atom)
+                    if geom_type == upsilon_tau:
+                        donor_func = don_upsilon_tau
+                        add_args = params.generic_upsilon_tau_params + [tau_sym]
+                    elif geom_type == theta_tau:
+                        donor_func = don_theta_tau
+                        add_args = params.generic_theta_tau_params
+                    elif geom_type == water:
+                        donor_func = don_water
+                        add_args = params.generic_water_params
+                    else:
+                        if donor_atom.idatm_type in ["Npl", "N2+"]:
+                            heavys = 0
+                            for bonded in donor_atom.neighbors:
+                                if bonded.element.number > 1:
+                                    heavys += 1
+                            if heavys > 1:
+                                info = params.gen_don_Npl_1h_params
                             else:
-                                info = generic_don_info[donor_atom.element.name]
-                            donor_func, arg_list = info
-                            add_args = generic_generic_params
-                            if donor_func == don_upsilon_tau:
-                                # tack on generic
-                                # tau symmetry
-                                add_args = generic_upsilon_tau_params + [4]
-                            elif donor_func == don_theta_tau:
-                                add_args = generic_theta_tau_params
-                        try:
-                            if not donor_func(donor_atom, donor_hyds, acc_atom,
-                                    *tuple(arg_list + add_args)):
-                                continue
-                        except ConnectivityError as e:
-                            session.logger.info("Skipping possible donor with bad geometry: %s\n%s\n"
-                                % (donor_atom, e))
-                            bad_connectivities += 1
+                                info = params.gen_don_Npl_2h_params
+                        else:
+                            info = params.generic_don_info[donor_atom.element.name]
+                        donor_func, arg_list = info
+                        add_args = params.generic_generic_params
+                        if donor_func == don_upsilon_tau:
+                            # tack on generic
+                            # tau symmetry
+                            add_args = params.generic_upsilon_tau_params + [4]
+                        elif donor_func == don_theta_tau:
+                            add_args = params.generic_theta_tau_params
+                    try:
+                        if not donor_func(donor_atom, donor_hyds, acc_atom,
+                                *tuple(arg_list + add_args)):
                             continue
-                        except AtomTypeError as e:
-                            session.logger.warning(str(e))
-                            #_problem = ("atom type", donor_atom, str(e), None)
+                    except ConnectivityError as e:
+                        session.logger.info("Skipping possible donor with bad geometry: %s\n%s\n"
+                            % (donor_atom, e))
+                        bad_connectivities += 1
+                        continue
+                    except AtomTypeError as e:
+                        session.logger.warning(str(e))
+                        #_problem = ("atom type", donor_atom, str(e), None)
+                        continue
+                    if verbose:
+                        session.logger.info("\t%s satisfies donor criteria" % donor_atom)
+                    # ensure hbond isn't precluded by metal-coordination...
+                    if acc_atom in metal_coord:
+                        from chimerax.geometry import angle
+                        conflict = False
+                        for metal in metal_coord[acc_atom]:
+                            if angle(donor_atom._hb_coord, acc_atom._hb_coord, metal._hb_coord) < 45.0:
+                                if verbose:
+                                    session.logger.info("\tH-bond between %s and %s conflicts with"
+                                        " metal coordination to %s" % (donor_atom, acc_atom, metal))
+                                conflict = True
+                                break
+                        if conflict:
                             continue
-                        if verbose:
-                            session.logger.info("\t%s satisfies donor criteria" % donor_atom)
-                        # ensure hbond isn't precluded by metal-coordination...
-                        if acc_atom in metal_coord:
-                            from chimerax.geometry import angle
-                            conflict = False
-                            for metal in metal_coord[acc_atom]:
-                                if angle(donor_atom._hb_coord, acc_atom._hb_coord, metal._hb_coord) < 45.0:
-                                    if verbose:
-                                        session.logger.info("\tH-bond between %s and %s conflicts with"
-                                            " metal coordination to %s" % (donor_atom, acc_atom, metal))
-                                    conflict = True
-                                    break
-                            if conflict:
-                                continue
-                        hbonds.append((donor_atom, acc_atom))
-            if status:
-                session.logger.status("")
-        if bad_connectivities:
-            session.logger.warning("Skipped %d atom(s) with bad connectivities; see log for details"
-                % bad_connectivities);
-        if _problem:
-            if session.ui.is_gui:
-                # report a bug when atom matches multiple donor/acceptor descriptions
-                da, atom, grp1, grp2 = _problem
-                res_atoms = atom.residue.atoms
-                def res_atom_rep(a):
-                    try:
-                        i = res_atoms.index(a)
-                    except ValueError:
-                        return "other %s" % a.element.name
-                    return "%2d" % (i+1)
-                descript = "geometry class 1: %s\n\ngeometry class 2: %s" % (repr(grp1), repr(grp2))
-                session.logger.report_exception(error_description=
+                    hbonds.append((donor_atom, acc_atom))
+    return hbonds, bad_connectivities
+
+def _report_problems(session, bad_connectivities):
+    global _problem, _truncated
+    if bad_connectivities:
+        session.logger.warning("Skipped %d atom(s) with bad connectivities; see log for details"
+            % bad_connectivities);
+    if _problem:
+        if session.ui.is_gui:
+            # report a bug when atom matches multiple donor/acceptor descriptions
+            da, atom, grp1, grp2 = _problem
+            res_atoms = atom.residue.atoms
+            def res_atom_rep(a):
+                try:
+                    i = res_atoms.index(a)
+                except ValueError:
+                    return "other %s" % a.element.name
+                return "%2d" % (i+1)
+            descript = "geometry class 1: %s\n\ngeometry class 2: %s" % (repr(grp1), repr(grp2))
+            session.logger.report_exception(error_description=
     """At least one atom was classified into more than one acceptor or donor
     geometry class.  This indicates a problem in the
     donr/acceptor classification mechanism and we would appreciate it if you
@@ -721,18 +838,15 @@ def find_hbonds(session, structures, *, inter_model=True, intra_model=True, dono
     "\n\t".join(["%s <-> %-s" % (res_atom_rep(b.atoms[0]), res_atom_rep(b.atoms[1])) for b in atom.residue.atoms.bonds]),
     descript)
     )
-            _problem = None
-        if _truncated:
-            if len(_truncated) > 20:
-                session.logger.warning("%d atoms were skipped as donors/acceptors due to missing"
-                    " heavy-atom bond partners" % len(_truncated))
-            else:
-                session.logger.warning("The following atoms were skipped as donors/acceptors due to missing"
-                    " heavy-atom bond partners: %s" % "; ".join([str(a) for a in _truncated]))
-            _truncated = None
-    finally:
-        delattr(Atom, "_hb_coord")
-    return hbonds
+        _problem = None
+    if _truncated:
+        if len(_truncated) > 20:
+            session.logger.warning("%d atoms were skipped as donors/acceptors due to missing"
+                " heavy-atom bond partners" % len(_truncated))
+        else:
+            session.logger.warning("The following atoms were skipped as donors/acceptors due to missing"
+                " heavy-atom bond partners: %s" % "; ".join([str(a) for a in _truncated]))
+        _truncated = None
 
 def _process_arg_tuple(arg_tuple, dist_slop, angle_slop):
     new_args = []
@@ -30,6 +30,7 @@
 //
 #include <Python.h>			// use PyObject
 #include <math.h>			// use ceil(), floor(), exp()
+#include <vector>			// use std::vector
 
 #include <arrays/pythonarray.h>		// use array_from_python()
 #include <arrays/rcarray.h>		// use FArray
@@ -46,6 +47,9 @@ static inline int clamp(int x, int limit)
 }
 
 // -----------------------------------------------------------------------------
+// The Gaussian is separable, exp(-(di^2+dj^2+dk^2)/2) = gi*gj*gk, so the
+// exponentials are computed once per axis for each center instead of for
+// every grid point.
 //
 static void sum_of_gaussians(const FArray &centers, const FArray &coef,
 			     const FArray &sdev, float maxrange,
@@ -59,35 +63,37 @@ static void sum_of_gaussians(const FArray &centers, const FArray &coef,
   int64_t cfs0 = coef.stride(0), ss0 = sdev.stride(0), ss1 = sdev.stride(1);
   float *ma = matrix.values();
   int64_t ms0 = matrix.stride(0), ms1 = matrix.stride(1), ms2 = matrix.stride(2);
+  std::vector<float> g[3];
   for (int64_t c = 0 ; c < n ; ++c)
     {
       float sd[3] = {sa[c*ss0], sa[c*ss0 + ss1], sa[c*ss0 + 2*ss1]};
       if (sd[0] == 0 || sd[1] == 0 || sd[2] == 0)
 	continue;
-      float cijk[3];
       int ijk_min[3], ijk_max[3];
       for (int p = 0 ; p < 3 ; ++p)
 	{
 	  float x = ca[cs0*c+cs1*p];
-	  cijk[p] = x;
 	  ijk_min[p] = clamp((int)ceil(x-maxrange*sd[p]), msize[2-p]);
 	  ijk_max[p] = clamp((int)floor(x+maxrange*sd[p]), msize[2-p]);
+	  g[p].resize(ijk_max[p]-ijk_min[p]+1);
+	  for (int i = ijk_min[p] ; i <= ijk_max[p] ; ++i)
+	    {
+	      float d = (i-x)/sd[p];
+	      g[p][i-ijk_min[p]] = exp(-0.5*d*d);
+	    }
 	}
       float cf = cfa[c*cfs0];
+      const float *gi = g[0].data() - ijk_min[0], *gj = g[1].data() - ijk_min[1],
+	*gk = g[2].data() - ijk_min[2];
       for (int k = ijk_min[2] ; k <= ijk_max[2] ; ++k)
 	{
-	  float dk = (k-cijk[2])/sd[2];
-	  float k2 = dk*dk;
+	  float fk = cf*gk[k];
 	  for (int j = ijk_min[1] ; j <= ijk_max[1] ; ++j)
 	    {
-	      float dj = (j-cijk[1])/sd[1];
-	      float jk2 = dj*dj + k2;
+	      float fjk = fk*gj[j];
+	      float *mrow = ma + k*ms0 + j*ms1;
 	      for (int i = ijk_min[0] ; i <= ijk_max[0] ; ++i)
-		{
-		  float di = (i-cijk[0])/sd[0];
-		  float ijk2 = di*di + jk2;
-		  ma[k*ms0+j*ms1+i*ms2] += cf*exp(-0.5*ijk2);
-		}
+		mrow[i*ms2] += fjk*gi[i];
 	    }
 	}
     }
@@ -142,8 +142,10 @@ local_correlation(PyObject *, PyObject *args, PyObject *keywds)
       return NULL;
     }
 
+  Py_BEGIN_ALLOW_THREADS
   call_template_function(local_corr, map1.value_type(),
 			 (map1, map2, window_size, subtract_mean, mapc));
+  Py_END_ALLOW_THREADS
   return python_none();
 }
 
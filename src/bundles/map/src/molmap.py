@@ -236,25 +236,26 @@ def bounding_grid(xyz, step, pad, transforms = None):
     return grid
 
 # -----------------------------------------------------------------------------
+# Symmetry copies of the atoms are transformed in batches and each batch is
+# added to slabs of z planes in parallel, see _add_in_slabs().  Batching bounds
+# the memory used for transformed coordinates, but the whole output grid is
+# still allocated, since the resulting map holds it in memory.  The output
+# grid is not tiled, so very large bounding grids need memory for the full
+# float32 matrix.
 #
 def add_gaussians(grid, xyz, weights, sdev, cutoff_range, transforms = None,
                   normalize = True):
 
-    from numpy import zeros, float32, empty
-    sdevs = zeros((len(xyz),3), float32)
-    for a in (0,1,2):
-        sdevs[:,a] = sdev / grid.step[a]
-
-    if transforms is None:
-        from chimerax.geometry import Places
-        transforms = Places()
+    from numpy import empty, float32
+    sdev_ijk = [sdev / s for s in grid.step]
     from ._map import sum_of_gaussians
-    ijk = empty(xyz.shape, float32)
     matrix = grid.matrix()
-    for tf in transforms:
-        ijk[:] = xyz
-        (grid.xyz_to_ijk_transform * tf).transform_points(ijk, in_place = True)
-        sum_of_gaussians(ijk, weights, sdevs, cutoff_range, matrix)
+    for ijk, w in _transformed_batches(grid, xyz, weights, transforms):
+        sdevs = empty((len(ijk),3), float32)
+        sdevs[:] = sdev_ijk
+        def add(indices, ijk_slab, matrix_slab):
+            sum_of_gaussians(ijk_slab, w[indices], sdevs[indices], cutoff_range, matrix_slab)
+        _add_in_slabs(matrix, ijk, cutoff_range * sdev_ijk[2], add)
 
     if normalize:
         from math import pow, pi
@@ -265,15 +266,62 @@ def add_gaussians(grid, xyz, weights, sdev, cutoff_range, transforms = None,
 #
 def add_balls(grid, xyz, radii, sdev, cutoff_range, transforms = None):
 
-    if transforms is None or len(transforms) == 0:
-        from chimerax.geometry import Places
-        transforms = Places()
-    from numpy import empty, float32
-    ijk = empty(xyz.shape, float32)
     r = (radii - sdev) / grid.step[0]
     matrix = grid.matrix()
     from ._map import sum_of_balls
-    for tf in transforms:
-        ijk[:] = xyz
-        (grid.xyz_to_ijk_transform * tf).transform_points(ijk, in_place = True)
-        sum_of_balls(ijk, r, sdev, cutoff_range, matrix)
+    for ijk, rb in _transformed_batches(grid, xyz, r, transforms):
+        def add(indices, ijk_slab, matrix_slab):
+            sum_of_balls(ijk_slab, rb[indices], sdev, cutoff_range, matrix_slab)
+        halo = (rb.max() if len(rb) else 0) + cutoff_range * sdev
+        _add_in_slabs(matrix, ijk, halo, add)
+
+# -----------------------------------------------------------------------------
+# Yield grid index coordinates of atoms for batches of symmetry transforms
+# with at most max_points points, and the per-atom values for each point.
+#
+def _transformed_batches(grid, xyz, values, transforms, max_points = 2**22):
+
+    if transforms is None or len(transforms) == 0:
+        from chimerax.geometry import Places
+        transforms = Places()
+    n = len(xyz)
+    tf_per_batch = max(1, max_points // max(n, 1))
+    from numpy import empty, float32, tile
+    for t0 in range(0, len(transforms), tf_per_batch):
+        tfs = transforms[t0:t0+tf_per_batch]
+        ijk = empty((len(tfs)*n, 3), float32)
+        for i, tf in enumerate(tfs):
+            ijk[i*n:(i+1)*n] = xyz
+            (grid.xyz_to_ijk_transform * tf).transform_points(ijk[i*n:(i+1)*n], in_place = True)
+        yield ijk, tile(values, len(tfs))
+
+# -----------------------------------------------------------------------------
+# Split the matrix into slabs of z planes and call add(indices, ijk, slab)
+# for each slab in worker threads, where indices are the points within halo
+# planes of the slab and ijk are their coordinates relative to the slab.
+# Slabs do not overlap so threads never add to the same grid point.
+#
+def _add_in_slabs(matrix, ijk, halo, add, min_points_per_slab = 10000):
+
+    ksize = matrix.shape[0]
+    from chimerax.core.threadq import thread_pool
+    pool = thread_pool()
+    nslabs = min(ksize, 4*pool.max_workers, max(1, len(ijk) // min_points_per_slab))
+    if nslabs <= 1:
+        from numpy import arange
+        add(arange(len(ijk)), ijk, matrix)
+        return
+
+    from numpy import argsort, searchsorted, float32
+    order = argsort(ijk[:,2])
+    kz = ijk[order,2]
+    slab_planes = (ksize + nslabs - 1) // nslabs
+    def add_slab(k0):
+        k1 = min(ksize, k0 + slab_planes)
+        i0 = searchsorted(kz, k0 - halo, 'left')
+        i1 = searchsorted(kz, k1 - 1 + halo, 'right')
+        indices = order[i0:i1]
+        slab_ijk = ijk[indices]
+        slab_ijk[:,2] -= float32(k0)
+        add(indices, slab_ijk, matrix[k0:k1])
+    pool.map(add_slab, [(k0,) for k0 in range(0, ksize, slab_planes)])
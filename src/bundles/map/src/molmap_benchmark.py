@@ -0,0 +1,82 @@
+# vim: set expandtab ts=4 sw=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Time molmap Gaussian sums for random atoms at several resolutions and
+# symmetry orders, comparing one sum_of_gaussians() call per symmetry copy
+# with batched copies added in parallel z slabs (molmap.add_gaussians()).
+#
+#   ChimeraX --nogui --exit --script "molmap_benchmark.py [num_atoms]"
+#
+def benchmark(num_atoms = 20000, resolutions = (4, 8, 16),
+              symmetries = ('C1', 'C6', 'I'), cutoff_range = 5, log = print):
+
+    from numpy import random, float32, zeros, abs
+    from math import pi, sqrt
+    random.seed(0)
+    density = 0.01	# Heavy atoms per cubic Angstrom
+    size = (num_atoms / density) ** (1/3)
+    radius = 3 * size	# Place asymmetric unit off the symmetry axes.
+    xyz = (size * random.random((num_atoms, 3)) + (radius, 0, 0)).astype(float32)
+    weights = random.randint(6, 9, num_atoms).astype(float32)
+
+    from chimerax.map.molmap import bounding_grid, add_gaussians
+    from chimerax.map._map import sum_of_gaussians
+    from time import time
+    for sym in symmetries:
+        transforms = _symmetry_matrices(sym)
+        for resolution in resolutions:
+            step = resolution / 3
+            grid = bounding_grid(xyz, step, 3*resolution, transforms)
+            sdev = resolution / (pi*sqrt(2))	# Default molmap sigma factor
+            t0 = time()
+            add_gaussians(grid, xyz, weights, sdev, cutoff_range, transforms, normalize = False)
+            t = time() - t0
+
+            # One call per symmetry copy in the main thread.
+            m = zeros(grid.matrix().shape, float32)
+            sdevs = zeros((num_atoms,3), float32)
+            sdevs[:] = [sdev/s for s in grid.step]
+            t0 = time()
+            for tf in transforms:
+                ijk = (grid.xyz_to_ijk_transform * tf).transform_points(xyz)
+                sum_of_gaussians(ijk, weights, sdevs, cutoff_range, m)
+            tserial = time() - t0
+            err = abs(m - grid.matrix()).max() / max(m.max(), 1e-30)
+            ks, js, is_ = m.shape
+            log('%s %d copies, resolution %g, grid %d x %d x %d: serial %.3f seconds,'
+                ' batched slabs %.3f seconds, %.1f times faster, relative difference %.2g'
+                % (sym, len(transforms), resolution, is_, js, ks, tserial, t,
+                   tserial / max(t, 1e-6), err))
+
+def _symmetry_matrices(sym):
+    from chimerax.geometry import cyclic_symmetry_matrices, icosahedral_symmetry_matrices
+    if sym == 'I':
+        return icosahedral_symmetry_matrices()
+    return cyclic_symmetry_matrices(int(sym[1:]))
+
+if __name__ == '__main__' or __name__.startswith('ChimeraX_sandbox'):
+    import sys
+    num_atoms = int(sys.argv[1]) if len(sys.argv) >= 2 else 20000
+    benchmark(num_atoms)
@@ -141,6 +141,18 @@ def register_volume_command(logger):
                              synopsis = 'set or report volume default values')
     register('volume defaultvalues', dsettings_desc, volume_default_values, logger=logger)
 
+    # Register volume cache command
+    cache_desc = CmdDesc(keyword = [('clear', NoArg), ('reset_statistics', NoArg)],
+                         synopsis = 'report or clear map data cache use')
+    register('volume cache', cache_desc, volume_cache, logger=logger)
+
+    # Register volume multires command
+    multires_desc = CmdDesc(optional = [('volumes', MapsArg)],
+                            keyword = [('location', EnumOf(('beside', 'cache'))),
+                                       ('rebuild', BoolArg)],
+                            synopsis = 'write subsampled copies of maps for fast coarse display')
+    register('volume multires', multires_desc, volume_multires, logger=logger)
+
     # Register volume channels command
     from . import channels
     channels.register_volume_channels_command(logger)
@@ -910,6 +922,95 @@ def volume_default_values(session,
         msg = default_settings_text(session)
         session.logger.info(msg)
 
+# -----------------------------------------------------------------------------
+#
+def volume_cache(session, clear = False, reset_statistics = False):
+    '''Report map data cache memory use and hit statistics, or clear the cache.'''
+    from .volume import data_cache
+    dc = data_cache(session)
+    if clear:
+        dc.clear()
+    if reset_statistics:
+        dc.reset_statistics()
+    session.logger.info(data_cache_text(dc))
+
+# -----------------------------------------------------------------------------
+#
+def volume_multires(session, volumes = None, location = 'beside', rebuild = False):
+    '''
+    Write a multiresolution cache file with copies of each map subsampled by
+    steps 2, 4, 8, ... in a background thread.  Displays at those steps then
+    read the small copies instead of the full map.  The cache file is written
+    next to the map file, or in the fetch cache directory, and is used when
+    the map is opened again until the map file changes.
+    '''
+    if volumes is None:
+        from . import Volume
+        volumes = session.models.list(type = Volume)
+
+    from chimerax.map_data import multires
+    from chimerax.core.errors import UserError
+    for v in volumes:
+        g = v.data
+        if not isinstance(g.path, str) or not g.path:
+            raise UserError('Map %s does not come from a single file' % v.name_with_id())
+        if g.file_type not in multires.threaded_formats:
+            raise UserError('Map %s has format %s which cannot be read in a background thread'
+                            ' to make subsampled copies' % (v.name_with_id(), g.file_type))
+        if not multires.level_steps(g.size):
+            session.logger.info('Map %s is too small to need subsampled copies' % v.name_with_id())
+            continue
+        if not rebuild:
+            mrc = multires.open_multiresolution_cache(g)
+            if mrc is not None:
+                g.multiresolution_cache = mrc
+                session.logger.info('Using multiresolution cache %s for map %s'
+                                    % (mrc.path, v.name_with_id()))
+                continue
+        if location == 'beside':
+            path = multires.cache_path_beside_map(g)
+            from os import access, W_OK
+            from os.path import dirname
+            if not access(dirname(path), W_OK):
+                path = multires.cache_path_in_fetch_cache(g)
+        else:
+            path = multires.cache_path_in_fetch_cache(g)
+        _build_multires_cache(session, v, path)
+
+def _build_multires_cache(session, v, path):
+    from chimerax.map_data.multires import write_multiresolution_cache
+    g = v.data
+    tasks = []
+    def build():
+        return write_multiresolution_cache(g, path, cancelled = lambda: bool(tasks) and tasks[0].terminating())
+    def finished(results):
+        if results is None or v.deleted:
+            return
+        mrc = results[0]
+        g.multiresolution_cache = mrc
+        steps = ', '.join('%d' % step[0] for step in mrc.steps)
+        session.logger.info('Wrote multiresolution cache %s for map %s with steps %s'
+                            % (path, v.name_with_id(), steps))
+    from chimerax.core.threadq import thread_pool
+    task = thread_pool().map_async(session, build, [()], finished,
+                                   name = 'multiresolution cache for %s' % v.name)
+    tasks.append(task)
+
+# -----------------------------------------------------------------------------
+#
+def data_cache_text(dcache):
+    s = dcache.statistics()
+    mb = float(2**20)
+    lines = ['Map data cache %.3g of %.3g Mbytes used, %d entries (%d in use), %d maps'
+             % (s['used']/mb, s['size']/mb, s['entries'], s['held'], s['groups']),
+             '%.3g Mbytes of memory mapped files not counted' % (s['mapped']/mb),
+             '%d hits, %d misses (hit rate %.1f%%), %d evictions'
+             % (s['hits'], s['misses'], 100*s['hit_rate'], s['evictions'])]
+    gused = sorted(s['group_used'].items(), key = lambda gu: gu[1], reverse = True)
+    lines.extend('%s %.3g Mbytes' % (getattr(g, 'name', str(g)), used/mb)
+                 for g, used in gused)
+    return '\n'.join(lines)
+    
 # -----------------------------------------------------------------------------
 #
 def default_settings_text(session):
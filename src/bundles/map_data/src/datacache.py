@@ -21,11 +21,21 @@
 # This notice must be embedded in or attached to all copies, including partial
 # copies, of the software or any revisions or derivations thereof.
 # === UCSF ChimeraX Copyright ===
-
 # -----------------------------------------------------------------------------
 # Maintain a cache of data objects using a limited amount of memory.
 # The least recently accessed data is released first.
 #
+# Entries are kept in an ordered dictionary in access order so lookup,
+# insertion and eviction are constant time.  Data still referenced outside
+# the cache is not released, since that would not free any memory.  Entries
+# found to be in use when they reach the head of the eviction order are set
+# aside, in access order, until they are accessed again.  Set aside entries
+# are checked again only when new data is cached or the cache is resized.
+#
+# Views of memory mapped files are cached but their size is counted
+# separately from data in memory, since the operating system reads their
+# pages from the file as needed and can drop them.
+#
 
 # -----------------------------------------------------------------------------
 #
@@ -35,42 +45,72 @@ class Data_Cache:
 
     self.size = size
     self.used = 0
+    self.mapped = 0		# Bytes of cached memory mapped file views
     self.time = 1
-    self.data = {}
-    self.groups = {}
+    self.data = {}		# All cached entries, key -> Cached_Data
+    self.groups = {}		# Group -> {key: Cached_Data}
+    self.group_used = {}	# Group -> bytes used
+    from collections import OrderedDict
+    self._lru = OrderedDict()	# Evictable entries, least recent first
+    self._held = OrderedDict()	# Entries found in use, least recent first
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
 
   # ---------------------------------------------------------------------------
   #
-  def cache_data(self, key, value, size, description, groups = []):
+  def cache_data(self, key, value, size, description, groups = [],
+                 mapped = False):
 
-    self.remove_key(key)
+    d = self.data.get(key)
+    if d is not None:
+      self.remove_data(d)
     d = Cached_Data(key, value, size, description,
-                    self.time_stamp(), groups)
+                    self.time_stamp(), groups, mapped)
     self.data[key] = d
+    self._lru[key] = d
+    resident = d.resident_size
 
+    gtable, gused = self.groups, self.group_used
     for g in groups:
-      gtable = self.groups
       if not g in gtable:
-        gtable[g] = []
-      gtable[g].append(d)
+        gtable[g] = {}
+        gused[g] = 0
+      gtable[g][key] = d
+      gused[g] += resident
 
-    self.used = self.used + size
-    self.reduce_use()
+    if mapped:
+      self.mapped += size
+    else:
+      self.used = self.used + size
+      self.reduce_use(check_held = True)
 
   # ---------------------------------------------------------------------------
+  # If count_miss is false a miss is not counted, so the caller can look
+  # for the data elsewhere in the cache and call record_miss() if not found.
   #
-  def lookup_data(self, key):
+  def lookup_data(self, key, count_miss = True):
 
     data = self.data
     if key in data:
       d = data[key]
       d.last_access = self.time_stamp()
+      self._touch(d)
       v = d.value
+      self.hits += 1
     else:
       v = None
+      if count_miss:
+        self.misses += 1
     self.reduce_use()
     return v
 
+  # ---------------------------------------------------------------------------
+  #
+  def record_miss(self):
+
+    self.misses += 1
+
   # ---------------------------------------------------------------------------
   #
   def remove_key(self, key):
@@ -78,7 +118,6 @@ class Data_Cache:
     data = self.data
     if key in data:
       self.remove_data(data[key])
-    self.reduce_use()
 
   # ---------------------------------------------------------------------------
   #
@@ -88,7 +127,7 @@ class Data_Cache:
     if not group in groups:
       return []
 
-    kd = [(d.key, d.value) for d in groups[group]]
+    kd = [(d.key, d.value) for d in groups[group].values()]
     return kd
 
   # ---------------------------------------------------------------------------
@@ -96,38 +135,111 @@ class Data_Cache:
   def resize(self, size):
 
     self.size = size
-    self.reduce_use()
+    self.reduce_use(check_held = True)
 
   # ---------------------------------------------------------------------------
+  # Evicting an entry that is not in use takes constant time.  Set aside
+  # entries may have been released since, so they are checked when requested,
+  # oldest first, stopping once enough memory is freed.  Entries still in use
+  # are moved to the end so the next check starts with those not yet checked.
   #
-  def reduce_use(self):
+  def reduce_use(self, check_held = False):
 
     if self.used <= self.size:
       return
 
-    data = self.data
-    dlist = list(data.values())
-    dlist.sort(key = lambda d: d.last_access)
-    import sys
-    for d in dlist:
-      if sys.getrefcount(d.value) == 2:
-        self.remove_data(d)
+    lru, held = self._lru, self._held
+    while self.used > self.size and lru:
+      key, d = lru.popitem(last = False)
+      if _externally_referenced(d):
+        held[key] = d		# Still in use, set aside until next access.
+      else:
+        self._evict(d)
+
+    if check_held:
+      for i in range(len(held)):
         if self.used <= self.size:
           break
+        key, d = held.popitem(last = False)
+        if _externally_referenced(d):
+          held[key] = d
+        else:
+          self._evict(d)
+
+  # ---------------------------------------------------------------------------
+  #
+  def _evict(self, d):
+
+    self.remove_data(d)
+    self.evictions += 1
+
+  # ---------------------------------------------------------------------------
+  # Move entry to most recently used position.
+  #
+  def _touch(self, d):
+
+    key = d.key
+    if key in self._held:
+      del self._held[key]
+      self._lru[key] = d
+    else:
+      self._lru.move_to_end(key)
 
   # ---------------------------------------------------------------------------
   #
   def remove_data(self, d):
 
-    del self.data[d.key]
-    self.used = self.used - d.size
+    key = d.key
+    del self.data[key]
+    if self._lru.pop(key, None) is None:
+      self._held.pop(key, None)
     d.value = None
+    if d.mapped:
+      self.mapped -= d.size
+    else:
+      self.used = self.used - d.size
 
     for g in d.groups:
-      dlist = self.groups[g]
-      dlist.remove(d)
-      if len(dlist) == 0:
+      gdata = self.groups[g]
+      del gdata[key]
+      self.group_used[g] -= d.resident_size
+      if len(gdata) == 0:
         del self.groups[g]
+        del self.group_used[g]
+
+  # ---------------------------------------------------------------------------
+  #
+  def clear(self):
+
+    for d in tuple(self.data.values()):
+      self.remove_data(d)
+
+  # ---------------------------------------------------------------------------
+  # The 'group_used' entry gives the bytes in memory cached for each group,
+  # not including memory mapped file views which are totalled in 'mapped'.
+  #
+  def statistics(self):
+
+    lookups = self.hits + self.misses
+    return {
+      'size': self.size,
+      'used': self.used,
+      'mapped': self.mapped,
+      'entries': len(self.data),
+      'held': len(self._held),
+      'groups': len(self.groups),
+      'group_used': dict(self.group_used),
+      'hits': self.hits,
+      'misses': self.misses,
+      'evictions': self.evictions,
+      'hit_rate': (self.hits / lookups) if lookups > 0 else 0,
+    }
+
+  # ---------------------------------------------------------------------------
+  #
+  def reset_statistics(self):
+
+    self.hits = self.misses = self.evictions = 0
 
   # ---------------------------------------------------------------------------
   #
@@ -137,11 +249,20 @@ class Data_Cache:
     self.time = t + 1
     return t
 
+# -----------------------------------------------------------------------------
+# References held by the Cached_Data object and by getrefcount() argument.
+#
+def _externally_referenced(d):
+
+  import sys
+  return sys.getrefcount(d.value) > 2
+
 # -----------------------------------------------------------------------------
 #
 class Cached_Data:
 
-  def __init__(self, key, value, size, description, time_stamp, groups):
+  def __init__(self, key, value, size, description, time_stamp, groups,
+               mapped = False):
 
     self.key = key
     self.value = value
@@ -149,3 +270,8 @@ class Cached_Data:
     self.description = description
     self.last_access = time_stamp
     self.groups = groups
+    self.mapped = mapped
+
+  @property
+  def resident_size(self):
+    return 0 if self.mapped else self.size
@@ -175,6 +175,9 @@ def open_file(path, file_type = None, **kw):
         data.extend(open_func(p, **okw))
   except SyntaxError as value:
     raise FileFormatError(value)
+
+  from .multires import attach_multiresolution_caches
+  attach_multiresolution_caches(data)
   
   return data
 
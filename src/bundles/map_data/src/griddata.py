@@ -143,6 +143,7 @@ class GridData:
     self.channel = channel		# Integer, channel number for multi-channel data
 
     self.data_cache = None
+    self.multiresolution_cache = None	# Subsampled copies, multires.py
 
     self.writable = False
     self.change_callbacks = []
@@ -314,7 +315,11 @@ class GridData:
     m = self.cached_data(ijk_origin, ijk_size, ijk_step)
     if m is None and not from_cache_only:
       try:
-        m = self.read_matrix(ijk_origin, ijk_size, ijk_step, progress)
+        mrc = getattr(self, 'multiresolution_cache', None)
+        if mrc is not None and tuple(ijk_step) != (1,1,1):
+          m = mrc.read_matrix(ijk_origin, ijk_size, ijk_step, progress)
+        if m is None:
+          m = self.read_matrix(ijk_origin, ijk_size, ijk_step, progress)
       except IOError as e:
         import errno
         if e.errno == errno.ENOENT:
@@ -428,11 +433,12 @@ class GridData:
       return None
 
     key = (self, tuple(origin), tuple(size), tuple(step))
-    m = dcache.lookup_data(key)
+    m = dcache.lookup_data(key, count_miss = False)
     if m is not None:
       return m
 
     if hasattr(self, 'read_xy_plane'):
+      dcache.record_miss()
       return None	# Don't look for subregion when only full planes are cached
     
     # Look for a matrix containing the desired matrix
@@ -457,9 +463,10 @@ class GridData:
       m = matrix[moffset[2]:moffset[2]+msize[2]:dstep[2],
                  moffset[1]:moffset[1]+msize[1]:dstep[1],
                  moffset[0]:moffset[0]+msize[0]:dstep[0]]
-      dcache.lookup_data(key)			# update access time
+      dcache.lookup_data(k)			# update access time
       return m
 
+    dcache.record_miss()
     return None
 
   # ---------------------------------------------------------------------------
@@ -475,7 +482,9 @@ class GridData:
     bytes = elements * m.itemsize
     groups = [self]
     descrip = self.data_description(origin, size, step)
-    dcache.cache_data(key, m, bytes, descrip, groups)
+    from .readarray import is_mapped_array
+    dcache.cache_data(key, m, bytes, descrip, groups,
+                      mapped = is_mapped_array(m))
 
   # ---------------------------------------------------------------------------
   #
@@ -525,6 +534,7 @@ class GridData:
   #
   def values_changed(self):
 
+    self.multiresolution_cache = None
     self.call_callbacks('values changed')
 
   # ---------------------------------------------------------------------------
@@ -0,0 +1,294 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+# -----------------------------------------------------------------------------
+# Multiresolution cache files hold copies of a map subsampled by steps 2, 4,
+# 8, ... so a coarse display of a huge map reads a small array instead of
+# the full resolution file.  Subsampled values are every Nth grid point, the
+# same values a step N display reads from the original file.
+#
+# The file is a 16 byte identifier, an 8 byte little endian header length,
+# a JSON header, then each subsampled array in native byte order at a page
+# aligned offset relative to the first page after the header.  Arrays are
+# read with memory mapping, see readarray.py.
+#
+# The cache is written next to the map file or in the fetch cache directory
+# and is used only if the map file size and modification time match those
+# recorded in the header.
+#
+FILE_ID = b'ChimeraX multres'
+FILE_VERSION = 1
+CACHE_SUFFIX = '.cxmr'
+MIN_LEVEL_ELEMENTS = 2**17
+
+# Formats safe to read in a background thread while the main thread also
+# reads the map.  These are read with read_array() which opens or maps the file
+# for each read.  Other formats use libraries such as HDF5, NetCDF or PIL that
+# are not safe to use from a second thread, keep an open file shared between
+# reads, or (cmap, ims, emanhdf) usually already contain subsampled copies.
+threaded_formats = ('amira', 'ccp4', 'delphi', 'deltavision', 'dock', 'gopenmol',
+                    'imagic', 'imod', 'mrc', 'pif', 'priism', 'spider', 'tom_em')
+
+# -----------------------------------------------------------------------------
+#
+class MultiresolutionCache:
+
+  def __init__(self, path, header):
+
+    self.path = path
+    data_start = header['data_start']
+    self.levels = [(tuple(l['step']), tuple(l['size']), data_start + l['offset'])
+                   for l in header['levels']]
+    from numpy import dtype
+    self.value_type = dtype(header['value_type'])
+
+  # ---------------------------------------------------------------------------
+  #
+  @property
+  def steps(self):
+    return [step for step, size, offset in self.levels]
+
+  # ---------------------------------------------------------------------------
+  # Choose the coarsest level whose grid points include the requested ones.
+  #
+  def choose_level(self, ijk_origin, ijk_step):
+
+    best = None
+    for level in self.levels:
+      step = level[0]
+      if all(st % s == 0 and o % s == 0
+             for s, st, o in zip(step, ijk_step, ijk_origin)):
+        if best is None or step[0]*step[1]*step[2] > best[0][0]*best[0][1]*best[0][2]:
+          best = level
+    return best
+
+  # ---------------------------------------------------------------------------
+  # Return matrix for full resolution indices, or None if no level matches.
+  #
+  def read_matrix(self, ijk_origin, ijk_size, ijk_step, progress = None):
+
+    level = self.choose_level(ijk_origin, ijk_step)
+    if level is None:
+      return None
+    step, size, offset = level
+    origin = [i//s for i,s in zip(ijk_origin, step)]
+    lsize = [(i+s-1)//s for i,s in zip(ijk_size, step)]
+    lstep = [i//s for i,s in zip(ijk_step, step)]
+    from .readarray import read_array
+    m = read_array(self.path, offset, origin, lsize, lstep, size,
+                   self.value_type, False, progress)
+    return m
+
+# -----------------------------------------------------------------------------
+# Sizes of subsampled levels.  Levels are made until they have fewer than
+# min_elements grid points.
+#
+def level_steps(size, min_elements = MIN_LEVEL_ELEMENTS):
+
+  isz, jsz, ksz = size
+  steps = []
+  s = 2
+  while (isz >= s and jsz >= s and ksz >= s and
+         (isz//s)*(jsz//s)*(ksz//s) >= min_elements):
+    steps.append((s,s,s))
+    s *= 2
+  return steps
+
+# -----------------------------------------------------------------------------
+#
+def cache_path_beside_map(grid_data):
+
+  path = grid_data.path
+  if not isinstance(path, str) or not path:
+    return None
+  if grid_data.grid_id:
+    return '%s.%s%s' % (path, _safe_name(grid_data.grid_id), CACHE_SUFFIX)
+  return path + CACHE_SUFFIX
+
+# -----------------------------------------------------------------------------
+#
+def cache_path_in_fetch_cache(grid_data):
+
+  path = grid_data.path
+  if not isinstance(path, str) or not path:
+    return None
+  from os.path import abspath, basename, join
+  from hashlib import sha1
+  key = sha1(('%s\n%s' % (abspath(path), grid_data.grid_id)).encode('utf-8')).hexdigest()[:16]
+  from chimerax.core.fetch import cache_directories
+  return join(cache_directories()[0], 'MapPyramids',
+              '%s_%s%s' % (key, basename(path), CACHE_SUFFIX))
+
+# -----------------------------------------------------------------------------
+#
+def _safe_name(s):
+
+  return ''.join((c if c.isalnum() or c in '-_' else '_') for c in str(s))
+
+# -----------------------------------------------------------------------------
+#
+def _source_signature(grid_data):
+
+  from os import stat
+  st = stat(grid_data.path)
+  return {'path': grid_data.path, 'size': st.st_size, 'mtime': st.st_mtime,
+          'grid_id': str(grid_data.grid_id)}
+
+# -----------------------------------------------------------------------------
+# Return the cache for the map if a valid cache file exists.
+#
+def open_multiresolution_cache(grid_data, paths = None):
+
+  if paths is None:
+    paths = [cache_path_beside_map(grid_data), cache_path_in_fetch_cache(grid_data)]
+  from os.path import isfile
+  for path in paths:
+    if path is None or not isfile(path):
+      continue
+    try:
+      header = read_header(path)
+      valid = (header.get('version') == FILE_VERSION and
+               header['source'] == _source_signature(grid_data) and
+               tuple(header['grid_size']) == tuple(grid_data.size))
+    except (OSError, ValueError, KeyError):
+      continue
+    if valid:
+      return MultiresolutionCache(path, header)
+  return None
+
+# -----------------------------------------------------------------------------
+# Use existing cache files for reading subsampled data of large maps.
+# Called when maps are opened.
+#
+def attach_multiresolution_caches(grids, min_size = 2**24):
+
+  from .griddata import GridData
+  from .subsample import SubsampledGrid
+  for g in grids:
+    if isinstance(g, (tuple, list)):
+      attach_multiresolution_caches(g, min_size)
+    elif (isinstance(g, GridData) and not isinstance(g, SubsampledGrid) and
+          isinstance(g.path, str) and g.size[0]*g.size[1]*g.size[2] >= min_size):
+      g.multiresolution_cache = open_multiresolution_cache(g)
+
+# -----------------------------------------------------------------------------
+#
+def read_header(path):
+
+  import json
+  from struct import unpack
+  with open(path, 'rb') as f:
+    if f.read(len(FILE_ID)) != FILE_ID:
+      raise ValueError('%s is not a multiresolution cache file' % path)
+    hlen = unpack('<Q', f.read(8))[0]
+    header = json.loads(f.read(hlen).decode('utf-8'))
+  header['data_start'] = _page_align(len(FILE_ID) + 8 + hlen)
+  return header
+
+# -----------------------------------------------------------------------------
+# Write a multiresolution cache file for the map.  The map is read once, in
+# slabs of z planes, without using the data cache, so this can be called from
+# a worker thread.  If cancelled() returns true while writing, the partial
+# file is removed and CancelOperation is raised.
+#
+def write_multiresolution_cache(grid_data, path, steps = None, cancelled = None,
+                                progress = None, max_slab_bytes = 2**28):
+
+  if steps is None:
+    steps = level_steps(grid_data.size)
+  if not steps:
+    raise ValueError('Map %s is too small for subsampled copies' % grid_data.name)
+
+  value_type = grid_data.value_type.newbyteorder('=')
+  levels = []
+  offset = 0
+  for step in steps:
+    size = [1+(n-1)//s for n,s in zip(grid_data.size, step)]
+    levels.append({'step': list(step), 'size': size, 'offset': offset})
+    nbytes = size[0]*size[1]*size[2]*value_type.itemsize
+    offset += _page_align(nbytes)
+  header = {'version': FILE_VERSION,
+            'source': _source_signature(grid_data),
+            'grid_size': list(grid_data.size),
+            'value_type': value_type.str,
+            'levels': levels}
+
+  import json
+  from struct import pack
+  hbytes = json.dumps(header).encode('utf-8')
+  data_start = _page_align(len(FILE_ID) + 8 + len(hbytes))
+
+  import os
+  os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok = True)
+  tmp_path = path + '.tmp'
+  try:
+    with open(tmp_path, 'wb') as f:
+      f.write(FILE_ID + pack('<Q', len(hbytes)) + hbytes)
+      f.truncate(data_start + offset)
+    _write_levels(grid_data, tmp_path, data_start, levels, cancelled, progress, max_slab_bytes)
+    os.replace(tmp_path, path)
+  except BaseException:
+    if os.path.exists(tmp_path):
+      os.remove(tmp_path)
+    raise
+
+  header['data_start'] = data_start
+  return MultiresolutionCache(path, header)
+
+# -----------------------------------------------------------------------------
+#
+def _page_align(nbytes, page_size = 4096):
+  return ((nbytes + page_size - 1) // page_size) * page_size
+
+# -----------------------------------------------------------------------------
+#
+def _write_levels(grid_data, path, data_start, levels, cancelled, progress, max_slab_bytes):
+
+  from numpy import memmap
+  value_type = grid_data.value_type.newbyteorder('=')
+  arrays = [(l['step'], memmap(path, value_type, 'r+', data_start + l['offset'],
+                               tuple(reversed(l['size']))))
+            for l in levels]
+
+  # Slabs are a multiple of the largest step so every slab starts on a plane
+  # of every level.
+  isz, jsz, ksz = grid_data.size
+  smax = max(step[2] for step, a in arrays)
+  plane_bytes = isz * jsz * value_type.itemsize
+  kslab = smax * max(1, max_slab_bytes // (plane_bytes * smax))
+  for k0 in range(0, ksz, kslab):
+    if cancelled and cancelled():
+      from chimerax.core.errors import CancelOperation
+      raise CancelOperation('Cancelled writing multiresolution cache %s' % path)
+    if progress:
+      progress.fraction(k0 / ksz)
+    kc = min(kslab, ksz - k0)
+    m = grid_data.read_matrix((0,0,k0), (isz,jsz,kc), (1,1,1), None)
+    for (istep,jstep,kstep), a in arrays:
+      ms = m[::kstep,::jstep,::istep]
+      a[k0//kstep:k0//kstep+ms.shape[0]] = ms
+  for step, a in arrays:
+    a.flush()
+  del arrays
+  if progress:
+    progress.done()
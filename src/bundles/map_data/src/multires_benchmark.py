@@ -0,0 +1,109 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Time to first image for a large map with and without a multiresolution
+# cache file.
+#
+#   ChimeraX --nogui --exit --script "multires_benchmark.py [size] [step] [directory]"
+#
+# A synthetic size^3 float32 MRC map is written, then the full map is read at
+# the given step, as the initial display of a huge map does, first from the
+# map file and then from the multiresolution cache.  The map file has just
+# been written so it is likely in the operating system file cache and the
+# times without the cache are lower than for a map on a network drive.
+#
+def benchmark(size = 1024, step = 8, directory = None, log = print):
+
+  from os.path import join, getsize
+  from tempfile import mkdtemp
+  from shutil import rmtree
+  tmp_dir = mkdtemp(dir = directory)
+  try:
+    path = join(tmp_dir, 'synthetic_%d.mrc' % size)
+    from time import time
+    t0 = time()
+    _write_synthetic_map(path, size)
+    log('Wrote %d^3 float32 map, %.0f Mbytes, %.2f seconds'
+        % (size, getsize(path)/2**20, time()-t0))
+
+    m, t = _time_first_image(path, step, use_cache = False)
+    log('Read step %d without cache: %.3f seconds' % (step, t))
+
+    from chimerax.map_data.fileformats import open_file
+    g = open_file(path)[0]
+    from chimerax.map_data.multires import cache_path_beside_map, write_multiresolution_cache
+    cpath = cache_path_beside_map(g)
+    t0 = time()
+    mrc = write_multiresolution_cache(g, cpath)
+    log('Wrote cache, steps %s, %.0f Mbytes, %.2f seconds'
+        % (', '.join('%d' % s[0] for s in mrc.steps), getsize(cpath)/2**20, time()-t0))
+
+    mc, tc = _time_first_image(path, step, use_cache = True)
+    log('Read step %d with cache: %.3f seconds, %.1f times faster'
+        % (step, tc, t/max(tc, 1e-6)))
+
+    from numpy import array_equal
+    if not array_equal(m, mc):
+      log('Values read from cache differ from map file values')
+  finally:
+    rmtree(tmp_dir)
+
+# -----------------------------------------------------------------------------
+#
+def _time_first_image(path, step, use_cache):
+
+  from time import time
+  t0 = time()
+  from chimerax.map_data.fileformats import open_file
+  g = open_file(path)[0]
+  from chimerax.map_data.multires import open_multiresolution_cache
+  g.multiresolution_cache = open_multiresolution_cache(g) if use_cache else None
+  m = g.matrix(ijk_step = (step,step,step))
+  return m, time()-t0
+
+# -----------------------------------------------------------------------------
+# Write planes of a smoothly varying function so memory use stays small.
+#
+def _write_synthetic_map(path, size):
+
+  from numpy import float32, arange, sin, cos
+  from chimerax.map_data.griddata import GridData
+  g = GridData((size,size,size), float32)
+  from chimerax.map_data.mrc.writemrc import mrc2000_header
+  x = arange(size, dtype = float32) * float32(0.05)
+  sx = sin(x)
+  cy = cos(x)[:,None]
+  with open(path, 'wb') as f:
+    f.write(mrc2000_header(g, float32))
+    for k in range(size):
+      plane = (sx + cy) * float32(sin(0.03*k))
+      f.write(plane.astype(float32).tobytes())
+
+if __name__ == '__main__' or __name__.startswith('ChimeraX_sandbox'):
+  import sys
+  size = int(sys.argv[1]) if len(sys.argv) >= 2 else 1024
+  step = int(sys.argv[2]) if len(sys.argv) >= 3 else 8
+  directory = sys.argv[3] if len(sys.argv) >= 4 else None
+  benchmark(size, step, directory)
@@ -23,15 +23,39 @@
 # === UCSF ChimeraX Copyright ===
 
 # -----------------------------------------------------------------------------
-# Read part of a matrix from a binary file making at most one copy of array
-# in memory.
+# Read subregions of raw binary files by memory mapping the file so a region
+# is a strided read-only view of the file contents, not copied and without a
+# system call for every row.  Views are read-only because all views of a file
+# share one mapping, so an in-place edit of one would change the others.  Grid
+# data read from files is not writable, so editing makes a copy, see
+# Volume.writable_copy().  Memory mapped files cannot be removed or replaced on
+# Windows, which would prevent overwriting an open map file, so mapping is
+# not used there.
 #
-# The code array.fromstring(file.read()) creates two copies in memory.
-# The numpy.fromfile() routine can't read into an existing array.
+import sys
+use_memory_map = (sys.platform != 'win32')
+
+# -----------------------------------------------------------------------------
+# Read part of a matrix from a binary file.
+#
+# If the file can be memory mapped and the values are native byte order and
+# aligned the returned array is a read-only view of the file.  Otherwise
+# values are converted from the mapped file, or if mapping fails, read from
+# the file.
 #
 def read_array(path, byte_offset, ijk_origin, ijk_size, ijk_step,
                full_size, type, byte_swap, progress = None):
 
+    if use_memory_map:
+        v = mapped_array(path, byte_offset, ijk_origin, ijk_size, ijk_step,
+                         full_size, type, byte_swap)
+        if v is not None:
+            if not byte_swap and v.flags.aligned:
+                if progress:
+                    progress.done()
+                return v
+            return copy_mapped_array(v, type, progress)
+
     if (tuple(ijk_origin) == (0,0,0) and
         tuple(ijk_size) == tuple(full_size) and
         tuple(ijk_step) == (1,1,1)):
@@ -46,26 +70,36 @@ def read_array(path, byte_offset, ijk_origin, ijk_size, ijk_step,
     if progress:
         progress.close_on_cancel(file)
         
-    # Seek in file to read needed 1d slices.
+    # If the subregion covers most of each row, read the rows of a plane
+    # spanned by the subregion with one read, otherwise read just the needed
+    # part of each row.
     io, jo, ko = ijk_origin
     isize, jsize, ksize = ijk_size
     istep, jstep, kstep = ijk_step
     element_size = matrix.itemsize
     jbytes = full_size[0] * element_size
     kbytes = full_size[1] * jbytes
-    ibytes = isize * element_size
-    ioffset = io * element_size
-    from numpy import fromstring
+    jcount = len(range(jo, jo+jsize, jstep))
+    jspan = (jcount-1)*jstep + 1
+    icount = len(range(io, io+isize, istep))
+    ispan = (icount-1)*istep + 1
+    ibytes = ispan * element_size
+    whole_rows = (jstep == 1 and 2 * ibytes >= jbytes)
+    from numpy import frombuffer
     for k in range(ko, ko+ksize, kstep):
       if progress:
         progress.plane((k-ko)//kstep)
-      kbase = byte_offset + k * kbytes
-      for j in range(jo, jo+jsize, jstep):
-        offset = kbase + j * jbytes + ioffset
-        file.seek(offset)
-        data = file.read(ibytes)
-        slice = fromstring(data, type)
-        matrix[(k-ko)//kstep,(j-jo)//jstep,:] = slice[::istep]
+      plane = matrix[(k-ko)//kstep,:,:]
+      if whole_rows:
+        file.seek(byte_offset + k * kbytes + jo * jbytes)
+        data = file.read(jspan * jbytes)
+        rows = frombuffer(data, type).reshape((jspan, full_size[0]))
+        plane[:,:] = rows[::jstep,io:io+isize:istep]
+      else:
+        for jc in range(jcount):
+          file.seek(byte_offset + k * kbytes + (jo + jc*jstep) * jbytes
+                    + io * element_size)
+          plane[jc,:] = frombuffer(file.read(ibytes), type)[::istep]
 
     file.close()
 
@@ -74,6 +108,81 @@ def read_array(path, byte_offset, ijk_origin, ijk_size, ijk_step,
 
     return matrix
 
+# -----------------------------------------------------------------------------
+# Return a strided view of a subregion of a memory mapped file, or None if the
+# file cannot be mapped or is too short.  If byte_swap is true the view has
+# non-native byte order.
+#
+def mapped_array(path, byte_offset, ijk_origin, ijk_size, ijk_step,
+                 full_size, type, byte_swap):
+
+    from numpy import dtype, ndarray
+    value_type = dtype(type)
+    if byte_swap:
+        value_type = value_type.newbyteorder()
+    isz, jsz, ksz = full_size
+    try:
+        mm = mapped_file(path)
+        a = ndarray((ksz, jsz, isz), value_type, buffer = mm, offset = byte_offset)
+        a.flags.writeable = False
+    except (OSError, ValueError, TypeError):
+        return None
+
+    io, jo, ko = ijk_origin
+    isize, jsize, ksize = ijk_size
+    istep, jstep, kstep = ijk_step
+    return a[ko:ko+ksize:kstep, jo:jo+jsize:jstep, io:io+isize:istep]
+
+# -----------------------------------------------------------------------------
+# Files stay mapped while any array refers to them.  A file modified since it
+# was mapped is mapped again.  Each file is mapped once, instead of once per
+# array, since each mapping holds a file descriptor.  The mapping is
+# read-only, so neither the file nor other arrays can be changed through it.
+#
+from weakref import WeakValueDictionary
+_mapped_files = WeakValueDictionary()
+def mapped_file(path):
+
+    import os
+    st = os.stat(path)
+    key = (path, st.st_ino, st.st_size, st.st_mtime_ns)
+    mm = _mapped_files.get(key)
+    if mm is None:
+        import mmap
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+        _mapped_files[key] = mm
+    return mm
+
+# -----------------------------------------------------------------------------
+# Return true if the array is a view of a memory mapped file.  Its pages are
+# read from the file as needed and can be dropped by the operating system, so
+# it does not use memory the way an array read into memory does.
+#
+def is_mapped_array(a):
+
+    import mmap
+    b = a
+    while b is not None:
+        if isinstance(b, mmap.mmap):
+            return True
+        b = b.obj if isinstance(b, memoryview) else getattr(b, 'base', None)
+    return False
+
+# -----------------------------------------------------------------------------
+# Copy a mapped array to a native byte order array, one plane at a time so
+# progress can be reported.
+#
+def copy_mapped_array(v, type, progress = None):
+
+    ksize, jsize, isize = v.shape
+    matrix = allocate_array((isize, jsize, ksize), type, progress = progress)
+    for k in range(ksize):
+      if progress:
+        progress.plane(k)
+      matrix[k,:,:] = v[k,:,:]
+    return matrix
+
 # -----------------------------------------------------------------------------
 # Read an array from a binary file making at most one copy of array in memory.
 #
@@ -17,10 +17,10 @@
 #
 def gaussian_convolve(volume, sdev, step = 1, subregion = None,
                       value_type = None, invert = False,
-                      modelId = None, task = None, session = None):
+                      modelId = None, session = None, output_file = None):
 
   gg = gaussian_grid(volume, sdev, step, subregion, value_type = value_type,
-                     invert = invert, task = task)
+                     invert = invert, output_file = output_file)
   from chimerax.map import volume_from_grid_data
   gv = volume_from_grid_data(gg, session, model_id = modelId)
   gv.copy_settings_from(volume, copy_region = False, copy_colors = False, copy_thresholds = False)
@@ -30,9 +30,14 @@ def gaussian_convolve(volume, sdev, step = 1, subregion = None,
   return gv
 
 # -----------------------------------------------------------------------------
+# Convolution is separable so slabs of z planes only need extra planes within
+# the Gaussian cutoff distance along z, see slabs.py.  Sharpening (invert)
+# divides by the Gaussian Fourier transform which is not a local operation,
+# so it is done on the whole map as one slab.
 #
 def gaussian_grid(volume, sdev, step = 1, subregion = None, region = None,
-                  value_type = None, invert = False, task = None):
+                  value_type = None, invert = False, output_file = None,
+                  cutoff = 5):
 
   v = volume
   if region is None:
@@ -43,18 +48,26 @@ def gaussian_grid(volume, sdev, step = 1, subregion = None, region = None,
   sdev3 = (sdev,sdev,sdev) if isinstance(sdev,(float,int)) else sdev
   ijk_sdev = [float(sd)/s for sd,s in zip(sdev3,step)]
 
-  m = v.region_matrix(region)
-  gm = gaussian_convolution(m, ijk_sdev, value_type = value_type,
-                            invert = invert, task = task)
-
-  from chimerax.map_data import ArrayGridData
   d = v.data
   suffix = 'sharpen' if invert else 'gaussian'
   if v.name.endswith(suffix): name = v.name
   else:                       name = '%s %s' % (v.name, suffix)
-  gg = ArrayGridData(gm, origin, step, d.cell_angles, d.rotation,
-                     name = name)
-  return gg
+
+  isz, jsz, ksz = v.matrix_size(region = region)
+  halo = int(cutoff*ijk_sdev[2]+1)
+  slab_planes = ksz if invert else None
+  def filter_slab(m):
+    return gaussian_convolution(m, ijk_sdev, value_type = value_type,
+                                cutoff = cutoff, invert = invert)
+
+  from .slabs import SlabOutput, filter_in_slabs, region_slab_reader
+  vtype = d.value_type if value_type is None else value_type
+  out = SlabOutput((ksz, jsz, isz), vtype, origin, step,
+                   d.cell_angles, d.rotation, name, output_file)
+  filter_in_slabs(region_slab_reader(v, region), ksz, filter_slab, out.array,
+                  halo = (halo, halo), slab_planes = slab_planes,
+                  session = v.session, name = 'gaussian filter')
+  return out.grid_data()
 
 # -----------------------------------------------------------------------------
 # Compute with zero padding in real-space to avoid cyclic-convolution.
@@ -19,19 +19,48 @@
 # This can be used for coloring # surfaces as shown in figure S3 of Hipp et al.
 # Nucleic Acids Research, 2012, Vol. 40, No. 7 3275-3288
 #
-def local_correlation(map1, map2, window_size, subtract_mean, model_id = None):
+# Slabs of z planes are computed in parallel, see slabs.py.
+#
+def local_correlation(map1, map2, window_size, subtract_mean, model_id = None,
+                      output_file = None):
 
     d1 = map1.data
-    m1 = map1.full_matrix()
     d2 = map2.data
-    m2, same = map2.interpolate_on_grid(map1)
-    mc = local_correlation_matrix(m1, m2, window_size, subtract_mean)
+    isz, jsz, ksz = d1.size
+    w = window_size
+
+    from chimerax.map.volume import same_grid, full_region
+    same = same_grid(map1, full_region(d1.size), map2, map2.subregion((1,1,1), 'all'))
+    subregion = 'all'
+    if not same and d2.voxel_count() > 2**28:
+        # Load just the subregion of map2 that covers map1 in case map1 is
+        # small and map2 is huge (e.g. does not fit in memory).
+        subregion = map2._covering_subregion(map1)
+    def read_slab(k0, k1):
+        m1 = d1.matrix((0,0,k0), (isz,jsz,k1-k0))
+        if same:
+            m2 = d2.matrix((0,0,k0), (isz,jsz,k1-k0))
+        else:
+            from numpy import empty, float32
+            m2 = empty((k1-k0,jsz,isz), float32)
+            tf = map2.model_transform().inverse()
+            for k in range(k0, k1):
+                points = map1.grid_points(tf, k)
+                m2[k-k0] = map2.interpolated_values(points, None, subregion = subregion
+                                                    ).reshape((jsz,isz))
+        return m1, m2
+    def filter_slab(m):
+        return local_correlation_matrix(m[0], m[1], w, subtract_mean)
 
-    hs = 0.5*(window_size-1)
+    hs = 0.5*(w-1)
     origin = tuple(o+hs*s for o,s in zip(d1.origin, d1.step))
-    from chimerax.map_data import ArrayGridData
-    g = ArrayGridData(mc, origin, d1.step, d1.cell_angles, d2.rotation,
-                      name = 'local correlation')
+    from numpy import float32
+    from .slabs import SlabOutput, filter_in_slabs
+    out = SlabOutput((ksz-w+1, jsz-w+1, isz-w+1), float32, origin, d1.step,
+                     d1.cell_angles, d2.rotation, 'local correlation', output_file)
+    filter_in_slabs(read_slab, ksz, filter_slab, out.array, halo = (0, w-1),
+                    session = map1.session, name = 'local correlation')
+    g = out.grid_data()
 
     from chimerax.map import volume_from_grid_data
     mapc = volume_from_grid_data(g, map1.session, model_id = model_id)
@@ -13,9 +13,10 @@
 # 3x3x3 median filter.
 #
 def median_filter(volume, bin_size = 3, iterations = 1,
-                  step = 1, subregion = None, modelId = None):
+                  step = 1, subregion = None, modelId = None, output_file = None):
 
-  mg = median_grid(volume, bin_size, iterations, step, subregion)
+  mg = median_grid(volume, bin_size, iterations, step, subregion,
+                   output_file = output_file)
   from chimerax.map import volume_from_grid_data
   mv = volume_from_grid_data(mg, volume.session, model_id = modelId)
   mv.copy_settings_from(volume, copy_region = False)
@@ -25,9 +26,10 @@ def median_filter(volume, bin_size = 3, iterations = 1,
   return mv
 
 # -----------------------------------------------------------------------------
+# Filter slabs of z planes in parallel, see slabs.py.
 #
 def median_grid(volume, bin_size = 3, iterations = 1,
-                step = 1, subregion = None, region = None):
+                step = 1, subregion = None, region = None, output_file = None):
 
   v = volume
   if region is None:
@@ -35,23 +37,31 @@ def median_grid(volume, bin_size = 3, iterations = 1,
 
   origin, step = v.region_origin_and_step(region)
 
-  vm = v.region_matrix(region)
-  m = vm
-  for i in range(iterations):
-    m = median_array(m, bin_size)
+  if isinstance(bin_size, int):
+    bin_size = (bin_size, bin_size, bin_size)
+  halo = iterations * ((bin_size[2]-1)//2)
+  def filter_slab(m):
+    for i in range(iterations):
+      m = median_array(m, bin_size)
+    return m
 
-  from chimerax.map_data import ArrayGridData
   d = v.data
   if v.name.endswith('median'): name = v.name
   else:                         name = '%s median' % v.name
-  mg = ArrayGridData(m, origin, step, d.cell_angles, d.rotation,
-                     name = name)
-  return mg
+  isz, jsz, ksz = v.matrix_size(region = region)
+  from .slabs import SlabOutput, filter_in_slabs, region_slab_reader
+  out = SlabOutput((ksz, jsz, isz), d.value_type, origin, step,
+                   d.cell_angles, d.rotation, name, output_file)
+  filter_in_slabs(region_slab_reader(v, region), ksz, filter_slab, out.array,
+                  halo = (halo, halo), session = v.session, name = 'median filter')
+  return out.grid_data()
 
 # -----------------------------------------------------------------------------
-# Volume border of result is set to zero.  Bin size must be odd.
+# Volume border of result is set to zero.  Bin size must be odd.  Rows of
+# each plane are done in blocks to limit the size of the array of neighbor
+# values.
 #
-def median_array(m, bin_size=3):
+def median_array(m, bin_size=3, max_block_values = 2**24):
 
   if isinstance(bin_size, int):
     bin_size = (bin_size, bin_size, bin_size)
@@ -65,16 +75,21 @@ def median_array(m, bin_size=3):
 
   ksize, jsize, isize = m.shape
   hsi,hsj,hsk = [(n-1)//2 for n in bin_size]
-  pn = empty((jsize-2*hsj,isize-2*hsi,si*sj*sk), m.dtype)
+  nj = jsize-2*hsj
+  jblock = max(1, min(nj, max_block_values // ((isize-2*hsi)*si*sj*sk)))
+  pn = empty((jblock,isize-2*hsi,si*sj*sk), m.dtype)
 
   for k in range(hsk,ksize-hsk):
-    c = 0
-    for ko in range(-hsk,hsk+1):
-      for jo in range(-hsj,hsj+1):
-        for io in range(-hsi,hsi+1):
-          pn[:,:,c] = m[k+ko,hsj+jo:jsize-hsj+jo,hsi+io:isize-hsi+io]
-          c += 1
-    mm[k,hsj:jsize-hsj,hsi:isize-hsi] = median(pn,axis=2)
+    for j0 in range(hsj, jsize-hsj, jblock):
+      j1 = min(j0+jblock, jsize-hsj)
+      p = pn[:j1-j0]
+      c = 0
+      for ko in range(-hsk,hsk+1):
+        for jo in range(-hsj,hsj+1):
+          for io in range(-hsi,hsi+1):
+            p[:,:,c] = m[k+ko,j0+jo:j1+jo,hsi+io:isize-hsi+io]
+            c += 1
+      mm[k,j0:j1,hsi:isize-hsi] = median(p,axis=2)
 
   return mm
 
@@ -0,0 +1,123 @@
+# === UCSF ChimeraX Copyright ===
+# Copyright 2016 Regents of the University of California.
+# All rights reserved.  This software provided pursuant to a
+# license agreement containing restrictions on its disclosure,
+# duplication and use.  For details see:
+# http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html
+# This notice must be embedded in or attached to all copies,
+# including partial copies, of the software or any revisions
+# or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+
+# -----------------------------------------------------------------------------
+# Filter maps in overlapping slabs of z planes using worker threads.  Each
+# slab of output planes is computed from the input planes it covers plus
+# halo planes below and above.  Reading input is done one slab at a time
+# since map file readers are not thread safe, while filtering runs in
+# parallel.  At most one slab per thread is in memory at once, and results
+# are copied into the output array, which can be a memory mapped file for
+# maps larger than memory.
+#
+def filter_in_slabs(read_slab, input_planes, filter_slab, output, halo = (0,0),
+                    slab_planes = None, max_slab_bytes = 2**26,
+                    session = None, name = None):
+  '''
+  read_slab(k0, k1) returns input planes k0 to k1-1 and filter_slab(m)
+  returns the filtered planes for slab m, the first result plane
+  corresponding to the first input plane.  Output plane k depends on input
+  planes k-halo[0] through k+halo[1].
+  '''
+  below, above = halo
+  kout = output.shape[0]
+  if kout == 0:
+    return output
+  if slab_planes is None:
+    plane_bytes = max(1, output[0].nbytes)
+    slab_planes = max_slab_bytes // plane_bytes
+  # Slabs at least twice the halo thickness, and equal size so the last slab
+  # is not much thinner than its halo.
+  slab_planes = max(1, slab_planes, 2*max(below, above))
+  nslabs = (kout + slab_planes - 1) // slab_planes
+  slab_planes = (kout + nslabs - 1) // nslabs
+
+  from threading import Lock
+  read_lock = Lock()
+  def filter_planes(k0, k1):
+    kin0, kin1 = max(0, k0-below), min(input_planes, k1+above)
+    with read_lock:
+      m = read_slab(kin0, kin1)
+    f = filter_slab(m)
+    output[k0:k1] = f[k0-kin0:k1-kin0]
+
+  args = [(k0, min(kout, k0+slab_planes)) for k0 in range(0, kout, slab_planes)]
+  from chimerax.core.threadq import thread_pool
+  thread_pool().map(filter_planes, args, session = session, name = name)
+  return output
+
+# -----------------------------------------------------------------------------
+# Return a function reading planes of a map region for filter_in_slabs().
+#
+def region_slab_reader(volume, region):
+
+  origin, size, step = volume.step_aligned_region(region)
+  d = volume.data
+  def read_slab(k0, k1):
+    o = (origin[0], origin[1], origin[2] + k0*step[2])
+    s = (size[0], size[1], (k1-k0-1)*step[2] + 1)
+    return d.matrix(o, s, step)
+  return read_slab
+
+# -----------------------------------------------------------------------------
+# Output array for a filtered map, in memory, or memory mapped in an MRC file
+# if a path is given.  Values are converted to the nearest MRC value type.
+#
+class SlabOutput:
+
+  def __init__(self, shape, value_type, origin, step, cell_angles, rotation,
+               name, path = None):
+
+    self.origin = origin
+    self.step = step
+    self.cell_angles = cell_angles
+    self.rotation = rotation
+    self.name = name
+    self.path = path
+    if path is None:
+      from numpy import zeros
+      self.array = zeros(shape, value_type)
+    else:
+      self.array = _mrc_file_array(path, shape, value_type, origin, step,
+                                   cell_angles, rotation)
+
+  def grid_data(self):
+
+    if self.path is None:
+      from chimerax.map_data import ArrayGridData
+      return ArrayGridData(self.array, self.origin, self.step, self.cell_angles,
+                           self.rotation, name = self.name)
+    self.array.flush()
+    self.array = None		# Close memory map before reading file.
+    from chimerax.map_data import open_file
+    g = open_file(self.path)[0]
+    g.name = self.name
+    return g
+
+# -----------------------------------------------------------------------------
+#
+def _mrc_file_array(path, shape, value_type, origin, step, cell_angles, rotation):
+
+  from chimerax.map_data.mrc.writemrc import mrc2000_header, closest_mrc2000_type
+  from numpy import dtype
+  vtype = dtype(closest_mrc2000_type(dtype(value_type).type))
+  from chimerax.map_data import GridData
+  ksize, jsize, isize = shape
+  g = GridData((isize, jsize, ksize), vtype, origin, step,
+               cell_angles = cell_angles, rotation = rotation)
+  header = mrc2000_header(g, vtype.type)
+  with open(path, 'wb') as f:
+    f.write(header)
+    f.truncate(len(header) + isize*jsize*ksize*vtype.itemsize)
+  from numpy import memmap
+  return memmap(path, vtype, 'r+', len(header), shape)
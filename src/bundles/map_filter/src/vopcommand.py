@@ -61,7 +61,7 @@ def register_volume_filtering_subcommands(logger):
     from chimerax.core.commands import CmdDesc, register, BoolArg, StringArg, EnumOf, IntArg, Int3Arg
     from chimerax.core.commands import FloatArg, Float3Arg, FloatsArg, ModelIdArg
     from chimerax.core.commands import AxisArg, CenterArg, CoordSysArg
-    from chimerax.core.commands import Or, EnumOf
+    from chimerax.core.commands import Or, EnumOf, SaveFileNameArg
     from chimerax.atomic import AtomsArg
     from chimerax.map.mapargs import MapsArg, MapStepArg, MapRegionArg, Int1or3Arg, Float1or3Arg, ValueTypeArg
     from chimerax.map.mapargs import BoxArg, Float2Arg
@@ -151,7 +151,8 @@ def register_volume_filtering_subcommands(logger):
     gauss_kw = [('s_dev', Float1or3Arg),
                  ('bfactor', FloatArg),
                  ('value_type', ValueTypeArg),
-                 ('invert', BoolArg)] + ssm_kw
+                 ('invert', BoolArg),
+                 ('output_file', SaveFileNameArg)] + ssm_kw
     gaussian_desc = CmdDesc(required = varg,
                             keyword = gauss_kw,
                             synopsis = 'Convolve map with a Gaussian for smoothing'
@@ -165,6 +166,7 @@ def register_volume_filtering_subcommands(logger):
     localcorr_desc = CmdDesc(required = varg,
                              keyword = [('window_size', IntArg),
                                         ('subtract_mean', BoolArg),
+                                        ('output_file', SaveFileNameArg),
                                         ('model_id', ModelIdArg)],
                              synopsis = 'Compute correlation between maps over a sliding window')
     register('volume localCorrelation', localcorr_desc, volume_local_correlation, logger=logger)
@@ -179,7 +181,8 @@ def register_volume_filtering_subcommands(logger):
 
     median_desc = CmdDesc(required = varg,
                           keyword = [('bin_size', MapStepArg),
-                                     ('iterations', IntArg)] + ssm_kw,
+                                     ('iterations', IntArg),
+                                     ('output_file', SaveFileNameArg)] + ssm_kw,
                           synopsis = 'Median map value over a sliding window')
     register('volume median', median_desc, volume_median, logger=logger)
 
@@ -653,8 +656,9 @@ def volume_fourier(session, volumes, subregion = 'all', step = 1, model_id = Non
 #
 def volume_gaussian(session, volumes, s_dev = (1.0,1.0,1.0), bfactor = None,
                  subregion = 'all', step = 1, value_type = None, invert = False,
-                 model_id = None):
+                 model_id = None, output_file = None):
     '''Smooth maps by Gaussian convolution.'''
+    _check_output_file(volumes, output_file)
     if bfactor is not None:
         if bfactor < 0:
             invert = not invert
@@ -664,7 +668,8 @@ def volume_gaussian(session, volumes, s_dev = (1.0,1.0,1.0), bfactor = None,
         s_dev = (sd,sd,sd)
 
     from .gaussian import gaussian_convolve
-    gv = [gaussian_convolve(v, s_dev, step, subregion, value_type, invert, model_id, session = session)
+    gv = [gaussian_convolve(v, s_dev, step, subregion, value_type, invert, model_id, session = session,
+                            output_file = output_file)
           for v in volumes]
     return _volume_or_list(gv)
                    
@@ -672,7 +677,7 @@ def volume_gaussian(session, volumes, s_dev = (1.0,1.0,1.0), bfactor = None,
 #
 def volume_sharpen(session, volumes, s_dev = (1.0,1.0,1.0), bfactor = None,
                    subregion = 'all', step = 1, value_type = None, invert = False,
-                   model_id = None):
+                   model_id = None, output_file = None):
     '''Sharpen map by amplifying high-frequencies using bfactor.'''
     if bfactor is not None:
         bfactor = -bfactor
@@ -680,7 +685,7 @@ def volume_sharpen(session, volumes, s_dev = (1.0,1.0,1.0), bfactor = None,
         invert = not invert	# s_dev specified
     return volume_gaussian(session, volumes, s_dev = s_dev, bfactor = bfactor,
                            subregion = subregion, step = step, value_type = value_type,
-                           invert = invert, model_id = model_id)
+                           invert = invert, model_id = model_id, output_file = output_file)
                    
 # -----------------------------------------------------------------------------
 #
@@ -693,7 +698,8 @@ def volume_laplacian(session, volumes, subregion = 'all', step = 1, model_id = N
 
 # -----------------------------------------------------------------------------
 #
-def volume_local_correlation(session, volumes, window_size = 5, subtract_mean = False, model_id = None):
+def volume_local_correlation(session, volumes, window_size = 5, subtract_mean = False, model_id = None,
+                             output_file = None):
     '''Compute correlation between two maps over a sliding window.'''
     if len(volumes) != 2:
         raise CommandError('volume local_correlation operation requires '
@@ -707,23 +713,31 @@ def volume_local_correlation(session, volumes, window_size = 5, subtract_mean =
                            'smaller than map size')
 
     from .localcorr import local_correlation
-    mapc = local_correlation(v1, v2, window_size, subtract_mean, model_id)
+    mapc = local_correlation(v1, v2, window_size, subtract_mean, model_id, output_file)
     return mapc
 
 # -----------------------------------------------------------------------------
 #
 def volume_median(session, volumes, bin_size = (3,3,3), iterations = 1,
-              subregion = 'all', step = 1, model_id = None):
+              subregion = 'all', step = 1, model_id = None, output_file = None):
     '''Replace map values with median of neighboring values.'''
+    _check_output_file(volumes, output_file)
     for b in bin_size:
         if b <= 0 or b % 2 == 0:
             raise CommandError('Bin size must be positive odd integer, got %d' % b)
 
     from .median import median_filter
-    mv = [median_filter(v, bin_size, iterations, step, subregion, model_id)
+    mv = [median_filter(v, bin_size, iterations, step, subregion, model_id, output_file)
           for v in volumes]
     return _volume_or_list(mv)
 
+# -----------------------------------------------------------------------------
+#
+def _check_output_file(volumes, output_file):
+    if output_file is not None and len(volumes) > 1:
+        raise CommandError('Can only write one map to output file %s, got %d maps'
+                           % (output_file, len(volumes)))
+
 # -----------------------------------------------------------------------------
 #
 def volume_morph(session, volumes, frames = 25, start = 0, play_step = 0.04,
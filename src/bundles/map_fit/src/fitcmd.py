@@ -19,8 +19,8 @@ def fitmap(session, atoms_or_map, in_map = None, subtract_maps = None,
            move_whole_molecules = True,
            search = 0, placement = 'sr', radius = None,
            cluster_angle = 6, cluster_shift = 3,
-           asymmetric_unit = True, level_inside = 0.1, sequence = 0,
-           max_steps = 2000, grid_step_min = 0.01, grid_step_max = 0.5,
+           asymmetric_unit = True, level_inside = 0.1, seed = None, threads = 1,
+           sequence = 0, max_steps = 2000, grid_step_min = 0.01, grid_step_max = 0.5,
            list_fits = None, log_fits = None, each_model = False):
     '''
     Fit an atomic model or a map in a map using a rigid rotation and translation
@@ -94,6 +94,11 @@ def fitmap(session, atoms_or_map, in_map = None, subtract_maps = None,
     level_inside : float
        Fraction of fit atoms or map that must be inside the target map contour level
        in order to keep the fit.
+    seed : integer
+       Seed for the random number generator so that search results can be reproduced.
+    threads : integer
+       Number of threads to optimize random placements in parallel.  Zero means use
+       all processor cores.  Default 1.
 
     ----------------------------------------------------------------------------
     Output options
@@ -129,7 +134,8 @@ def fitmap(session, atoms_or_map, in_map = None, subtract_maps = None,
             fits = fit_search(atoms, v, volume, metric, envelope, zeros, shift, rotate,
                               mwm, search, placement, radius,
                               cluster_angle, cluster_shift, asymmetric_unit, level_inside,
-                              max_steps, grid_step_min, grid_step_max, log)
+                              max_steps, grid_step_min, grid_step_max, log,
+                              seed = seed, threads = threads)
         elif symmetric:
             fits = [fit_map_in_symmetric_map(v, volume, metric, envelope, zeros,
                                              shift, rotate, mwm,
@@ -390,7 +396,8 @@ def fit_map_in_symmetric_map(v, volume, metric, envelope, zeros,
 def fit_search(atoms, v, volume, metric, envelope, zeros, shift, rotate,
                move_whole_molecules, search, placement, radius,
                cluster_angle, cluster_shift, asymmetric_unit, level_inside,
-               max_steps, grid_step_min, grid_step_max, log = None):
+               max_steps, grid_step_min, grid_step_max, log = None,
+               seed = None, threads = 1):
     
     # TODO: Handle case where not moving whole molecules.
 
@@ -413,16 +420,24 @@ def fit_search(atoms, v, volume, metric, envelope, zeros, shift, rotate,
 #    task = tasks.Task("Fit search", modal=True)
     def stop_cb(msg, task = None, log = log):
         return request_stop_cb(msg, task = task, log = log)
+    if threads == 0:
+        import os
+        threads = os.cpu_count() or 1
+    from time import time
+    t0 = time()
 #    try:
     flist, outside = FS.fit_search(
             mlist, points, point_weights, volume, search, rotations, shifts,
             radius, cluster_angle, cluster_shift, asymmetric_unit, level_inside,
-            me, shift, rotate, max_steps, grid_step_min, grid_step_max, stop_cb)
+            me, shift, rotate, max_steps, grid_step_min, grid_step_max, stop_cb,
+            seed = seed, threads = threads)
 #    finally:
 #        task.finished()
 
     if log:
         report_fit_search_results(flist, search, outside, level_inside, log)
+        if threads > 1:
+            log.info('Fit search took %.3g seconds using %d threads' % (time() - t0, threads))
     return flist
 
 # -----------------------------------------------------------------------------
@@ -587,6 +602,8 @@ def register_fitmap_command(logger):
             ('cluster_shift', FloatArg),
             ('asymmetric_unit', BoolArg),
             ('level_inside', FloatArg),            # fraction of point in contour
+            ('seed', IntArg),
+            ('threads', IntArg),
 
 # Output options
             ('move_whole_molecules', BoolArg),
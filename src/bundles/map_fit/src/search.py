@@ -28,6 +28,11 @@
 # Points should be in volume local coordinates.
 # Models can contain atomic models and maps that are the source of the points.
 #
+# Random placements are all chosen before optimizing, using the given seed,
+# so results are reproducible.  If threads > 1 the optimizations are run in
+# parallel and the results are clustered in placement order afterwards,
+# giving the same fits as optimizing serially.
+#
 def fit_search(models, points, point_weights, volume, n,
                rotations = True, shifts = True, radius = None,
                angle_tolerance = 6, shift_tolerance = 3,
@@ -37,7 +42,7 @@ def fit_search(models, points, point_weights, volume, n,
                optimize_translation = True, optimize_rotation = True,
                max_steps = 2000,
                ijk_step_size_min = 0.01, ijk_step_size_max = 0.5,
-               request_stop_cb = None):
+               request_stop_cb = None, seed = None, threads = 1):
 
     bounds = volume.surface_bounds()
     if bounds is None:
@@ -57,40 +62,31 @@ def fit_search(models, points, point_weights, volume, n,
     data_array = volume.matrix(step = 1)
     vtfinv = volume.position.inverse()
     mtv_list = [vtfinv * m.position for m in models]
+    symmetries = volume.data.symmetries if asymmetric_unit else None
+
+    from random import Random
+    rng = Random(seed)
+    start_tfs = []
+    for i in range(n):
+        shift = ((random_translation(bounds, rng) if radius is None
+                  else random_translation_step(center, radius, rng)) if shifts
+                  else translation(center))
+        rot = random_rotation(rng) if rotations else identity()
+        start_tfs.append(shift * rot * ctf)
 
-    flist = []
-    outside = 0
     from math import pi
     from chimerax.geometry import bins
     b = bins.Binned_Transforms(angle_tolerance*pi/180, shift_tolerance, center)
+
+    def optimize(tf, reoptimize = lambda ptf: True):
+        return optimize_placement(tf, points, point_weights, data_array, xyz_to_ijk_tf,
+                                  center, asym_center, symmetries, reoptimize,
+                                  max_steps, ijk_step_size_min, ijk_step_size_max,
+                                  optimize_translation, optimize_rotation, metric)
+
+    flist = []
     fo = {}
-    from .fitmap import locate_maximum
-    for i in range(n):
-        if request_stop_cb and request_stop_cb('Fit %d of %d' % (i+1,n)):
-            break
-        shift = ((random_translation(bounds) if radius is None
-                  else random_translation_step(center, radius)) if shifts
-                  else translation(center))
-        rot = random_rotation() if rotations else identity()
-        tf = shift * rot * ctf
-        optimize = True
-        max_opt = 2
-        while optimize and max_opt > 0:
-            p_to_ijk_tf = xyz_to_ijk_tf * tf
-            move_tf, stats = \
-              locate_maximum(points, point_weights, data_array, p_to_ijk_tf,
-                             max_steps, ijk_step_size_min, ijk_step_size_max,
-                             optimize_translation, optimize_rotation,
-                             metric, request_stop_cb = None)
-            ptf = tf * move_tf
-            optimize = False
-            max_opt -= 1
-            if asymmetric_unit:
-                atf = unique_symmetry_position(ptf, center, asym_center,
-                                               volume.data.symmetries)
-                if not atf is ptf:
-                    ptf = tf = atf
-                    optimize = not b.close_transforms(ptf)
+    def add_fit(ptf, stats):
         close = b.close_transforms(ptf)
         if len(close) == 0:
             transforms = [ptf * mtv for mtv in mtv_list]
@@ -104,6 +100,29 @@ def fit_search(models, points, point_weights, volume, n,
             s = fo[id(close[0])].stats
             s['hits'] += 1
 
+    # Reoptimize symmetry equivalent position only if not close to an existing fit.
+    reoptimize = lambda ptf: not b.close_transforms(ptf)
+    if threads is not None and threads > 1 and n > 1:
+        # Whether to reoptimize depends on the fits found from earlier placements,
+        # so threads optimize moved fits both ways and the choice is made in
+        # placement order, giving the same fits as the serial loop.
+        def optimize_both(tf):
+            moved = []
+            def note_move(ptf):
+                moved.append(ptf)
+                return False
+            fit = optimize(tf, note_move)
+            refit = optimize(moved[0], lambda ptf: False) if moved else None
+            return fit, refit
+        results = _optimize_in_threads(optimize_both, start_tfs, threads, request_stop_cb)
+        for fit, refit in results:
+            add_fit(*(refit if refit is not None and reoptimize(fit[0]) else fit))
+    else:
+        for i, tf in enumerate(start_tfs):
+            if request_stop_cb and request_stop_cb('Fit %d of %d' % (i+1,n)):
+                break
+            add_fit(*optimize(tf, reoptimize))
+
     # Filter out solutions with too many points outside volume contour.
     fflist = [f for f in flist if (in_contour(f.ptf, points, volume, f.stats)
                                    >= minimum_points_in_contour)]
@@ -116,6 +135,58 @@ def fit_search(models, points, point_weights, volume, n,
 
     return fflist, outside
 
+# -----------------------------------------------------------------------------
+# Locally optimize one placement.  If the target map has symmetry the fit is
+# moved to the symmetric copy nearest the asymmetric unit center and optimized
+# again when reoptimize(ptf) is true.
+#
+def optimize_placement(tf, points, point_weights, data_array, xyz_to_ijk_tf,
+                       center, asym_center, symmetries, reoptimize,
+                       max_steps, ijk_step_size_min, ijk_step_size_max,
+                       optimize_translation, optimize_rotation, metric):
+
+    from .fitmap import locate_maximum
+    optimize = True
+    max_opt = 2
+    while optimize and max_opt > 0:
+        p_to_ijk_tf = xyz_to_ijk_tf * tf
+        move_tf, stats = \
+          locate_maximum(points, point_weights, data_array, p_to_ijk_tf,
+                         max_steps, ijk_step_size_min, ijk_step_size_max,
+                         optimize_translation, optimize_rotation,
+                         metric, request_stop_cb = None)
+        ptf = tf * move_tf
+        optimize = False
+        max_opt -= 1
+        if symmetries is not None:
+            atf = unique_symmetry_position(ptf, center, asym_center, symmetries)
+            if not atf is ptf:
+                ptf = tf = atf
+                optimize = reoptimize(ptf)
+    return ptf, stats
+
+# -----------------------------------------------------------------------------
+# Run optimizations on a pool of threads.  The map interpolation and gradient
+# calculations release the Python global interpreter lock so the threads run
+# concurrently.  Results are returned in the order of the starting placements.
+#
+def _optimize_in_threads(optimize, start_tfs, threads, request_stop_cb = None):
+
+    n = len(start_tfs)
+    from concurrent import futures
+    with futures.ThreadPoolExecutor(max_workers = threads) as ex:
+        fmap = {ex.submit(optimize, tf):i for i, tf in enumerate(start_tfs)}
+        results = [None] * n
+        done = 0
+        for f in futures.as_completed(fmap):
+            results[fmap[f]] = f.result()
+            done += 1
+            if request_stop_cb and request_stop_cb('Fit %d of %d' % (done,n)):
+                for pf in fmap:
+                    pf.cancel()
+                break
+    return [r for r in results if r is not None]
+
 # -----------------------------------------------------------------------------
 #
 def in_contour(tf, points, volume, stats):
@@ -440,10 +511,13 @@ def move_step(move_table, session):
 
 # -----------------------------------------------------------------------------
 #
-def random_translation_step(center, radius):
+def random_translation_step(center, radius, rng = None):
 
-    v = random_direction()
-    from random import random
+    v = random_direction(rng)
+    if rng is None:
+        from random import random
+    else:
+        random = rng.random
     r = radius * random()
     from chimerax.geometry import translation
     tf = translation(center + r*v)
@@ -451,9 +525,12 @@ def random_translation_step(center, radius):
 
 # -----------------------------------------------------------------------------
 #
-def random_translation(bounds):
+def random_translation(bounds, rng = None):
 
-    from random import random
+    if rng is None:
+        from random import random
+    else:
+        random = rng.random
     shift = [x0+random()*(x1-x0) for x0,x1 in zip(bounds.xyz_min, bounds.xyz_max)]
     from chimerax.geometry import translation
     tf = translation(shift)
@@ -461,20 +538,23 @@ def random_translation(bounds):
 
 # -----------------------------------------------------------------------------
 #
-def random_rotation():
+def random_rotation(rng = None):
 
-    y, z = random_direction(), random_direction()
+    y, z = random_direction(rng), random_direction(rng)
     from chimerax.geometry import orthonormal_frame
     f = orthonormal_frame(z, y)
     return f
 
 # -----------------------------------------------------------------------------
 #
-def random_direction():
+def random_direction(rng = None):
 
     z = (1,1,1)
     from chimerax.geometry import norm, normalize_vector
-    from random import random
+    if rng is None:
+        from random import random
+    else:
+        random = rng.random
     while norm(z) > 1:
         z = (1-2*random(), 1-2*random(), 1-2*random())
     return normalize_vector(z)
@@ -28,6 +28,12 @@ class _MDCrdsBundleAPI(BundleAPI):
     
     from chimerax.atomic import StructureArg
 
+    @staticmethod
+    def get_class(class_name):
+        if class_name == 'DCDCoordsetSource':
+            from .trajectory import DCDCoordsetSource
+            return DCDCoordsetSource
+
     @staticmethod
     def run_provider(session, name, mgr):
         if mgr == session.open_command:
@@ -48,6 +54,8 @@ class _MDCrdsBundleAPI(BundleAPI):
                             'auto_style': BoolArg,
                             'coords': OpenFileNameArg,
                             'end': PositiveIntArg,
+                            'lazy': BoolArg,
+                            'max_frames': PositiveIntArg,
                             'slider': BoolArg,
                             'start': PositiveIntArg,
                             'step': PositiveIntArg,
@@ -64,7 +72,8 @@ class _MDCrdsBundleAPI(BundleAPI):
             else:
                 class MDInfo(OpenerInfo):
                     def open(self, session, data, file_name, *, structure_model=None,
-                            md_type=name, replace=True, slider=True, start=1, step=1, end=None, **kw):
+                            md_type=name, replace=True, slider=True, start=1, step=1, end=None,
+                            lazy=False, max_frames=100, **kw):
                         if structure_model is None:
                             from chimerax.core.errors import UserError, CancelOperation
                             from chimerax.atomic import Structure
@@ -113,7 +122,8 @@ class _MDCrdsBundleAPI(BundleAPI):
                                         " into")
                         from .read_coords import read_coords
                         num_coords = read_coords(session, data, structure_model, md_type,
-                            replace=replace, start=start, step=step, end=end)
+                            replace=replace, start=start, step=step, end=end, lazy=lazy,
+                            max_frames=max_frames)
                         if slider and session.ui.is_gui:
                             from chimerax.std_commands.coordset import coordset_slider
                             coordset_slider(session, [structure_model])
@@ -128,6 +138,8 @@ class _MDCrdsBundleAPI(BundleAPI):
                         from chimerax.core.commands import BoolArg, PositiveIntArg
                         return {
                             'end': PositiveIntArg,
+                            'lazy': BoolArg,
+                            'max_frames': PositiveIntArg,
                             'replace': BoolArg,
                             'slider': BoolArg,
                             'start': PositiveIntArg,
@@ -24,8 +24,12 @@
 
 from chimerax.core.errors import UserError
 
-def read_coords(session, file_name, model, format_name, *, replace=True, start=1, step=1, end=None):
+def read_coords(session, file_name, model, format_name, *, replace=True, start=1, step=1, end=None,
+        lazy=False, max_frames=100):
     from numpy import array, float64
+    if lazy and format_name != "dcd":
+        session.logger.warning("Reading frames on demand is only supported for DCD files,"
+            " reading all frames")
     if format_name == "xtc":
         from ._gromacs import read_xtc_file
         session.logger.status("Reading Gromacs xtc coordinates", blank_after=0)
@@ -44,7 +48,11 @@ def read_coords(session, file_name, model, format_name, *, replace=True, start=1
         from .dcd.MDToolsMarch97.md_DCD import DCD
         session.logger.status("Reading DCD coordinates", blank_after=0)
         dcd = DCD(file_name)
-        num_frames = _set_model_dcd_coordinates(session, model, dcd, replace, start, step, end)
+        if lazy:
+            num_frames = _set_model_dcd_source(session, model, dcd, replace, start, step, end,
+                max_frames, file_name)
+        else:
+            num_frames = _set_model_dcd_coordinates(session, model, dcd, replace, start, step, end)
         session.logger.status("Finished reading DCD coordinates")
         return num_frames
     elif format_name == "amber":
@@ -65,6 +73,8 @@ def read_coords(session, file_name, model, format_name, *, replace=True, start=1
     if start > 0 or step > 1 or end < len(coords):
         coords = coords[start:end:step]
 
+    _clear_coordset_source(model, replace)
+
     model.add_coordsets(coords, replace=replace)
     return len(coords)
 
@@ -78,13 +88,46 @@ def process_limit_args(session, start, step, end, num_coords):
         session.logger.info("start: %d, step: %d, end %d" % (start+1, step, end))
     return start, step, end
 
-def _set_model_dcd_coordinates(session, model, dcd, replace, start, step, end):
-    '''Read DCD coordinates and add to model efficiently when there are thousands of frames.'''
+def _clear_coordset_source(model, replace):
+    '''Stop reading frames on demand when a trajectory is replaced.'''
+    src = getattr(model, 'coordset_source', None)
+    if src is not None:
+        if not replace:
+            raise UserError("Cannot add frames to a structure whose frames are read on demand")
+        src.close()
+        model.coordset_source = None
+
+def _check_dcd_atoms(model, dcd):
     num_atoms = dcd.numatoms
     if model.num_atoms != num_atoms:
-        from chimerax.core.errors import UserError
         raise UserError("Specified structure has %d atoms"
             " whereas the coordinates are for %d atoms" % (model.num_atoms, num_atoms))
+
+def _set_model_dcd_source(session, model, dcd, replace, start, step, end, max_frames, path):
+    '''Read DCD frames only when they are needed, keeping at most max_frames in memory.'''
+    _check_dcd_atoms(model, dcd)
+    start, step, end = process_limit_args(session, start, step, end, dcd.numframes)
+    _clear_coordset_source(model, replace)
+    if replace:
+        base = 1
+    else:
+        base = max(model.coordset_ids) + 1
+    from .trajectory import DCDCoordsetSource
+    src = DCDCoordsetSource(model, dcd, range(start, end, step), base_id = base,
+        max_frames = max_frames, path = path)
+    if src.num_frames == 0:
+        raise UserError("No frames in range start %d, end %d, step %d" % (start+1, end, step))
+    if replace:
+        model.remove_coordsets()
+    model.coordset_source = src
+    src.load_coordset(base)
+    model.active_coordset_id = base
+    return src.num_frames
+
+def _set_model_dcd_coordinates(session, model, dcd, replace, start, step, end):
+    '''Read DCD coordinates and add to model efficiently when there are thousands of frames.'''
+    _check_dcd_atoms(model, dcd)
+    _clear_coordset_source(model, replace)
     start, step, end = process_limit_args(session, start, step, end, dcd.numframes)
     if replace:
         model.remove_coordsets()
@@ -0,0 +1,145 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+from chimerax.core.state import State
+
+class DCDCoordsetSource(State):
+    '''
+    Supplies coordinate sets for a structure from a memory-mapped DCD file.
+    Frames are only decoded and added to the structure as coordinate sets when
+    requested with load_coordset(), and at most max_frames of them are kept,
+    discarding the least recently used.  Frames skipped by the start / end / step
+    range are never read.
+
+    The structure attribute "coordset_source" refers to this object so that
+    coordinate set playback can ask for frames that are not yet loaded.  Other code
+    that uses structure.coordset_ids, such as hydrogen bonds and rmsd over coordinate
+    sets, only sees the loaded frames.  Sessions save the file path and frame range
+    and read frames on demand again when restored.
+    '''
+    def __init__(self, structure, dcd, frame_indices, base_id = 1, max_frames = 100, path = None):
+        self.structure = structure
+        self.dcd = dcd
+        self.path = path
+        self._frame_indices = frame_indices     # DCD frame index for each coordset id
+        self._base_id = base_id
+        # Coordsets that the structure already had before the trajectory frames were added.
+        self._other_ids = [i for i in structure.coordset_ids if i < base_id]
+        self.max_frames = max(1, max_frames)
+        from collections import OrderedDict
+        self._loaded = OrderedDict()            # Loaded coordset ids, least recently used first
+        self.frames_read = 0
+
+    @property
+    def num_frames(self):
+        return len(self._frame_indices)
+
+    @property
+    def coordset_ids(self):
+        '''All coordinate set ids available from the file, loaded or not.'''
+        from numpy import arange, int32, concatenate, array
+        ids = arange(self._base_id, self._base_id + self.num_frames, dtype = int32)
+        if self._other_ids:
+            ids = concatenate((array(self._other_ids, int32), ids))
+        return ids
+
+    def has_coordset(self, cs_id):
+        return 0 <= cs_id - self._base_id < self.num_frames
+
+    def frame_coords(self, cs_id):
+        '''Return float64 coordinates for a coordinate set id without creating a coordset.'''
+        if not self.has_coordset(cs_id):
+            raise IndexError('No coordinate set %d, range is %d-%d'
+                             % (cs_id, self._base_id, self._base_id + self.num_frames - 1))
+        from numpy import asarray, float64
+        self.frames_read += 1
+        return asarray(self.dcd[self._frame_indices[cs_id - self._base_id]], float64, order = 'C')
+
+    def load_coordset(self, cs_id):
+        '''Make sure the structure has a coordinate set for this id.'''
+        loaded = self._loaded
+        if cs_id in loaded:
+            loaded.move_to_end(cs_id)
+            return
+        if not self.has_coordset(cs_id):
+            return
+        s = self.structure
+        s.add_coordset(cs_id, self.frame_coords(cs_id))
+        loaded[cs_id] = True
+        self._trim(keep = cs_id)
+
+    def _trim(self, keep):
+        s = self.structure
+        active = s.active_coordset_id
+        loaded = self._loaded
+        for cs_id in tuple(loaded.keys()):
+            if len(loaded) <= self.max_frames:
+                break
+            if cs_id == active or cs_id == keep:
+                continue
+            del loaded[cs_id]
+            s.delete_coordset(cs_id)
+
+    def close(self):
+        self._loaded.clear()
+        self.structure = None
+        self.dcd = None
+
+    def set_structure(self, structure):
+        '''Attach to a structure restored from a session.'''
+        self.structure = structure
+        ids = set(structure.coordset_ids)
+        for cs_id in tuple(self._loaded.keys()):
+            if cs_id not in ids:
+                del self._loaded[cs_id]
+
+    def take_snapshot(self, session, flags):
+        # The structure is not saved here since it refers to this source.
+        return {'version': 1, 'path': self.path, 'frame_indices': list(self._frame_indices),
+                'base_id': self._base_id, 'other_ids': list(self._other_ids),
+                'max_frames': self.max_frames, 'loaded': list(self._loaded.keys())}
+
+    @staticmethod
+    def restore_snapshot(session, data):
+        path = data['path']
+        try:
+            from .dcd.MDToolsMarch97.md_DCD import DCD
+            dcd = DCD(path)
+        except (OSError, TypeError) as e:
+            session.logger.warning('Could not open trajectory file %s, only the %d frames'
+                ' loaded when the session was saved are available: %s'
+                % (path, len(data['loaded']), e))
+            return None
+        src = DCDCoordsetSource.__new__(DCDCoordsetSource)
+        src.structure = None
+        src.dcd = dcd
+        src.path = path
+        src._frame_indices = data['frame_indices']
+        src._base_id = data['base_id']
+        src._other_ids = data['other_ids']
+        src.max_frames = data['max_frames']
+        from collections import OrderedDict
+        src._loaded = OrderedDict((cs_id, True) for cs_id in data['loaded'])
+        src.frames_read = 0
+        return src
@@ -34,6 +34,9 @@
 
 #include <math.h>			// use sqrtf(), expf()
 #include <string.h>			// use strcmp()
+#include <atomic>			// use std::atomic
+#include <thread>			// use std::thread
+#include <vector>			// use std::vector
 
 #include <arrays/pythonarray.h>		// use array_from_python()
 #include <arrays/rcarray.h>		// use FArray, IArray
@@ -41,81 +44,174 @@
 inline int max(int a, int b) { return (a < b ? b : a); }
 inline int min(int a, int b) { return (a < b ? a : b); }
 
-// ----------------------------------------------------------------------------
-//
+enum Lipophilicity_Method { FAUCHERE, BRASSEUR, BUCKINGHAM, DUBOST, TYPE5, UNKNOWN };
+
+static Lipophilicity_Method method_type(const char *method)
+{
+  if (strcmp(method, "fauchere") == 0)
+    return FAUCHERE;
+  else if (strcmp(method, "brasseur") == 0)
+    return BRASSEUR;
+  else if (strcmp(method, "buckingham") == 0)
+    return BUCKINGHAM;
+  else if (strcmp(method, "dubost") == 0)
+    return DUBOST;
+  else if (strcmp(method, "type5") == 0)
+    return TYPE5;
+  return UNKNOWN;
+}
+
+class Lipophilicity_Grid
+{
+public:
+  Lipophilicity_Grid(const FArray &xyz, const FArray &fi, float origin[3], float spacing,
+		     float max_dist, float nexp, Lipophilicity_Method method, FArray &pot)
+  {
+    this->xyz = xyz.values();
+    xs0 = xyz.stride(0); xs1 = xyz.stride(1);
+    this->fi = fi.values();
+    fs0 = fi.stride(0);
+    x0 = origin[0]; y0 = origin[1]; z0 = origin[2];
+    this->spacing = spacing;
+    this->max_dist = max_dist;
+    this->nexp = nexp;
+    this->method = method;
+    pa = pot.values();
+    nz = pot.size(0); ny = pot.size(1); nx = pot.size(2);
+    ps0 = pot.stride(0); ps1 = pot.stride(1); ps2 = pot.stride(2);
+    md = int(ceil(max_dist / spacing));
+  }
+
+  // Bin atoms by blocks of z planes.  An atom is put in every block that
+  // has a grid point within max_dist of the atom.
+  void bin_atoms(int na, int block_size, std::vector<std::vector<int> > &blocks)
+  {
+    int nb = (nz + block_size - 1) / block_size;
+    blocks.resize(nb);
+    for (int a = 0 ; a < na ; ++a)
+      {
+	int kmin, kmax;
+	if (!k_range(a, &kmin, &kmax))
+	  continue;
+	for (int b = kmin / block_size ; b <= kmax / block_size ; ++b)
+	  blocks[b].push_back(a);
+      }
+  }
+
+  // Add potential from the given atoms to z planes kb0 through kb1.
+  void sum_block(const std::vector<int> &atoms, int kb0, int kb1)
+  {
+    for (auto a: atoms)
+      {
+	const float *xa = xyz + xs0*a;
+	float ax = *xa, ay = xa[xs1], az = xa[2*xs1];
+	float f = 100 * fi[fs0*a];
+	float i0 = (ax-x0)/spacing, j0 = (ay-y0)/spacing, k0 = (az-z0)/spacing;
+	int kmin = max(kb0,int(floor(k0-md))), kmax = min(kb1,int(ceil(k0+md)));
+	int jmin = max(0,int(floor(j0-md))), jmax = min(ny-1,int(ceil(j0+md)));
+	int imin = max(0,int(floor(i0-md))), imax = min(nx-1,int(ceil(i0+md)));
+	for (int k = kmin ; k <= kmax ; ++k)
+	  {
+	    float gz = z0 + k * spacing;
+	    for (int j = jmin ; j <= jmax ; ++j)
+	      {
+		float gy = y0 + j * spacing;
+		for (int i = imin ; i <= imax ; ++i)
+		  {
+		    // Evaluation of the distance between the grid point and each atoms
+		    float gx = x0 + i * spacing;
+		    float dx = ax-gx, dy = ay-gy, dz = az-gz;
+		    float d = sqrtf(dx*dx + dy*dy + dz*dz);
+		    if (d <= max_dist)
+		      pa[ps0*k+ps1*j+ps2*i] += f*potential(d);
+		  }
+	      }
+	  }
+      }
+  }
+
+  int nz, md;
+
+private:
+  const float *xyz, *fi;
+  long xs0, xs1, fs0;
+  float x0, y0, z0, spacing, max_dist, nexp;
+  Lipophilicity_Method method;
+  float *pa;
+  int ny, nx;
+  long ps0, ps1, ps2;
+
+  bool k_range(int a, int *kmin, int *kmax)
+  {
+    float k0 = (xyz[xs0*a + 2*xs1]-z0)/spacing;
+    *kmin = max(0,int(floor(k0-md)));
+    *kmax = min(nz-1,int(ceil(k0+md)));
+    return *kmin <= *kmax;
+  }
+
+  inline float potential(float d)
+  {
+    switch (method)
+      {
+      case FAUCHERE:	return expf(-d);
+      case BRASSEUR:	return expf(-d/3.1);
+      case BUCKINGHAM:	return 1.0/pow(d,nexp);
+      case DUBOST:	return 1.0/(1+d);
+      case TYPE5:	return expf(-sqrtf(d));
+      default:		return 0;
+      }
+  }
+};
+
+static void sum_blocks(Lipophilicity_Grid *grid, const std::vector<std::vector<int> > *blocks,
+		       int block_size, std::atomic<int> *next_block)
+{
+  int nb = blocks->size();
+  for (int b = (*next_block)++ ; b < nb ; b = (*next_block)++)
+    {
+      int kb0 = b * block_size, kb1 = min(grid->nz - 1, kb0 + block_size - 1);
+      grid->sum_block((*blocks)[b], kb0, kb1);
+    }
+}
+
 static void lipophilicity_sum(const FArray &xyz, const FArray &fi,
 			      float origin[3], float spacing, float max_dist, float nexp,
-			      const char *method,  FArray &pot)
+			      Lipophilicity_Method method, int num_threads, FArray &pot)
 {
-  float x0 = origin[0], y0 = origin[1], z0 = origin[2];
-  int na = xyz.size(0);
-  long xs0 = xyz.stride(0), xs1 = xyz.stride(1);
-  const float *xyza = xyz.values();
-  int nz = pot.size(0), ny = pot.size(1), nx = pot.size(2);
-  long ps0 = pot.stride(0), ps1 = pot.stride(1), ps2 = pot.stride(2);
-  float *pa = pot.values();
-  long fs0 = fi.stride(0);
-  const float *fa = fi.values();
-  int md = int(ceil(max_dist / spacing));
-  bool fauchere = (strcmp(method, "fauchere") == 0);
-  bool brasseur = (strcmp(method, "brasseur") == 0);
-  bool buckingham = (strcmp(method, "buckingham") == 0);
-  bool dubost = (strcmp(method, "dubost") == 0);
-  bool type5 = (strcmp(method, "type5") == 0);
-  for (int a = 0 ; a < na ; ++a)
+  Lipophilicity_Grid grid(xyz, fi, origin, spacing, max_dist, nexp, method, pot);
+
+  // Blocks of z planes are summed independently so threads never write the same grid point.
+  // Use several blocks per thread for load balancing, but at least as thick as the cutoff
+  // so each atom lands in only a few blocks.
+  int nthreads = max(1, num_threads);
+  int block_size = max(max(1, grid.md), grid.nz / (4*nthreads));
+  std::vector<std::vector<int> > blocks;
+  grid.bin_atoms(xyz.size(0), block_size, blocks);
+
+  std::atomic<int> next_block(0);
+  nthreads = min(nthreads, blocks.size());
+  if (nthreads <= 1)
+    sum_blocks(&grid, &blocks, block_size, &next_block);
+  else
     {
-      const float *xa = xyza + xs0*a;
-      float ax = *xa, ay = xa[xs1], az = xa[2*xs1];
-      float f = 100 * fa[fs0*a];
-      float i0 = (ax-x0)/spacing, j0 = (ay-y0)/spacing, k0 = (az-z0)/spacing;
-      int kmin = max(0,int(floor(k0-md))), kmax = min(nz-1,int(ceil(k0+md)));
-      int jmin = max(0,int(floor(j0-md))), jmax = min(ny-1,int(ceil(j0+md)));
-      int imin = max(0,int(floor(i0-md))), imax = min(nx-1,int(ceil(i0+md)));
-      for (int k = kmin ; k <= kmax ; ++k)
-	{
-	  float gz = z0 + k * spacing;
-	  for (int j = jmin ; j <= jmax ; ++j)
-	    {
-	      float gy = y0 + j * spacing;
-	      for (int i = imin ; i <= imax ; ++i)
-		{
-		  // Evaluation of the distance between the grid point and each atoms
-		  float gx = x0 + i * spacing;
-		  float dx = ax-gx, dy = ay-gy, dz = az-gz;
-		  float d = sqrtf(dx*dx + dy*dy + dz*dz);
-		  if (d <= max_dist)
-		    {
-		      float p;
-		      if (fauchere)
-			p = expf(-d);
-		      else if (brasseur)
-			p = expf(-d/3.1);
-		      else if (buckingham)
-			p = 1.0/pow(d,nexp);
-		      else if (dubost)
-			p = 1.0/(1+d);
-		      else if (type5)
-			p = expf(-sqrtf(d));
-		      else
-			p = 0;
-		      pa[ps0*k+ps1*j+ps2*i] += f*p;
-		    }
-		}
-	    }
-	}
+      std::vector<std::thread> threads;
+      for (int t = 0 ; t < nthreads ; ++t)
+	threads.push_back(std::thread(sum_blocks, &grid, &blocks, block_size, &next_block));
+      for (auto &th: threads)
+	th.join();
     }
 }
 
-// ----------------------------------------------------------------------------
-//
 extern "C" PyObject *
 mlp_sum(PyObject *, PyObject *args, PyObject *keywds)
 {
   FArray xyz, fi, pot;
   float origin[3], spacing, max_dist, nexp;
   const char *method;
-  const char *kwlist[] = {"xyz", "fi", "origin", "spacing", "max_dist", "method", "nexp", "pot", NULL};
-  if (!PyArg_ParseTupleAndKeywords(args, keywds, const_cast<char *>("O&O&O&ffsfO&"),
+  int num_threads = 1;
+  const char *kwlist[] = {"xyz", "fi", "origin", "spacing", "max_dist", "method", "nexp", "pot",
+			  "num_threads", NULL};
+  if (!PyArg_ParseTupleAndKeywords(args, keywds, const_cast<char *>("O&O&O&ffsfO&|i"),
 				   (char **)kwlist,
 				   parse_float_n3_array, &xyz,
 				   parse_float_n_array, &fi,
@@ -124,27 +220,33 @@ mlp_sum(PyObject *, PyObject *args, PyObject *keywds)
 				   &max_dist,
 				   &method,
 				   &nexp,
-				   parse_writable_float_3d_array, &pot))
+				   parse_writable_float_3d_array, &pot,
+				   &num_threads))
     return NULL;
 
   if (xyz.size(0) != fi.size(0))
     return PyErr_Format(PyExc_ValueError, "Xyz and fi arrays have different sizes %d and %d",
 			xyz.size(0), fi.size(0));
 
+  Lipophilicity_Method mtype = method_type(method);
+  if (mtype == UNKNOWN)
+    return PyErr_Format(PyExc_ValueError, "Unknown lipophilicity method %s", method);
 
-  lipophilicity_sum(xyz, fi, origin, spacing, max_dist, nexp, method, pot);
+  Py_BEGIN_ALLOW_THREADS
+  lipophilicity_sum(xyz, fi, origin, spacing, max_dist, nexp, mtype, num_threads, pot);
+  Py_END_ALLOW_THREADS
   
   return python_none();
 }
 
-// ----------------------------------------------------------------------------
-//
 static PyMethodDef mlp_methods[] = {
   {const_cast<char*>("mlp_sum"), (PyCFunction)mlp_sum,
    METH_VARARGS|METH_KEYWORDS,
-   "mlp_sum(xyz, fi, origin, spacing, method, nexp, pot)\n"
+   "mlp_sum(xyz, fi, origin, spacing, max_dist, method, nexp, pot, num_threads = 1)\n"
    "\n"
-   "Sum lipophilicity values for atoms over a grid.\n"
+   "Sum lipophilicity values for atoms over a grid.  Only grid points within max_dist\n"
+   "of an atom are summed.  The grid is divided into blocks of z planes computed in\n"
+   "parallel using the specified number of threads.\n"
    "Implemented in C++.\n"
   },
   {NULL, NULL, 0, NULL}
@@ -0,0 +1,86 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Compare the C++ lipophilicity grid calculation with the Python reference code.
+#
+#   ChimeraX --nogui --exit --script "benchmark.py [num_atoms] [num_threads]"
+#
+# Atoms are placed randomly with roughly protein density.  The Python reference
+# calculation is timed on a few z planes and extrapolated to the full grid since
+# computing the full grid takes hours for 100,000 atoms.
+#
+def benchmark(num_atoms = 100000, spacing = 1.0, max_dist = 5.0, method = 'fauchere',
+              nexp = 3.0, num_threads = None, reference_planes = 1, log = print):
+
+    from numpy import random, float32, zeros, abs
+    random.seed(0)
+    density = 0.01	# Heavy atoms per cubic Angstrom
+    size = (num_atoms / density) ** (1/3)
+    xyz = (size * random.random((num_atoms, 3))).astype(float32)
+    fi = random.uniform(-0.8, 0.6, num_atoms).astype(float32)
+
+    from chimerax.mlp.mlp import Defaults, _griddimcalc
+    margin = Defaults().gridmargin
+    grid = [_griddimcalc(xyz[:,a], spacing, margin) for a in (0,1,2)]
+    origin = tuple(cmin for cmin, cmax, n in grid)
+    nx, ny, nz = [n+1 for cmin, cmax, n in grid]
+    log('%d atoms, grid %d x %d x %d, spacing %.3g, max distance %.3g, method %s'
+        % (num_atoms, nx, ny, nz, spacing, max_dist, method))
+
+    import chimerax.arrays	# Make sure _mlp can runtime link shared library libarrays.
+    from chimerax.mlp._mlp import mlp_sum
+    if num_threads is None:
+        import os
+        num_threads = os.cpu_count() or 1
+    thread_counts = [1] if num_threads == 1 else [1, num_threads]
+    from time import time
+    for nt in thread_counts:
+        pot = zeros((nz, ny, nx), float32)
+        t0 = time()
+        mlp_sum(xyz, fi, origin, spacing, max_dist, method, nexp, pot, num_threads = nt)
+        t = time() - t0
+        log('C++ %d thread%s: %.3f seconds' % (nt, '' if nt == 1 else 's', t))
+
+    # Time Python reference code on a slab of planes through the middle of the grid.
+    from chimerax.mlp.mlp import mlp_sum as mlp_sum_python
+    k0 = nz // 2
+    kz = origin[2] + k0 * spacing
+    slab_origin = (origin[0], origin[1], kz)
+    ref = zeros((reference_planes, ny, nx), float32)
+    t0 = time()
+    mlp_sum_python(xyz, fi, slab_origin, spacing, max_dist, method, nexp, ref)
+    t = time() - t0
+    log('Python reference: %.3f seconds for %d plane%s, %.0f seconds estimated for full grid'
+        % (t, reference_planes, '' if reference_planes == 1 else 's', t * nz / reference_planes))
+
+    err = abs(ref - pot[k0:k0+reference_planes]).max()
+    log('Maximum difference between C++ and Python values %.3g (range %.3g to %.3g)'
+        % (err, ref.min(), ref.max()))
+
+if __name__ == '__main__' or __name__.startswith('ChimeraX_sandbox'):
+    import sys
+    num_atoms = int(sys.argv[1]) if len(sys.argv) >= 2 else 100000
+    num_threads = int(sys.argv[2]) if len(sys.argv) >= 3 else None
+    benchmark(num_atoms, num_threads = num_threads)
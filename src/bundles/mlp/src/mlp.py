@@ -393,7 +393,7 @@ def _griddimcalc(listcoord, spacing, gridmargin):
     ngrid = int(round((coordmax - coordmin) / spacing))
     return coordmin, coordmax, ngrid
 
-def calculatefimap(atoms, method, spacing, max_dist, nexp):
+def calculatefimap(atoms, method, spacing, max_dist, nexp, num_threads = None):
     """Calculation loop"""
 
     #grid settings in angstrom
@@ -415,11 +415,18 @@ def calculatefimap(atoms, method, spacing, max_dist, nexp):
     # Make sure _mlp can runtime link shared library libarrays.
     import chimerax.arrays
     from ._mlp import mlp_sum
-    mlp_sum(xyz, fi, origin, spacing, max_dist, method, nexp, pot)
+    if num_threads is None:
+        import os
+        num_threads = os.cpu_count() or 1
+    mlp_sum(xyz, fi, origin, spacing, max_dist, method, nexp, pot, num_threads = num_threads)
                  
     return pot, bounds
 
 def mlp_sum(xyz, fi, origin, spacing, max_dist, method, nexp, pot):
+    """
+    Python reference implementation of the C++ _mlp.mlp_sum() routine.
+    It is much slower and is only used to check the results of the C++ code.
+    """
     computemethod = None
     if method == 'dubost':
         computemethod = _dubost
@@ -453,7 +460,8 @@ def mlp_sum(xyz, fi, origin, spacing, max_dist, method, nexp, pot):
                 dist += dxyz[:,1]
                 dist += dxyz[:,2]
                 sqrt(dist, dist)
-                pot[k,j,i] = computemethod(fi, dist, nexp)
+                close = (dist <= max_dist)
+                pot[k,j,i] = computemethod(fi[close], dist[close], nexp)
 
 def _dubost(fi, d, n):
     return (100 * fi / (1 + d)).sum()
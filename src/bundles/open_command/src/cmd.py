@@ -204,6 +204,8 @@ def provider_open(session, names, format=None, from_database=None, ignore_cache=
                     else:
                         ungrouped_models.extend(models)
             else:
+                from time import time
+                t0 = time()
                 for fi in file_infos:
                     if provider_info.want_path:
                         data = _get_path(mgr, fi.file_name, provider_info.check_path)
@@ -243,6 +245,10 @@ def provider_open(session, names, format=None, from_database=None, ignore_cache=
                                     if isinstance(m, Structure)])
                         else:
                             ungrouped_models.extend(models)
+                if len(file_infos) > 1:
+                    t = time() - t0
+                    session.logger.info("Opened %d files in %.3g seconds, %.1f files per second"
+                        % (len(file_infos), t, len(file_infos) / t if t > 0 else 0))
     else:
         for fi in file_infos:
             opener_info = mgr.opener_info(fi.data_format)
@@ -35,6 +35,8 @@ class _MyAPI(BundleAPI):
                  cmd.start_desc, cmd.start_server, logger=logger)
         register(command_name + " port",
                  cmd.port_desc, cmd.report_port, logger=logger)
+        register(command_name + " status",
+                 cmd.status_desc, cmd.report_status, logger=logger)
         register(command_name + " stop",
                  cmd.stop_desc, cmd.stop_server, logger=logger)
 
@@ -32,8 +32,16 @@ def _get_server():
         _server = None
     return _server
 
-def start_server(session, port=None, ssl=None, json=False):
-    """If 'json' is True, then the return value from a command will be a JSON object with the following
+def start_server(session, port=None, ssl=None, json=False, workers=0, timeout=None,
+                 memory_limit=None):
+    """If 'workers' is greater than 0, commands are run in that many worker processes
+       forked from this ChimeraX, each with its own session that is reset after every
+       request.  Requests wait in a queue for a free worker.  A worker that runs more
+       than 'timeout' seconds, or whose resident memory grows by more than 'memory_limit'
+       megabytes during a request, is killed and replaced.  Workers require no graphical user interface
+       and a system that supports fork (not Windows).
+
+       If 'json' is True, then the return value from a command will be a JSON object with the following
        name/value pairs:
 
        (name) json values
@@ -59,14 +67,27 @@ def start_server(session, port=None, ssl=None, json=False):
     if server is not None:
         session.logger.error("REST server is already running")
     else:
+        if workers:
+            from chimerax.core.errors import UserError
+            import sys
+            if session.ui.is_gui:
+                raise UserError("REST server workers require ChimeraX without a graphical user interface (--nogui)")
+            if sys.platform.startswith('win'):
+                raise UserError("REST server workers are not supported on Windows")
+        elif timeout is not None or memory_limit is not None:
+            from chimerax.core.errors import UserError
+            raise UserError("REST server timeout and memoryLimit options require workers")
         from .server import RESTServer
         _server = RESTServer(session)
         # Run code will report port number
-        _server.start(port, ssl, json)
-from chimerax.core.commands import CmdDesc, IntArg, BoolArg
+        _server.start(port, ssl, json, workers, timeout, memory_limit)
+from chimerax.core.commands import CmdDesc, IntArg, BoolArg, PositiveIntArg, PositiveFloatArg
 start_desc = CmdDesc(keyword=[("port", IntArg),
                               ("ssl", BoolArg),
                               ("json", BoolArg),
+                              ("workers", PositiveIntArg),
+                              ("timeout", PositiveFloatArg),
+                              ("memory_limit", PositiveFloatArg),
                              ],
                      synopsis="Start REST server")
 
@@ -80,6 +101,27 @@ def report_port(session):
 from chimerax.core.commands import CmdDesc, IntArg
 port_desc = CmdDesc(synopsis="Report REST server port")
 
+def report_status(session):
+    server = _get_server()
+    if server is None:
+        session.logger.info("REST server is not running")
+        return
+    status = server.status()
+    if status['workers'] == 0:
+        session.logger.info("REST server is running commands without workers")
+        return
+    lines = ['%s: %d' % (name, status[name]) for name in
+             ('workers', 'busy workers', 'queued jobs', 'completed jobs',
+              'failed jobs', 'timed out jobs', 'worker restarts')]
+    for name in ('wait ms', 'run ms'):
+        t = status[name]
+        if t['mean'] is not None:
+            lines.append('%s: mean %.1f, median %.1f, 95%% %.1f, max %.1f'
+                         % (name.replace(' ms', ' time (ms)'), t['mean'], t['median'], t['p95'], t['max']))
+    session.logger.info('REST server status\n' + '\n'.join(lines))
+from chimerax.core.commands import CmdDesc
+status_desc = CmdDesc(synopsis="Report REST server worker queue depth and latency")
+
 def stop_server(session, quiet=False):
     global _server
     server = _get_server()
@@ -32,6 +32,7 @@ class RESTServer(Task):
     def __init__(self, *args, **kw):
         import threading
         self.httpd = None
+        self.pool = None
         self.run_count = 0
         self.run_lock = threading.Lock()
         super().__init__(*args, **kw)
@@ -52,8 +53,8 @@ class RESTServer(Task):
     def server_address(self):
         return self.httpd.server_address
 
-    def run(self, port, use_ssl, json):
-        from http.server import HTTPServer
+    def run(self, port, use_ssl, json, workers=0, timeout=None, memory_limit=None):
+        from http.server import HTTPServer, ThreadingHTTPServer
         import sys
         if port is None:
             # Defaults to any available port
@@ -61,7 +62,10 @@ class RESTServer(Task):
         if use_ssl is None:
             # Defaults to cleartext
             use_ssl = False
-        self.httpd = HTTPServer(("localhost", port), RESTHandler)
+        # With a worker pool, requests are handled concurrently
+        # so jobs can queue for the workers.
+        server_class = ThreadingHTTPServer if workers else HTTPServer
+        self.httpd = server_class(("localhost", port), RESTHandler)
         self.httpd.chimerax_restserver = self
         self.json = json
         if not use_ssl:
@@ -80,15 +84,28 @@ class RESTServer(Task):
             #                                     certfile=cert)
             self.httpd.socket = context.wrap_socket(self.httpd.socket,
                                                     server_side=True)
+        if workers:
+            from .worker_pool import WorkerPool
+            self.pool = WorkerPool(self.session, workers, json=json, timeout=timeout,
+                                   memory_limit=memory_limit,
+                                   close_sockets=[self.httpd.socket])
+            self.pool.start()
         self.run_increment()    # To match decrement in terminate()
         host, port = self.httpd.server_address
         msg = ("REST server started on host %s port %d" % (host, port))
+        if workers:
+            msg += " with %d worker processes" % workers
         self.session.ui.thread_safe(print, msg, file=sys.__stdout__, flush=True)
         msg += ('\nVisit %s://%s:%d/cmdline.html for CLI interface' %
                (proto, host, port))
         self.session.ui.thread_safe(self.session.logger.info, msg)
         self.httpd.serve_forever()
 
+    def status(self):
+        """Return dictionary of worker pool queue depth and latencies."""
+        pool = self.pool
+        return {'workers': 0} if pool is None else pool.status()
+
     def run_increment(self):
         with self.run_lock:
             if self.httpd is None:
@@ -104,6 +121,9 @@ class RESTServer(Task):
                 if self.httpd is not None:
                     self.httpd.shutdown()
                     self.httpd = None
+                if self.pool is not None:
+                    self.pool.stop()
+                    self.pool = None
                 super().terminate()
 
     def terminate(self):
@@ -137,6 +157,12 @@ class RESTHandler(BaseHTTPRequestHandler):
                         else:
                             al.extend(vl)
                 self._run(args)
+            elif r.path == "/status":
+                # Report worker pool queue depth and latencies
+                from json import JSONEncoder
+                data = bytes(JSONEncoder().encode(self.server.chimerax_restserver.status()), "utf-8")
+                self._header(200, "application/json", len(data))
+                self.wfile.write(data)
             else:
                 # Serve up some static files for testing
                 import os.path
@@ -188,73 +214,84 @@ class RESTHandler(BaseHTTPRequestHandler):
         self.end_headers()
 
     def _run(self, args):
-        from queue import Queue
-        from chimerax.core.errors import NotABug
-        from chimerax.core.logger import StringPlainTextLog
-        session = self.server.chimerax_restserver.session
-        q = Queue()
-        def f(args=args, session=session, q=q, json=self.server.chimerax_restserver.json):
-            logger = session.logger
-            # rest_log.log_summary gets called at the end
-            # of the "with" statement
-            log_class = ByLevelPlainTextLog if json else StringPlainTextLog
-            with log_class(logger) as rest_log:
-                from chimerax.core.commands import run
-                error_info = None
-                try:
-                    commands = args["command"]
-                except KeyError:
-                    logger.error("\"command\" parameter missing")
+        server = self.server.chimerax_restserver
+        commands = args.get("command")
+        if server.pool is not None:
+            # Run in a forked worker process
+            response = server.pool.run(commands)
+        else:
+            from queue import Queue
+            session = server.session
+            q = Queue()
+            def f(commands=commands, session=session, q=q, json=server.json):
+                q.put(run_commands(session, commands, json))
+            session.ui.thread_safe(f)
+            response = q.get()
+        data = bytes(response, "utf-8")
+        self._header(200, "text/plain", len(data))
+        self.wfile.write(data)
+
+
+def run_commands(session, commands, json):
+    """Run a list of commands and return the log output or, if json is true,
+    a JSON string with return values, log messages and error."""
+    from chimerax.core.errors import NotABug
+    from chimerax.core.logger import StringPlainTextLog
+    logger = session.logger
+    # rest_log.log_summary gets called at the end
+    # of the "with" statement
+    log_class = ByLevelPlainTextLog if json else StringPlainTextLog
+    with log_class(logger) as rest_log:
+        from chimerax.core.commands import run
+        error_info = None
+        if commands is None:
+            logger.error("\"command\" parameter missing")
+            ret_val = []
+        else:
+            try:
+                for cmd in commands:
+                    if isinstance(cmd, bytes):
+                        cmd = cmd.decode('utf-8')
+                    ret_val = run(session, cmd, log=False, return_json=json, return_list=True)
+            except NotABug as e:
+                if json:
                     ret_val = []
-                else:
-                    try:
-                        for cmd in commands:
-                            if isinstance(cmd, bytes):
-                                cmd = cmd.decode('utf-8')
-                            ret_val = run(session, cmd, log=False, return_json=json, return_list=True)
-                    except NotABug as e:
-                        if json:
-                            ret_val = []
-                            error_info = e
-                        logger.info(str(e))
-                    except Exception as e:
-                        if json:
-                            ret_val = []
-                            error_info = e
-                        else:
-                            raise
-                # if json, compose Python and JSON return values into a JSON string,
-                # along with log messages broken down by logging level
+                    error_info = e
+                logger.info(str(e))
+            except Exception as e:
                 if json:
-                    from chimerax.core.commands import JSONResult
-                    from json import JSONEncoder
-                    json_vals = []
-                    python_vals = []
-                    for val in ret_val:
-                        if isinstance(val, JSONResult):
-                            json_vals.append(val.json_value)
-                            python_vals.append(val.python_value)
-                        else:
-                            json_vals.append(None)
-                            python_vals.append(val)
-                    response = {}
-                    response['json values'] = json_vals
-                    response['python values'] = python_vals
-                    response['log messages'] = rest_log.getvalue()
-                    if error_info is None:
-                        response['error'] = None
-                    else:
-                        response['error'] = {
-                            'type': error_info.__class__.__name__,
-                            'message': str(error_info)
-                        }
-                    q.put(JSONEncoder(default=lambda x: None).encode(response))
+                    ret_val = []
+                    error_info = e
                 else:
-                    q.put(rest_log.getvalue())
-        session.ui.thread_safe(f)
-        data = bytes(q.get(), "utf-8")
-        self._header(200, "text/plain", len(data))
-        self.wfile.write(data)
+                    raise
+        # if json, compose Python and JSON return values into a JSON string,
+        # along with log messages broken down by logging level
+        if json:
+            from chimerax.core.commands import JSONResult
+            from json import JSONEncoder
+            json_vals = []
+            python_vals = []
+            for val in ret_val:
+                if isinstance(val, JSONResult):
+                    json_vals.append(val.json_value)
+                    python_vals.append(val.python_value)
+                else:
+                    json_vals.append(None)
+                    python_vals.append(val)
+            response = {}
+            response['json values'] = json_vals
+            response['python values'] = python_vals
+            response['log messages'] = rest_log.getvalue()
+            if error_info is None:
+                response['error'] = None
+            else:
+                response['error'] = {
+                    'type': error_info.__class__.__name__,
+                    'message': str(error_info)
+                }
+            return JSONEncoder(default=lambda x: None).encode(response)
+        else:
+            return rest_log.getvalue()
 
 from chimerax.core.logger import StringPlainTextLog
 class ByLevelPlainTextLog(StringPlainTextLog):
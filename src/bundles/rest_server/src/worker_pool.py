@@ -0,0 +1,271 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+"""
+Pool of forked ChimeraX worker processes that run REST command requests.
+
+Each worker is forked from the server process after bundles are initialized,
+so jobs do not pay ChimeraX startup time.  Jobs wait in a queue until a
+worker is free.  The worker session is reset after each job, which closes
+models and resets tools and other state managers, but does not clear named
+views, aliases, settings or the working directory, so those can carry over
+from one job to the next.  A worker whose reset fails, or whose job exceeds
+the time limit or uses more memory than the limit (beyond what the worker
+used when the job started), is killed and replaced by a new fork.
+"""
+
+class WorkerPool:
+    """Run REST jobs in forked worker processes.  Requires a POSIX system."""
+
+    def __init__(self, session, num_workers, json=False, timeout=None,
+                 memory_limit=None, close_sockets=(), max_latencies=1000):
+        self.session = session
+        self.num_workers = num_workers
+        self.json = json
+        self.timeout = timeout                  # seconds per job, None for no limit
+        self.memory_limit = memory_limit        # megabytes per job, None for no limit
+        self._close_sockets = close_sockets     # Server sockets not used by workers
+        from queue import Queue
+        self._jobs = Queue()
+        import threading
+        self._lock = threading.Lock()
+        self._busy = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.restarts = 0
+        self.memory_check_interval = 0.5        # seconds
+        from collections import deque
+        self._wait_times = deque(maxlen=max_latencies)
+        self._run_times = deque(maxlen=max_latencies)
+        self._threads = []
+        self._stopped = False
+
+    def start(self):
+        import threading
+        for i in range(self.num_workers):
+            # Fork workers now so the first jobs do not wait.
+            process, conn = self._fork_worker()
+            t = threading.Thread(target=self._dispatch, args=(process, conn),
+                                 name="REST worker %d" % (i + 1), daemon=True)
+            self._threads.append(t)
+        for t in self._threads:
+            t.start()
+
+    def stop(self):
+        from queue import Empty
+        with self._lock:
+            self._stopped = True
+            # Answer jobs still waiting for a worker.
+            while True:
+                try:
+                    job = self._jobs.get_nowait()
+                except Empty:
+                    break
+                if job is not None:
+                    job[2].put(_error_response(RuntimeError("REST server stopped"), self.json))
+            for t in self._threads:
+                self._jobs.put(None)
+        self._threads = []
+
+    def run(self, commands):
+        """Run commands in a worker and return the response text.  Called from a server thread."""
+        from time import perf_counter
+        from queue import Queue
+        reply = Queue()
+        with self._lock:
+            # Checked under the lock so no job is queued after the stop sentinels.
+            if self._stopped:
+                return _error_response(RuntimeError("REST server stopped"), self.json)
+            self._jobs.put((commands, perf_counter(), reply))
+        return reply.get()
+
+    def status(self):
+        """Return dictionary of queue depth, job counts and latencies in milliseconds."""
+        with self._lock:
+            status = {
+                'workers': self.num_workers,
+                'busy workers': self._busy,
+                'queued jobs': self._jobs.qsize(),
+                'completed jobs': self.completed,
+                'failed jobs': self.failed,
+                'timed out jobs': self.timed_out,
+                'worker restarts': self.restarts,
+            }
+            for name, times in (('wait', self._wait_times), ('run', self._run_times)):
+                ms = sorted(1000 * t for t in times)
+                n = len(ms)
+                status[name + ' ms'] = {
+                    'mean': sum(ms) / n if n else None,
+                    'median': ms[n//2] if n else None,
+                    'p95': ms[min(n-1, int(0.95*n))] if n else None,
+                    'max': ms[-1] if n else None,
+                }
+        return status
+
+    def _fork_worker(self):
+        import multiprocessing
+        context = multiprocessing.get_context('fork')
+        parent_conn, child_conn = context.Pipe()
+        process = context.Process(target=_worker_main,
+                                  args=(self.session, child_conn, self.json,
+                                        self._close_sockets),
+                                  daemon=True)
+        process.start()
+        child_conn.close()
+        return process, parent_conn
+
+    def _dispatch(self, process, conn):
+        # Runs in a thread that owns one worker process.
+        from time import perf_counter
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            commands, queued_time, reply = job
+            if self._stopped:
+                reply.put(_error_response(RuntimeError("REST server stopped"), self.json))
+                continue
+            start_time = perf_counter()
+            with self._lock:
+                self._busy += 1
+            ok, response, reset_ok = False, None, True
+            try:
+                start_rss = None if self.memory_limit is None else _resident_memory(process.pid)
+                conn.send(commands)
+                error = self._wait_for_worker(process, conn, start_rss, self.timeout)
+                if error is None:
+                    ok, response = conn.recv()
+            except (EOFError, OSError):
+                # Worker died, e.g. killed by the system for running out of memory
+                process.join(1)
+                error = RuntimeError("worker process exited with code %s" % process.exitcode)
+            end_time = perf_counter()
+            if error is not None:
+                response = _error_response(error, self.json)
+            reply.put(response)
+            if error is None:
+                # The worker reports whether resetting its session succeeded.
+                try:
+                    if self._wait_for_worker(process, conn, None, self.timeout) is None:
+                        reset_ok = conn.recv()
+                    else:
+                        reset_ok = False
+                except (EOFError, OSError):
+                    reset_ok = False
+                if not reset_ok:
+                    self.session.logger.warning("REST worker session reset failed,"
+                                                " replacing worker process")
+            if error is not None or not reset_ok:
+                process.kill()
+                process.join()
+                conn.close()
+                process, conn = self._fork_worker()
+            with self._lock:
+                self._busy -= 1
+                self._wait_times.append(start_time - queued_time)
+                self._run_times.append(end_time - start_time)
+                if isinstance(error, TimeoutError):
+                    self.timed_out += 1
+                elif ok:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                if error is not None or not reset_ok:
+                    self.restarts += 1
+        conn.close()
+        process.kill()
+        process.join()
+
+    def _wait_for_worker(self, process, conn, start_rss, timeout):
+        # Wait for a message from the worker, checking the job time and memory
+        # limits.  Returns an error if a limit is exceeded, otherwise None.
+        from time import perf_counter
+        end_time = None if timeout is None else perf_counter() + timeout
+        check_memory = (start_rss is not None)
+        while True:
+            wait = self.memory_check_interval if check_memory else None
+            if end_time is not None:
+                remaining = max(0, end_time - perf_counter())
+                wait = remaining if wait is None else min(wait, remaining)
+            if conn.poll(wait):
+                return None
+            if end_time is not None and perf_counter() >= end_time:
+                return TimeoutError("job exceeded time limit of %.3g seconds" % timeout)
+            if check_memory:
+                used = _resident_memory(process.pid) - start_rss
+                if used > self.memory_limit * 2**20:
+                    return MemoryError("job exceeded memory limit of %.4g Mbytes" % self.memory_limit)
+
+
+def _resident_memory(pid):
+    # Resident memory of a process in bytes, 0 if it has exited.
+    import psutil
+    try:
+        return psutil.Process(pid).memory_info().rss
+    except psutil.Error:
+        return 0
+
+
+def _worker_main(session, conn, json, close_sockets):
+    # Runs in the forked worker process.
+    for sock in close_sockets:
+        sock.close()
+    # No event loop runs in the worker, so run thread safe calls immediately
+    session.ui._queue = None
+    from .server import run_commands
+    while True:
+        try:
+            commands = conn.recv()
+        except EOFError:
+            break
+        try:
+            response = (True, run_commands(session, commands, json))
+        except Exception as e:
+            response = (False, _error_response(e, json))
+        conn.send(response)
+        # Clear models and other session state before the next job.  If that
+        # fails the dispatcher replaces this worker with a new fork.
+        try:
+            session.reset()
+        except Exception:
+            conn.send(False)
+            break
+        conn.send(True)
+
+
+def _error_response(error, json):
+    if json:
+        from json import JSONEncoder
+        response = {
+            'json values': [],
+            'python values': [],
+            'log messages': {},
+            'error': {
+                'type': error.__class__.__name__,
+                'message': str(error),
+            },
+        }
+        return JSONEncoder().encode(response)
+    return "%s: %s\n" % (error.__class__.__name__, str(error))
@@ -0,0 +1,144 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+def cache(session):
+    '''Report the size of the fetched file cache.'''
+    from chimerax.core.fetch_cache import fetch_cache
+    fc = fetch_cache()
+    dbs = fc.databases()
+    total = sum(size for count, size in dbs.values())
+    nfiles = sum(count for count, size in dbs.values())
+    limit = ('%s limit' % _size_string(fc.max_size)) if fc.max_size else 'no size limit'
+    lines = ['Fetch cache %s: %d files, %s, %s' % (fc.directory, nfiles, _size_string(total), limit)]
+    for db in sorted(dbs.keys()):
+        count, size = dbs[db]
+        lines.append('    %s: %d files, %s' % (db, count, _size_string(size)))
+    lookups = fc.hits + fc.misses
+    if lookups:
+        lines.append('%d of %d lookups found in cache this session' % (fc.hits, lookups))
+    session.logger.info('\n'.join(lines))
+
+
+def cache_prune(session, size=None, older_than=None, database=None):
+    '''
+    Remove least recently used fetched files.
+
+    Parameters
+    ----------
+    size : float
+        Remove files until the cache is no bigger than this many Mbytes.
+        Default is the cache size limit.
+    older_than : float
+        Remove files not used in this many days.
+    database : string
+        Only remove files fetched from this database (cache subdirectory).
+    '''
+    from chimerax.core.fetch_cache import fetch_cache
+    fc = fetch_cache()
+    max_size = fc.max_size if size is None else int(size * 2**20)
+    if max_size is None and older_than is None:
+        from chimerax.core.errors import UserError
+        raise UserError('No cache size limit is set, give a size or olderThan value')
+    age = None if older_than is None else older_than * 86400
+    nfiles, nbytes = fc.prune(max_size, database=database, older_than=age)
+    session.logger.info('Removed %d cached files, %s' % (nfiles, _size_string(nbytes)))
+
+
+def cache_limit(session, size):
+    '''Set the fetch cache size limit in Mbytes, 0 for no limit.  The limit is saved
+    as a preference.'''
+    from chimerax.core.fetch_cache import set_fetch_cache_size
+    set_fetch_cache_size(int(size * 2**20))
+    session.logger.info('Fetch cache size limit %s'
+                        % (_size_string(int(size * 2**20)) if size else 'removed'))
+
+
+def cache_clear(session, database=None):
+    '''Remove all fetched files, or those of one database.'''
+    from chimerax.core.fetch_cache import fetch_cache
+    nfiles, nbytes = fetch_cache().clear(database)
+    session.logger.info('Removed %d cached files, %s' % (nfiles, _size_string(nbytes)))
+
+
+def cache_verify(session):
+    '''Check cached file sizes and checksums and remove damaged files.'''
+    from chimerax.core.fetch_cache import fetch_cache
+    bad = fetch_cache().verify(remove_bad=True)
+    if bad:
+        session.logger.warning('Removed %d damaged cached files: %s' % (len(bad), ', '.join(bad)))
+    else:
+        session.logger.info('All cached files match their checksums')
+
+
+def cache_prefetch(session, ids, url=None, database=None, save_name=None, threads=4,
+                   ignore_cache=False):
+    '''
+    Fetch files for several identifiers concurrently into the cache.
+
+    Parameters
+    ----------
+    ids : list of strings
+        Database identifiers.
+    url : string
+        URL template with {id} replaced by each identifier.
+    database : string
+        Cache subdirectory to save files in.
+    save_name : string
+        File name template with {id} replaced, default last part of URL.
+    threads : int
+        Maximum simultaneous downloads.
+    '''
+    from chimerax.core.fetch_cache import prefetch_ids
+    prefetch_ids(session, ids, url, database, save_name_template=save_name, nthread=threads,
+                 ignore_cache=ignore_cache)
+
+
+def _size_string(nbytes):
+    if nbytes >= 2**30:
+        return '%.3g Gbytes' % (nbytes / 2**30)
+    return '%.3g Mbytes' % (nbytes / 2**20)
+
+
+def register_command(logger):
+    from chimerax.core.commands import CmdDesc, register, FloatArg, StringArg, IntArg, \
+        BoolArg, ListOf
+    desc = CmdDesc(synopsis='report fetched file cache size')
+    register('cache', desc, cache, logger=logger)
+    desc = CmdDesc(keyword=[('size', FloatArg), ('older_than', FloatArg), ('database', StringArg)],
+                   synopsis='remove least recently used fetched files')
+    register('cache prune', desc, cache_prune, logger=logger)
+    desc = CmdDesc(required=[('size', FloatArg)],
+                   synopsis='set fetched file cache size limit (Mbytes)')
+    register('cache limit', desc, cache_limit, logger=logger)
+    desc = CmdDesc(optional=[('database', StringArg)],
+                   synopsis='remove fetched files')
+    register('cache clear', desc, cache_clear, logger=logger)
+    desc = CmdDesc(synopsis='check fetched file checksums')
+    register('cache verify', desc, cache_verify, logger=logger)
+    desc = CmdDesc(required=[('ids', ListOf(StringArg))],
+                   keyword=[('url', StringArg), ('database', StringArg), ('save_name', StringArg),
+                            ('threads', IntArg), ('ignore_cache', BoolArg)],
+                   required_arguments=['url', 'database'],
+                   synopsis='fetch several files into the cache')
+    register('cache prefetch', desc, cache_prefetch, logger=logger)
@@ -34,7 +34,8 @@
 # Can use -1 for last frame.  Frame numbers start at 1.
 #
 def coordset(session, structures, index_range, hold_steady = None,
-             pause_frames = 1, loop = 1, bounce = False, compute_ss = False):
+             pause_frames = 1, loop = 1, bounce = False, compute_ss = False,
+             fixed_topology = False):
   '''Change which coordinate set is shown for a structure.
   Can play through a range of coordinate sets.
 
@@ -62,19 +63,30 @@ def coordset(session, structures, index_range, hold_steady = None,
     Whether to reverse direction instead of jumping to beginning when looping.  Default false.
   compute_ss : bool
     Whether to recompute secondary structure using dssp for every new frame.  Default false.
+  fixed_topology : bool
+    Whether to only update coordinate dependent graphics for each new frame, reusing
+    atom radii, bonds, ring fills and ribbon residue classes.  This makes playback
+    of large trajectories faster.  Changes to atom radii or ribbon style made during
+    playback are shown when playback stops.  Cannot be used with compute_ss.
+    Default false.
   '''
 
   if len(structures) == 0:
     from chimerax.core.errors import UserError
     raise UserError('No structures specified')
 
+  if fixed_topology and compute_ss:
+    from chimerax.core.errors import UserError
+    raise UserError('Cannot use fixedTopology with computeSs since secondary structure changes')
+
   if index_range is None:
     index_range = (1,None,None)
   immediate = (index_range[1] == index_range[0] and index_range[2] is None)
   for m in structures:
     s,e,step = absolute_index_range(index_range, m)
     hold = hold_steady.intersect(m.atoms) if hold_steady else None
-    csp = CoordinateSetPlayer(m, s, e, step, hold, pause_frames, loop, bounce, compute_ss)
+    csp = CoordinateSetPlayer(m, s, e, step, hold, pause_frames, loop, bounce, compute_ss,
+                              fixed_topology)
     csp.start()
     if immediate:
       # For just one frame execute immediately so scripts don't need wait command.
@@ -144,7 +156,8 @@ def register_command(logger):
                    ('pause_frames', IntArg),
                    ('loop', IntArg),
                    ('bounce', BoolArg),
-                   ('compute_ss', BoolArg)],
+                   ('compute_ss', BoolArg),
+                   ('fixed_topology', BoolArg)],
         synopsis = 'show coordinate sets')
     register('coordset', desc, coordset, logger=logger)
 
@@ -193,7 +206,7 @@ class IndexRangeArg(Annotation):
 def absolute_index_range(index_range, mol):
 
   # Find available coordsets
-  ids = mol.coordset_ids
+  ids = coordset_ids(mol)
   imin, imax = min(ids), max(ids)
 
   s,e,st = index_range
@@ -228,7 +241,7 @@ class CoordinateSetPlayer:
 
   def __init__(self, structure, istart, iend, istep,
                steady_atoms = None, pause_frames = 1, loop = 1, bounce = False,
-               compute_ss = False):
+               compute_ss = False, fixed_topology = False):
 
     self.structure = structure
     # structure deletes its 'session' attr when the structure is deleted,
@@ -244,6 +257,7 @@ class CoordinateSetPlayer:
     self.bounce = bounce
     self._reverse = False   # Whether playing in opposite direction after bounce
     self.compute_ss = compute_ss
+    self.fixed_topology = fixed_topology
     self._pause_count = 0
     self._steady_coords = None
     self._steady_transforms = {}
@@ -258,6 +272,8 @@ class CoordinateSetPlayer:
     if not hasattr(session, '_coord_set_players'):
       session._coord_set_players = set()
     session._coord_set_players.add(self)
+    if self.fixed_topology:
+      self.structure.fixed_topology_playback = True
 
   def stop(self):
 
@@ -268,6 +284,9 @@ class CoordinateSetPlayer:
     t.remove_handler(self._handler)
     self._handler = None
     self.inext = None
+    m = self.structure
+    if self.fixed_topology and not m.deleted:
+      m.fixed_topology_playback = False
 
   def frame_cb(self, tname, tdata):
 
@@ -303,6 +322,7 @@ class CoordinateSetPlayer:
   def change_coordset(self, cs):
     m = self.structure
     last_cs = m.active_coordset_id
+    load_coordset(m, cs)
     try:
       m.active_coordset_id = cs
       compute_ss = self.compute_ss
@@ -343,7 +363,21 @@ def coordset_coords(atoms, cset, structure):
   if cset == cs:
     xyz = atoms.coords
   else:
+    load_coordset(structure, cset)
     structure.active_coordset_id = cset
     xyz = atoms.coords
     structure.active_coordset_id = cs
   return xyz
+
+# -----------------------------------------------------------------------------
+# Structures with trajectories read on demand have a coordset_source attribute
+# that lists all coordset ids and creates a coordset when it is needed.
+#
+def coordset_ids(structure):
+  src = getattr(structure, 'coordset_source', None)
+  return structure.coordset_ids if src is None else src.coordset_ids
+
+def load_coordset(structure, cs_id):
+  src = getattr(structure, 'coordset_source', None)
+  if src is not None:
+    src.load_coordset(cs_id)
@@ -0,0 +1,63 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2022 Regents of the University of California. All rights reserved.
+# The ChimeraX application is provided pursuant to the ChimeraX license
+# agreement, which covers academic and commercial uses. For more details, see
+# <http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html>
+#
+# This particular file is part of the ChimeraX library. You can also
+# redistribute and/or modify it under the terms of the GNU Lesser General
+# Public License version 2.1 as published by the Free Software Foundation.
+# For more details, see
+# <https://www.gnu.org/licenses/old-licenses/lgpl-2.1.html>
+#
+# THIS SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY KIND, EITHER
+# EXPRESSED OR IMPLIED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE. ADDITIONAL LIABILITY
+# LIMITATIONS ARE DESCRIBED IN THE GNU LESSER GENERAL PUBLIC LICENSE
+# VERSION 2.1
+#
+# This notice must be embedded in or attached to all copies, including partial
+# copies, of the software or any revisions or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Measure trajectory playback frame rate with and without fixed topology.
+# Frames are made by randomly displacing the atoms of the given structure.
+#
+#   ChimeraX --nogui --offscreen --exit --script "coordset_benchmark.py structure.cif [frames]"
+#
+def benchmark(session, path, num_frames = 50, displacement = 0.3, log = print):
+
+    from chimerax.core.commands import run
+    m = run(session, 'open %s' % path, log = False)[0]
+    xyz = m.atoms.coords
+    from numpy import random, empty, float64
+    random.seed(0)
+    xyzs = empty((num_frames, len(xyz), 3), float64)
+    for f in range(num_frames):
+        xyzs[f] = xyz + random.normal(0, displacement, xyz.shape)
+    m.add_coordsets(xyzs)
+
+    from chimerax.std_commands.coordset import CoordinateSetPlayer
+    from time import time
+    for fixed in (False, True):
+        csp = CoordinateSetPlayer(m, 1, num_frames, 1, fixed_topology = fixed)
+        csp.start()
+        t0 = time()
+        while csp.inext is not None:
+            # Drawing the frame fires the new frame trigger that changes coordset.
+            session.update_loop.draw_new_frame()
+        t = time() - t0
+        log('%s, %d atoms, %d residues, %d frames, fixed topology %s: %.1f frames per second'
+            % (m.name, m.num_atoms, m.num_residues, num_frames, fixed, num_frames / t))
+    m.delete()
+
+if __name__ == '__main__' or __name__.startswith('ChimeraX_sandbox'):
+    import sys
+    if len(sys.argv) < 2:
+        print('Usage: coordset_benchmark.py structure-file [frames]')
+    else:
+        num_frames = int(sys.argv[2]) if len(sys.argv) >= 3 else 50
+        benchmark(session, sys.argv[1], num_frames)  # noqa -- session is defined when run by ChimeraX
@@ -19,8 +19,9 @@ class CoordinateSetSlider(Slider):
 
         self.structure = structure
 
-        title = 'Coordinate sets %s (%d)' % (structure.name, structure.num_coordsets)
-        csids = structure.coordset_ids
+        from .coordset import coordset_ids
+        csids = coordset_ids(structure)
+        title = 'Coordinate sets %s (%d)' % (structure.name, len(csids))
         id_start, id_end = min(csids), max(csids)
         self.coordset_ids = set(csids)
         Slider.__init__(self, session, 'Model Series', 'Model', title, value_range = (id_start, id_end),
@@ -134,10 +135,11 @@ class PlayCoordinatesMouseMode(MouseMode):
         if fraction is None and step is None:
             return
         from chimerax.atomic import Structure
+        from .coordset import coordset_ids, load_coordset
         mlist = [m for m in self.session.models.list(type = Structure)
-                 if m.num_coordsets > 1 and m.visible]
+                 if len(coordset_ids(m)) > 1 and m.visible]
         for m in mlist:
-            ids = m.coordset_ids
+            ids = coordset_ids(m)
             nc = len(ids)
             if fraction is not None:
                 step = fraction * nc
@@ -157,6 +159,7 @@ class PlayCoordinatesMouseMode(MouseMode):
                 elif np < 0:
                     np = 0
                 nid = ids[np]
+                load_coordset(m, nid)
                 m.active_coordset_id = nid
 
     def vr_motion(self, event):
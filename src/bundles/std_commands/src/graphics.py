@@ -280,6 +280,7 @@ def graphics_restart(session):
 
 def register_command(logger):
     from chimerax.core.commands import CmdDesc, register, IntArg, FloatArg, BoolArg, ColorArg, TopModelsArg, Or, EnumOf
+    from chimerax.core.commands import SaveFileNameArg
 
     desc = CmdDesc(
         keyword=[('background_color', ColorArg),
@@ -336,6 +337,15 @@ def register_command(logger):
     desc = CmdDesc(synopsis='Restart graphics drawing after an error')
     register('graphics restart', desc, graphics_restart, logger=logger)
 
+    desc = CmdDesc(optional=[('action', EnumOf(('start', 'stop', 'report')))],
+                   keyword=[('save', SaveFileNameArg),
+                            ('format', EnumOf(('json', 'trace'))),
+                            ('handlers', BoolArg),
+                            ('max_samples', IntArg),
+                            ('num_report', IntArg)],
+                   synopsis='Record times of graphics frame phases and trigger handlers')
+    register('graphics profile', desc, graphics_profile, logger=logger)
+
     desc = CmdDesc(optional=[('models', TopModelsArg)],
                    synopsis='Report triangles in graphics scene')
     register('graphics triangles', desc, graphics_triangles, logger=logger)
@@ -344,6 +354,62 @@ def register_command(logger):
                    keyword=[('verbose', BoolArg)])
     register('graphics driver', desc, graphics_driver, logger=logger)
     
+def graphics_profile(session, action = 'report', save = None, format = 'json', handlers = True,
+                     max_samples = 1000, num_report = 20):
+    '''
+    Record times of graphics frame phases ('new frame', 'changes', 'graphics update',
+    'draw', 'frame drawn') and of each trigger handler to find what slows rendering.
+
+    Parameters
+    ----------
+    action : "start", "stop" or "report"
+      Start clears prior times and begins recording.  Stop ends recording and
+      report logs the slowest phases and handlers.  Stop also logs the report.
+    save : string
+      File to save results in.
+    format : "json" or "trace"
+      Save statistics and histograms as JSON, or the timed intervals in Chrome trace
+      format that can be viewed with chrome://tracing or https://ui.perfetto.dev.
+    handlers : bool
+      Whether to time every trigger handler call.
+    max_samples : int
+      Number of most recent times kept for each phase or handler for statistics.
+    num_report : int
+      Number of phases and handlers to list in the log report.
+    '''
+    u = session.update_loop
+    prof = u.profiler
+    if action == 'start':
+        from chimerax.core.frame_profiler import FrameProfiler
+        u.profiler = prof = FrameProfiler(max_samples = max_samples, time_handlers = handlers)
+        prof.start()
+        session.logger.info('Started recording graphics frame times')
+    elif prof is None:
+        from chimerax.core.errors import UserError
+        raise UserError('No graphics profile recorded, use "graphics profile start"')
+    elif action == 'stop':
+        prof.stop()
+
+    if action in ('stop', 'report'):
+        _report_profile(session, prof, num_report)
+
+    if save is not None:
+        from os.path import expanduser
+        prof.save(expanduser(save), format = format)
+
+def _report_profile(session, prof, num_report):
+    stats = prof.statistics()
+    from html import escape
+    rows = ['<tr><th>%s</th></tr>' % '</th><th>'.join(('Phase or trigger handler', 'Calls',
+                                                         'Total ms', 'Mean ms', '95% ms', 'Max ms'))]
+    for st in stats[:num_report]:
+        rows.append('<tr><td>%s</td><td>%d</td><td>%.1f</td><td>%.2f</td><td>%.2f</td><td>%.2f</td></tr>'
+                    % (escape(st['name']), st['count'], st['total_ms'], st['mean_ms'],
+                       st['p95_ms'], st['max_ms']))
+    msg = ('Graphics profile of %d frames%s<table border=1 cellpadding=2 cellspacing=0>%s</table>'
+           % (prof.num_frames, ' (recording)' if prof.recording else '', ''.join(rows)))
+    session.logger.info(msg, is_html = True)
+
 def graphics_triangles(session, models = None):
     '''
     Report shown triangles in graphics scene.  This is for analyzing graphics performance.
@@ -397,6 +463,7 @@ class FrameRateReporter:
                                   'new_frame_time': 0,
                                   'atomic_check_for_changes_time': 0,
                                   'drawing_change_time': 0,
+                                  'ribbon_time': 0,
                                   'clip_time': 0}
     def report(self, enable):
         t = self.session.triggers
@@ -443,8 +510,13 @@ class FrameRateReporter:
     def record_times(self):
         u = self.session.update_loop
         ct = self._cumulative_times
+        from chimerax.atomic import structure_graphics_updater
+        gu = structure_graphics_updater(self.session)
         for k in ct.keys():
-            ct[k] += getattr(u, 'last_'+k)
+            if k == 'ribbon_time':
+                ct[k] += gu.last_ribbon_time	# Part of drawing change time
+            else:
+                ct[k] += getattr(u, 'last_'+k)
     
 def graphics_driver(session, verbose = False):
     '''
@@ -173,8 +173,6 @@ def surface(session, atoms = None, enclose = None, include = None,
     threadq.apply_to_list(_calculate_surface, args, nthread)
 #    for s in surfs:
 #        s.calculate_surface_geometry()
-    # TODO: Any Python error in the threaded call causes a crash when it tries
-    #       to write an error message to the log, not in the main thread.
 
     if not resolution is None and resolution > 0 and level is None:
         gsurfs = [s for s in surfs if hasattr(s, 'gaussian_level')]
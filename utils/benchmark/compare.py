@@ -0,0 +1,91 @@
+# vi:set shiftwidth=4 expandtab:
+# Compare two benchmark result files written by run_benchmarks.py.
+#
+#   python compare.py baseline.json current.json [--threshold 0.1]
+#       [--min-time 0.005] [--memory-threshold 0.2]
+#
+# A benchmark is a regression if its median time grew by more than the
+# threshold fraction and by more than min-time seconds, or its peak memory
+# grew by more than the memory threshold fraction.  Exits with status 1 if
+# any benchmark regressed so it can be used in automated builds.
+#
+import json
+import sys
+
+
+def compare(baseline, current, threshold=0.10, min_time=0.005, memory_threshold=0.20):
+    '''
+    Return list of (name, base_median, cur_median, ratio, status) tuples
+    for benchmarks in either result dictionary.  Status is 'ok', 'faster',
+    'slower', 'memory', 'missing' or 'new'.
+    '''
+    bb = baseline['benchmarks']
+    cb = current['benchmarks']
+    rows = []
+    for name in list(bb) + [n for n in cb if n not in bb]:
+        b, c = bb.get(name), cb.get(name)
+        if c is None:
+            rows.append((name, b['median'], None, None, 'missing'))
+            continue
+        if b is None:
+            rows.append((name, None, c['median'], None, 'new'))
+            continue
+        bt, ct = b['median'], c['median']
+        ratio = ct / bt if bt > 0 else float('inf')
+        if ct - bt > min_time and ratio > 1 + threshold:
+            status = 'slower'
+        elif b.get('peak_rss_mb') and \
+                c.get('peak_rss_mb', 0) > b['peak_rss_mb'] * (1 + memory_threshold):
+            status = 'memory'
+        elif bt - ct > min_time and ratio < 1 / (1 + threshold):
+            status = 'faster'
+        else:
+            status = 'ok'
+        rows.append((name, bt, ct, ratio, status))
+    return rows
+
+
+def regressions(rows):
+    return [r for r in rows if r[4] in ('slower', 'memory')]
+
+
+def report(rows, out=sys.stdout):
+    def sec(t):
+        return '%10s' % '-' if t is None else '%10.4f' % t
+    print('%-16s %10s %10s %7s  %s' % ('benchmark', 'baseline', 'current', 'ratio', 'status'),
+          file=out)
+    for name, bt, ct, ratio, status in rows:
+        r = '%7s' % '-' if ratio is None else '%7.2f' % ratio
+        print('%-16s %s %s %s  %s' % (name, sec(bt), sec(ct), r, status.upper()
+                                      if status in ('slower', 'memory') else status),
+              file=out)
+
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(prog='compare.py',
+                                     description='Flag benchmark regressions against a baseline')
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='fractional median time increase counted as a regression')
+    parser.add_argument('--min-time', type=float, default=0.005,
+                        help='smallest time increase in seconds counted as a regression')
+    parser.add_argument('--memory-threshold', type=float, default=0.20,
+                        help='fractional peak memory increase counted as a regression')
+    args = parser.parse_args(argv)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    be, ce = baseline.get('environment', {}), current.get('environment', {})
+    if be.get('hostname') != ce.get('hostname'):
+        print('Warning: results are from different computers, %s and %s'
+              % (be.get('hostname'), ce.get('hostname')), file=sys.stderr)
+    rows = compare(baseline, current, args.threshold, args.min_time, args.memory_threshold)
+    report(rows)
+    return 1 if regressions(rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
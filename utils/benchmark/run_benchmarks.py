@@ -0,0 +1,204 @@
+# vi:set shiftwidth=4 expandtab:
+# Offline benchmarks writing machine readable results.
+#
+#   ChimeraX --nogui --exit --silent --script "utils/benchmark/run_benchmarks.py
+#       [--output results.json] [--repeat N] [--only name,name,...] [--data dir]"
+#
+# Only structures and maps in testdata/ or computed from them (molmap) are
+# used, so no network access is needed.  Each benchmark runs untimed setup
+# commands, then repeats a timed command, with untimed commands before and
+# after each repetition to return to the same starting state.  Results are
+# JSON with all the timings, summary statistics, and process memory use,
+# including the peak resident memory while each benchmark ran.
+# Compare two result files with compare.py.
+#
+import gc
+import json
+import os
+import platform
+import socket
+import statistics
+import sys
+import tempfile
+import time
+
+RESULTS_VERSION = 1
+
+# Each benchmark is (name, setup, before, command, after, cleanup) where
+# command is timed and the others are lists of commands that are not.
+# {data} is replaced by the test data directory and {tmp} by a temporary
+# directory.
+BENCHMARKS = [
+    ('open_pdb', [], [], 'open {data}/3fx2.pdb', ['close'], []),
+    ('open_mmcif', [], [], 'open {data}/1gcf.cif', ['close'], []),
+    ('close', [], ['open {data}/1gcf.cif'], 'close', [], []),
+    ('style_ball', ['open {data}/1gcf.cif'], [], 'style ball', ['style stick'], ['close']),
+    ('cartoon', ['open {data}/1gcf.cif', 'cartoon hide'], [],
+     'cartoon', ['cartoon hide'], ['close']),
+    ('surface', ['open {data}/1gcf.cif'], [], 'surface', ['surface close'], ['close']),
+    ('contour', ['open {data}/1gcf.cif', 'molmap #1 2 gridSpacing 0.5'], ['volume #2 level 0.1'],
+     'volume #2 level 0.05 ; measure area #2', [], ['close']),
+    ('hbonds', ['open {data}/1gcf.cif'], [], 'hbonds #1', ['~hbonds'], ['close']),
+    ('clashes', ['open {data}/1gcf.cif'], [], 'clashes #1', ['~clashes'], ['close']),
+    ('molmap', ['open {data}/1gcf.cif'], [], 'molmap #1 3', ['close #2'], ['close']),
+    ('fitmap', ['open {data}/9rsa.cif', 'molmap #1 4'], ['view initial #1', 'move x 1.5 models #1'],
+     'fitmap #1 inMap #2', [], ['close']),
+    ('session_save', ['open {data}/1gcf.cif', 'cartoon', 'surface'], [],
+     'save {tmp}/benchmark.cxs', [], ['close']),
+    ('session_restore', ['open {data}/1gcf.cif', 'cartoon', 'surface', 'save {tmp}/benchmark.cxs',
+                         'close'], [],
+     'open {tmp}/benchmark.cxs', ['close'], []),
+]
+
+def run_benchmarks(session, names = None, repeat = 5, data_dir = None, log = print):
+    '''Run benchmarks and return results dictionary.'''
+    if data_dir is None:
+        data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'testdata')
+    data_dir = os.path.abspath(data_dir)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        subst = {'data': data_dir.replace('\\', '/'), 'tmp': tmp_dir.replace('\\', '/')}
+        for name, setup, before, command, after, cleanup in BENCHMARKS:
+            if names and name not in names:
+                continue
+            r = _run_benchmark(session, name, setup, before, command, after, cleanup,
+                               repeat, subst)
+            results[name] = r
+            log('%-16s median %.4f s  min %.4f s  max %.4f s  peak RSS %.0f MB'
+                % (name, r['median'], r['min'], r['max'], r['peak_rss_mb']))
+    return results
+
+def _run_benchmark(session, name, setup, before, command, after, cleanup, repeat, subst):
+    from chimerax.core.commands import run
+    def run_all(commands):
+        for c in commands:
+            run(session, c.format(**subst), log = False)
+    run(session, 'close session', log = False)
+    gc.collect()
+    rss_before = current_rss_mb()
+    with PeakRSS() as peak:
+        run_all(setup)
+        cmd = command.format(**subst)
+        times = []
+        for i in range(repeat):
+            run_all(before)
+            gc.collect()
+            t0 = time.perf_counter()
+            run(session, cmd, log = False)
+            times.append(time.perf_counter() - t0)
+            run_all(after)
+        rss_after = current_rss_mb()
+    run_all(cleanup)
+    return {
+        'command': cmd.replace(subst['tmp'], '{tmp}').replace(subst['data'], '{data}'),
+        'times': times,
+        'min': min(times),
+        'median': statistics.median(times),
+        'mean': statistics.mean(times),
+        'stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+        'max': max(times),
+        'rss_before_mb': rss_before,
+        'rss_after_mb': rss_after,
+        'peak_rss_mb': peak.peak_mb,
+    }
+
+def current_rss_mb():
+    import psutil
+    return psutil.Process().memory_info().rss / 2**20
+
+class PeakRSS:
+    '''
+    Highest resident memory of this process while the context is active.
+    The process lifetime peak would report the largest earlier benchmark.
+    On Linux the kernel high water mark is reset on entry, elsewhere
+    memory use is sampled in a thread, which can miss short spikes.
+    '''
+    def __init__(self, interval = 0.005):
+        self.interval = interval
+        self.peak_mb = 0
+        self._thread = None
+
+    def __enter__(self):
+        self.peak_mb = current_rss_mb()
+        if not _reset_linux_peak_rss():
+            import threading
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target = self._sample, daemon = True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._thread is None:
+            self.peak_mb = max(self.peak_mb, _linux_peak_rss_mb())
+        else:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+def _reset_linux_peak_rss():
+    # Writing 5 to clear_refs resets VmHWM (Linux 4.0 and later).
+    if not sys.platform.startswith('linux'):
+        return False
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        return False
+    return _linux_peak_rss_mb() is not None
+
+def _linux_peak_rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 2**10  # Kilobytes
+    return None
+
+def environment():
+    from chimerax.core import buildinfo
+    return {
+        'chimerax_version': buildinfo.version,
+        'build_date': buildinfo.date,
+        'commit': getattr(buildinfo, 'commit', ''),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'hostname': socket.gethostname(),
+    }
+
+def main(session, argv):
+    import argparse
+    parser = argparse.ArgumentParser(prog = 'run_benchmarks.py')
+    parser.add_argument('--output', help = 'JSON results file, default standard output')
+    parser.add_argument('--repeat', type = int, default = 5, help = 'timed repetitions')
+    parser.add_argument('--only', help = 'comma separated benchmark names')
+    parser.add_argument('--data', help = 'test data directory')
+    parser.add_argument('--list', action = 'store_true', help = 'list benchmark names')
+    args = parser.parse_args(argv)
+    if args.list:
+        for b in BENCHMARKS:
+            print(b[0])
+        return
+    names = set(args.only.split(',')) if args.only else None
+    log = (lambda msg: print(msg, file = sys.stderr)) if args.output is None else print
+    results = {
+        'version': RESULTS_VERSION,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'repeat': args.repeat,
+        'environment': environment(),
+        'benchmarks': run_benchmarks(session, names, args.repeat, args.data, log = log),
+    }
+    text = json.dumps(results, indent = 2)
+    if args.output is None:
+        print(text)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(text)
+
+if __name__ == '__main__' or __name__.startswith('ChimeraX_sandbox'):
+    main(session, sys.argv[1:])  # noqa -- session is defined when run by ChimeraX
@@ -0,0 +1,72 @@
+import os
+
+import numpy
+import pytest
+
+from chimerax.core.session import Session
+from chimerax.pdb import open_pdb
+from chimerax.atomic import initialize_atomic
+
+
+def _open_trajectory():
+    session = Session('cx standalone')
+    initialize_atomic(session)
+    pdb_loc = os.path.join(os.path.dirname(__file__), "..", "data", "pdb", "2gbp.pdb")
+    models, status_message = open_pdb(session, pdb_loc)
+    s = models[0]
+    session.models.add([s])
+    xyz = s.atoms.coords
+    rng = numpy.random.default_rng(1)
+    s.add_coordset(2, xyz + rng.normal(scale=0.3, size=xyz.shape))
+    s.add_coordset(3, xyz + rng.normal(scale=0.3, size=xyz.shape))
+    return s
+
+
+def _graphics_state(s):
+    state = {}
+    for name, d in (('atoms', s._atoms_drawing), ('bonds', s._bonds_drawing)):
+        if d is not None:
+            state[name] = d.positions.array().copy()
+    for name, pbg in s.pbg_map.items():
+        d = pbg._pbond_drawing
+        if d is not None:
+            state['pbonds ' + name] = d.positions.array().copy()
+    rd = s._ribbons_drawing
+    if rd is not None and rd.vertices is not None:
+        state['ribbons'] = rd.vertices.copy()
+    return state
+
+
+def _show_chain_trace(s):
+    # Only principal atoms shown, no cartoon, so a chain trace is drawn.
+    s.residues.ribbon_displays = False
+    s.atoms.displays = False
+    s.residues.existing_principal_atoms.displays = True
+
+
+@pytest.mark.parametrize("chain_trace", [False, True])
+def test_playback_matches_normal_update(chain_trace):
+    s = _open_trajectory()
+    if chain_trace:
+        _show_chain_trace(s)
+    s.update_graphics_if_needed()
+    s.fixed_topology_playback = True
+    s.update_graphics_if_needed()
+    if chain_trace:
+        assert 'pbonds chain trace' in _graphics_state(s)
+
+    for cs_id in (2, 3, 1):
+        s.active_coordset_id = cs_id
+        s.update_graphics_if_needed()
+        assert s._playback_graphics is not None
+        fast = _graphics_state(s)
+
+        # Recompute everything through the normal update path.
+        s.fixed_topology_playback = False
+        s.update_graphics_if_needed()
+        normal = _graphics_state(s)
+        s.fixed_topology_playback = True
+
+        assert fast.keys() == normal.keys()
+        for name in fast:
+            assert numpy.allclose(fast[name], normal[name], atol=1e-5), name
@@ -0,0 +1,58 @@
+import os
+
+import numpy
+import pytest
+
+from chimerax.core.session import Session
+from chimerax.pdb import open_pdb
+from chimerax.atomic import initialize_atomic
+from chimerax.atomic.ribbon import RibbonsDrawing
+
+
+def _open_structure():
+    session = Session('cx standalone')
+    initialize_atomic(session)
+    pdb_loc = os.path.join(os.path.dirname(__file__), "..", "data", "pdb", "2gbp.pdb")
+    models, status_message = open_pdb(session, pdb_loc)
+    s = models[0]
+    session.models.add([s])
+    s.residues.ribbon_displays = True
+    return s
+
+
+def _check_matches_rebuild(s, cached):
+    # Update cached ribbons, reusing or patching chains, and compare with
+    # ribbons computed from scratch.
+    cached.compute_ribbons(s)
+    fresh = RibbonsDrawing('fresh', 'fresh')
+    fresh.compute_ribbons(s)
+    assert numpy.array_equal(cached.triangles, fresh.triangles)
+    assert numpy.allclose(cached.vertices, fresh.vertices)
+    assert numpy.allclose(cached.normals, fresh.normals)
+
+
+@pytest.mark.dependency(
+    depends=["tests/pdb/test_open_pdb.py::test_open_pdb"]
+    , scope="session"
+)
+def test_ribbon_reuse_matches_rebuild():
+    s = _open_structure()
+    cached = RibbonsDrawing('cached', 'cached')
+    _check_matches_rebuild(s, cached)
+
+    # Coordinate change patches the moved residues.
+    atoms = s.residues[20:25].atoms
+    atoms.coords = atoms.coords + (0.5, 0, 0)
+    _check_matches_rebuild(s, cached)
+
+    # Smoothing adjustment only sets the ribbon change flag.
+    s.residues.ribbon_adjusts = 0.5
+    _check_matches_rebuild(s, cached)
+
+    # Tube helices and a tube radius change.
+    s.ribbon_mode_helix = s.RIBBON_MODE_ARC
+    _check_matches_rebuild(s, cached)
+    s.ribbon_xs_mgr.set_tube_radius(3.0)
+    _check_matches_rebuild(s, cached)
+    atoms.coords = atoms.coords - (0.5, 0, 0)
+    _check_matches_rebuild(s, cached)
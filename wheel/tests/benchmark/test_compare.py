@@ -0,0 +1,39 @@
+import os
+import sys
+
+import pytest
+
+# The benchmark scripts are not part of a bundle, so import them from the
+# source tree.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "..", "utils", "benchmark"))
+import compare
+
+
+def _results(**medians):
+    return {'benchmarks': {name: {'median': t, 'peak_rss_mb': 100.0}
+                           for name, t in medians.items()}}
+
+
+@pytest.mark.parametrize("base,cur,status", [
+    (1.0, 1.05, 'ok')
+    , (1.0, 1.2, 'slower')
+    , (1.0, 0.8, 'faster')
+    , (0.001, 0.002, 'ok')  # Below minimum time difference
+])
+def test_compare_time(base, cur, status):
+    rows = compare.compare(_results(a=base), _results(a=cur))
+    assert rows[0][4] == status
+
+
+def test_compare_memory():
+    cur = _results(a=1.0)
+    cur['benchmarks']['a']['peak_rss_mb'] = 150.0
+    rows = compare.compare(_results(a=1.0), cur)
+    assert rows[0][4] == 'memory'
+    assert compare.regressions(rows) == rows
+
+
+def test_missing_and_new():
+    rows = compare.compare(_results(a=1.0, b=1.0), _results(b=1.0, c=2.0))
+    assert [(r[0], r[4]) for r in rows] == [('a', 'missing'), ('b', 'ok'), ('c', 'new')]
+    assert compare.regressions(rows) == []
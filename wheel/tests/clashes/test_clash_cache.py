@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from chimerax.core.session import Session
+from chimerax.pdb import open_pdb
+from chimerax.atomic import initialize_atomic
+from chimerax.clashes.clashes import find_clashes, _clash_cache
+
+def _open(session, name):
+    pdb_loc = os.path.join(os.path.dirname(__file__), "..", "data", "pdb", name)
+    models, status_message = open_pdb(session, pdb_loc)
+    session.models.add(models)
+    return models[0]
+
+def _as_pairs(clashes):
+    return {(a.string(), nb.string(), round(d, 4))
+            for a, a_clashes in clashes.items() for nb, d in a_clashes.items()}
+
+def _check_matches_full(session, atoms, **kw):
+    incremental = find_clashes(session, atoms, **kw)
+    _clash_cache(session).clear()
+    full = find_clashes(session, atoms, **kw)
+    assert _as_pairs(incremental) == _as_pairs(full)
+    return full
+
+@pytest.mark.dependency(
+    depends=["tests/pdb/test_open_pdb.py::test_open_pdb"]
+    , scope="session"
+)
+def test_clash_cache_matches_full_recompute():
+    session = Session('cx standalone')
+    initialize_atomic(session)
+    s = _open(session, "2gbp.pdb")
+    atoms = s.atoms
+    find_clashes(session, atoms, res_separation=4)
+
+    # Move some atoms into contact with their neighbors
+    moved = atoms[:50]
+    moved.coords = moved.coords + 1.5
+    _check_matches_full(session, atoms, res_separation=4)
+
+    # Renumber residues, which changes the res_separation test
+    renumbered = s.residues[:20]
+    renumbered.numbers = renumbered.numbers + 10000
+    _check_matches_full(session, atoms, res_separation=4)
+
+@pytest.mark.dependency(
+    depends=["tests/pdb/test_open_pdb.py::test_open_pdb"]
+    , scope="session"
+)
+def test_clash_cache_cleared_on_close():
+    session = Session('cx standalone')
+    initialize_atomic(session)
+    s1 = _open(session, "2gbp.pdb")
+    s2 = _open(session, "1ie9.pdb")
+    find_clashes(session, s1.atoms)
+    assert len(_clash_cache(session)) > 0
+    session.models.close([s1])
+    assert len(_clash_cache(session)) == 0
+    _check_matches_full(session, s2.atoms)
@@ -0,0 +1,86 @@
+import os
+import time
+
+from chimerax.core.fetch_cache import FetchCache
+
+
+def _write(cache_dir, db, name, nbytes):
+    os.makedirs(os.path.join(cache_dir, db), exist_ok=True)
+    with open(os.path.join(cache_dir, db, name), 'wb') as f:
+        f.write(b'x' * nbytes)
+
+
+def test_lru_eviction(tmp_path):
+    cache_dir = str(tmp_path)
+    cache = FetchCache(cache_dir, max_size=250)
+    for name in ('a.cif', 'b.cif'):
+        _write(cache_dir, 'PDB', name, 100)
+        cache.add('PDB', name, 'http://example.org/' + name)
+        time.sleep(0.01)
+    assert cache.lookup('PDB', 'a.cif') is not None  # a is now most recently used
+    time.sleep(0.01)
+    _write(cache_dir, 'PDB', 'c.cif', 100)
+    cache.add('PDB', 'c.cif', 'http://example.org/c.cif')
+    assert cache.lookup('PDB', 'b.cif') is None
+    assert not os.path.exists(os.path.join(cache_dir, 'PDB', 'b.cif'))
+    assert cache.total_size() == 200
+    assert cache.databases() == {'PDB': (2, 200)}
+
+
+def test_index_persists_and_verify(tmp_path):
+    cache_dir = str(tmp_path)
+    cache = FetchCache(cache_dir)
+    _write(cache_dir, 'EMDB', 'emd_1.map', 50)
+    cache.add('EMDB', 'emd_1.map', 'http://example.org/emd_1.map', etag='"abc"')
+    cache.save_index()
+
+    cache = FetchCache(cache_dir)
+    assert cache.entry('EMDB', 'emd_1.map')['etag'] == '"abc"'
+    assert cache.verify() == []
+    _write(cache_dir, 'EMDB', 'emd_1.map', 60)
+    assert cache.verify() == ['EMDB/emd_1.map']
+    assert cache.lookup('EMDB', 'emd_1.map') is None
+
+
+def test_clear_database(tmp_path):
+    cache_dir = str(tmp_path)
+    cache = FetchCache(cache_dir)
+    for db in ('PDB', 'EMDB'):
+        _write(cache_dir, db, 'f', 10)
+        cache.add(db, 'f', 'http://example.org/f')
+    assert cache.clear('PDB') == (1, 10)
+    assert list(cache.databases()) == ['EMDB']
+
+
+def test_unindexed_files_kept(tmp_path):
+    cache_dir = str(tmp_path)
+    _write(cache_dir, 'AlphaFold', 'prediction.pdb', 500)
+    cache = FetchCache(cache_dir, max_size=100)
+    _write(cache_dir, 'PDB', 'a.cif', 50)
+    cache.add('PDB', 'a.cif', 'http://example.org/a.cif')
+    assert cache.databases() == {'PDB': (1, 50)}
+    assert cache.clear() == (1, 50)
+    assert os.path.exists(os.path.join(cache_dir, 'AlphaFold', 'prediction.pdb'))
+
+
+def test_lookup_deleted_file(tmp_path):
+    cache_dir = str(tmp_path)
+    cache = FetchCache(cache_dir)
+    _write(cache_dir, 'PDB', 'a.cif', 50)
+    cache.add('PDB', 'a.cif', 'http://example.org/a.cif')
+    os.remove(os.path.join(cache_dir, 'PDB', 'a.cif'))
+    assert cache.lookup('PDB', 'a.cif') is None
+    assert cache.entry('PDB', 'a.cif') is None
+
+
+def test_index_merged_between_processes(tmp_path):
+    cache_dir = str(tmp_path)
+    cache1 = FetchCache(cache_dir)
+    cache2 = FetchCache(cache_dir)
+    for cache, name in ((cache1, 'a.cif'), (cache2, 'b.cif')):
+        cache.entries()         # Load the index before the other cache writes it.
+        _write(cache_dir, 'PDB', name, 10)
+        cache.add('PDB', name, 'http://example.org/' + name)
+    cache1.save_index()
+    cache2.save_index()
+    assert sorted(p for p, e in FetchCache(cache_dir).entries()) == ['PDB/a.cif', 'PDB/b.cif']
@@ -0,0 +1,27 @@
+import threading
+
+from chimerax.core.threadq import ThreadPool, in_worker_thread
+
+
+def test_nested_map():
+    pool = ThreadPool(4)
+    def inner(i, j):
+        return (i, j, in_worker_thread())
+    def outer(i):
+        # Calls from a worker thread run serially instead of waiting on the pool.
+        return pool.map(inner, [(i, j) for j in range(5)])
+    results = pool.map(outer, [(i,) for i in range(8)])
+    assert [[(i, j) for i, j, w in r] for r in results] == [[(i, j) for j in range(5)] for i in range(8)]
+    assert all(w for r in results for i, j, w in r)
+    pool.shutdown()
+
+
+def test_reuse_after_shutdown():
+    pool = ThreadPool(2)
+    assert pool.map(lambda x: x * x, [(x,) for x in range(10)]) == [x * x for x in range(10)]
+    pool.shutdown()
+    assert pool.max_workers == 2
+    names = pool.map(lambda x: threading.current_thread().name, [(x,) for x in range(4)])
+    assert all(name.startswith('ChimeraX worker') for name in names)
+    assert pool.submit(sum, [1, 2, 3]).result() == 6
+    pool.shutdown()
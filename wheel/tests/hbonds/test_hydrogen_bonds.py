@@ -38,3 +38,35 @@ def test_ligand_hydrogen_bonds():
     session.models.add(models)
     ligand = pdb_model.atoms.filter(pdb_model.atoms.structure_categories == 'ligand')
     assert len(cmd_hbonds(session, ligand)) == 11
+
+@pytest.mark.dependency(
+    depends=["tests/pdb/test_open_pdb.py::test_open_pdb"]
+    , scope="session"
+)
+def test_interleaved_coordset_hydrogen_bonds():
+    from chimerax.hbonds import find_coordset_hbonds, iter_coordset_hbonds
+    session = Session('cx standalone')
+    initialize_atomic(session)
+    _DistMonitorBundleAPI.initialize(session)
+    pdb_loc = os.path.join(os.path.dirname(__file__), "..", "data", "pdb", "2gbp.pdb")
+    models, status_message = open_pdb(session, pdb_loc)
+    s = models[0]
+    session.models.add(models)
+    xyz = s.atoms.coords
+    s.add_coordset(2, xyz * 1.02)
+    s.add_coordset(3, xyz)
+    expected = [len(hbonds) for hbonds in find_coordset_hbonds(session, s)]
+
+    # Other H-bond searches between coordsets must not disturb the iteration
+    counts = []
+    for cs_id, hbonds in iter_coordset_hbonds(session, s):
+        counts.append(len(hbonds))
+        find_hbonds(session, [s])
+        assert s.active_coordset_change_notify
+    assert counts == expected
+
+    # An abandoned generator leaves the structure as it was
+    cs_id = s.active_coordset_id
+    next(iter_coordset_hbonds(session, s))
+    assert s.active_coordset_change_notify
+    assert s.active_coordset_id == cs_id
@@ -0,0 +1,79 @@
+from chimerax.map_data.datacache import Data_Cache
+
+def _array(n):
+    from numpy import zeros, uint8
+    return zeros((n,), uint8)
+
+def test_least_recently_used_evicted_first():
+    dc = Data_Cache(300)
+    dc.cache_data('a', _array(100), 100, 'a')
+    dc.cache_data('b', _array(100), 100, 'b')
+    dc.cache_data('c', _array(100), 100, 'c')
+    assert dc.lookup_data('a') is not None
+    dc.cache_data('d', _array(100), 100, 'd')
+    assert set(dc.data) == {'a', 'c', 'd'}
+    assert dc.evictions == 1
+    assert dc.used == 300
+
+def test_held_entry_promoted_on_access():
+    dc = Data_Cache(200)
+    held = _array(100)
+    dc.cache_data('a', held, 100, 'a')
+    dc.cache_data('b', _array(100), 100, 'b')
+    dc.cache_data('c', _array(100), 100, 'c')
+    # 'a' is still in use so 'b' is evicted and 'a' is set aside.
+    assert set(dc.data) == {'a', 'c'}
+    assert dc.statistics()['held'] == 1
+    assert dc.lookup_data('a') is held
+    assert dc.statistics()['held'] == 0
+    # Accessing 'a' made it most recent, so 'c' goes next.
+    dc.cache_data('d', _array(100), 100, 'd')
+    assert set(dc.data) == {'a', 'd'}
+
+def test_released_held_entry_evicted():
+    dc = Data_Cache(200)
+    held = _array(100)
+    dc.cache_data('a', held, 100, 'a')
+    dc.cache_data('b', _array(100), 100, 'b')
+    dc.cache_data('c', _array(100), 100, 'c')
+    assert 'a' in dc._held
+    del held
+    dc.resize(0)
+    assert len(dc.data) == 0
+    assert dc.used == 0
+
+def test_hit_miss_counts():
+    dc = Data_Cache(1000)
+    dc.cache_data('a', _array(10), 10, 'a')
+    dc.lookup_data('a')
+    dc.lookup_data('a')
+    dc.lookup_data('x')
+    dc.lookup_data('y', count_miss = False)
+    s = dc.statistics()
+    assert (s['hits'], s['misses']) == (2, 1)
+    assert abs(s['hit_rate'] - 2/3) < 1e-6
+    dc.reset_statistics()
+    s = dc.statistics()
+    assert (s['hits'], s['misses'], s['evictions']) == (0, 0, 0)
+
+def test_group_bytes():
+    dc = Data_Cache(1000)
+    dc.cache_data('a', _array(100), 100, 'a', groups = ['g1'])
+    dc.cache_data('b', _array(50), 50, 'b', groups = ['g1'])
+    dc.cache_data('c', _array(200), 200, 'c', groups = ['g2'])
+    assert dc.statistics()['group_used'] == {'g1': 150, 'g2': 200}
+    dc.remove_key('a')
+    assert dc.statistics()['group_used'] == {'g1': 50, 'g2': 200}
+    dc.remove_key('b')
+    assert dc.statistics()['group_used'] == {'g2': 200}
+
+def test_mapped_data_counted_separately():
+    dc = Data_Cache(150)
+    dc.cache_data('m', _array(1000), 1000, 'm', groups = ['g'], mapped = True)
+    dc.cache_data('a', _array(100), 100, 'a', groups = ['g'])
+    s = dc.statistics()
+    assert (s['used'], s['mapped']) == (100, 1000)
+    assert s['group_used'] == {'g': 100}
+    assert set(dc.data) == {'m', 'a'}
+    dc.remove_key('m')
+    assert dc.statistics()['mapped'] == 0
@@ -0,0 +1,42 @@
+import os
+
+import numpy
+
+from chimerax.map_data import ArrayGridData, open_file
+from chimerax.map_data import multires
+from chimerax.map_data.mrc.writemrc import write_mrc2000_grid_data
+
+def _mrc_map(tmp_path):
+    z, y, x = numpy.mgrid[0:20, 0:18, 0:16]
+    values = (x + 100*y + 10000*z).astype(numpy.float32)
+    path = str(tmp_path / 'map.mrc')
+    write_mrc2000_grid_data(ArrayGridData(values), path)
+    return open_file(path)[0], values
+
+def test_multiresolution_cache_round_trip(tmp_path):
+    g, values = _mrc_map(tmp_path)
+    assert g.file_type in multires.threaded_formats
+    path = str(tmp_path / 'map.mrc.cxmr')
+    mrc = multires.write_multiresolution_cache(g, path, steps = [(2,2,2), (4,4,4)])
+    assert mrc.steps == [(2,2,2), (4,4,4)]
+
+    mrc = multires.open_multiresolution_cache(g, [path])
+    assert mrc is not None
+    for origin, size, step in (((0,0,0), g.size, (2,2,2)),
+                               ((0,0,0), g.size, (4,4,4)),
+                               ((4,2,8), (8,10,8), (4,2,2)),
+                               ((2,4,6), (9,7,5), (2,2,2))):
+        m = mrc.read_matrix(origin, size, step)
+        (io,jo,ko), (isz,jsz,ksz), (ist,jst,kst) = origin, size, step
+        assert (m == values[ko:ko+ksz:kst, jo:jo+jsz:jst, io:io+isz:ist]).all()
+    # Steps that are not a multiple of a cached level are not handled.
+    assert mrc.read_matrix((0,0,0), g.size, (3,3,3)) is None
+    assert mrc.read_matrix((1,0,0), g.size, (2,2,2)) is None
+
+def test_multiresolution_cache_invalid_after_map_change(tmp_path):
+    g, values = _mrc_map(tmp_path)
+    path = str(tmp_path / 'map.mrc.cxmr')
+    multires.write_multiresolution_cache(g, path, steps = [(2,2,2)])
+    st = os.stat(g.path)
+    os.utime(g.path, (st.st_atime, st.st_mtime + 10))
+    assert multires.open_multiresolution_cache(g, [path]) is None
@@ -0,0 +1,80 @@
+import numpy
+import pytest
+
+from chimerax.map_data import readarray
+from chimerax.map_data.readarray import read_array, is_mapped_array
+
+def _write_values(path, shape = (6,5,4), offset = 16):
+    values = numpy.arange(numpy.prod(shape), dtype = numpy.float32).reshape(shape)
+    with open(path, 'wb') as f:
+        f.write(b'\0' * offset)
+        f.write(values.tobytes())
+    return values
+
+def _read(path, origin = (0,0,0), size = (4,5,6), step = (1,1,1)):
+    return read_array(str(path), 16, origin, size, step, (4,5,6),
+                      numpy.float32, False)
+
+@pytest.mark.skipif(not readarray.use_memory_map, reason = 'memory mapping not used')
+def test_mapped_views_are_read_only(tmp_path):
+    path = tmp_path / 'map.raw'
+    values = _write_values(path)
+    v1 = _read(path)
+    v2 = _read(path, (1,1,1), (2,3,4), (1,2,1))
+    assert is_mapped_array(v1) and is_mapped_array(v2)
+    with pytest.raises(ValueError):
+        v1[0,0,0] = -1
+    assert (v1 == values).all()
+    assert (v2 == values[1:5,1:4:2,1:3]).all()
+
+def test_copy_edit_does_not_change_file_or_views(tmp_path):
+    path = tmp_path / 'map.raw'
+    values = _write_values(path)
+    file_bytes = path.read_bytes()
+    v1 = _read(path)
+    v2 = _read(path)
+    c = v1.copy()
+    c[:] = -1
+    assert not is_mapped_array(c)
+    assert (v1 == values).all()
+    assert (v2 == values).all()
+    assert (_read(path) == values).all()
+    assert path.read_bytes() == file_bytes
+
+def test_unmapped_subregion_read(tmp_path, monkeypatch):
+    monkeypatch.setattr(readarray, 'use_memory_map', False)
+    path = tmp_path / 'map.raw'
+    values = _write_values(path)
+    # Narrow subregion reads part of each row, wide one reads whole rows.
+    for origin, size, step in (((1,0,2), (1,5,3), (1,2,1)),
+                               ((0,1,0), (4,3,6), (1,1,2)),
+                               ((1,1,1), (3,4,5), (2,2,2))):
+        m = _read(path, origin, size, step)
+        (io,jo,ko), (isz,jsz,ksz), (ist,jst,kst) = origin, size, step
+        assert (m == values[ko:ko+ksz:kst, jo:jo+jsz:jst, io:io+isz:ist]).all()
+        assert m.flags.writeable
+
+def test_writable_copy_edit_does_not_change_file(tmp_path):
+    from chimerax.core.session import Session
+    from chimerax.map_data import ArrayGridData, open_file
+    from chimerax.map_data.mrc.writemrc import write_mrc2000_grid_data
+    from chimerax.map import volume_from_grid_data
+    session = Session('cx standalone')
+    values = numpy.arange(6*5*4, dtype = numpy.float32).reshape((6,5,4))
+    path = str(tmp_path / 'map.mrc')
+    write_mrc2000_grid_data(ArrayGridData(values), path)
+    with open(path, 'rb') as f:
+        file_bytes = f.read()
+
+    v = volume_from_grid_data(open_file(path)[0], session, show_dialog = False)
+    other = open_file(path)[0].full_matrix()
+    vc = v.writable_copy()
+    assert vc is not v
+    m = vc.full_matrix()
+    m[:] = -1
+    vc.data.values_changed()
+    assert (v.full_matrix() == values).all()
+    assert (other == values).all()
+    assert (open_file(path)[0].full_matrix() == values).all()
+    with open(path, 'rb') as f:
+        assert f.read() == file_bytes
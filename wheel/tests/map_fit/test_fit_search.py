@@ -0,0 +1,36 @@
+import numpy
+
+from chimerax.core.session import Session
+
+
+def _two_blob_map(session):
+    from chimerax.map_data import ArrayGridData
+    from chimerax.map import volume_from_grid_data
+    from chimerax.geometry import Places, identity, rotation
+    z, y, x = numpy.mgrid[0:24, 0:24, 0:24].astype(numpy.float32)
+    a = (numpy.exp(-((x - 7)**2 + (y - 12)**2 + (z - 12)**2) / 8)
+         + numpy.exp(-((x - 16)**2 + (y - 12)**2 + (z - 12)**2) / 8))
+    # Two-fold symmetry exchanging the blobs so symmetric fits get reoptimized.
+    sym = Places([identity(), rotation((0, 0, 1), 180, center=(11.5, 11.5, 11.5))])
+    g = ArrayGridData(a.astype(numpy.float32), symmetries=sym, name='blobs')
+    v = volume_from_grid_data(g, session, style='surface', show_dialog=False)
+    v.set_parameters(surface_levels=[0.5])
+    return v
+
+
+def test_threaded_search_matches_serial():
+    session = Session('cx standalone')
+    v = _two_blob_map(session)
+    z, y, x = numpy.mgrid[-2:3, -2:3, -2:3]
+    points = numpy.stack((x.ravel(), y.ravel(), z.ravel()), axis=1).astype(numpy.float32)
+    points += (7, 12, 12)
+    from chimerax.map_fit.search import fit_search
+    results = []
+    for threads in (1, 4):
+        fits, outside = fit_search([], points, None, v, 20, seed=5, threads=threads)
+        results.append((outside, [(f.hits(), f.ptf.matrix) for f in fits]))
+    (out1, fits1), (out4, fits4) = results
+    assert out1 == out4
+    assert [h for h, m in fits1] == [h for h, m in fits4]
+    for (h1, m1), (h4, m4) in zip(fits1, fits4):
+        assert numpy.allclose(m1, m4)
@@ -0,0 +1,54 @@
+import numpy
+
+from chimerax.md_crds.trajectory import DCDCoordsetSource
+
+
+class _Structure:
+    # The coordinate set methods of a Structure used by DCDCoordsetSource.
+    def __init__(self):
+        self.coordsets = {}
+        self.active_coordset_id = None
+
+    @property
+    def coordset_ids(self):
+        return numpy.array(sorted(self.coordsets), numpy.int32)
+
+    def add_coordset(self, cs_id, coords):
+        self.coordsets[cs_id] = coords
+
+    def delete_coordset(self, cs_id):
+        del self.coordsets[cs_id]
+
+
+def _frames(n, natoms=3):
+    return [numpy.full((natoms, 3), i, numpy.float32) for i in range(n)]
+
+
+def test_load_coordset():
+    s = _Structure()
+    src = DCDCoordsetSource(s, _frames(10), range(0, 10, 2), base_id=1)
+    assert list(src.coordset_ids) == [1, 2, 3, 4, 5]
+    src.load_coordset(3)
+    assert list(s.coordset_ids) == [3]
+    assert (s.coordsets[3] == 4).all()     # Third coordset is frame 4 with step 2
+    assert s.coordsets[3].dtype == numpy.float64
+    src.load_coordset(3)
+    assert src.frames_read == 1
+    src.load_coordset(6)                     # Out of range is ignored
+    assert list(s.coordset_ids) == [3]
+
+
+def test_trim_keeps_active_frame():
+    s = _Structure()
+    src = DCDCoordsetSource(s, _frames(10), range(10), base_id=1, max_frames=2)
+    src.load_coordset(1)
+    s.active_coordset_id = 1
+    for cs_id in (2, 3, 4):
+        src.load_coordset(cs_id)
+    # Least recently used frames are removed, except the active one.
+    assert list(s.coordset_ids) == [1, 4]
+    src.load_coordset(1)
+    src.load_coordset(5)
+    s.active_coordset_id = 5
+    src.load_coordset(6)
+    assert list(s.coordset_ids) == [5, 6]